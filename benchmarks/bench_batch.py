@@ -0,0 +1,46 @@
+"""
+Пропускная способность пакетной конвертации (main.py convert) в зависимости от числа процессов.
+
+    python -m benchmarks.bench_batch [число файлов] [фигур в файле]
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.common import ensure_app, print_table, make_shapes
+
+DEFAULT_FILES = 48
+DEFAULT_SHAPES = 2000
+
+
+def main(files, shapes):
+    ensure_app()
+    from src.logic import batch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for i in range(files):
+            path = os.path.join(tmp, f"project{i}.json")
+            with open(path, "w") as f:
+                json.dump({"version": "1.1", "scene": {"width": 5000, "height": 5000},
+                           "shapes": make_shapes(shapes, seed=i)}, f)
+            sources.append(path)
+
+        cores = os.cpu_count() or 1
+        rows = []
+        for fmt in ("png", "vec"):
+            for jobs in sorted({1, min(4, cores), cores}):
+                stream = io.StringIO()
+                batch.run(sources, os.path.join(tmp, f"out-{fmt}-{jobs}"), fmt, jobs, scale=0.2, stream=stream)
+                summary = json.loads(stream.getvalue().splitlines()[-1])["summary"]
+                rows.append([fmt, jobs, f"{summary['seconds']:.2f} s",
+                             f"{summary['files_per_second']:.1f}", f"{summary['shapes_per_second']:,}"])
+
+    print_table(["format", "jobs", "total", "files/s", "shapes/s"], rows)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [DEFAULT_FILES, DEFAULT_SHAPES][len(args):]))
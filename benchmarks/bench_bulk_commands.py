@@ -0,0 +1,82 @@
+"""
+Удаление и смена толщины у всего выделения: одна пакетная команда
+против макроса из команды на каждую фигуру (как было раньше).
+Панель свойств подключена, как в приложении: она слушает selectionChanged.
+
+    python -m benchmarks.bench_bulk_commands [размеры...]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SIZES = [10_000, 100_000]
+
+
+def _timed(app, action) -> float:
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+
+    # Между действиями пользователя цикл событий успевает отработать (полировка новых объектов)
+    app.processEvents()
+    return elapsed
+
+
+def measure(mode, count):
+    app = ensure_app()
+    import src.widgets.canvas as canvas_module
+    from src.logic.commands import (
+        DeleteCommand, ChangeWidthCommand, BulkDeleteCommand, BulkChangeWidthCommand
+    )
+    from src.logic.document import ShapeDocument
+    from src.widgets.properties import PropertiesPanel
+
+    canvas_module.BULK_LAYER_THRESHOLD = float("inf")
+
+    canvas = canvas_module.EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(make_shapes(count)))
+    PropertiesPanel(canvas.scene, canvas.undo_stack)
+    app.processEvents()
+
+    scene = canvas.scene
+    stack = canvas.undo_stack
+    items = scene.items()
+
+    scene.blockSignals(True)
+    for item in items:
+        item.setSelected(True)
+    scene.blockSignals(False)
+
+    def push_macro(name, commands):
+        stack.beginMacro(name)
+        for command in commands:
+            stack.push(command)
+        stack.endMacro()
+
+    if mode == "bulk":
+        restroke = lambda: stack.push(BulkChangeWidthCommand(items, 5))
+        delete = lambda: stack.push(BulkDeleteCommand(scene, items))
+    else:
+        restroke = lambda: push_macro("Change Width All", (ChangeWidthCommand(item, 5) for item in items))
+        delete = lambda: push_macro("Delete Selection", (DeleteCommand(scene, item) for item in items))
+
+    width = _timed(app, restroke), _timed(app, stack.undo), _timed(app, stack.redo)
+    removal = _timed(app, delete), _timed(app, stack.undo), _timed(app, stack.redo)
+    return width, removal
+
+
+def main(sizes):
+    rows = []
+    for count in sizes:
+        for mode in ("bulk", "macro"):
+            width, removal = run_isolated(measure, mode, count)
+            for name, (do, undo, redo) in (("width", width), ("delete", removal)):
+                rows.append([f"{count:,}", mode, name,
+                             f"{do * 1000:.0f} ms", f"{undo * 1000:.0f} ms", f"{redo * 1000:.0f} ms"])
+
+    print_table(["shapes", "commands", "action", "do", "undo", "redo"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
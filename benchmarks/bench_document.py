@@ -0,0 +1,48 @@
+"""
+Сравнение колоночного документа и Qt-объектов: время построения и память.
+
+    python -m benchmarks.bench_document [размеры...]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, rss_bytes, run_isolated, print_table, make_shapes
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def measure(mode, count):
+    ensure_app()
+    from src.logic.document import ShapeDocument
+    from src.logic.factory import ShapeFactory
+
+    shapes = make_shapes(count)
+    before = rss_bytes()
+    start = time.perf_counter()
+
+    document = ShapeDocument.from_dicts(shapes)
+    if mode == "qt items":
+        children = document.children_map()
+        items = [ShapeFactory.from_document(document, ref, children) for ref in document.roots(children)]
+
+    elapsed = time.perf_counter() - start
+    used = rss_bytes() - before
+
+    return elapsed, used
+
+
+def main(sizes):
+    rows = []
+    for count in sizes:
+        for mode in ("document", "qt items"):
+            elapsed, used = run_isolated(measure, mode, count)
+            rows.append([
+                mode, f"{count:,}", f"{elapsed:.2f} s",
+                f"{used / 2 ** 20:.1f} MiB", f"{used / count:.0f} B"
+            ])
+
+    print_table(["mode", "shapes", "build", "memory", "per shape"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
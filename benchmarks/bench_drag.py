@@ -0,0 +1,124 @@
+"""
+Перетаскивание большого выделения: все фигуры документа выделены и тащатся мышью
+(нажатие, DRAG_MOVES движений с кадром после каждого, отпускание, отмена).
+Первое движение считается вместе с нажатием: с него начинается перетаскивание. Сравниваются:
+    legacy   - как было раньше: Qt двигает каждый объект на каждое движение,
+               на отпускании макрос из MoveCommand на каждый объект
+    snapshot - SelectionTool: движется снимок выделения, объекты - один раз на отпускании
+
+    python -m benchmarks.bench_drag [число фигур]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SHAPES = 20000
+DRAG_MOVES = 30
+
+
+def legacy_tool_class():
+    from src.logic.commands import MoveCommand
+    from src.logic.tools import Tool
+
+    class LegacySelectionTool(Tool):
+        def __init__(self, view, undo_stack):
+            super().__init__(view)
+            self.undo_stack = undo_stack
+            self.item_positions = {}
+
+        def mouse_press(self, event):
+            super(type(self.view), self.view).mousePressEvent(event)
+            self.item_positions = {item: item.pos() for item in self.scene.selectedItems()}
+
+        def mouse_move(self, event):
+            super(type(self.view), self.view).mouseMoveEvent(event)
+
+        def mouse_release(self, event):
+            super(type(self.view), self.view).mouseReleaseEvent(event)
+            moved = [(item, old, item.pos()) for item, old in self.item_positions.items() if item.pos() != old]
+            if moved:
+                self.undo_stack.beginMacro("Move Items")
+                for item, old, new in moved:
+                    self.undo_stack.push(MoveCommand(item, old, new))
+                self.undo_stack.endMacro()
+            self.item_positions = {}
+
+    return LegacySelectionTool
+
+
+def measure(mode, count):
+    app = ensure_app()
+    from PySide6.QtCore import Qt, QPointF, QEvent
+    from PySide6.QtGui import QMouseEvent
+    import src.widgets.canvas as canvas_module
+    from src.constants import TYPE_SELECT
+    from src.logic.document import ShapeDocument
+
+    canvas_module.BULK_LAYER_THRESHOLD = float("inf")
+
+    canvas = canvas_module.EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(make_shapes(count, extent=700)))
+    canvas.resize(900, 700)
+    if mode == "legacy":
+        canvas.tools[TYPE_SELECT] = legacy_tool_class()(canvas, canvas.undo_stack)
+        canvas.set_tool(TYPE_SELECT)
+    canvas.show()
+    app.processEvents()
+
+    for item in canvas.scene.items():
+        item.setSelected(True)
+    app.processEvents()
+
+    viewport = canvas.viewport()
+    grab = canvas.mapFromScene(canvas.scene.items()[0].sceneBoundingRect().center())
+
+    def send(kind, dx, dy):
+        point = QPointF(grab.x() + dx, grab.y() + dy)
+        buttons = Qt.NoButton if kind == QEvent.Type.MouseButtonRelease else Qt.LeftButton
+        button = Qt.NoButton if kind == QEvent.Type.MouseMove else Qt.LeftButton
+        canvas.viewportEvent(QMouseEvent(kind, point, point, button, buttons, Qt.NoModifier))
+
+    start = time.perf_counter()
+    send(QEvent.Type.MouseButtonPress, 0, 0)
+    press_time = time.perf_counter() - start
+
+    # Первое движение начинает перетаскивание (снимок выделения) - отдельно от остальных
+    start = time.perf_counter()
+    send(QEvent.Type.MouseMove, 3, 2)
+    viewport.repaint()
+    first_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for step in range(2, DRAG_MOVES + 1):
+        send(QEvent.Type.MouseMove, step * 3, step * 2)
+        viewport.repaint()
+    move_time = (time.perf_counter() - start) / (DRAG_MOVES - 1)
+
+    start = time.perf_counter()
+    send(QEvent.Type.MouseButtonRelease, DRAG_MOVES * 3, DRAG_MOVES * 2)
+    viewport.repaint()
+    release_time = time.perf_counter() - start
+
+    stack = canvas.undo_stack
+    start = time.perf_counter()
+    stack.undo()
+    undo_time = time.perf_counter() - start
+
+    moved = stack.command(0)
+    entries = max(1, moved.childCount())
+    return press_time + first_time, move_time, release_time, undo_time, entries
+
+
+def main(count):
+    rows = []
+    for mode in ("legacy", "snapshot"):
+        start, move, release, undo, entries = run_isolated(measure, mode, count)
+        rows.append([mode, f"{start * 1000:.0f} ms", f"{move * 1000:.1f} ms", f"{release * 1000:.0f} ms",
+                     f"{undo * 1000:.0f} ms", entries])
+
+    print_table(["tool", "press + 1st move", "move + frame", "release", "undo", "commands"], rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SHAPES)
@@ -0,0 +1,176 @@
+"""
+Задержка от ввода до кадра (input-to-photon) при рисовании прямоугольника.
+Записанная трасса - нажатие, TRACE_MOVES движений мыши с частотой MOUSE_HZ, отпускание -
+проигрывается из отдельного потока через postEvent, как приходил бы настоящий ввод,
+пока поток GUI перерисовывает холст с фоновыми фигурами.
+
+Для каждого движения задержка - от отправки события до конца первого кадра, на котором
+видно это положение или более новое. Сравниваются:
+    overlay - CreationTool: предпросмотр в оверлее, движения схлопываются до кадра экрана
+    legacy  - как было раньше: временная фигура на сцене, путь на каждое движение,
+              на отпускании вторая фигура через ShapeFactory
+
+Кроме задержки считаются перестроения пути фигуры и кадры за трассу.
+
+    python -m benchmarks.bench_drawing_latency [число фоновых фигур]
+"""
+import sys
+import threading
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+MOUSE_HZ = 500
+TRACE_MOVES = 500
+DEFAULT_SHAPES = 3000
+VIEW_SIZE = (1000, 800)
+
+
+def make_trace():
+    """[(время от начала, тип, x, y)] в координатах окна"""
+    from PySide6.QtCore import QEvent
+
+    trace = [(0.0, QEvent.Type.MouseButtonPress, 100, 100)]
+    for i in range(1, TRACE_MOVES + 1):
+        trace.append((i / MOUSE_HZ, QEvent.Type.MouseMove, 100 + i, 100 + i // 2))
+    trace.append(((TRACE_MOVES + 1) / MOUSE_HZ, QEvent.Type.MouseButtonRelease, 100 + TRACE_MOVES, 100 + TRACE_MOVES // 2))
+    return trace
+
+
+def legacy_tool_class():
+    from PySide6.QtCore import Qt
+    from PySide6.QtWidgets import QGraphicsView
+    from src.constants import DEFAULT_COLOR
+    from src.logic.commands import AddShapeCommand
+    from src.logic.factory import ShapeFactory
+    from src.logic.tools import Tool
+
+    class LegacyCreationTool(Tool):
+        def __init__(self, view, shape_type, undo_stack):
+            super().__init__(view)
+            self.shape_type = shape_type
+            self.undo_stack = undo_stack
+            self.start_pos = None
+            self.temp_shape = None
+
+        def mouse_press(self, event):
+            self.start_pos = self.view.mapToScene(event.pos())
+            self.temp_shape = ShapeFactory.create_shape(self.shape_type, self.start_pos, self.start_pos, DEFAULT_COLOR)
+            self.scene.addItem(self.temp_shape)
+
+        def mouse_move(self, event):
+            if self.temp_shape and event.buttons() & Qt.LeftButton:
+                self.temp_shape.set_geometry(self.start_pos, self.view.mapToScene(event.pos()))
+            else:
+                QGraphicsView.mouseMoveEvent(self.view, event)
+
+        def mouse_release(self, event):
+            self.scene.removeItem(self.temp_shape)
+            self.temp_shape = None
+            shape = ShapeFactory.create_shape(self.shape_type, self.start_pos,
+                                              self.view.mapToScene(event.pos()), DEFAULT_COLOR)
+            self.undo_stack.push(AddShapeCommand(self.scene, shape))
+
+    return LegacyCreationTool
+
+
+def measure(mode, count):
+    app = ensure_app()
+    from PySide6.QtCore import Qt, QPointF, QEvent, QEventLoop
+    from PySide6.QtGui import QMouseEvent
+    from PySide6.QtWidgets import QApplication
+    from src.constants import TYPE_RECT
+    from src.logic.Rectangle import Rectangle
+    from src.logic.document import ShapeDocument
+    from src.widgets.canvas import EditorCanvas
+
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(make_shapes(count, extent=900)))
+    canvas.scene.setSceneRect(0, 0, *VIEW_SIZE)
+    canvas.resize(*VIEW_SIZE)
+    canvas.scene.item_cache.set_enabled(False)
+    if mode == "legacy":
+        canvas.tools[TYPE_RECT] = legacy_tool_class()(canvas, TYPE_RECT, canvas.undo_stack)
+    canvas.set_tool(TYPE_RECT)
+    canvas.show()
+    app.processEvents()
+
+    trace = make_trace()
+    viewport = canvas.viewport()
+
+    # Какое событие трассы сейчас показывает фигура: по правому нижнему углу
+    corner_to_event = {}
+    for index, (_, kind, x, y) in enumerate(trace):
+        point = canvas.mapToScene(x, y)
+        corner_to_event[(round(point.x(), 3), round(point.y(), 3))] = index
+
+    shown = [-1]
+    rebuilds = [0]
+    original_set_geometry = Rectangle.set_geometry
+
+    def set_geometry(shape, start, end):
+        original_set_geometry(shape, start, end)
+        rebuilds[0] += 1
+        shown[0] = corner_to_event.get((round(end.x(), 3), round(end.y(), 3)), shown[0])
+
+    Rectangle.set_geometry = set_geometry
+
+    frames = []  # (конец кадра, последнее показанное событие)
+    original_paint = type(canvas).paintEvent
+
+    def paint_event(view, event):
+        original_paint(view, event)
+        frames.append((time.perf_counter(), shown[0]))
+
+    type(canvas).paintEvent = paint_event
+
+    posted = [0.0] * len(trace)
+    done = threading.Event()
+
+    def replay():
+        start = time.perf_counter()
+        for index, (offset, kind, x, y) in enumerate(trace):
+            while time.perf_counter() - start < offset:
+                time.sleep(0)
+            buttons = Qt.NoButton if kind == QEvent.Type.MouseButtonRelease else Qt.LeftButton
+            button = Qt.NoButton if kind == QEvent.Type.MouseMove else Qt.LeftButton
+            posted[index] = time.perf_counter()
+            QApplication.postEvent(viewport, QMouseEvent(kind, QPointF(x, y), QPointF(x, y),
+                                                         button, buttons, Qt.NoModifier))
+        done.set()
+
+    thread = threading.Thread(target=replay)
+    thread.start()
+    while not done.is_set():
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 5)
+    thread.join()
+    deadline = time.perf_counter() + 0.5
+    while time.perf_counter() < deadline:
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 5)
+
+    latencies = []
+    frame = 0
+    for index in range(1, TRACE_MOVES + 1):
+        while frame < len(frames) and (frames[frame][1] < index or frames[frame][0] < posted[index]):
+            frame += 1
+        if frame == len(frames):
+            break
+        latencies.append(frames[frame][0] - posted[index])
+
+    latencies.sort()
+    return (sum(latencies) / len(latencies), latencies[len(latencies) // 2],
+            latencies[int(len(latencies) * 0.95)], latencies[-1], rebuilds[0], len(frames))
+
+
+def main(count):
+    rows = []
+    for mode in ("legacy", "overlay"):
+        mean, p50, p95, worst, rebuilds, frames = run_isolated(measure, mode, count)
+        rows.append([mode, f"{mean * 1000:.1f} ms", f"{p50 * 1000:.1f} ms", f"{p95 * 1000:.1f} ms",
+                     f"{worst * 1000:.1f} ms", rebuilds, frames])
+
+    print_table(["tool", "mean", "p50", "p95", "max", "path rebuilds", "frames"], rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SHAPES)
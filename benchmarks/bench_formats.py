@@ -0,0 +1,52 @@
+"""
+Сохранение и загрузка проекта: JSON (JsonSaveStrategy) против бинарного .vec (VecSaveStrategy).
+
+    python -m benchmarks.bench_formats [размеры...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import ensure_app, print_table, make_shapes
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+
+
+def main(sizes):
+    ensure_app()
+    from src.logic.document import ShapeDocument
+    from src.logic.io_manager import FileManager
+    from src.logic.strategies import JsonSaveStrategy, VecSaveStrategy
+    from src.widgets.canvas import EditorScene
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            scene = EditorScene(ShapeDocument.from_dicts(make_shapes(count)))
+            scene.setSceneRect(0, 0, 5000, 5000)
+
+            results = {}
+            for name, strategy in (("json", JsonSaveStrategy()), ("vec", VecSaveStrategy())):
+                path = os.path.join(tmp, f"project.{name}")
+
+                start = time.perf_counter()
+                strategy.save(path, scene)
+                save = time.perf_counter() - start
+
+                start = time.perf_counter()
+                FileManager.load_document(path)
+                load = time.perf_counter() - start
+
+                results[name] = (save, load)
+                rows.append([name, f"{count:,}", f"{os.path.getsize(path) / 2 ** 20:.1f} MiB",
+                             f"{save:.3f} s", f"{load:.3f} s"])
+
+            (json_save, json_load), (vec_save, vec_load) = results["json"], results["vec"]
+            rows.append(["speedup", "", "", f"x{json_save / vec_save:.0f}", f"x{json_load / vec_load:.0f}"])
+
+    print_table(["format", "shapes", "size", "save", "load"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
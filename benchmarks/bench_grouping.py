@@ -0,0 +1,93 @@
+"""
+Масштабирование группировки: все фигуры сцены в одну группу и обратно.
+    bulk   - GroupCommand/UngroupCommand (один проход, одна запись в истории)
+    legacy - как было раньше: addToGroup по одной в порядке selectedItems(),
+             разгруппировка через destroyItemGroup (квадратичная из-за removeFromGroup)
+Для bulk также замеряются отмена/повтор и построение группы из документа (загрузка файла).
+
+    python -m benchmarks.bench_grouping [размеры...]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SIZES = [5_000, 20_000, 50_000]
+
+# Старая разгруппировка 50k фигур идет минуты, поэтому выше этого размера не замеряется
+LEGACY_MAX = 20_000
+
+
+def _timed(app, action) -> float:
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    app.processEvents()
+    return elapsed
+
+
+def measure(mode, count):
+    app = ensure_app()
+    import src.widgets.canvas as canvas_module
+    from src.logic.Group import Group
+    from src.logic.document import ShapeDocument
+    from src.logic.factory import ShapeFactory
+
+    canvas_module.BULK_LAYER_THRESHOLD = float("inf")
+
+    shapes = make_shapes(count)
+    canvas = canvas_module.EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(shapes))
+    app.processEvents()
+
+    scene = canvas.scene
+    stack = canvas.undo_stack
+
+    scene.blockSignals(True)
+    for item in scene.items():
+        item.setSelected(True)
+    scene.blockSignals(False)
+
+    if mode == "legacy":
+        def group():
+            items = scene.selectedItems()
+            group = Group()
+            scene.addItem(group)
+            for item in items:
+                item.setSelected(False)
+                group.addToGroup(item)
+            group.setSelected(True)
+
+        def ungroup():
+            for item in scene.selectedItems():
+                if isinstance(item, Group):
+                    scene.destroyItemGroup(item)
+
+        return _timed(app, group), _timed(app, ungroup), None, None, None
+
+    times = [_timed(app, canvas.group_selection), _timed(app, canvas.ungroup_selection),
+             _timed(app, stack.undo), _timed(app, stack.redo)]
+
+    document = ShapeDocument.from_dicts([{"type": "group", "children": shapes}])
+    times.append(_timed(app, lambda: ShapeFactory.from_document(document, document.roots()[0])))
+    return times
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f} ms"
+
+
+def main(sizes):
+    rows = []
+    for count in sizes:
+        for mode in ("bulk", "legacy"):
+            if mode == "legacy" and count > LEGACY_MAX:
+                continue
+            group, ungroup, undo, redo, load = run_isolated(measure, mode, count)
+            rows.append([f"{count:,}", mode, _ms(group), _ms(ungroup), _ms(undo), _ms(redo), _ms(load)])
+
+    print_table(["shapes", "path", "group", "ungroup", "undo", "redo", "load group"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,83 @@
+"""
+Перерисовка при прокрутке с кэшем растра фигур (ItemCache) и без него.
+Сцена из отдельных Qt-объектов (меньше BULK_LAYER_THRESHOLD), в основном сглаженные эллипсы.
+Каждый кадр - сдвиг на PAN_STEP_PX и полная перерисовка окна; первые WARMUP кадров
+(заполнение кэша) считаются отдельно.
+
+    python -m benchmarks.bench_item_cache [число фигур]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table
+
+DEFAULT_SHAPES = 3000
+FRAMES = 200
+WARMUP = 5
+PAN_STEP_PX = 4
+VIEW_SIZE = (1000, 800)
+
+
+def _shapes(count, extent):
+    import random
+    rng = random.Random(0)
+    kinds = ["ellipse", "ellipse", "ellipse", "rect", "line"]
+    shapes = []
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        x, y = rng.uniform(0, extent), rng.uniform(0, extent)
+        w, h = rng.uniform(10, 120), rng.uniform(10, 120)
+        props = {"x1": x, "y1": y, "x2": x + w, "y2": y + h} if kind == "line" else {"x": x, "y": y, "w": w, "h": h}
+        props["stroke_width"] = rng.randint(1, 4)
+        shapes.append({"type": kind, "props": props})
+    return shapes
+
+
+def measure(mode, count):
+    app = ensure_app()
+    import src.logic.item_cache as item_cache_module
+    from src.logic.document import ShapeDocument
+    from src.widgets.canvas import EditorCanvas
+
+    item_cache_module.CACHE_IDLE_MS = 0
+
+    extent = 3000
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(_shapes(count, extent)))
+    canvas.scene.setSceneRect(0, 0, extent, extent)
+    canvas.resize(*VIEW_SIZE)
+    canvas.show()
+    app.processEvents()
+
+    cache = canvas.scene.item_cache
+    cache.set_enabled(mode == "cached")
+    if mode == "cached":
+        cache.track(canvas.scene.items())
+        cache.cache_idle()
+
+    scrollbar = canvas.horizontalScrollBar()
+    viewport = canvas.viewport()
+    times = []
+
+    for frame in range(FRAMES + WARMUP):
+        scrollbar.setValue(scrollbar.value() + PAN_STEP_PX)
+        start = time.perf_counter()
+        viewport.repaint()
+        times.append(time.perf_counter() - start)
+
+    warmup, frames = times[:WARMUP], sorted(times[WARMUP:])
+    return sum(warmup) / WARMUP, sum(frames) / len(frames), frames[int(len(frames) * 0.95)], len(cache), cache.bytes
+
+
+def main(count):
+    rows = []
+    for mode in ("uncached", "cached"):
+        warmup, mean, p95, cached, memory = run_isolated(measure, mode, count)
+        rows.append([mode, f"{warmup * 1000:.2f} ms", f"{mean * 1000:.2f} ms", f"{p95 * 1000:.2f} ms",
+                     f"{cached:,}", f"{memory / 2 ** 20:.1f} MB"])
+
+    print_table(["items", "warmup frame", "frame", "p95", "cached items", "pixmaps"], rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SHAPES)
@@ -0,0 +1,101 @@
+"""
+Цена журнала правок на одну команду: перемещения, смена толщины и добавление фигур
+в документе заданного размера. Время push с журналом и без, отдельно - время слота
+журнала (упаковка строк в буфер), и время снимка документа при compact().
+Запись на диск идет в фоновом потоке и в GUI-время не входит.
+
+    python -m benchmarks.bench_journal [размеры...]
+"""
+import sys
+import tempfile
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SIZES = [1_000, 100_000]
+COMMANDS = 3000
+HISTORY_CHUNK = 300  # история чистится кусками, чтобы учет бюджета стека не заслонял журнал
+
+
+def measure(count, journaled):
+    app = ensure_app()
+    from PySide6.QtCore import QPointF
+    import src.widgets.canvas as canvas_module
+    from src.logic import journal
+    from src.logic.Line import Line
+    from src.logic.commands import AddShapeCommand, MoveCommand, ChangeWidthCommand
+    from src.logic.document import ShapeDocument
+
+    canvas_module.BULK_LAYER_THRESHOLD = float("inf")
+
+    canvas = canvas_module.EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(make_shapes(count)))
+    app.processEvents()
+
+    scene = canvas.scene
+    stack = canvas.undo_stack
+    items = scene.items()[:100]
+
+    slot_time = [0.0]
+    log = None
+    directory = tempfile.mkdtemp(prefix="bench-journal-")
+
+    if journaled:
+        log = journal.DocumentJournal(directory, canvas)
+        slot = log._on_index_changed
+
+        def timed_slot(index):
+            start = time.perf_counter()
+            slot(index)
+            slot_time[0] += time.perf_counter() - start
+
+        log._on_index_changed = timed_slot
+        log.start()
+
+    def command(i):
+        item = items[i % len(items)]
+        kind = i % 3
+        if kind == 0:
+            return MoveCommand(item, item.pos(), item.pos() + QPointF(1, 0))
+        if kind == 1:
+            return ChangeWidthCommand(item, 1 + i % 7)
+        return AddShapeCommand(scene, Line(i % 500, 0, i % 500, 10))
+
+    elapsed = 0.0
+    for start in range(0, COMMANDS, HISTORY_CHUNK):
+        commands = [command(i) for i in range(start, start + HISTORY_CHUNK)]
+        # Каждая команда отдельной правкой: без склейки соседних
+        for c in commands:
+            c._edited_at -= 10
+
+        begin = time.perf_counter()
+        for c in commands:
+            stack.push(c)
+        elapsed += time.perf_counter() - begin
+
+        app.processEvents()
+        stack.clear()
+
+    compact_time = 0.0
+    if journaled:
+        begin = time.perf_counter()
+        log.compact()
+        compact_time = time.perf_counter() - begin
+        log.close(discard_files=True)
+
+    return elapsed / COMMANDS, slot_time[0] / COMMANDS, compact_time
+
+
+def main(sizes):
+    rows = []
+    for count in sizes:
+        plain, _, _ = run_isolated(measure, count, False)
+        journaled, slot, compact = run_isolated(measure, count, True)
+        rows.append([f"{count:,}", f"{plain * 1e6:.1f} us", f"{journaled * 1e6:.1f} us",
+                     f"{slot * 1e6:.1f} us", f"{compact * 1000:.1f} ms"])
+
+    print_table(["shapes", "push", "push + journal", "journal slot", "compact"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,61 @@
+"""
+Время перерисовки сцены: BulkLayer против отдельного QGraphicsItem на фигуру.
+Рендер идет в QImage (raster), как при offscreen-платформе.
+
+    python -m benchmarks.bench_layers [размеры...]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SIZES = [50_000, 500_000]
+FRAMES = 5
+FRAME_SIZE = (1600, 1200)
+
+
+def measure(mode, count):
+    ensure_app()
+    import src.widgets.canvas as canvas_module
+    from PySide6.QtCore import QRectF
+    from PySide6.QtGui import QImage, QPainter, QColor
+    from src.logic.document import ShapeDocument
+
+    canvas_module.BULK_LAYER_THRESHOLD = 0 if mode == "layers" else float("inf")
+
+    document = ShapeDocument.from_dicts(make_shapes(count))
+    canvas = canvas_module.EditorCanvas()
+
+    start = time.perf_counter()
+    canvas.set_document(document)
+    build = time.perf_counter() - start
+
+    scene = canvas.scene
+    source = scene.itemsBoundingRect()
+    image = QImage(*FRAME_SIZE, QImage.Format_ARGB32_Premultiplied)
+
+    timings = []
+    for _ in range(FRAMES):
+        image.fill(QColor("white"))
+        painter = QPainter(image)
+        start = time.perf_counter()
+        scene.render(painter, QRectF(image.rect()), source)
+        timings.append(time.perf_counter() - start)
+        painter.end()
+
+    # Первый кадр у слоев включает сборку пакетов
+    return build, timings[0], min(timings[1:])
+
+
+def main(sizes):
+    rows = []
+    for count in sizes:
+        for mode in ("layers", "items"):
+            build, first, frame = run_isolated(measure, mode, count)
+            rows.append([mode, f"{count:,}", f"{build:.2f} s", f"{first * 1000:.0f} ms", f"{frame * 1000:.0f} ms"])
+
+    print_table(["mode", "shapes", "build", "first frame", "repaint"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
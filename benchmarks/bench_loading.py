@@ -0,0 +1,93 @@
+"""
+Загрузка большого проекта: полное время и самая долгая блокировка окна (цикла событий).
+Сравниваются потоковый ProjectLoader и прежняя загрузка целиком (json.load + set_document).
+У ProjectLoader самый долгий шаг - финальная подмена документа на холсте (set_document).
+
+    python -m benchmarks.bench_loading [размер файла в МБ]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SIZE_MB = 200
+
+
+def write_project(path, size_mb):
+    """Пишет проект в формате JsonSaveStrategy (indent=4) порциями, пока не наберется size_mb"""
+    limit = size_mb * 2 ** 20
+    count = 0
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{\n    "version": "1.0",\n    "scene": {"width": 5000, "height": 5000},\n    "shapes": [\n')
+        first = True
+        seed = 0
+
+        while f.tell() < limit:
+            for shape in make_shapes(10_000, seed):
+                if not first:
+                    f.write(",\n")
+                f.write(json.dumps(shape, indent=4))
+                first = False
+                count += 1
+            seed += 1
+
+        f.write("\n    ]\n}\n")
+
+    return count
+
+
+def measure_streaming(path):
+    app = ensure_app()
+    from src.logic.loader import ProjectLoader
+    from src.widgets.canvas import EditorCanvas
+
+    canvas = EditorCanvas()
+    loader = ProjectLoader(canvas, path)
+    loader.start()
+
+    while loader.is_running:
+        app.processEvents()
+        time.sleep(0.001)
+
+    return loader.longest_tick, loader.total_time
+
+
+def measure_blocking(path):
+    ensure_app()
+    from src.logic.document import ShapeDocument
+    from src.widgets.canvas import EditorCanvas
+
+    canvas = EditorCanvas()
+    start = time.perf_counter()
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    document = ShapeDocument.from_dicts(data["shapes"])
+    canvas.set_document(document)
+
+    # Пока все не построено, окно не отвечает
+    total = time.perf_counter() - start
+    return total, total
+
+
+def main(size_mb):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "project.json")
+        count = write_project(path, size_mb)
+        print(f"{os.path.getsize(path) / 2 ** 20:.0f} MiB, {count:,} shapes")
+
+        rows = []
+        for name, func in (("streaming", measure_streaming), ("blocking", measure_blocking)):
+            stall, total = run_isolated(func, path)
+            rows.append([name, f"{stall:.2f} s", f"{total:.2f} s"])
+
+    print_table(["loader", "longest stall", "total"], rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_MB)
@@ -0,0 +1,76 @@
+"""
+Время кадра на сильно отдаленной сцене: level-of-detail включен / выключен.
+Вся сцена (extent x extent) вписывается в кадр FRAME_SIZE, т.е. масштаб ~1/30.
+
+    python -m benchmarks.bench_lod [размеры...]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SIZES = [1_000_000]
+FRAMES = 5
+FRAME_SIZE = (1600, 1200)
+EXTENT = 50_000
+
+
+def _document(count):
+    from src.logic.document import ShapeDocument
+
+    # Документ заполняется напрямую: миллион словарей to_dict занял бы гигабайты
+    document = ShapeDocument()
+    for chunk in range(0, count, 100_000):
+        for shape in make_shapes(min(100_000, count - chunk), seed=chunk, extent=EXTENT):
+            document.add_dict(shape)
+    return document
+
+
+def measure(lod_enabled, count):
+    ensure_app()
+    import src.widgets.canvas as canvas_module
+    from PySide6.QtCore import QRectF
+    from PySide6.QtGui import QImage, QPainter, QColor
+    from src.logic.lod import LOD
+
+    LOD.enabled = lod_enabled
+    canvas_module.BULK_LAYER_THRESHOLD = 0
+
+    canvas = canvas_module.EditorCanvas()
+    canvas.set_document(_document(count))
+
+    scene = canvas.scene
+    source = QRectF(0, 0, EXTENT, EXTENT)
+    image = QImage(*FRAME_SIZE, QImage.Format_ARGB32_Premultiplied)
+
+    timings = []
+    for _ in range(FRAMES):
+        image.fill(QColor("white"))
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        start = time.perf_counter()
+        scene.render(painter, QRectF(image.rect()), source)
+        timings.append(time.perf_counter() - start)
+        painter.end()
+
+    # Первый кадр включает сборку кэшей (пакеты, растр плотности)
+    return timings[0], min(timings[1:])
+
+
+def main(sizes):
+    rows = []
+
+    for count in sizes:
+        results = {}
+        for lod_enabled in (False, True):
+            first, frame = run_isolated(measure, lod_enabled, count)
+            results[lod_enabled] = frame
+            rows.append([f"{count:,}", "on" if lod_enabled else "off",
+                         f"{first * 1000:.0f} ms", f"{frame * 1000:.1f} ms"])
+        rows.append(["", "speedup", "", f"x{results[False] / results[True]:.1f}"])
+
+    print_table(["shapes", "lod", "first frame", "frame"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
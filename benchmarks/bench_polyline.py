@@ -0,0 +1,126 @@
+"""
+Ломаные из длинных треков: память на вершину, упрощение по мере поступления точек,
+отрисовка drawPolyline против обводки QPainterPath.
+
+    python -m benchmarks.bench_polyline [вершин в треке]
+"""
+import math
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import ensure_app, run_isolated, print_table
+
+DEFAULT_VERTICES = 50_000
+TRACKS = 20
+IMAGE_SIZE = 1024
+
+
+def _trace(count, seed=0):
+    """Трек GPS: плавная кривая с шумом, точки через ~1 единицу сцены"""
+    points = []
+    for i in range(count):
+        noise = ((i + seed) * 7919 % 17) / 40
+        points += [i * IMAGE_SIZE / count, IMAGE_SIZE / 2 + 300 * math.sin(i / 900 + seed) + noise]
+    return points
+
+
+def _storage(count) -> list:
+    from src.logic.document import ShapeDocument
+
+    trace = _trace(count)
+    rows = []
+
+    tracemalloc.start()
+    pairs = [(trace[i], trace[i + 1]) for i in range(0, len(trace), 2)]
+    rows.append(("list of (x, y)", tracemalloc.get_traced_memory()[0]))
+    del pairs
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    document = ShapeDocument()
+    document.add_shape("polyline", None, points=trace)
+    rows.append(("ShapeTable pool", tracemalloc.get_traced_memory()[0]))
+    tracemalloc.stop()
+
+    return [[name, f"{size / count:.1f} B"] for name, size in rows]
+
+
+def _simplify(count) -> list:
+    from src.logic.simplify import StreamSimplifier, simplify
+
+    trace = _trace(count)
+    rows = []
+
+    start = time.perf_counter()
+    stream = StreamSimplifier(0.5)
+    for i in range(0, len(trace), 2):
+        stream.add(trace[i], trace[i + 1])
+    result = stream.finish()
+    elapsed = time.perf_counter() - start
+    rows.append(["StreamSimplifier", f"{elapsed / count * 1e6:.1f} us", f"{len(result) // 2:,}"])
+
+    start = time.perf_counter()
+    result = simplify(trace, 0.5)
+    elapsed = time.perf_counter() - start
+    rows.append(["simplify (RDP)", f"{elapsed / count * 1e6:.1f} us", f"{len(result) // 2:,}"])
+
+    return rows
+
+
+def _paint(count) -> list:
+    from PySide6.QtCore import Qt
+    from PySide6.QtGui import QImage, QPainter, QPainterPath, QPen
+    from src.logic.Polyline import make_polygon
+    from src.logic.simplify import simplify
+
+    image = QImage(IMAGE_SIZE, IMAGE_SIZE, QImage.Format_ARGB32_Premultiplied)
+    rows = []
+
+    for tolerance in (0, 0.5):
+        traces = [_trace(count, seed) for seed in range(TRACKS)]
+        if tolerance:
+            traces = [simplify(trace, tolerance) for trace in traces]
+        polygons = [make_polygon(trace) for trace in traces]
+        paths = []
+        for polygon in polygons:
+            path = QPainterPath()
+            path.addPolygon(polygon)
+            paths.append(path)
+
+        row = [f"{tolerance}", f"{sum(map(len, traces)) // 2 // TRACKS:,}"]
+        for draw, shapes in ((QPainter.drawPolyline, polygons), (QPainter.drawPath, paths)):
+            image.fill(Qt.white)
+            painter = QPainter(image)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(QPen(Qt.black, 2))
+
+            start = time.perf_counter()
+            for shape in shapes:
+                draw(painter, shape)
+            elapsed = time.perf_counter() - start
+            painter.end()
+            row.append(f"{elapsed * 1000 / TRACKS:.1f} ms")
+        rows.append(row)
+
+    return rows
+
+
+def measure(count):
+    ensure_app()
+    return _storage(count), _simplify(count), _paint(count)
+
+
+def main(count):
+    storage, simplified, painted = run_isolated(measure, count)
+
+    print(f"{count:,} vertices per track")
+    print_table(["storage", "bytes per vertex"], storage)
+    print()
+    print_table(["simplification (0.5)", "per point", "vertices kept"], simplified)
+    print()
+    print_table(["tolerance", "vertices", "drawPolyline", "drawPath"], painted)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_VERTICES)
@@ -0,0 +1,69 @@
+"""
+Цена профилировщика на горячих путях: undo/redo перемещения и отрисовка кадра
+без инструментирования (исходные методы), с выключенным и с включенным профилировщиком.
+
+    python -m benchmarks.bench_profiling [число фигур]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SHAPES = 2000
+CYCLES = 20000
+FRAMES = 200
+
+
+def measure(mode, count):
+    app = ensure_app()
+    from PySide6.QtCore import QPointF
+    from PySide6.QtWidgets import QGraphicsView
+    import src.widgets.canvas as canvas_module
+    from src.logic.commands import MoveCommand
+    from src.logic.document import ShapeDocument
+    from src.logic.profiling import PROFILER
+
+    canvas_module.BULK_LAYER_THRESHOLD = float("inf")
+
+    if mode == "raw":
+        # Исходные методы без оберток profiled()
+        MoveCommand.redo = MoveCommand.redo.__wrapped__
+        MoveCommand.undo = MoveCommand.undo.__wrapped__
+        canvas_module.EditorCanvas.paintEvent = QGraphicsView.paintEvent
+
+    canvas = canvas_module.EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(make_shapes(count, extent=800)))
+    canvas.resize(800, 600)
+    canvas.show()
+    app.processEvents()
+    PROFILER.set_enabled(mode == "enabled")
+
+    item = canvas.scene.items()[0]
+    command = MoveCommand(item, item.pos(), item.pos() + QPointF(1, 1))
+
+    start = time.perf_counter()
+    for _ in range(CYCLES):
+        command.redo()
+        command.undo()
+    command_time = (time.perf_counter() - start) / (2 * CYCLES)
+
+    viewport = canvas.viewport()
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        viewport.repaint()
+    frame_time = (time.perf_counter() - start) / FRAMES
+
+    return command_time, frame_time
+
+
+def main(count):
+    rows = []
+    for mode in ("raw", "disabled", "enabled"):
+        command_time, frame_time = run_isolated(measure, mode, count)
+        rows.append([mode, f"{command_time * 1e6:.2f} us", f"{frame_time * 1000:.2f} ms"])
+
+    print_table(["profiler", "redo/undo call", "frame"], rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SHAPES)
@@ -0,0 +1,53 @@
+"""
+Сколько сохранение держит GUI-поток: синхронный strategy.save против BackgroundSaver
+(в GUI-потоке остается только снимок документа).
+
+    python -m benchmarks.bench_saving [размеры...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import ensure_app, print_table, make_shapes
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+
+
+def main(sizes):
+    app = ensure_app()
+    from src.logic.document import ShapeDocument
+    from src.logic.saver import BackgroundSaver
+    from src.logic.strategies import JsonSaveStrategy, ImageSaveStrategy
+    from src.widgets.canvas import EditorScene
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            scene = EditorScene(ShapeDocument.from_dicts(make_shapes(count)))
+            scene.setSceneRect(0, 0, 5000, 5000)
+
+            for name, strategy in (("json", JsonSaveStrategy()), ("png", ImageSaveStrategy("PNG"))):
+                path = os.path.join(tmp, f"project.{name}")
+
+                start = time.perf_counter()
+                strategy.save(path, scene)
+                blocking = time.perf_counter() - start
+
+                saver = BackgroundSaver()
+                start = time.perf_counter()
+                saver.save(strategy, path, scene)
+                gui = time.perf_counter() - start
+
+                while saver.is_running:
+                    app.processEvents()
+                    time.sleep(0.001)
+                total = time.perf_counter() - start
+
+                rows.append([name, f"{count:,}", f"{blocking:.3f} s", f"{gui * 1000:.1f} ms", f"{total:.3f} s"])
+
+    print_table(["format", "shapes", "sync save", "background: GUI", "background: total"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,92 @@
+"""
+Выделение рамкой с подключенной панелью свойств: рамка растет за BAND_STEPS движений мыши,
+пока не накроет все фигуры; после каждого движения цикл событий отрабатывает, как в приложении.
+Сравниваются обработчики selectionChanged (none - без панели, цена самого выделения в Qt):
+    legacy  - как было раньше: на каждый сигнал scene.selectedItems() и обход всего выделения
+    summary - PropertiesPanel: не чаще раза за кадр, сводка досчитывается по изменениям выделения
+
+    python -m benchmarks.bench_selection [число фигур]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SHAPES = 20000
+BAND_STEPS = 40
+EXTENT = 2000
+
+
+def legacy_handler(scene):
+    """Старый PropertiesPanel.on_selection_changed без виджетов: то же чтение выделения"""
+    def on_selection_changed():
+        selected = scene.selectedItems()
+        if not selected:
+            return
+        first = selected[0]
+        first.pen().width(), first.pen().color().name(), first.pos()
+        widths = {item.pen().width() for item in selected}
+        return len(selected), len(widths) > 1
+
+    return on_selection_changed
+
+
+def measure(mode, count):
+    app = ensure_app()
+    from PySide6.QtCore import Qt
+    from PySide6.QtGui import QPainterPath
+    import src.widgets.canvas as canvas_module
+    from src.logic.document import ShapeDocument
+    from src.widgets.properties import PropertiesPanel
+
+    canvas_module.BULK_LAYER_THRESHOLD = float("inf")
+
+    canvas = canvas_module.EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(make_shapes(count, extent=EXTENT)))
+    scene = canvas.scene
+
+    panel = None
+    if mode == "legacy":
+        handler = legacy_handler(scene)
+        scene.selectionChanged.connect(handler)
+    elif mode == "summary":
+        panel = PropertiesPanel(scene, canvas.undo_stack)
+    app.processEvents()
+
+    signals = []
+    scene.selectionChanged.connect(lambda: signals.append(1))
+
+    start = time.perf_counter()
+    for step in range(1, BAND_STEPS + 1):
+        size = (EXTENT + 100) * step / BAND_STEPS
+        path = QPainterPath()
+        path.addRect(0, 0, size, size)
+        scene.setSelectionArea(path, Qt.ItemSelectionOperation.ReplaceSelection)
+        app.processEvents()
+
+    if panel is not None:
+        # Последнее обновление панели - через кадр после последнего движения
+        while panel._refresh_timer.isActive():
+            app.processEvents()
+    elapsed = time.perf_counter() - start
+
+    if mode == "legacy":
+        # Сцена при удалении еще раз испускает selectionChanged
+        scene.selectionChanged.disconnect(handler)
+
+    return elapsed, len(signals), len(scene.selectedItems())
+
+
+def main(count):
+    rows = []
+    baseline = None
+    for mode in ("none", "legacy", "summary"):
+        elapsed, signals, selected = run_isolated(measure, mode, count)
+        baseline = elapsed if baseline is None else baseline
+        rows.append([mode, f"{elapsed * 1000:.0f} ms", f"{(elapsed - baseline) * 1000:.0f} ms", signals, selected])
+
+    print_table(["panel", "band total", "panel share", "signals", "selected"], rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SHAPES)
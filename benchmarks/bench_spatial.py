@@ -0,0 +1,123 @@
+"""
+Поиск фигур: GridIndex по документу против индексов QGraphicsScene (BspTreeIndex, NoIndex).
+Замеры: построение индекса, выбор точкой, выбор рамкой и стоимость перемещения фигур.
+
+    python -m benchmarks.bench_spatial [размеры...]
+"""
+import random
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SIZES = [10_000, 100_000]
+PICKS = 1000
+RECTS = 200
+RECT_SIZE = 300
+MOVES = 1000
+EXTENT = 5000
+
+
+def _points(seed=1):
+    rng = random.Random(seed)
+    return [(rng.uniform(0, EXTENT), rng.uniform(0, EXTENT)) for _ in range(PICKS)]
+
+
+def _rects(seed=2):
+    rng = random.Random(seed)
+    return [(x, y, x + RECT_SIZE, y + RECT_SIZE)
+            for x, y in ((rng.uniform(0, EXTENT), rng.uniform(0, EXTENT)) for _ in range(RECTS))]
+
+
+def measure_scene(method, count):
+    ensure_app()
+    from PySide6.QtCore import QPointF, QRectF
+    from PySide6.QtWidgets import QGraphicsScene
+    from src.logic.document import ShapeDocument
+    from src.logic.factory import ShapeFactory
+
+    document = ShapeDocument.from_dicts(make_shapes(count, extent=EXTENT))
+    scene = QGraphicsScene()
+    scene.setItemIndexMethod(getattr(QGraphicsScene.ItemIndexMethod, method))
+
+    start = time.perf_counter()
+    items = [ShapeFactory.from_document(document, ref) for ref in document.roots()]
+    for item in items:
+        scene.addItem(item)
+    scene.items(QPointF(0, 0))  # BSP строится лениво, при первом запросе
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for x, y in _points():
+        scene.items(QPointF(x, y))
+    pick = (time.perf_counter() - start) / PICKS
+
+    start = time.perf_counter()
+    for x0, y0, x1, y1 in _rects():
+        scene.items(QRectF(x0, y0, x1 - x0, y1 - y0))
+    rect = (time.perf_counter() - start) / RECTS
+
+    # Перемещение: Qt переиндексирует сдвинутые объекты при следующем запросе
+    rng = random.Random(3)
+    moved = rng.sample(items, MOVES)
+    start = time.perf_counter()
+    for item in moved:
+        item.setPos(item.pos().x() + 10, item.pos().y() + 10)
+    scene.items(QPointF(0, 0))
+    move = (time.perf_counter() - start) / MOVES
+
+    return build, pick, rect, move
+
+
+def measure_grid(count):
+    ensure_app()
+    from src.logic.document import ShapeDocument
+    from src.logic.layers import hit_test
+    from src.logic.spatial import GridIndex, document_entries
+
+    document = ShapeDocument.from_dicts(make_shapes(count, extent=EXTENT))
+    index = GridIndex()
+
+    start = time.perf_counter()
+    index.insert_many(document_entries(document))
+    build = time.perf_counter() - start
+
+    # Выбор точкой - как EditorCanvas.pick: кандидаты из сетки и точная проверка
+    start = time.perf_counter()
+    for x, y in _points():
+        for kind, row in index.query_point(x, y, 3):
+            hit_test(document.tables[kind], row, x, y, 3)
+    pick = (time.perf_counter() - start) / PICKS
+
+    start = time.perf_counter()
+    for bounds in _rects():
+        index.query_rect(*bounds)
+    rect = (time.perf_counter() - start) / RECTS
+
+    rng = random.Random(3)
+    moved = rng.sample(list(document_entries(document)), MOVES)
+    start = time.perf_counter()
+    for ref, (x0, y0, x1, y1) in moved:
+        index.update(ref, (x0 + 10, y0 + 10, x1 + 10, y1 + 10))
+    move = (time.perf_counter() - start) / MOVES
+
+    return build, pick, rect, move
+
+
+def main(sizes):
+    rows = []
+    for count in sizes:
+        cases = [
+            ("GridIndex", run_isolated(measure_grid, count)),
+            ("BspTreeIndex", run_isolated(measure_scene, "BspTreeIndex", count)),
+            ("NoIndex", run_isolated(measure_scene, "NoIndex", count)),
+        ]
+        for name, (build, pick, rect, move) in cases:
+            rows.append([name, f"{count:,}", f"{build * 1000:.0f} ms", f"{pick * 1e6:.0f} us",
+                         f"{rect * 1e6:.0f} us", f"{move * 1e6:.1f} us"])
+
+    print_table(["index", "shapes", "build", "pick", "rect select", "move (per shape)"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
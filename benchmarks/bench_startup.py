@@ -0,0 +1,112 @@
+"""
+Время запуска: импорт окна (python -X importtime) и время до первой отрисовки холста.
+Каждый замер - в свежем интерпретаторе, берется лучший из --repeat.
+
+    python -m benchmarks.bench_startup [--repeat N]
+
+Код выхода 1, если превышен хотя бы один бюджет (проверка в сборке):
+    IMPORT_BUDGET_MS      - импорт src.app целиком, вместе с PySide6
+    OWN_IMPORT_BUDGET_MS  - собственное время модулей src.* (без PySide6 и stdlib)
+    FIRST_PAINT_BUDGET_MS - от запуска процесса до первого paintEvent холста
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import print_table
+
+IMPORT_BUDGET_MS = 700
+OWN_IMPORT_BUDGET_MS = 150
+FIRST_PAINT_BUDGET_MS = 2000
+
+DEFAULT_REPEAT = 5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Запускается в отдельном процессе: окно как в main.py, выход сразу после первого кадра холста
+FIRST_PAINT_DRIVER = """
+import sys, time
+launched = float(sys.argv[1])
+
+from PySide6.QtCore import QObject, QEvent, QTimer
+from PySide6.QtWidgets import QApplication
+app = QApplication(sys.argv[:1])
+
+from src.app import VectorEditorWindow
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and not hasattr(self, "seen"):
+            self.seen = True
+            # Кадр дорисуется до того, как цикл событий дойдет до таймера
+            QTimer.singleShot(0, lambda: (print(time.time() - launched), app.quit()))
+        return False
+
+window = VectorEditorWindow(journal_dir=sys.argv[2])
+first_paint = FirstPaint()
+window.canvas.viewport().installEventFilter(first_paint)
+window.show()
+app.exec()
+"""
+
+
+def _env():
+    return dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=ROOT)
+
+
+def import_times() -> tuple:
+    """:return: (импорт src.app всего, собственное время модулей src.*), мс"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.app"],
+                            cwd=ROOT, env=_env(), capture_output=True, text=True, check=True)
+    total = own = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if not fields[0].strip().isdigit():
+            continue  # строка заголовка
+
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2].strip()
+        if name == "src.app":
+            total = cumulative_us
+        if name.startswith("src"):
+            own += self_us
+    return total / 1000, own / 1000
+
+
+def first_paint_time() -> float:
+    """:return: мс от запуска интерпретатора до первой отрисовки холста"""
+    with tempfile.TemporaryDirectory() as journal_dir:
+        result = subprocess.run([sys.executable, "-c", FIRST_PAINT_DRIVER, repr(time.time()), journal_dir],
+                                cwd=ROOT, env=_env(), capture_output=True, text=True, check=True, timeout=60)
+    return float(result.stdout.split()[-1]) * 1000
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_startup")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args(argv)
+
+    imports = [import_times() for _ in range(args.repeat)]
+    total = min(value[0] for value in imports)
+    own = min(value[1] for value in imports)
+    paint = min(first_paint_time() for _ in range(args.repeat))
+
+    rows = []
+    failed = False
+    for name, value, budget in (("import src.app", total, IMPORT_BUDGET_MS),
+                                ("own modules (src.*)", own, OWN_IMPORT_BUDGET_MS),
+                                ("first paint", paint, FIRST_PAINT_BUDGET_MS)):
+        over = value > budget
+        failed |= over
+        rows.append([name, f"{value:.0f} ms", f"{budget} ms", "OVER BUDGET" if over else "ok"])
+
+    print_table(["stage", "best", "budget", "status"], rows)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
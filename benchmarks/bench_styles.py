@@ -0,0 +1,74 @@
+"""
+Память и размер файла с общей таблицей стилей против пера и стиля на каждую фигуру.
+Qt-объекты: RSS на фигуру, когда у каждой свое QPen (как раньше) и когда перо общее из STYLE_TABLE.
+Файл: JSON со стилем в каждой фигуре против таблицы "styles" и ссылок "style".
+
+    python -m benchmarks.bench_styles [размеры...]
+"""
+import gc
+import json
+import sys
+
+from benchmarks.common import ensure_app, run_isolated, print_table, rss_bytes, make_shapes
+
+DEFAULT_SIZES = [100_000, 300_000]
+
+
+def measure_items(mode, count):
+    ensure_app()
+    from PySide6.QtGui import QPen, QColor
+    from src.logic.document import ShapeDocument
+    from src.logic.factory import ShapeFactory
+    from src.logic.Shape import Shape
+
+    if mode == "pen per shape":
+        # Прежнее поведение _setup_pen: новый QColor и QPen на каждую фигуру
+        # (переназначить перо потом нельзя: setPen игнорирует равное перо)
+        def setup_own_pen(self):
+            pen = QPen(QColor(self.color))
+            pen.setWidth(self.stroke_width)
+            self.setPen(pen)
+
+        Shape._setup_pen = setup_own_pen
+
+    document = ShapeDocument.from_dicts(make_shapes(count))
+    refs = document.roots()
+    gc.collect()
+    before = rss_bytes()
+
+    items = [ShapeFactory.from_document(document, ref) for ref in refs]
+
+    gc.collect()
+    assert len(items) == count
+    return (rss_bytes() - before) / count
+
+
+def measure_file(count):
+    from src.logic.document import ShapeDocument, STYLE_TABLE
+
+    document = ShapeDocument.from_dicts(make_shapes(count))
+
+    inline = len(json.dumps({"shapes": document.to_dicts()}, indent=4))
+
+    style_ids = {}
+    shapes = document.to_dicts(style_ids)
+    table = len(json.dumps({"styles": STYLE_TABLE.export(style_ids), "shapes": shapes}, indent=4))
+
+    return inline / count, table / count, len(style_ids)
+
+
+def main(sizes):
+    rows = []
+    for count in sizes:
+        shared = run_isolated(measure_items, "shared pen", count)
+        own = run_isolated(measure_items, "pen per shape", count)
+        inline, table, styles = run_isolated(measure_file, count)
+        rows.append([f"{count:,}", styles, f"{own:.0f} B", f"{shared:.0f} B",
+                     f"{inline:.0f} B", f"{table:.0f} B"])
+
+    print_table(["shapes", "styles", "item: own pen", "item: shared pen",
+                 "json: inline style", "json: style table"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,74 @@
+"""
+Экспорт SVG (SvgSaveStrategy): пропускная способность и пиковая память записи
+против сборки всего текста SVG в одну строку.
+
+Память - пик tracemalloc за время записи сверх уже загруженного документа:
+у потоковой записи он не должен расти вместе с числом фигур (кроме индекса обхода, 4 байта на строку).
+
+    python -m benchmarks.bench_svg_export [размеры...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import ensure_app, run_isolated, print_table
+from benchmarks.scenes import GENERATORS
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+SCENES = ("flat", "grouped")
+
+
+def _peak(action) -> int:
+    tracemalloc.start()
+    action()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def measure(scene, count) -> list:
+    ensure_app()
+    from PySide6.QtCore import QRectF
+    from src.logic.document import ShapeDocument
+    from src.logic.strategies import SvgSaveStrategy
+    from src.logic.svg_export import iter_svg
+
+    document = ShapeDocument.from_dicts(GENERATORS[scene](count))
+    rect = QRectF(0, 0, 5000, 5000)
+    rows = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scene.svg")
+
+        def stream():
+            SvgSaveStrategy().write(path, (document, rect))
+
+        def whole():
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("".join(iter_svg(document, 0, 0, 5000, 5000)))
+
+        for name, action in (("stream", stream), ("whole text", whole)):
+            start = time.perf_counter()
+            action()
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(path)
+
+            rows.append([scene, f"{count:,}", name, f"{elapsed:.2f} s", f"{count / elapsed:,.0f}",
+                         f"{size / 2 ** 20 / elapsed:.1f}", f"{_peak(action) / 2 ** 20:.1f} MiB"])
+
+    return rows
+
+
+def main(sizes):
+    rows = []
+    for scene in SCENES:
+        for count in sizes:
+            rows += run_isolated(measure, scene, count)
+
+    print_table(["scene", "shapes", "write", "time", "shapes/s", "MiB/s", "peak memory"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,58 @@
+"""
+Тайловый экспорт PNG: время в зависимости от числа процессов и пиковая память.
+
+    python -m benchmarks.bench_tiled_export [фигур] [масштаб]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import ensure_app, print_table, make_shapes, run_isolated
+
+DEFAULT_COUNT = 100_000
+DEFAULT_SCALE = 2.0
+WORKER_COUNTS = [0, 1, 2, 4, 8]
+
+
+def _export(count, scale, workers, path):
+    import resource
+    ensure_app()
+    from src.logic.document import ShapeDocument
+    from src.logic.tiled_export import TiledImageSaveStrategy
+    from src.widgets.canvas import EditorScene
+
+    scene = EditorScene(ShapeDocument.from_dicts(make_shapes(count)))
+    scene.setSceneRect(0, 0, 5000, 5000)
+    strategy = TiledImageSaveStrategy(scale=scale, workers=workers)
+
+    start = time.perf_counter()
+    strategy.save(path, scene)
+    elapsed = time.perf_counter() - start
+
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def main(count, scale):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.png")
+        base = None
+
+        for workers in WORKER_COUNTS:
+            if workers > (os.cpu_count() or 1):
+                continue
+
+            elapsed, peak = run_isolated(_export, count, scale, workers, path)
+            base = base or elapsed
+            rows.append([workers or "in-process", f"{elapsed:.2f} s", f"x{base / elapsed:.1f}",
+                         f"{peak / 2 ** 20:.0f} MiB", f"{os.path.getsize(path) / 2 ** 20:.1f} MiB"])
+
+    size = int(5000 * scale)
+    print(f"{count:,} фигур, {size}x{size} px")
+    print_table(["workers", "time", "speedup", "peak RSS (main)", "png"], rows)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else DEFAULT_COUNT, float(args[1]) if len(args) > 1 else DEFAULT_SCALE)
@@ -0,0 +1,75 @@
+"""
+Пакетные преобразования всего выделения (transform_selection): сбор координат,
+расчет операции, запись в документ вместе с путями и индексом (redo) и отмена.
+
+    python -m benchmarks.bench_transforms [число фигур]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes
+
+DEFAULT_SHAPES = 100_000
+
+
+def measure(count):
+    app = ensure_app()
+    import src.widgets.canvas as canvas_module
+    from src.logic import transforms
+    from src.logic.commands import shape_leaves
+    from src.logic.document import ShapeDocument
+
+    # Все фигуры - отдельные выделенные объекты, как после выделения рамкой
+    canvas_module.BULK_LAYER_THRESHOLD = float("inf")
+
+    canvas = canvas_module.EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(make_shapes(count)))
+    scene = canvas.scene
+    scene.blockSignals(True)
+    for item in scene.items():
+        item.setSelected(True)
+    scene.blockSignals(False)
+    app.processEvents()
+
+    stack = canvas.undo_stack
+    rows = []
+    for name, operation, args in (
+        ("translate", transforms.translate, (10, 5)),
+        ("scale", transforms.scale, (1.5, 0.5)),
+        ("rotate 90", transforms.rotate, (90,)),
+        ("rotate 30", transforms.rotate, (30,)),
+        ("align left", transforms.align, ("left",)),
+        ("distribute", transforms.distribute, ("horizontal",)),
+    ):
+        start = time.perf_counter()
+        coords = transforms.ShapeCoords(scene, shape_leaves(scene.selectedItems()))
+        gathered = time.perf_counter()
+        points = operation(coords, *args)
+        computed = time.perf_counter()
+
+        start_push = time.perf_counter()
+        canvas.transform_selection(name, operation, *args)
+        pushed = time.perf_counter() - start_push
+
+        start_undo = time.perf_counter()
+        stack.undo()
+        undone = time.perf_counter() - start_undo
+
+        rows.append((name, gathered - start, computed - gathered, pushed, undone))
+        app.processEvents()
+
+    return rows
+
+
+def main(count):
+    rows = []
+    for name, gather, compute, push, undo in run_isolated(measure, count):
+        rows.append([name, f"{gather * 1000:.0f} ms", f"{compute * 1000:.0f} ms",
+                     f"{push * 1000:.0f} ms", f"{undo * 1000:.0f} ms"])
+
+    print(f"{count:,} selected shapes")
+    print_table(["operation", "gather", "compute", "transform_selection", "undo"], rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SHAPES)
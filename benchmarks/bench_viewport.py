@@ -0,0 +1,70 @@
+"""
+Виртуализация холста: память и прокрутка при росте документа в 10 раз.
+    items   - Qt-объект на каждую фигуру (BULK_LAYER_THRESHOLD отключен)
+    virtual - слои + объекты только у видимых фигур (ViewportItems)
+Окно одного размера; прокрутка - PAN_STEPS шагов по PAN_STEP единиц сцены по диагонали,
+после каждого шага объекты обновляются (как после кадра). Память: RSS после построения сцены и прокрутки
+за вычетом RSS с готовым документом, то есть цена представления без самой модели.
+
+    python -m benchmarks.bench_viewport [размеры...]
+"""
+import sys
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table, make_shapes, rss_bytes
+
+DEFAULT_SIZES = [20_000, 200_000]
+PAN_STEPS = 50
+PAN_STEP = 100
+VIEW_SIZE = (1000, 800)
+
+
+def measure(mode, count):
+    app = ensure_app()
+    import src.widgets.canvas as canvas_module
+    from src.logic.document import ShapeDocument
+
+    if mode == "items":
+        canvas_module.BULK_LAYER_THRESHOLD = float("inf")
+
+    # Плотность постоянная: документ больше - карта шире, видимых фигур столько же
+    extent = int(5000 * (count / 20_000) ** 0.5)
+    document = ShapeDocument.from_dicts(make_shapes(count, extent=extent))
+    canvas = canvas_module.EditorCanvas()
+    canvas.resize(*VIEW_SIZE)
+    canvas.scene.setSceneRect(0, 0, extent, extent)
+    app.processEvents()
+    base = rss_bytes()
+
+    start = time.perf_counter()
+    canvas.set_document(document)
+    canvas.centerOn(0, 0)
+    canvas.viewport_items.refresh()
+    load = time.perf_counter() - start
+
+    pan = []
+    most_items = 0
+    for step in range(1, PAN_STEPS + 1):
+        start = time.perf_counter()
+        canvas.centerOn(step * PAN_STEP, step * PAN_STEP)
+        canvas.viewport_items.refresh()
+        pan.append(time.perf_counter() - start)
+        most_items = max(most_items, len(canvas.scene.items()))
+
+    return load, sum(pan) / len(pan), max(pan), most_items, rss_bytes() - base
+
+
+def main(sizes):
+    rows = []
+    for count in sizes:
+        for mode in ("items", "virtual"):
+            load, pan_mean, pan_max, items, memory = run_isolated(measure, mode, count)
+            rows.append([f"{count:,}", mode, f"{load * 1000:.0f} ms", f"{pan_mean * 1000:.1f} ms",
+                         f"{pan_max * 1000:.1f} ms", f"{items:,}", f"{memory / 2 ** 20:.1f} MB",
+                         f"{memory / count:.0f}"])
+
+    print_table(["shapes", "view", "build", "pan step", "pan max", "Qt items", "view RSS", "B/shape"], rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,65 @@
+import os
+import sys
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Бенчмарки всегда работают без дисплея
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def ensure_app():
+    """QApplication нужен для любых QGraphicsItem"""
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv[:1])
+    return app
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса (Linux: /proc, иначе пиковое значение из resource)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_isolated(func, *args):
+    """Запускает замер в отдельном процессе, чтобы память одного случая не влияла на другой"""
+    # ProcessPoolExecutor, а не Pool: его процессы не демоны и могут сами запускать пул
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(1, mp_context=context) as pool:
+        return pool.submit(func, *args).result()
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    for row in [headers] + rows:
+        print("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
+
+
+def make_shapes(count, seed=0, extent=5000):
+    """Плоский список примитивов в формате to_dict (линии, прямоугольники, эллипсы по кругу)"""
+    rng = random.Random(seed)
+    kinds = ["line", "rect", "ellipse"]
+    shapes = []
+
+    for i in range(count):
+        kind = kinds[i % 3]
+        a, b = rng.uniform(0, extent), rng.uniform(0, extent)
+        c, d = rng.uniform(1, 100), rng.uniform(1, 100)
+
+        if kind == "line":
+            props = {"x1": a, "y1": b, "x2": a + c, "y2": b + d}
+        else:
+            props = {"x": a, "y": b, "w": c, "h": d}
+
+        props["color"] = "#%06x" % rng.randrange(16)
+        props["stroke_width"] = rng.randint(1, 4)
+        shapes.append({"type": kind, "props": props})
+
+    return shapes
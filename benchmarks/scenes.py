@@ -0,0 +1,87 @@
+"""
+Генераторы синтетических сцен для бенчмарков. Все детерминированы по seed.
+
+Каждый возвращает список фигур в формате to_dict (как в "shapes" файла проекта)
+с count примитивами всего, включая вложенные в группы.
+"""
+import random
+
+from benchmarks.common import make_shapes
+
+KINDS = ("line", "rect", "ellipse")
+
+
+def _primitive(rng, kind, x, y, size):
+    w, h = rng.uniform(1, size), rng.uniform(1, size)
+    if kind == "line":
+        props = {"x1": x, "y1": y, "x2": x + w, "y2": y + h}
+    else:
+        props = {"x": x, "y": y, "w": w, "h": h}
+
+    props["color"] = "#%06x" % rng.randrange(16)
+    props["stroke_width"] = rng.randint(1, 4)
+    return {"type": kind, "props": props}
+
+
+def flat(count, seed=0):
+    """Плоский список по всему холсту 5000x5000"""
+    return make_shapes(count, seed=seed)
+
+
+def grouped(count, seed=0, fanout=4, extent=5000):
+    """
+    Дерево групп: у каждой группы fanout детей, примитивы только в листьях.
+    Глубина - около log(count, fanout), позиции групп вложены друг в друга.
+    """
+    rng = random.Random(seed)
+    counter = [0]
+
+    def build(total, depth):
+        if total <= fanout:
+            shapes = []
+            for _ in range(total):
+                kind = KINDS[counter[0] % 3]
+                counter[0] += 1
+                shapes.append(_primitive(rng, kind, rng.uniform(0, 50), rng.uniform(0, 50), 50))
+            return shapes
+
+        children = []
+        share, rest = divmod(total, fanout)
+        for i in range(fanout):
+            part = share + (1 if i < rest else 0)
+            if part:
+                span = extent / (fanout ** (depth + 1))
+                children.append({
+                    "type": "group",
+                    "pos": [rng.uniform(0, span), rng.uniform(0, span)],
+                    "children": build(part, depth + 1),
+                })
+        return children
+
+    return build(count, 0)
+
+
+def dense(count, seed=0, extent=200):
+    """Все фигуры внахлест в маленькой области: худший случай для поиска под курсором"""
+    rng = random.Random(seed)
+    return [
+        _primitive(rng, KINDS[i % 3], rng.uniform(0, extent), rng.uniform(0, extent), extent)
+        for i in range(count)
+    ]
+
+
+def huge_coordinates(count, seed=0, extent=1e9):
+    """Координаты порядка 1e9 и крупные фигуры: проверка точности и разреженного индекса"""
+    rng = random.Random(seed)
+    return [
+        _primitive(rng, KINDS[i % 3], rng.uniform(-extent, extent), rng.uniform(-extent, extent), extent / 1000)
+        for i in range(count)
+    ]
+
+
+GENERATORS = {
+    "flat": flat,
+    "grouped": grouped,
+    "dense": dense,
+    "huge": huge_coordinates,
+}
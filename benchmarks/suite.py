@@ -0,0 +1,202 @@
+"""
+Набор бенчмарков по синтетическим сценам (см. scenes.py) с проверкой регрессий.
+
+Для каждой сцены и размера в отдельном процессе замеряются:
+    from_dict     - ShapeFactory.from_dict для всех фигур файла
+    json_save     - JsonSaveStrategy.save
+    image_save    - ImageSaveStrategy.save (PNG, холст по умолчанию)
+    hit_test      - HIT_POINTS вызовов canvas.pick в случайных точках
+    group/ungroup - группировка всех верхних объектов и обратно
+    undo/redo     - отмена и повтор UNDO_MOVES перемещений
+Берется лучшее время из --repeat прогонов.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline baseline.json [--tolerance 0.25]
+
+Результаты - JSON {"meta": {...}, "results": {"сцена/размер/операция": секунды}}.
+С --baseline замеры сравниваются с сохраненными: операция, ставшая медленнее больше чем
+на tolerance (и на MIN_DELTA_S в абсолютном выражении), считается регрессией, код выхода 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.common import ensure_app, run_isolated, print_table
+from benchmarks.scenes import GENERATORS
+
+DEFAULT_SIZES = [1_000, 10_000]
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+MIN_DELTA_S = 0.002  # разницу меньше не считаем регрессией: это шум таймера и планировщика
+
+HIT_POINTS = 1000
+UNDO_MOVES = 200
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+
+
+def measure(scene, count, repeat):
+    app = ensure_app()
+    from PySide6.QtCore import QPointF
+    import src.widgets.canvas as canvas_module
+    from src.logic.commands import MoveCommand
+    from src.logic.document import ShapeDocument
+    from src.logic.factory import ShapeFactory
+    from src.logic.strategies import JsonSaveStrategy, ImageSaveStrategy
+
+    # Отдельные Qt-объекты для всех фигур: группировка и отмена работают с ними
+    canvas_module.BULK_LAYER_THRESHOLD = float("inf")
+
+    shapes = GENERATORS[scene](count)
+    results = {}
+
+    def timed(name, action, before=None, after=None):
+        """before/after не входят в замер: подготовка и возврат сцены в исходное состояние"""
+        best = float("inf")
+        for _ in range(repeat):
+            if before is not None:
+                before()
+            app.processEvents()
+
+            start = time.perf_counter()
+            action()
+            best = min(best, time.perf_counter() - start)
+
+            if after is not None:
+                after()
+        results[name] = best
+
+    def from_dict():
+        document = ShapeDocument()
+        return [ShapeFactory.from_dict(data, document) for data in shapes]
+
+    timed("from_dict", from_dict)
+
+    canvas = canvas_module.EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(shapes))
+    app.processEvents()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timed("json_save", lambda: JsonSaveStrategy().save(os.path.join(tmp, "scene.json"), canvas.scene))
+        timed("image_save", lambda: ImageSaveStrategy("PNG").save(os.path.join(tmp, "scene.png"), canvas.scene))
+
+    rng = random.Random(0)
+    bounds = canvas.scene.itemsBoundingRect()
+    points = [QPointF(rng.uniform(bounds.left(), bounds.right()), rng.uniform(bounds.top(), bounds.bottom()))
+              for _ in range(HIT_POINTS)]
+
+    timed("hit_test", lambda: [canvas.pick(point) for point in points])
+
+    def select_top_level():
+        canvas.scene.clearSelection()
+        for item in canvas.scene.items():
+            if item.topLevelItem() is item:
+                item.setSelected(True)
+
+    # Новая группа остается выделенной, поэтому ungroup_selection возвращает сцену как было
+    timed("group", canvas.group_selection, select_top_level, canvas.ungroup_selection)
+    timed("ungroup", canvas.ungroup_selection, lambda: (select_top_level(), canvas.group_selection()))
+
+    stack = canvas.undo_stack
+    items = [item for item in canvas.scene.items() if item.topLevelItem() is item][:UNDO_MOVES]
+    for item in items:
+        stack.push(MoveCommand(item, item.pos(), item.pos() + QPointF(5, 5)))
+
+    def undo_all():
+        while stack.canUndo():
+            stack.undo()
+
+    def redo_all():
+        while stack.canRedo():
+            stack.redo()
+
+    timed("undo", undo_all, redo_all)
+    timed("redo", redo_all, undo_all)
+
+    return results
+
+
+def run(scenes, sizes, repeat) -> dict:
+    results = {}
+    for scene in scenes:
+        for count in sizes:
+            for name, seconds in run_isolated(measure, scene, count, repeat).items():
+                results[f"{scene}/{count}/{name}"] = seconds
+    return results
+
+
+def metadata() -> dict:
+    import PySide6
+
+    return {
+        "python": platform.python_version(),
+        "pyside": PySide6.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> tuple:
+    """:return: (строки таблицы, ключи регрессий); операции без базового замера не сравниваются"""
+    rows = []
+    regressions = []
+
+    for key, seconds in results.items():
+        base = baseline.get(key)
+        if base is None:
+            rows.append([key, f"{seconds * 1000:.1f}", "-", "-", "new"])
+            continue
+
+        ratio = seconds / base if base else float("inf")
+        regressed = ratio > 1 + tolerance and seconds - base > MIN_DELTA_S
+        if regressed:
+            regressions.append(key)
+
+        rows.append([key, f"{seconds * 1000:.1f}", f"{base * 1000:.1f}", f"{ratio:.2f}x",
+                     "REGRESSION" if regressed else "ok"])
+
+    return rows, regressions
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Бенчмарки по синтетическим сценам")
+    parser.add_argument("--scenes", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help="куда записать результаты (JSON)")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="допустимое замедление, доля (0.25 = на 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args.scenes, args.sizes, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+    if not args.baseline:
+        print_table(["case", "ms"], [[key, f"{seconds * 1000:.1f}"] for key, seconds in results.items()])
+        return EXIT_OK
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+
+    rows, regressions = compare(results, baseline, args.tolerance)
+    print_table(["case", "ms", "baseline ms", "ratio", "status"], rows)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}")
+        return EXIT_REGRESSION
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
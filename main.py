@@ -1,12 +1,21 @@
+import os
 import sys
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QPalette, QColor
 
 from src.constants import APP_STYLE
-from src.app import VectorEditorWindow
 
 
 def main():
+    # Пакетный режим без окон: python main.py convert ...
+    if len(sys.argv) > 1 and sys.argv[1] == "convert":
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from src.logic.batch import main as convert_main
+        sys.exit(convert_main(sys.argv[2:]))
+
+    # Окно и виджеты нужны только GUI-режиму (процессы пула convert импортируют этот модуль заново)
+    from src.app import VectorEditorWindow
+
     app = QApplication(sys.argv)
 
     app.setStyle(APP_STYLE)
@@ -1,29 +1,47 @@
-import json
+import os
 
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QFrame, QVBoxLayout, QPushButton, QFileDialog, \
-    QMessageBox
+    QMessageBox, QProgressDialog
 from PySide6.QtGui import QAction, QKeySequence
 
 from src.constants import (
-    WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, DEFAULT_SCENE_WIDTH, DEFAULT_SCENE_HEIGHT,
-    TYPE_LINE, TYPE_RECT, TYPE_ELLIPSE, TYPE_SELECT, TOOLS_PANEL_WIDTH, PROPERTIES_PANEL_WIDTH,
-    PANEL_BG_COLOR, SAVE_FILTERS, BG_COLOR_WHITE, BG_COLOR_TRANSPARENT, PROJECT_VERSION
+    WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE,
+    TYPE_LINE, TYPE_RECT, TYPE_ELLIPSE, TYPE_POLYLINE, TYPE_SELECT, TOOLS_PANEL_WIDTH,
+    PANEL_BG_COLOR, SAVE_FILTERS, STREAMING_LOAD_MIN_BYTES, JOURNAL_DIR
 )
-from src.logic.factory import ShapeFactory
-from src.logic.strategies import ImageSaveStrategy, JsonSaveStrategy
+from src.logic import transforms
+from src.logic.profiling import PROFILER
+from src.logic.saver import BackgroundSaver
 from src.widgets.canvas import EditorCanvas
 from src.widgets.properties import PropertiesPanel
 
 
 class VectorEditorWindow(QMainWindow):
-    def __init__(self):
+    # Сохранение, загрузка, экспорт и журнал правок импортируются при первом использовании:
+    # первому кадру нужны только окно, холст и панель свойств (см. benchmarks/bench_startup.py)
+
+    def __init__(self, journal_dir=JOURNAL_DIR):
         super().__init__()
 
         self.setWindowTitle(WINDOW_TITLE)
         self.resize(WINDOW_WIDTH, WINDOW_HEIGHT)
 
+        self.loader = None
+
+        self.saver = BackgroundSaver(self)
+        self.saver.finished.connect(self.on_save_finished)
+        self.saver.failed.connect(self.on_save_failed)
+
         self._init_ui()
 
+        # Журнал правок: после сбоя документ восстанавливается при следующем запуске.
+        # Запускается уже из цикла событий, после показа окна
+        self.journal_dir = journal_dir
+        self.journal_session = None
+        self.journal = None
+        QTimer.singleShot(0, self.start_journal)
+
     def _init_ui(self):
         self.statusBar().showMessage("Готов к работе")
 
@@ -88,6 +106,50 @@ class VectorEditorWindow(QMainWindow):
         edit_menu.addAction(undo_action)
         edit_menu.addAction(redo_action)
 
+        # Пакетные преобразования выделения: одна команда отмены на все фигуры
+        arrange_menu = self.menuBar().addMenu("&Arrange")
+        for entry in (
+            ("Rotate 90° CW", "Ctrl+R", transforms.rotate, (90,)),
+            ("Rotate 90° CCW", "Ctrl+Shift+R", transforms.rotate, (-90,)),
+            ("Scale 200%", "Ctrl+]", transforms.scale, (2, 2)),
+            ("Scale 50%", "Ctrl+[", transforms.scale, (0.5, 0.5)),
+            None,
+            ("Align Left", None, transforms.align, ("left",)),
+            ("Align Center", None, transforms.align, ("hcenter",)),
+            ("Align Right", None, transforms.align, ("right",)),
+            ("Align Top", None, transforms.align, ("top",)),
+            ("Align Middle", None, transforms.align, ("vcenter",)),
+            ("Align Bottom", None, transforms.align, ("bottom",)),
+            None,
+            ("Distribute Horizontally", None, transforms.distribute, ("horizontal",)),
+            ("Distribute Vertically", None, transforms.distribute, ("vertical",)),
+        ):
+            if entry is None:
+                arrange_menu.addSeparator()
+                continue
+
+            text, shortcut, operation, args = entry
+            action = QAction(text, self)
+            if shortcut:
+                action.setShortcut(shortcut)
+            action.triggered.connect(
+                lambda _=False, t=text, op=operation, a=args: self.canvas.transform_selection(t, op, *a)
+            )
+            arrange_menu.addAction(action)
+
+        # Профилирование: оверлей с FPS и временем отрисовки, выгрузка гистограмм
+        profile_action = QAction("Profiling Overlay", self)
+        profile_action.setShortcut("F12")
+        profile_action.setCheckable(True)
+        profile_action.toggled.connect(self.canvas.set_profiling)
+
+        export_profile_action = QAction("Export Profile...", self)
+        export_profile_action.triggered.connect(self.on_export_profile)
+
+        view_menu = self.menuBar().addMenu("&View")
+        view_menu.addAction(profile_action)
+        view_menu.addAction(export_profile_action)
+
     def _setup_layout(self):
         container = QWidget()
         self.setCentralWidget(container)
@@ -104,23 +166,20 @@ class VectorEditorWindow(QMainWindow):
         self.btn_line = QPushButton("Line")
         self.btn_rect = QPushButton("Rect")
         self.btn_ellipse = QPushButton("Ellipse")
+        self.btn_polyline = QPushButton("Freehand")
+
+        self.tool_buttons = {
+            TYPE_SELECT: self.btn_select,
+            TYPE_LINE: self.btn_line,
+            TYPE_RECT: self.btn_rect,
+            TYPE_ELLIPSE: self.btn_ellipse,
+            TYPE_POLYLINE: self.btn_polyline,
+        }
+        for tool_name, button in self.tool_buttons.items():
+            button.setCheckable(True)
+            button.clicked.connect(lambda checked=False, name=tool_name: self.on_change_tool(name))
+            tools_layout.addWidget(button)
 
-        self.btn_select.setCheckable(True)
-        self.btn_line.setCheckable(True)
-        self.btn_rect.setCheckable(True)
-        self.btn_ellipse.setCheckable(True)
-
-        self.btn_line.setChecked(True)
-
-        self.btn_select.clicked.connect(lambda: self.on_change_tool(TYPE_SELECT))
-        self.btn_line.clicked.connect(lambda: self.on_change_tool(TYPE_LINE))
-        self.btn_rect.clicked.connect(lambda: self.on_change_tool(TYPE_RECT))
-        self.btn_ellipse.clicked.connect(lambda: self.on_change_tool(TYPE_ELLIPSE))
-
-        tools_layout.addWidget(self.btn_select)
-        tools_layout.addWidget(self.btn_line)
-        tools_layout.addWidget(self.btn_rect)
-        tools_layout.addWidget(self.btn_ellipse)
         tools_layout.addStretch()
 
         self.canvas = EditorCanvas()
@@ -137,26 +196,8 @@ class VectorEditorWindow(QMainWindow):
     def on_change_tool(self, tool_name):
         self.current_tool = tool_name
 
-        if tool_name == TYPE_LINE:
-            self.btn_select.setChecked(False)
-            self.btn_line.setChecked(True)
-            self.btn_rect.setChecked(False)
-            self.btn_ellipse.setChecked(False)
-        elif tool_name == TYPE_RECT:
-            self.btn_select.setChecked(False)
-            self.btn_line.setChecked(False)
-            self.btn_rect.setChecked(True)
-            self.btn_ellipse.setChecked(False)
-        elif tool_name == TYPE_SELECT:
-            self.btn_select.setChecked(True)
-            self.btn_line.setChecked(False)
-            self.btn_rect.setChecked(False)
-            self.btn_ellipse.setChecked(False)
-        else:
-            self.btn_select.setChecked(False)
-            self.btn_line.setChecked(False)
-            self.btn_rect.setChecked(False)
-            self.btn_ellipse.setChecked(True)
+        for name, button in self.tool_buttons.items():
+            button.setChecked(name == tool_name)
 
         self.canvas.set_tool(tool_name)
 
@@ -168,20 +209,83 @@ class VectorEditorWindow(QMainWindow):
         if not filename:
             return
 
-        strategy = None
+        # Огромный PNG рендерится тайлами в пуле процессов
+        from src.logic.batch import save_strategy
+        strategy = save_strategy(filename, self.canvas.scene.sceneRect())
 
-        if filename.lower().endswith(".png"):
-            strategy = ImageSaveStrategy("PNG", background_color=BG_COLOR_TRANSPARENT)
-        elif filename.lower().endswith(".jpg"):
-            strategy = ImageSaveStrategy("JPG", background_color=BG_COLOR_WHITE)
-        else:
-            strategy = JsonSaveStrategy()
+        # Снимок сцены берется сразу, запись идет в фоне
+        self.saver.save(strategy, filename, self.canvas.scene)
+        self.statusBar().showMessage(f"Saving to {filename}...")
+
+    def on_export_profile(self):
+        filename, _ = QFileDialog.getSaveFileName(self, "Export Profile", "profile.json", "JSON (*.json)")
+        if not filename:
+            return
 
         try:
-            strategy.save(filename, self.canvas.scene)
-            self.statusBar().showMessage(f"Successfully saved to {filename}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not save file:\n{str(e)}")
+            PROFILER.export(filename)
+        except OSError as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось записать файл:\n{e}")
+            return
+
+        self.statusBar().showMessage(f"Profile exported to {filename}")
+
+    def on_save_finished(self, filename):
+        self.statusBar().showMessage(f"Successfully saved to {filename}")
+
+    def on_save_failed(self, filename, message):
+        self.statusBar().showMessage(f"Could not save {filename}: {message}")
+
+    def closeEvent(self, event):
+        # Не даем процессу завершиться посреди записи файла
+        self.saver.wait()
+        # Штатное закрытие: журнал для восстановления больше не нужен (журналы других окон не трогаем)
+        if self.journal is not None:
+            self.journal.close(discard_files=True)
+            self.journal_session.remove()
+        super().closeEvent(event)
+
+    def start_journal(self):
+        """Предлагает восстановить документ сеанса, завершившегося аварийно, затем начинает свой журнал"""
+        from src.logic import journal
+
+        # Сеансы живых окон заблокированы их процессами и сюда не попадают
+        orphans = journal.orphaned_sessions(self.journal_dir)
+        recoverable = [session for session in orphans if journal.has_recovery(session.directory)]
+        for session in orphans:
+            if session not in recoverable:
+                session.remove()
+
+        if recoverable:
+            session = recoverable[0]
+            answer = QMessageBox.question(
+                self, "Восстановление",
+                "Прошлый сеанс завершился аварийно. Восстановить несохраненный документ?"
+            )
+
+            if answer == QMessageBox.Yes:
+                try:
+                    document, scene_info = journal.recover(session.directory)
+                except Exception as e:
+                    QMessageBox.critical(self, "Ошибка восстановления", f"Не удалось прочитать журнал:\n{e}")
+                else:
+                    self.canvas.set_document(document)
+                    self.canvas.scene.setSceneRect(0, 0, scene_info["width"], scene_info["height"])
+                    self.statusBar().showMessage("Документ восстановлен из журнала")
+
+            session.remove()
+            # Остальные упавшие сеансы предложим при следующих запусках
+            for session in recoverable[1:]:
+                session.release()
+
+        self.journal_session = journal.JournalSession.create(self.journal_dir)
+        self.journal = journal.DocumentJournal(self.journal_session.directory, self.canvas, self)
+        self.journal.start()
+
+    def compact_journal(self):
+        """Фиксирует правки в обход истории отмены (открытие файла) снимком журнала"""
+        if self.journal is not None:
+            self.journal.compact()
 
     def on_open_clicked(self):
         from src.constants import PROJECT_FILE_EXTENSIONS
@@ -195,39 +299,66 @@ class VectorEditorWindow(QMainWindow):
         if not path:
             return
 
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        # Большие JSON-проекты грузятся по частям, не блокируя окно
+        if not path.lower().endswith(".vec") and os.path.getsize(path) >= STREAMING_LOAD_MIN_BYTES:
+            self._open_streaming(path)
+            return
 
-            if "version" not in data or "shapes" not in data:
-                raise ValueError("Некорректный формат файла")
+        try:
+            from src.logic.io_manager import FileManager
+            document, scene_info, errors_count = FileManager.load_document(path)
 
         except Exception as e:
             QMessageBox.critical(self, "Ошибка загрузки", f"Не удалось прочитать файл:\n{e}")
             return
 
-        self.canvas.scene.clear()
-        self.canvas.undo_stack.clear()
+        # Qt-объекты строятся по уже заполненному документу
+        self.canvas.set_document(document)
+        self.canvas.scene.setSceneRect(0, 0, scene_info["width"], scene_info["height"])
+        self.compact_journal()
+
+        self._show_load_result(path, errors_count)
+
+    def _open_streaming(self, path):
+        if self.loader is not None and self.loader.is_running:
+            self.loader.cancel()
+
+        from src.logic.loader import ProjectLoader
+        self.loader = ProjectLoader(self.canvas, path, self)
+
+        dialog = QProgressDialog("Загрузка проекта...", "Отмена", 0, 100, self)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+
+        def on_progress(done, total):
+            dialog.setValue(int(done * 100 / total) if total else 100)
 
-        scene_info = data.get("scene", {})
-        width = scene_info.get("width", DEFAULT_SCENE_WIDTH)
-        height = scene_info.get("height", DEFAULT_SCENE_HEIGHT)
-        self.canvas.scene.setSceneRect(0, 0, width, height)
+        def close_dialog():
+            # closeEvent диалога испускает canceled, поэтому сначала отключаемся
+            dialog.canceled.disconnect(on_canceled)
+            dialog.close()
 
-        shapes_data = data.get("shapes", [])
+        def on_finished(errors_count):
+            close_dialog()
+            self.compact_journal()
+            self._show_load_result(path, errors_count)
 
-        errors_count = 0
+        def on_failed(message):
+            close_dialog()
+            QMessageBox.critical(self, "Ошибка загрузки", f"Не удалось прочитать файл:\n{message}")
 
-        for shape_dict in shapes_data:
-            try:
-                shape_obj = ShapeFactory.from_dict(shape_dict)
+        def on_canceled():
+            self.loader.cancel()
+            self.statusBar().showMessage("Загрузка прервана, открытый проект не изменен")
 
-                # Добавляем на сцену
-                self.canvas.scene.addItem(shape_obj)
+        self.loader.progress.connect(on_progress)
+        self.loader.finished.connect(on_finished)
+        self.loader.failed.connect(on_failed)
+        dialog.canceled.connect(on_canceled)
 
-            except Exception as e:
-                errors_count += 1
+        self.loader.start()
 
+    def _show_load_result(self, path, errors_count):
         if errors_count > 0:
             self.statusBar().showMessage(f"Загружено с ошибками ({errors_count} фигур пропущено)")
         else:
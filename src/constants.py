@@ -1,4 +1,5 @@
 # src/constants.py
+import os
 
 # Настройки окна
 WINDOW_WIDTH = 1000
@@ -20,9 +21,14 @@ DEFAULT_COLOR_HEX = "#000000"
 TYPE_LINE = "line"
 TYPE_RECT = "rect"
 TYPE_ELLIPSE = "ellipse"
+TYPE_POLYLINE = "polyline"
 TYPE_GROUP = "group"
 TYPE_SELECT = "select"
 
+# Ломаная от руки (FreehandTool)
+FREEHAND_TOLERANCE_PX = 1.0  # точки ближе к упрощенной ломаной отбрасываются уже при рисовании, px экрана
+FREEHAND_WINDOW = 64  # сколько последних точек проверяется на отклонение (ограничивает работу на точку)
+
 # Цвета фона
 BG_COLOR_WHITE = "white"
 BG_COLOR_TRANSPARENT = "transparent"
@@ -31,15 +37,74 @@ PANEL_BG_COLOR = "#f0f0f0"
 # Размеры панелей
 TOOLS_PANEL_WIDTH = 120
 PROPERTIES_PANEL_WIDTH = 200
+PROPERTIES_REFRESH_MS = 16  # панель свойств обновляется по выделению не чаще раза за столько мс (кадр)
+
+# Пакетная отрисовка (BulkLayer)
+BULK_LAYER_THRESHOLD = 5000  # с какого числа фигур документ рисуется слоями
+LAYER_CHUNK_SIZE = 1024  # размер ячейки сцены, покрываемой одним слоем
+HIT_TOLERANCE = 3  # допуск попадания курсором по фигуре в слое, px сцены
+
+# Виртуализация: отдельные Qt-объекты только у видимых фигур документа, остальные рисуют слои
+VIEWPORT_MARGIN_PX = 256  # запас вокруг видимой области, px экрана
+VIEWPORT_MAX_ITEMS = 4000  # если видно больше фигур, объекты не создаются (рисуют слои)
+VIEWPORT_MIN_LOD = 0.5  # при сильном отдалении объекты не нужны: слои рисуют упрощенно
+VIEWPORT_POOL_SIZE = 2000  # свободных объектов каждого типа, которые ждут повторного использования
+
+# Кэш растра отдельных Qt-объектов (QGraphicsItem.CacheMode)
+CACHE_IDLE_MS = 1500  # фигура без правок дольше этого получает кэш
+CACHE_MEMORY_LIMIT = 64 * 1024 * 1024  # байт на все пиксмапы кэша; сверх - вытесняются давние
+CACHE_MAX_ITEM_PIXELS = 1024 * 1024  # фигура крупнее на экране не кэшируется: растр дороже пути
+CACHE_GROUP_MIN_CHILDREN = 64  # дети группы не меньше этого кэшируются в координатах объекта
+
+# Пространственный индекс фигур (GridIndex)
+SPATIAL_GRID_CELL_SIZE = 256  # сторона ячейки сетки, единиц сцены
+SPATIAL_GRID_MAX_CELLS = 64  # фигура, задевающая больше ячеек, хранится в общем списке крупных
+
+# Level of detail при отдалении (размеры в пикселях экрана)
+LOD_SKIP_SIZE = 0.25  # фигура меньше не рисуется
+LOD_POINT_SIZE = 1.5  # фигура меньше рисуется точкой
+LOD_ELLIPSE_RECT_SIZE = 4  # эллипс меньше рисуется прямоугольником
+LOD_DENSITY_SHAPES_PER_PIXEL = 0.5  # слой плотнее рисуется растром плотности
+LOD_DENSITY_LAYER_SIZE = 64  # слой меньше этого на экране тоже рисуется растром
+
+# Потоковая загрузка проектов
+STREAMING_LOAD_MIN_BYTES = 1024 * 1024  # файлы меньше читаются целиком
+LOAD_CHUNK_BYTES = 1024 * 1024  # сколько байт фоновый поток читает за раз
+LOAD_BATCH_SIZE = 500  # фигур в одной порции от фонового потока
+LOAD_QUEUE_SIZE = 64  # максимум порций в очереди (ограничивает память)
+LOAD_FRAME_BUDGET_MS = 12  # время на вставку фигур за один кадр GUI
+LOAD_TICK_MS = 4  # пауза между кадрами вставки, чтобы окно успевало перерисоваться
+
+# Экспорт растра по тайлам
+TILED_EXPORT_MIN_PIXELS = 4096 * 4096  # изображения больше рендерятся тайлами
+EXPORT_TILE_SIZE = 1024  # сторона тайла, px
+EXPORT_SCREEN_DPI = 96  # DPI, которому соответствует масштаб 1.0
 
 # Настройки Undo/Redo
-UNDO_STACK_LIMIT = 50
+UNDO_STACK_LIMIT = 1000  # страховочный предел числа команд; основной предел - память
+UNDO_MEMORY_BUDGET = 256 * 1024 * 1024  # байт на всю историю; старые команды вытесняются
+COMMAND_BASE_BYTES = 512  # сама команда (Python-объект и QUndoCommand)
+ITEM_RETAINED_BYTES = 1400  # Qt-объект фигуры, который держит команда удаления (см. bench_styles)
+COMMAND_MERGE_WINDOW_MS = 1000  # правки одного объекта с меньшей паузой склеиваются в одну
+
+# Журнал правок для восстановления после сбоя
+# Общий каталог восстановления: у каждого окна в нем свой каталог сеанса (journal.JournalSession)
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".vector_editor", "recovery")
+JOURNAL_FLUSH_MS = 200  # как часто фоновый поток сбрасывает накопленные записи на диск
+JOURNAL_COMPACT_BYTES = 8 * 1024 * 1024  # журнал длиннее заменяется полным снимком документа
+JOURNAL_SNAPSHOT_ROWS = 20000  # правка, задевающая больше строк, пишется снимком, а не строками
+
+# Профилирование (оверлей и гистограммы времени)
+PROFILE_BUCKETS = 32  # корзин гистограммы: степени двойки мкс, последняя - все от ~36 минут
+PROFILE_FPS_WINDOW_S = 1.0  # FPS считается по кадрам за это окно
+PROFILE_OVERLAY_REFRESH_S = 0.5  # как часто оверлей пересчитывает число объектов
 
 # Настройки файлов
-PROJECT_VERSION = "1.0"
+PROJECT_VERSION = "1.1"
 PROJECT_FILE_EXTENSIONS = "Vector Project (*.json *.vec)"
 IMAGE_FILTERS = "PNG Image (*.png);;JPEG Image (*.jpg)"
-SAVE_FILTERS = f"Vector Project (*.json);;{IMAGE_FILTERS}"
+SAVE_FILTERS = f"Vector Project (*.json);;Vector Binary Project (*.vec);;{IMAGE_FILTERS};;SVG Image (*.svg)"
+SVG_CHUNK_ELEMENTS = 4096  # элементов SVG на одну запись в файл при экспорте
 
 # Настройки координат (для SpinBox в properties)
 MIN_COORDINATE = -10000
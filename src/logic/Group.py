@@ -1,18 +1,83 @@
 from PySide6.QtWidgets import QGraphicsItemGroup, QGraphicsItem
 from PySide6.QtCore import QPointF
 
-from src.logic.Shape import Shape
+from src.logic.Shape import Shape, POSITION_CHANGED, SELECTION_CHANGED, mark_selection
+from src.logic.document import GroupTable
 
 
 class Group(QGraphicsItemGroup):
-    def __init__(self):
+    def __init__(self, table=None, row=None):
         QGraphicsItemGroup.__init__(self)
 
+        if table is None:
+            table = GroupTable()
+            row = table.append()
+
+        self.bind(table, row)
+
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable, True)
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsMovable, True)
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges, True)
 
         self.setHandlesChildEvents(True)
 
+    def bind(self, table, row):
+        """Перепривязывает группу к строке таблицы групп (порядок наложения в Qt - z строки)"""
+        self.table = table
+        self.row = row
+        self.setZValue(table.z[row])
+
+    @property
+    def ref(self) -> tuple:
+        return self.table.shape_type, self.row
+
+    def add_items(self, items):
+        """
+        Добавляет объекты в группу, сохраняя их положение в сцене.
+        Порядок наложения детей задает их zValue (z строки документа), а не порядок добавления;
+        items - снизу вверх: так Qt убирает объекты из своего списка без сдвига хвоста.
+        addToGroup дописывает габариты ребенка к габаритам группы (без пересчета по всем детям).
+        """
+        for item in items:
+            self.addToGroup(item)
+
+    def release_items(self) -> list:
+        """
+        Вынимает всех детей к родителю группы (или на верхний уровень сцены) за один проход,
+        сохраняя положение и zValue (z строки документа). Возвращает детей снизу вверх.
+
+        removeFromGroup после каждого ребенка пересчитывает габариты группы по всем оставшимся,
+        то есть разгруппировка через него квадратичная. Здесь дети снимаются со сцены с конца
+        списка и добавляются обратно в прежнем порядке; габариты опустевшей группы не нужны.
+        """
+        scene = self.scene()
+        children = self.childItems()
+        positions = [self.mapToParent(child.pos()) for child in children]
+        # parentItem() без родителя отдает объект во владение Python
+        parent = None if self.topLevelItem() is self else self.parentItem()
+
+        for child in reversed(children):
+            scene.removeItem(child)
+
+        for child, pos in zip(children, positions):
+            child.setPos(pos)
+            # addItem возвращает объект во владение сцены (setParentItem(None) - нет)
+            if parent is None:
+                scene.addItem(child)
+            else:
+                child.setParentItem(parent)
+
+        return children
+
+    def itemChange(self, change, value):
+        if change == POSITION_CHANGED:
+            self.table.pos_x[self.row] = value.x()
+            self.table.pos_y[self.row] = value.y()
+        elif change == SELECTION_CHANGED:
+            mark_selection(self)
+
+        return super().itemChange(change, value)
+
     @property
     def type_name(self) -> str:
         from src.constants import TYPE_GROUP
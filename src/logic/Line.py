@@ -1,12 +1,18 @@
 from PySide6.QtGui import QPainterPath
 
 from src.constants import DEFAULT_COLOR, DEFAULT_STROKE_WIDTH
-from src.logic.Shape import Shape
+from src.logic.Shape import Shape, Column
 
 
 class Line(Shape):
-    def __init__(self, x1, y1, x2, y2, color=DEFAULT_COLOR, stroke_width=DEFAULT_STROKE_WIDTH):
-        super().__init__(color, stroke_width)
+    x1 = Column()
+    y1 = Column()
+    x2 = Column()
+    y2 = Column()
+
+    def __init__(self, x1, y1, x2, y2, color=DEFAULT_COLOR, stroke_width=DEFAULT_STROKE_WIDTH,
+                 table=None, row=None):
+        super().__init__(color, stroke_width, table, row)
         self.x1 = x1
         self.y1 = y1
         self.x2 = x2
@@ -38,6 +44,7 @@ class Line(Shape):
         }
 
     def set_geometry(self, start_point, end_point):
+         self._edited()
          self.x1 = start_point.x()
          self.y1 = start_point.y()
          self.x2 = end_point.x()
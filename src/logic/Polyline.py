@@ -0,0 +1,84 @@
+from PySide6.QtCore import Qt, QPointF
+from PySide6.QtGui import QPainterPath, QPolygonF, QPen
+from PySide6.QtWidgets import QStyle
+
+from src.constants import DEFAULT_COLOR, DEFAULT_STROKE_WIDTH
+from src.logic.Shape import Shape, Column
+
+
+def make_polygon(points, dx=0.0, dy=0.0) -> QPolygonF:
+    """QPolygonF из вершин пула (x, y подряд), сдвинутых на (dx, dy)"""
+    return QPolygonF([QPointF(x + dx, y + dy) for x, y in zip(points[0::2], points[1::2])])
+
+
+class Polyline(Shape):
+    """
+    Ломаная (рисование от руки, импортированные треки).
+    Вершины хранятся в пуле таблицы документа (ShapeTable.vertices), колонки x, y, w, h - их габариты.
+    Рисуется drawPolyline по готовому QPolygonF; путь нужен Qt только для габаритов и попадания мышью.
+    """
+
+    x = Column()
+    y = Column()
+    w = Column()
+    h = Column()
+
+    def __init__(self, points=(), color=DEFAULT_COLOR, stroke_width=DEFAULT_STROKE_WIDTH,
+                 table=None, row=None):
+        """:param points: вершины (x, y подряд) новой фигуры; фигура строки документа берет их из таблицы"""
+        super().__init__(color, stroke_width, table, row)
+
+        if table is None:
+            self.table.set_vertices(self.row, points)
+
+        self._create_geometry()
+
+    def _create_geometry(self):
+        self._polygon = make_polygon(self.table.vertices(self.row))
+
+        # Путь нужен Qt для габаритов и попадания мышью; рисуется self._polygon
+        path = QPainterPath()
+        path.addPolygon(self._polygon)
+        self.setPath(path)
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(self.pen())
+        painter.setBrush(Qt.NoBrush)
+        painter.drawPolyline(self._polygon)
+
+        if option.state & QStyle.StateFlag.State_Selected:
+            # Как рамка выделения, которую рисует QGraphicsPathItem
+            painter.setPen(QPen(option.palette.windowText(), 0, Qt.DashLine))
+            painter.drawRect(self.boundingRect())
+
+    def draw_outline(self, painter):
+        painter.drawPolyline(self._polygon)
+
+    @property
+    def type_name(self) -> str:
+        from src.constants import TYPE_POLYLINE
+        return TYPE_POLYLINE
+
+    @property
+    def points(self):
+        return self.table.vertices(self.row)
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type_name,
+            "pos": [self.pos().x(), self.pos().y()],
+            "props": {
+                "points": self.points.tolist(),
+                "color": self.pen().color().name(),
+                "stroke_width": self.pen().width()
+            }
+        }
+
+    def set_points(self, points):
+        """Новые вершины (x, y подряд)"""
+        self._edited()
+        self.table.set_vertices(self.row, points)
+        self._create_geometry()
+
+    def set_geometry(self, start_point, end_point):
+        self.set_points((start_point.x(), start_point.y(), end_point.x(), end_point.y()))
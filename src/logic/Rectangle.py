@@ -1,12 +1,18 @@
 from PySide6.QtGui import QPainterPath
 
 from src.constants import DEFAULT_COLOR, DEFAULT_STROKE_WIDTH
-from src.logic.Shape import Shape
+from src.logic.Shape import Shape, Column
 
 
 class Rectangle(Shape):
-    def __init__(self, x, y, w, h, color=DEFAULT_COLOR, stroke_width=DEFAULT_STROKE_WIDTH):
-        super().__init__(color, stroke_width)
+    x = Column()
+    y = Column()
+    w = Column()
+    h = Column()
+
+    def __init__(self, x, y, w, h, color=DEFAULT_COLOR, stroke_width=DEFAULT_STROKE_WIDTH,
+                 table=None, row=None):
+        super().__init__(color, stroke_width, table, row)
 
         self.x = x
         self.y = y
@@ -42,6 +48,7 @@ class Rectangle(Shape):
         }
 
     def set_geometry(self, start_point, end_point):
+        self._edited()
         self.x = min(start_point.x(), end_point.x())
         self.y = min(start_point.y(), end_point.y())
         self.w = abs(end_point.x() - start_point.x())
@@ -1,32 +1,114 @@
 from abc import ABC, abstractmethod
 
 from PySide6.QtCore import QPointF
-from PySide6.QtWidgets import QGraphicsPathItem
-from PySide6.QtGui import QPen, QColor
+from PySide6.QtWidgets import QGraphicsPathItem, QGraphicsItem
 
 from src.constants import DEFAULT_COLOR, DEFAULT_STROKE_WIDTH
+from src.logic.document import ShapeTable, STYLE_TABLE
+
+
+# Сравнение с константой модуля дешевле обращения к вложенному enum на каждое изменение объекта
+POSITION_CHANGED = QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged
+SELECTION_CHANGED = QGraphicsItem.GraphicsItemChange.ItemSelectedHasChanged
+
+
+def mark_selection(item):
+    """Выделение объекта поменялось: сводка выделения сцены (SelectionSummary) пересчитает его"""
+    selection = getattr(item.scene(), "selection", None)
+    if selection is not None:
+        selection.mark((item,))
+
+
+class Column:
+    """
+    Атрибут фигуры, который хранится не в самом объекте,
+    а в колонке таблицы документа (строка self.row).
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj.table.columns[self.name][obj.row]
+
+    def __set__(self, obj, value):
+        obj.table.columns[self.name][obj.row] = value
 
 
 class Shape(QGraphicsPathItem):
-    def __init__(self, color: str = DEFAULT_COLOR, stroke_width: int = DEFAULT_STROKE_WIDTH):
+    def __init__(self, color: str = DEFAULT_COLOR, stroke_width: int = DEFAULT_STROKE_WIDTH,
+                 table=None, row=None):
         super().__init__()
 
-        self.color = color
-        self.stroke_width = stroke_width
+        # Фигура без документа получает собственную таблицу из одной строки
+        if table is None:
+            table = ShapeTable(self.type_name)
+            row = table.append([0.0] * len(table.fields))
+
+        self.bind(table, row)
+
+        self.style_id = STYLE_TABLE.intern(color, stroke_width)
 
         self._setup_pen()
         self._setup_flags()
 
+    def bind(self, table, row):
+        """Перепривязывает фигуру к строке другой таблицы (порядок наложения в Qt - z строки)"""
+        self.table = table
+        self.row = row
+        self.setZValue(table.z[row])
+
+    def reload(self, table, row):
+        """
+        Перепривязывает фигуру к другой строке и перестраивает по ней путь, перо и позицию.
+        Так один Qt-объект по очереди показывает разные фигуры документа (см. ViewportItems).
+        """
+        self.bind(table, row)
+        self._create_geometry()
+        self._setup_pen()
+        self.setPos(table.pos_x[row], table.pos_y[row])
+
+    @property
+    def ref(self) -> tuple:
+        return self.table.shape_type, self.row
+
+    @property
+    def style_id(self) -> int:
+        return self.table.style[self.row]
+
+    @style_id.setter
+    def style_id(self, value: int):
+        self.table.style[self.row] = value
+
+    @property
+    def color(self) -> str:
+        return STYLE_TABLE.color(self.style_id)
+
+    @property
+    def stroke_width(self) -> int:
+        return STYLE_TABLE.width(self.style_id)
+
     def _setup_pen(self):
-        pen = QPen(QColor(self.color))
-        pen.setWidth(self.stroke_width)
-        self.setPen(pen)
+        # Общее перо стиля: миллион фигур одного стиля держат одну копию данных пера
+        self.setPen(STYLE_TABLE.pen(self.style_id))
 
     def _setup_flags(self):
         self.setFlag(QGraphicsPathItem.GraphicsItemFlag.ItemIsSelectable)
         self.setFlag(QGraphicsPathItem.GraphicsItemFlag.ItemIsMovable)
         self.setFlag(QGraphicsPathItem.GraphicsItemFlag.ItemSendsGeometryChanges)
 
+    def itemChange(self, change, value):
+        # Позиция пишется в документ сразу, как только Qt ее поменял
+        if change == POSITION_CHANGED:
+            self.table.pos_x[self.row] = value.x()
+            self.table.pos_y[self.row] = value.y()
+        elif change == SELECTION_CHANGED:
+            mark_selection(self)
+
+        return super().itemChange(change, value)
+
     @property
     @abstractmethod
     def type_name(self) -> str:
@@ -36,16 +118,35 @@ class Shape(QGraphicsPathItem):
     def to_dict(self) -> dict:
         pass
 
+    def set_style(self, style_id: int):
+        """Переключает фигуру на другой стиль из STYLE_TABLE"""
+        self.style_id = style_id
+        self._setup_pen()
+
     def set_active_color(self, color: str):
-        self.color = color
-        pen = self.pen()
-        pen.setColor(QColor(color))
-        self.setPen(pen)
+        self._edited()
+        self.set_style(STYLE_TABLE.intern(color, self.stroke_width))
 
     def set_stroke_width(self, width: int):
-        pen = self.pen()
-        pen.setWidth(width)
-        self.setPen(pen)
+        self._edited()
+        self.set_style(STYLE_TABLE.intern(self.color, width))
+
+    def geometry_changed(self):
+        """
+        Координаты фигуры записали прямо в строку документа (BulkTransformCommand): перестроить путь.
+        Разовая правка: кэш растра не выключается, Qt перерисует его один раз.
+        """
+        self._create_geometry()
+
+    def draw_outline(self, painter):
+        """Рисует контур текущим пером painter (оверлей предпросмотра холста)"""
+        painter.drawPath(self.path())
+
+    def _edited(self):
+        """Фигуру начали править: кэш растра (ItemCache сцены) выключается до следующего простоя"""
+        cache = getattr(self.scene(), "item_cache", None)
+        if cache is not None:
+            cache.edited(self)
 
     @abstractmethod
     def set_geometry(self, start_point: QPointF, end_point: QPointF):
@@ -53,4 +154,4 @@ class Shape(QGraphicsPathItem):
         Метод для динамического обновления формы фигуры.
         Принимает две точки (старт рисования и текущее положение мыши).
         """
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,200 @@
+"""
+Пакетная конвертация проектов без окон (сборочные серверы, миниатюры).
+
+    python main.py convert [--jobs N] [--format png|jpg|json|vec|svg] [--scale S] in/*.json out/
+
+Файлы раздаются пулу процессов; каждый процесс поднимает QGuiApplication на платформе
+offscreen и работает только с документом и стратегиями сохранения - виджеты и
+QGraphicsScene не создаются.
+
+Вывод машиночитаемый: по строке JSON на файл в stdout (в порядке завершения)
+и итоговая строка {"summary": ...} с пропускной способностью.
+Код выхода: EXIT_OK - все файлы сконвертированы, EXIT_FAILED - часть файлов с ошибками,
+EXIT_USAGE - неверные аргументы или нет входных файлов.
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QGuiApplication
+
+from src.constants import TILED_EXPORT_MIN_PIXELS, BG_COLOR_TRANSPARENT, BG_COLOR_WHITE
+from src.logic.io_manager import FileManager
+from src.logic.strategies import ImageSaveStrategy, JsonSaveStrategy, VecSaveStrategy, SvgSaveStrategy
+from src.logic.tiled_export import TiledImageSaveStrategy
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+FORMATS = ("png", "jpg", "json", "vec", "svg")
+
+_worker_app = None
+
+
+def ensure_headless_app():
+    """QGuiApplication на платформе offscreen, если приложения в процессе еще нет"""
+    global _worker_app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    if QGuiApplication.instance() is None:
+        _worker_app = QGuiApplication([])
+
+
+def save_strategy(filename: str, rect, workers=None, scale=1.0):
+    """
+    Стратегия сохранения по расширению файла (как в диалоге сохранения).
+    :param workers: Процессы для тайлового экспорта; внутри пула - 0 (у демонов нет детей)
+    """
+    name = filename.lower()
+    pixels = rect.width() * rect.height() * scale * scale
+
+    if name.endswith(".png") and pixels > TILED_EXPORT_MIN_PIXELS:
+        # Огромный холст не помещается в один QImage: рендер тайлами
+        return TiledImageSaveStrategy(background_color=BG_COLOR_TRANSPARENT, scale=scale, workers=workers)
+    if name.endswith(".png"):
+        return ImageSaveStrategy("PNG", background_color=BG_COLOR_TRANSPARENT, scale=scale)
+    if name.endswith(".jpg"):
+        return ImageSaveStrategy("JPG", background_color=BG_COLOR_WHITE, scale=scale)
+    if name.endswith(".vec"):
+        return VecSaveStrategy()
+    if name.endswith(".svg"):
+        return SvgSaveStrategy()
+    return JsonSaveStrategy()
+
+
+def convert_file(source: str, target: str, scale: float = 1.0, workers=0) -> dict:
+    """
+    Конвертирует один проект. Исключения не выбрасывает: ошибка попадает в результат.
+    :return: словарь-строка отчета (input, output, status, shapes, skipped, seconds, error)
+    """
+    start = time.perf_counter()
+    result = {"input": source, "output": target}
+
+    try:
+        document, scene_info, skipped = FileManager.load_document(source)
+        rect = QRectF(0, 0, scene_info["width"], scene_info["height"])
+
+        strategy = save_strategy(target, rect, workers, scale)
+        strategy.write(target, (document, rect))
+
+        result.update(status="ok", shapes=len(document), skipped=skipped)
+
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _convert_task(task) -> dict:
+    return convert_file(*task)
+
+
+def output_path(source: str, out_dir: str, fmt: str) -> str:
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(out_dir, f"{stem}.{fmt}")
+
+
+def expand_inputs(patterns) -> list:
+    """Шаблоны раскрываются сами, если оболочка этого не сделала (Windows)"""
+    files = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            files.extend(sorted(glob.glob(pattern)))
+        else:
+            files.append(pattern)
+    return files
+
+
+def run(files, out_dir: str, fmt: str = "png", jobs: int = None, scale: float = 1.0, stream=None) -> int:
+    """
+    Конвертирует файлы, печатая отчет в stream (по умолчанию stdout).
+    :param jobs: Число процессов; 0 или 1 - в текущем процессе
+    :return: код выхода
+    """
+    stream = stream or sys.stdout
+    jobs = (os.cpu_count() or 1) if jobs is None else jobs
+
+    def report(line):
+        stream.write(json.dumps(line, ensure_ascii=False) + "\n")
+        stream.flush()
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    tasks = []
+    results = []
+    targets = set()
+
+    for source in files:
+        target = output_path(source, out_dir, fmt)
+        if target in targets:
+            # Два входа с одинаковым именем перезаписали бы один выход
+            results.append({"input": source, "output": target, "status": "error",
+                            "error": "duplicate output name", "seconds": 0.0})
+            report(results[-1])
+            continue
+        targets.add(target)
+        tasks.append((source, target, scale))
+
+    start = time.perf_counter()
+
+    if jobs <= 1 or len(tasks) <= 1:
+        ensure_headless_app()
+        outcomes = (_convert_task(task) for task in tasks)
+        pool = None
+    else:
+        context = multiprocessing.get_context("spawn")
+        pool = context.Pool(min(jobs, len(tasks)), initializer=ensure_headless_app)
+        outcomes = pool.imap_unordered(_convert_task, tasks)
+
+    try:
+        for result in outcomes:
+            results.append(result)
+            report(result)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    converted = [result for result in results if result["status"] == "ok"]
+    shapes = sum(result["shapes"] for result in converted)
+
+    report({"summary": {
+        "files": len(results),
+        "ok": len(converted),
+        "failed": len(results) - len(converted),
+        "jobs": jobs,
+        "seconds": round(elapsed, 4),
+        "files_per_second": round(len(converted) / elapsed, 2) if elapsed else None,
+        "shapes_per_second": round(shapes / elapsed) if elapsed else None,
+    }})
+
+    return EXIT_OK if len(converted) == len(results) else EXIT_FAILED
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(prog="main.py convert", description="Пакетная конвертация проектов")
+    parser.add_argument("inputs", nargs="+", help="файлы проектов (.json, .vec) или шаблоны")
+    parser.add_argument("out_dir", help="папка для результатов")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="число процессов (по умолчанию - ядер)")
+    parser.add_argument("--format", "-f", choices=FORMATS, default="png", help="формат результата")
+    parser.add_argument("--scale", type=float, default=1.0, help="пикселей на единицу сцены для PNG/JPG")
+
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_USAGE if e.code else EXIT_OK
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        sys.stderr.write("Нет входных файлов\n")
+        return EXIT_USAGE
+
+    return run(files, args.out_dir, args.format, args.jobs, args.scale)
@@ -1,9 +1,167 @@
+import itertools
+import time
+from abc import abstractmethod
+from array import array
+from contextlib import contextmanager
+
+from PySide6.QtCore import QPointF
 from PySide6.QtGui import QUndoCommand
 
-from src.constants import DEFAULT_COLOR_HEX, MIN_STROKE_WIDTH
+from src.constants import (
+    DEFAULT_COLOR_HEX, MIN_STROKE_WIDTH, COMMAND_BASE_BYTES, ITEM_RETAINED_BYTES, COMMAND_MERGE_WINDOW_MS
+)
+from src.logic.Group import Group
+from src.logic.document import STYLE_TABLE, ROOT
+from src.logic.profiling import profiled
+from src.logic.spatial import index_item, unindex_item, inflate_item
+
+
+def _set_alive(scene, item, alive):
+    """Отмечает фигуру живой/удаленной в документе сцены (если он есть), в ее индексе и кэше растра"""
+    cache = getattr(scene, "item_cache", None)
+    if cache is not None:
+        if alive:
+            cache.track([item])
+        else:
+            cache.discard([item])
+
+    document = getattr(scene, "document", None)
+    if document is None or not hasattr(item, "ref"):
+        return
+
+    if alive:
+        document.adopt(item)
+        document.set_alive(item.ref, True)
+        index_item(scene, item)
+    else:
+        unindex_item(scene, item)
+        document.set_alive(item.ref, False)
+
+
+def _set_deleted(scene, item, deleted):
+    """
+    Удаление объекта со сцены и отмена удаления: _set_alive для самого объекта,
+    а у группы - еще и строки всех вложенных групп и фигур, чтобы они не считались живыми
+    """
+    _set_alive(scene, item, not deleted)
+
+    document = getattr(scene, "document", None)
+    if document is None:
+        return
+
+    stack = [child for child in item.childItems() if hasattr(child, "ref")]
+    while stack:
+        child = stack.pop()
+        document.set_alive(child.ref, not deleted)
+        stack.extend(grandchild for grandchild in child.childItems() if hasattr(grandchild, "ref"))
+
+
+def _set_parent(scene, items, parent_row):
+    """Записывает в документ сцены новую группу-родителя объектов"""
+    document = getattr(scene, "document", None)
+    if document is None:
+        return
+
+    for item in items:
+        if hasattr(item, "ref"):
+            document.set_parent(item.ref, parent_row)
+
+
+_sessions = itertools.count(1)
+
+
+def new_session() -> int:
+    """Номер нового непрерывного действия пользователя (перетаскивание, правка поля) для склейки команд"""
+    return next(_sessions)
+
+
+# id() команд, которые умеют склеиваться с соседней такой же
+MERGE_MOVE = 1
+MERGE_COLOR = 2
+MERGE_WIDTH = 3
+MERGE_BULK_COLOR = 4
+MERGE_BULK_WIDTH = 5
+MERGE_BULK_MOVE = 6
+
+
+class EditorCommand(QUndoCommand):
+    """
+    Основа команд редактора.
+    retained_bytes() - оценка памяти, которую держит команда (для бюджета UndoBudgetStack),
+    release() - отпустить эти данные, когда команду вытеснили из истории.
+    affected_items() - объекты, чьи строки документа меняют redo/undo (для журнала правок).
+    Команды с merge_id склеиваются с такой же следующей:
+    с номером действия (session, см. new_session) - только внутри этого действия, сколько бы оно ни длилось;
+    без номера - если между ними прошло не больше COMMAND_MERGE_WINDOW_MS (тики спинбокса)
+    и класс это допускает (merge_by_time).
+    """
+
+    merge_id = -1
+    # Склейка по времени для команд без номера действия; у перемещений выключена:
+    # два перетаскивания подряд - две записи истории, как бы быстро они ни шли
+    merge_by_time = True
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # redo/undo каждого класса команд - отдельный участок профилировщика
+        for name in ("redo", "undo"):
+            method = cls.__dict__.get(name)
+            if method is not None:
+                setattr(cls, name, profiled(f"command.{cls.__name__}.{name}")(method))
 
-class AddShapeCommand(QUndoCommand):
+    def __init__(self, session=None):
+        super().__init__()
+        self.session = session
+        self._edited_at = time.monotonic()
+
+    def id(self) -> int:
+        return self.merge_id
+
+    def mergeWith(self, other) -> bool:
+        if other.id() != self.id():
+            return False
+        if self.session is not None or other.session is not None:
+            if other.session != self.session:
+                return False
+        elif not self.merge_by_time or other._edited_at - self._edited_at > COMMAND_MERGE_WINDOW_MS / 1000:
+            return False
+        if not self.merge(other):
+            return False
+
+        self._edited_at = other._edited_at
+        # Правка вернулась к исходному значению - QUndoStack удалит пустую команду
+        self.setObsolete(self.is_noop())
+        return True
+
+    def merge(self, other) -> bool:
+        """Забирает конечное состояние other (та же команда над теми же объектами)"""
+        return False
+
+    def is_noop(self) -> bool:
+        return False
+
+    def retained_bytes(self) -> int:
+        return COMMAND_BASE_BYTES
+
+    def release(self):
+        pass
+
+    def affected_items(self) -> list:
+        item = getattr(self, "item", None)
+        return [item] if item is not None else []
+
+
+def command_items(command):
+    """Объекты, которые меняет команда, включая вложенные команды макроса"""
+    affected = getattr(command, "affected_items", None)
+    if affected is not None:
+        yield from affected()
+
+    for i in range(command.childCount()):
+        yield from command_items(command.child(i))
+
+
+class AddShapeCommand(EditorCommand):
     def __init__(self, scene, item):
         """
         :param scene: Сцена, куда добавляем
@@ -21,25 +179,50 @@ class AddShapeCommand(QUndoCommand):
     def redo(self):
         if self.item.scene() != self.scene:
             self.scene.addItem(self.item)
+        _set_alive(self.scene, self.item, True)
 
     def undo(self):
         self.scene.removeItem(self.item)
+        _set_alive(self.scene, self.item, False)
 
-class MoveCommand(QUndoCommand):
-    def __init__(self, item, old_pos, new_pos):
-        super().__init__()
+    def retained_bytes(self):
+        return COMMAND_BASE_BYTES + ITEM_RETAINED_BYTES
+
+    def release(self):
+        self.item = None
+
+class MoveCommand(EditorCommand):
+    merge_id = MERGE_MOVE
+    merge_by_time = False
+
+    def __init__(self, item, old_pos, new_pos, session=None):
+        super().__init__(session)
         self.item = item
         self.old_pos = old_pos
         self.new_pos = new_pos
         self.setText(f"Move {item.type_name}")
 
+    def merge(self, other):
+        if other.item is not self.item:
+            return False
+        self.new_pos = other.new_pos
+        return True
+
+    def is_noop(self):
+        return self.new_pos == self.old_pos
+
+    def release(self):
+        self.item = None
+
     def undo(self):
         self.item.setPos(self.old_pos)
+        index_item(self.item.scene(), self.item)
 
     def redo(self):
         self.item.setPos(self.new_pos)
+        index_item(self.item.scene(), self.item)
 
-class DeleteCommand(QUndoCommand):
+class DeleteCommand(EditorCommand):
     def __init__(self, scene, item):
         super().__init__()
         self.scene = scene
@@ -48,12 +231,22 @@ class DeleteCommand(QUndoCommand):
 
     def redo(self):
         self.scene.removeItem(self.item)
+        _set_deleted(self.scene, self.item, True)
 
     def undo(self):
         self.scene.addItem(self.item)
+        _set_deleted(self.scene, self.item, False)
 
+    def retained_bytes(self):
+        return COMMAND_BASE_BYTES + ITEM_RETAINED_BYTES
+
+    def release(self):
+        self.item = None
+
+
+class ChangeColorCommand(EditorCommand):
+    merge_id = MERGE_COLOR
 
-class ChangeColorCommand(QUndoCommand):
     def __init__(self, item, new_color):
         super().__init__()
         self.item = item
@@ -74,8 +267,23 @@ class ChangeColorCommand(QUndoCommand):
         if hasattr(self.item, "set_active_color"):
             self.item.set_active_color(self.old_color)
 
+    def merge(self, other):
+        if other.item is not self.item:
+            return False
+        self.new_color = other.new_color
+        self.setText(other.text())
+        return True
+
+    def is_noop(self):
+        return self.new_color == self.old_color
+
+    def release(self):
+        self.item = None
+
+
+class ChangeWidthCommand(EditorCommand):
+    merge_id = MERGE_WIDTH
 
-class ChangeWidthCommand(QUndoCommand):
     def __init__(self, item, new_width):
         super().__init__()
         self.item = item
@@ -91,7 +299,402 @@ class ChangeWidthCommand(QUndoCommand):
     def redo(self):
         if hasattr(self.item, "set_stroke_width"):
             self.item.set_stroke_width(self.new_width)
+            index_item(self.item.scene(), self.item)
 
     def undo(self):
         if hasattr(self.item, "set_stroke_width"):
-            self.item.set_stroke_width(self.old_width)
\ No newline at end of file
+            self.item.set_stroke_width(self.old_width)
+            index_item(self.item.scene(), self.item)
+
+    def merge(self, other):
+        if other.item is not self.item:
+            return False
+        self.new_width = other.new_width
+        self.setText(other.text())
+        return True
+
+    def is_noop(self):
+        return self.new_width == self.old_width
+
+    def release(self):
+        self.item = None
+
+
+@contextmanager
+def bulk_update(scene):
+    """
+    Пакетная правка сцены: сигналы сцены и перерисовка видов отключены до конца прохода.
+    selectionChanged испускается один раз в конце, а не на каждую снятую с выделения фигуру.
+    """
+    if scene is None:
+        yield
+        return
+
+    views = scene.views()
+    was_blocked = scene.blockSignals(True)
+    for view in views:
+        view.setUpdatesEnabled(False)
+
+    try:
+        yield
+    finally:
+        scene.blockSignals(was_blocked)
+        for view in views:
+            view.setUpdatesEnabled(True)
+
+        if not was_blocked:
+            scene.selectionChanged.emit()
+        scene.update()
+
+
+def shape_leaves(items):
+    """Примитивы (фигуры со стилем и координатами): сами объекты или все фигуры внутри групп"""
+    for item in items:
+        if hasattr(item, "set_style"):
+            yield item
+        else:
+            yield from shape_leaves(item.childItems())
+
+
+def _stacking_key(item):
+    table = getattr(item, "table", None)
+    return table.z[item.row] if table is not None else 0
+
+
+def _same_items(first, second) -> bool:
+    return len(first) == len(second) and all(a is b for a, b in zip(first, second))
+
+
+class BulkDeleteCommand(EditorCommand):
+    """Удаление выделения одной командой вместо DeleteCommand на каждую фигуру"""
+
+    def __init__(self, scene, items):
+        super().__init__()
+        self.scene = scene
+        # Снизу вверх: Qt быстрее всего убирает объекты в порядке добавления,
+        # а отмена возвращает их на сцену в прежнем порядке наложения
+        self.items = sorted(items, key=_stacking_key)
+        self.setText(f"Delete {len(self.items)} Items")
+
+    def redo(self):
+        scene = self.scene
+        with bulk_update(scene):
+            for item in self.items:
+                scene.removeItem(item)
+                _set_deleted(scene, item, True)
+
+    def undo(self):
+        scene = self.scene
+        with bulk_update(scene):
+            for item in self.items:
+                scene.addItem(item)
+                _set_deleted(scene, item, False)
+
+    def retained_bytes(self):
+        return COMMAND_BASE_BYTES + len(self.items) * (ITEM_RETAINED_BYTES + 8)
+
+    def release(self):
+        self.items = []
+
+    def affected_items(self):
+        return self.items
+
+
+class BulkMoveCommand(EditorCommand):
+    """
+    Перемещение выделения одной командой: общий сдвиг delta (QPointF) на все объекты
+    вместо MoveCommand со старой и новой позицией на каждый.
+    """
+
+    merge_id = MERGE_BULK_MOVE
+    merge_by_time = False
+
+    def __init__(self, scene, items, delta, session=None):
+        super().__init__(session)
+        self.scene = scene
+        self.items = list(items)
+        self.delta = QPointF(delta)
+        self.setText(f"Move {len(self.items)} Items")
+
+    def _shift(self, delta):
+        scene = self.scene
+        for item in self.items:
+            item.setPos(item.pos() + delta)
+            index_item(scene, item)
+
+    def redo(self):
+        self._shift(self.delta)
+
+    def undo(self):
+        self._shift(-self.delta)
+
+    def merge(self, other):
+        if not _same_items(self.items, other.items):
+            return False
+        self.delta += other.delta
+        return True
+
+    def is_noop(self):
+        return self.delta.isNull()
+
+    def retained_bytes(self):
+        return COMMAND_BASE_BYTES + len(self.items) * (ITEM_RETAINED_BYTES + 8)
+
+    def release(self):
+        self.items = []
+
+    def affected_items(self):
+        return self.items
+
+
+class BulkTransformCommand(EditorCommand):
+    """
+    Пакетное преобразование примитивов (см. transforms): старые и новые точки сцены
+    всех фигур хранятся колонками array('d'), redo/undo пишут их в документ одним проходом
+    и перестраивают пути и индекс.
+    """
+
+    def __init__(self, scene, coords, points, text):
+        """
+        :param coords: ShapeCoords - фигуры и их точки до преобразования
+        :param points: новые колонки (x1, y1, x2, y2), результат операции из transforms
+        """
+        super().__init__()
+        self.scene = scene
+        self.coords = coords
+        self.old = coords.points()
+        self.new = points
+        # Отрезки пула вершин ломаных: новые появляются при первом redo, дальше только переключаются
+        self.old_runs = coords.runs()
+        self.new_runs = None
+        self.setText(f"{text} ({len(coords)} Items)")
+
+    def _apply(self, points, runs):
+        scene = self.scene
+        self.coords.write(points, runs)
+
+        with bulk_update(scene):
+            for item in self.coords.items:
+                item.geometry_changed()
+
+        index = getattr(scene, "index", None)
+        if index is not None:
+            index.update_many(self.coords.index_entries(points))
+
+    def redo(self):
+        self._apply(self.new, self.new_runs)
+        if self.new_runs is None:
+            self.new_runs = self.coords.runs()
+
+    def undo(self):
+        self._apply(self.old, self.old_runs)
+
+    def retained_bytes(self):
+        # Ссылка на объект, восемь колонок точек (старые и новые), две колонки смещений;
+        # новые вершины ломаных остаются в пуле таблицы, пока команда может их вернуть
+        vertices = sum(count for _, count in (self.new_runs or {}).values())
+        return COMMAND_BASE_BYTES + len(self.coords) * (8 + 10 * 8) + len(self.old_runs) * 64 + vertices * 16
+
+    def release(self):
+        self.coords.items = []
+        self.old = self.new = None
+        self.old_runs, self.new_runs = {}, None
+
+    def affected_items(self):
+        return self.coords.items
+
+
+class GroupCommand(EditorCommand):
+    """
+    Группировка выделения одной командой: объекты переносятся в новую группу за один проход
+    (Group.add_items), отмена возвращает их на верхний уровень (Group.release_items).
+    Объекты - верхнего уровня: выделение группы в Qt включает и ее детей, их отсеивает вызывающий
+    (EditorCanvas.group_selection).
+    """
+
+    def __init__(self, scene, items):
+        super().__init__()
+        self.scene = scene
+        self.items = sorted(items, key=_stacking_key)
+        # Группа создается при первом redo, чтобы получить z поверх уже существующих фигур
+        self.group = None
+        self.setText(f"Group {len(self.items)} Items")
+
+    def redo(self):
+        scene = self.scene
+        with bulk_update(scene):
+            if self.group is None:
+                self.group = Group()
+
+            scene.addItem(self.group)
+            _set_alive(scene, self.group, True)
+
+            for item in self.items:
+                item.setSelected(False)
+            self.group.add_items(self.items)
+            _set_parent(scene, self.items, self.group.row)
+
+            self.group.setSelected(True)
+
+    def undo(self):
+        scene = self.scene
+        with bulk_update(scene):
+            self.group.release_items()
+            _set_parent(scene, self.items, ROOT)
+
+            scene.removeItem(self.group)
+            _set_alive(scene, self.group, False)
+
+    def retained_bytes(self):
+        return COMMAND_BASE_BYTES + ITEM_RETAINED_BYTES + len(self.items) * 8
+
+    def release(self):
+        self.items = []
+        self.group = None
+
+    def affected_items(self):
+        # После отмены у группы нет детей, поэтому они перечислены отдельно
+        return self.items + [self.group]
+
+
+class UngroupCommand(EditorCommand):
+    """Разгруппировка выделенных групп одной командой; дети переходят к родителю группы"""
+
+    def __init__(self, scene, groups):
+        super().__init__()
+        self.scene = scene
+        self.groups = sorted(groups, key=_stacking_key)
+        self.children = [group.childItems() for group in self.groups]
+        # parentItem() без родителя отдает объект во владение Python, поэтому сначала topLevelItem()
+        self.parents = [None if group.topLevelItem() is group else group.parentItem() for group in self.groups]
+        self.setText(f"Ungroup {len(self.groups)} Groups")
+
+    def redo(self):
+        scene = self.scene
+        with bulk_update(scene):
+            for group in self.groups:
+                parent_row = group.table.parent[group.row]
+                children = group.release_items()
+                _set_parent(scene, children, parent_row)
+
+                scene.removeItem(group)
+                _set_alive(scene, group, False)
+
+    def undo(self):
+        scene = self.scene
+        with bulk_update(scene):
+            for group, children, parent in zip(self.groups, self.children, self.parents):
+                if parent is None:
+                    scene.addItem(group)
+                else:
+                    group.setParentItem(parent)
+                _set_alive(scene, group, True)
+
+                group.add_items(children)
+                _set_parent(scene, children, group.row)
+                group.setSelected(True)
+
+    def retained_bytes(self):
+        children = sum(len(children) for children in self.children)
+        return COMMAND_BASE_BYTES + len(self.groups) * ITEM_RETAINED_BYTES + children * 8
+
+    def release(self):
+        self.groups = []
+        self.children = []
+        self.parents = []
+
+    def affected_items(self):
+        return self.groups + [child for children in self.children for child in children]
+
+
+class BulkStyleCommand(EditorCommand):
+    """
+    Смена стиля у многих фигур за один проход.
+    Старые и новые id стилей хранятся в array: 8 байт на фигуру вместо команды на каждую.
+    """
+
+    def __init__(self, items, text):
+        super().__init__()
+        self.items = list(shape_leaves(items))
+        self.old_styles = array('I', (item.style_id for item in self.items))
+
+        # Разных стилей единицы, поэтому новый id считается один раз на старый
+        restyled = {style_id: self.restyle(style_id) for style_id in set(self.old_styles)}
+        self.new_styles = array('I', (restyled[style_id] for style_id in self.old_styles))
+
+        self.setText(text)
+
+    @abstractmethod
+    def restyle(self, style_id: int) -> int:
+        """id стиля, в который переходит фигура со стилем style_id"""
+        pass
+
+    def _apply(self, styles, previous):
+        if not self.items:
+            return
+
+        scene = self.items[0].scene()
+        with bulk_update(scene):
+            for item, style_id in zip(self.items, styles):
+                item.set_style(style_id)
+            self.after_apply(scene, styles, previous)
+
+    def after_apply(self, scene, styles, previous):
+        """Доработка после смены стилей: styles - новые id, previous - прежние"""
+        pass
+
+    def redo(self):
+        self._apply(self.new_styles, self.old_styles)
+
+    def undo(self):
+        self._apply(self.old_styles, self.new_styles)
+
+    def merge(self, other):
+        if not _same_items(self.items, other.items):
+            return False
+        self.new_styles = other.new_styles
+        self.setText(other.text())
+        return True
+
+    def is_noop(self):
+        return self.new_styles == self.old_styles
+
+    def retained_bytes(self):
+        # Ссылка на фигуру в списке + два id стилей
+        return COMMAND_BASE_BYTES + len(self.items) * (8 + 2 * self.old_styles.itemsize)
+
+    def release(self):
+        self.items = []
+        self.old_styles = self.new_styles = array('I')
+
+    def affected_items(self):
+        return self.items
+
+
+class BulkChangeColorCommand(BulkStyleCommand):
+    merge_id = MERGE_BULK_COLOR
+
+    def __init__(self, items, new_color):
+        self.new_color = new_color
+        super().__init__(items, f"Change Color to {new_color}")
+
+    def restyle(self, style_id):
+        return STYLE_TABLE.intern(self.new_color, STYLE_TABLE.width(style_id))
+
+
+class BulkChangeWidthCommand(BulkStyleCommand):
+    merge_id = MERGE_BULK_WIDTH
+
+    def __init__(self, items, new_width):
+        self.new_width = new_width
+        super().__init__(items, f"Change Width to {new_width}")
+
+    def restyle(self, style_id):
+        return STYLE_TABLE.intern(STYLE_TABLE.color(style_id), self.new_width)
+
+    def after_apply(self, scene, styles, previous):
+        # Толщина меняет габариты фигуры в индексе на разницу половин толщин
+        width = STYLE_TABLE.width
+        for item, style_id, old_style_id in zip(self.items, styles, previous):
+            if style_id != old_style_id:
+                inflate_item(scene, item, (width(style_id) - width(old_style_id)) / 2)
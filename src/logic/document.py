@@ -0,0 +1,523 @@
+from array import array
+
+from PySide6.QtGui import QColor, QPen
+
+from src.constants import (
+    TYPE_LINE, TYPE_RECT, TYPE_ELLIPSE, TYPE_POLYLINE, TYPE_GROUP, DEFAULT_COLOR, DEFAULT_STROKE_WIDTH
+)
+
+# Порядок колонок координат для каждого типа фигур
+SHAPE_FIELDS = {
+    TYPE_LINE: ("x1", "y1", "x2", "y2"),
+    TYPE_RECT: ("x", "y", "w", "h"),
+    TYPE_ELLIPSE: ("x", "y", "w", "h"),
+    TYPE_POLYLINE: ("x", "y", "w", "h"),  # габариты вершин
+}
+
+# Типы, чьи вершины лежат в пуле таблицы (ShapeTable.points), а колонки координат - их габариты
+POINT_TYPES = {TYPE_POLYLINE}
+
+# Колонки пула вершин: первая вершина строки, число вершин, сам пул (x, y подряд)
+POINT_COLUMNS = ("start", "count", "points")
+
+# Строка без родителя (лежит прямо на сцене)
+ROOT = -1
+
+
+class StyleTable:
+    """
+    Интернированная таблица стилей: каждая уникальная пара (цвет, толщина)
+    хранится один раз, фигуры ссылаются на нее по id.
+    Перо стиля тоже одно на всех: QPen разделяет данные между копиями.
+    """
+
+    def __init__(self):
+        self._colors = []
+        self._widths = []
+        self._ids = {}
+        self._names = {}
+        self._pens = {}
+
+        # id 0 - стиль по умолчанию
+        self.intern(DEFAULT_COLOR, DEFAULT_STROKE_WIDTH)
+
+    def __len__(self):
+        return len(self._colors)
+
+    def _normalize(self, color: str) -> str:
+        name = self._names.get(color)
+        if name is None:
+            name = QColor(color).name()
+            self._names[color] = name
+        return name
+
+    def intern(self, color: str, width: int) -> int:
+        key = (self._normalize(color), int(width))
+
+        style_id = self._ids.get(key)
+        if style_id is None:
+            style_id = len(self._colors)
+            self._colors.append(key[0])
+            self._widths.append(key[1])
+            self._ids[key] = style_id
+
+        return style_id
+
+    def color(self, style_id: int) -> str:
+        return self._colors[style_id]
+
+    def width(self, style_id: int) -> int:
+        return self._widths[style_id]
+
+    def pen(self, style_id: int) -> QPen:
+        # id стилей не переиспользуются, поэтому перо можно кэшировать навсегда
+        pen = self._pens.get(style_id)
+        if pen is None:
+            pen = self._pens[style_id] = QPen(QColor(self._colors[style_id]))
+            pen.setWidth(self._widths[style_id])
+        return pen
+
+    def export(self, style_ids) -> list:
+        """Таблица стилей для файла: [[цвет, толщина], ...] в порядке style_ids"""
+        return [[self._colors[style_id], self._widths[style_id]] for style_id in style_ids]
+
+    def intern_all(self, entries) -> list:
+        """Обратное к export: id стилей процесса для строк таблицы из файла"""
+        return [self.intern(color, width) for color, width in entries]
+
+
+# Общая таблица стилей процесса
+STYLE_TABLE = StyleTable()
+
+
+def points_bounds(points) -> tuple:
+    """Габариты вершин (x, y подряд) в колонках прямоугольника: (x, y, w, h)"""
+    if not points:
+        return 0.0, 0.0, 0.0, 0.0
+
+    xs, ys = points[0::2], points[1::2]
+    x0, y0 = min(xs), min(ys)
+    return x0, y0, max(xs) - x0, max(ys) - y0
+
+
+class ShapeTable:
+    """
+    Колонки одного типа фигур: координаты, позиция, стиль, z-порядок, родитель.
+
+    У ломаных (POINT_TYPES) вершины всех строк лежат подряд в одном array('d') points,
+    строка ссылается на свой отрезок пула колонками start и count. Отрезки не меняются:
+    новые вершины дописываются в конец пула, поэтому старый отрезок можно вернуть (отмена).
+    """
+
+    def __init__(self, shape_type: str, document=None):
+        self.shape_type = shape_type
+        self.fields = SHAPE_FIELDS[shape_type]
+        self.document = document
+
+        self.has_points = shape_type in POINT_TYPES
+        if self.has_points:
+            self.start = array('Q')
+            self.count = array('I')
+            self.points = array('d')
+
+        self.columns = {name: array('d') for name in self.fields}
+        self.pos_x = array('d')
+        self.pos_y = array('d')
+        self.style = array('I')
+        self.z = array('Q')
+        self.parent = array('i')
+        self.alive = array('B')
+
+    def __len__(self):
+        return len(self.alive)
+
+    def append(self, values, style=0, z=0, parent=ROOT, pos=(0.0, 0.0), points=None) -> int:
+        """:param points: вершины ломаной (x, y подряд); для них values не нужны - это габариты"""
+        if self.has_points:
+            points = _packed(points)
+            values = points_bounds(points)
+
+        # Приводим заранее, чтобы ошибка в данных не оставила колонки разной длины
+        values = [float(value) for value in values]
+        pos = (float(pos[0]), float(pos[1]))
+
+        for name, value in zip(self.fields, values):
+            self.columns[name].append(value)
+
+        self.pos_x.append(pos[0])
+        self.pos_y.append(pos[1])
+        self.style.append(style)
+        self.z.append(z)
+        self.parent.append(parent)
+        self.alive.append(1)
+
+        if self.has_points:
+            self.start.append(len(self.points) // 2)
+            self.count.append(len(points) // 2)
+            self.points.extend(points)
+
+        return len(self.alive) - 1
+
+    def values(self, row: int) -> tuple:
+        return tuple(self.columns[name][row] for name in self.fields)
+
+    def set_values(self, row: int, values):
+        for name, value in zip(self.fields, values):
+            self.columns[name][row] = value
+
+    def vertices(self, row: int) -> array:
+        """Вершины ломаной строки row: копия ее отрезка пула, x и y подряд"""
+        start = 2 * self.start[row]
+        return self.points[start:start + 2 * self.count[row]]
+
+    def set_vertices(self, row: int, points):
+        """Новые вершины строки: дописываются в пул, габариты пересчитываются"""
+        points = _packed(points)
+        if self.document is None and len(self) == 1:
+            # Фигура вне документа (предпросмотр) - старый отрезок никому не нужен
+            del self.points[:]
+        self.start[row] = len(self.points) // 2
+        self.count[row] = len(points) // 2
+        self.points.extend(points)
+        self.set_values(row, points_bounds(points))
+
+    def run(self, row: int) -> tuple:
+        """Отрезок пула строки: (start, count)"""
+        return self.start[row], self.count[row]
+
+    def set_run(self, row: int, run):
+        """Возвращает строке отрезок пула, полученный от run() (вершины в пуле не меняются)"""
+        self.start[row], self.count[row] = run
+        self.set_values(row, points_bounds(self.vertices(row)))
+
+    def pack_points(self, rows) -> tuple:
+        """Пул только из вершин rows, без отрезков удаленных и замененных строк: (start, points)"""
+        starts, points = array('Q'), array('d')
+        for row in rows:
+            starts.append(len(points) // 2)
+            points.extend(self.vertices(row))
+        return starts, points
+
+    def copy(self, document=None):
+        table = ShapeTable(self.shape_type, document)
+        table.columns = {name: column[:] for name, column in self.columns.items()}
+        for name in ("pos_x", "pos_y", "style", "z", "parent", "alive"):
+            setattr(table, name, getattr(self, name)[:])
+        if self.has_points:
+            for name in POINT_COLUMNS:
+                setattr(table, name, getattr(self, name)[:])
+        return table
+
+    def bounds(self, row: int) -> tuple:
+        """Габариты фигуры в координатах родителя: (x0, y0, x1, y1), без учета толщины"""
+        a, b, c, d = self.values(row)
+        px, py = self.pos_x[row], self.pos_y[row]
+
+        if self.shape_type == TYPE_LINE:
+            return min(a, c) + px, min(b, d) + py, max(a, c) + px, max(b, d) + py
+
+        return a + px, b + py, a + c + px, b + d + py
+
+
+def _packed(points) -> array:
+    points = array('d', points if points is not None else ())
+    if len(points) % 2:
+        raise ValueError("Odd number of polyline coordinates")
+    return points
+
+
+class GroupTable:
+    """Колонки групп. Координат у группы нет, только позиция и место в дереве."""
+
+    shape_type = TYPE_GROUP
+
+    def __init__(self, document=None):
+        self.document = document
+
+        self.pos_x = array('d')
+        self.pos_y = array('d')
+        self.z = array('Q')
+        self.parent = array('i')
+        self.alive = array('B')
+
+    def __len__(self):
+        return len(self.alive)
+
+    def append(self, z=0, parent=ROOT, pos=(0.0, 0.0)) -> int:
+        self.pos_x.append(pos[0])
+        self.pos_y.append(pos[1])
+        self.z.append(z)
+        self.parent.append(parent)
+        self.alive.append(1)
+
+        return len(self.alive) - 1
+
+    def copy(self, document=None):
+        table = GroupTable(document)
+        for name in ("pos_x", "pos_y", "z", "parent", "alive"):
+            setattr(table, name, getattr(self, name)[:])
+        return table
+
+
+class ShapeDocument:
+    """
+    Колоночное хранилище документа - источник истины о фигурах.
+    Qt-объекты (Shape, Group) лишь отображают строки этих таблиц.
+
+    Фигура адресуется ссылкой ref = (тип, номер строки).
+    Удаление не сдвигает строки, а снимает флаг alive, поэтому ссылки стабильны.
+    """
+
+    def __init__(self):
+        self.tables = {shape_type: ShapeTable(shape_type, self) for shape_type in SHAPE_FIELDS}
+        self.groups = GroupTable(self)
+        self._next_z = 0
+
+    def __len__(self):
+        """Количество живых примитивов (без групп)"""
+        return sum(sum(table.alive) for table in self.tables.values())
+
+    def table(self, kind: str):
+        if kind == TYPE_GROUP:
+            return self.groups
+        return self.tables[kind]
+
+    def all_tables(self) -> list:
+        return list(self.tables.values()) + [self.groups]
+
+    def snapshot(self):
+        """
+        Независимая копия документа (несколько memcpy на колонку).
+        Ее можно читать из фонового потока, пока GUI продолжает менять оригинал.
+        """
+        copy = ShapeDocument()
+        copy.tables = {kind: table.copy(copy) for kind, table in self.tables.items()}
+        copy.groups = self.groups.copy(copy)
+        copy._next_z = self._next_z
+        return copy
+
+    def sync_next_z(self):
+        """Продолжает нумерацию z после таблиц, заполненных напрямую (например, из файла)"""
+        self._next_z = max((max(table.z) + 1 for table in self.all_tables() if len(table)), default=0)
+
+    def _take_z(self) -> int:
+        z = self._next_z
+        self._next_z += 1
+        return z
+
+    def add_shape(self, shape_type, values, color=DEFAULT_COLOR, stroke_width=DEFAULT_STROKE_WIDTH,
+                  pos=(0.0, 0.0), parent=ROOT, points=None) -> tuple:
+        """:param points: вершины ломаной (x, y подряд); values у ломаной не используются"""
+        style = STYLE_TABLE.intern(color, stroke_width)
+        row = self.tables[shape_type].append(values, style, self._take_z(), parent, pos, points)
+        return shape_type, row
+
+    def add_group(self, pos=(0.0, 0.0), parent=ROOT) -> tuple:
+        row = self.groups.append(self._take_z(), parent, pos)
+        return TYPE_GROUP, row
+
+    def add_dict(self, data: dict, parent=ROOT, children=None, styles=None) -> tuple:
+        """
+        Добавляет фигуру (или дерево фигур) из словаря формата to_dict.
+        Qt-объекты при этом не создаются.
+        :param children: если передан словарь, в него дописываются новые строки
+                         в формате children_map() (без полного перебора документа)
+        :param styles: id стилей для ссылок "style" (таблица стилей файла после intern_all)
+        """
+        shape_type = data.get("type")
+        pos = tuple(data.get("pos", (0.0, 0.0)))
+
+        if shape_type == TYPE_GROUP:
+            ref = self.add_group(pos, parent)
+            try:
+                for child_dict in data.get("children", []):
+                    self.add_dict(child_dict, ref[1], children, styles)
+            except Exception:
+                # Недостроенная группа вместе с детьми выпадает из дерева
+                self.groups.alive[ref[1]] = 0
+                raise
+        else:
+            ref = self._add_primitive_dict(data, pos, parent, styles)
+
+        if children is not None:
+            children.setdefault(parent, []).append(ref)
+        return ref
+
+    def _add_primitive_dict(self, data: dict, pos, parent, styles=None) -> tuple:
+        shape_type = data.get("type")
+
+        if shape_type not in SHAPE_FIELDS:
+            raise ValueError(f"Unknown type: {shape_type}")
+
+        props = data.get("props", {})
+        if shape_type in POINT_TYPES:
+            values, points = None, props["points"]
+        else:
+            values, points = [props[name] for name in SHAPE_FIELDS[shape_type]], None
+
+        if "style" in data:
+            # Ссылка на таблицу стилей файла вместо цвета и толщины в каждой фигуре
+            style = styles[data["style"]]
+            row = self.tables[shape_type].append(values, style, self._take_z(), parent, pos, points)
+            return shape_type, row
+
+        return self.add_shape(
+            shape_type, values,
+            props.get("color", DEFAULT_COLOR),
+            props.get("stroke_width", DEFAULT_STROKE_WIDTH),
+            pos, parent, points
+        )
+
+    @classmethod
+    def from_dicts(cls, shapes: list, styles=None):
+        """:param styles: таблица стилей файла [[цвет, толщина], ...], на которую ссылаются фигуры"""
+        document = cls()
+        style_ids = STYLE_TABLE.intern_all(styles or [])
+        for data in shapes:
+            document.add_dict(data, styles=style_ids)
+        return document
+
+    def adopt(self, item, parent=ROOT) -> tuple:
+        """
+        Переносит данные Qt-объекта (созданного вне документа) в таблицы
+        документа и перепривязывает объект к новым строкам.
+        """
+        source = item.table
+
+        if source.document is self:
+            return item.ref
+
+        pos = (item.pos().x(), item.pos().y())
+
+        if source.shape_type == TYPE_GROUP:
+            ref = self.add_group(pos, parent)
+            item.bind(self.groups, ref[1])
+
+            for child in item.childItems():
+                if hasattr(child, "bind"):
+                    self.adopt(child, ref[1])
+            return ref
+
+        table = self.tables[source.shape_type]
+        row = table.append(
+            source.values(item.row), source.style[item.row], self._take_z(), parent, pos,
+            source.vertices(item.row) if source.has_points else None
+        )
+        item.bind(table, row)
+        return source.shape_type, row
+
+    def set_alive(self, ref, alive: bool):
+        kind, row = ref
+        self.table(kind).alive[row] = 1 if alive else 0
+
+    def set_parent(self, ref, parent_row: int):
+        kind, row = ref
+        self.table(kind).parent[row] = parent_row
+
+    def offset(self, parent_row: int) -> tuple:
+        """Суммарная позиция группы parent_row и всех ее предков: (dx, dy)"""
+        groups = self.groups
+        dx = dy = 0.0
+
+        while parent_row != ROOT:
+            dx += groups.pos_x[parent_row]
+            dy += groups.pos_y[parent_row]
+            parent_row = groups.parent[parent_row]
+
+        return dx, dy
+
+    def scene_bounds(self, ref) -> tuple:
+        """Габариты примитива в координатах сцены (с учетом групп-предков), без учета толщины"""
+        kind, row = ref
+        table = self.tables[kind]
+        dx, dy = self.offset(table.parent[row])
+        x0, y0, x1, y1 = table.bounds(row)
+        return x0 + dx, y0 + dy, x1 + dx, y1 + dy
+
+    def children_map(self) -> dict:
+        """Живые строки, разложенные по родителям и отсортированные по z"""
+        children = {}
+
+        for kind, table in list(self.tables.items()) + [(TYPE_GROUP, self.groups)]:
+            alive, parent, z = table.alive, table.parent, table.z
+            for row in range(len(alive)):
+                if alive[row]:
+                    children.setdefault(parent[row], []).append((z[row], kind, row))
+
+        for refs in children.values():
+            refs.sort()
+
+        return {
+            parent: [(kind, row) for _, kind, row in refs]
+            for parent, refs in children.items()
+        }
+
+    def reachable_rows(self) -> dict:
+        """
+        Строки, видимые из корня (живые и без удаленных предков): {тип: номера строк по возрастанию}.
+        Если удаленных строк нет, возвращает range без перебора дерева.
+        """
+        tables = self.all_tables()
+
+        if all(table.alive.count(0) == 0 for table in tables):
+            return {table.shape_type: range(len(table)) for table in tables}
+
+        rows = {table.shape_type: [] for table in tables}
+        children = self.children_map()
+        stack = [ROOT]
+
+        while stack:
+            for kind, row in children.get(stack.pop(), []):
+                rows[kind].append(row)
+                if kind == TYPE_GROUP:
+                    stack.append(row)
+
+        for kind_rows in rows.values():
+            kind_rows.sort()
+
+        return rows
+
+    def roots(self, children=None) -> list:
+        if children is None:
+            children = self.children_map()
+        return children.get(ROOT, [])
+
+    def ref_to_dict(self, ref, children=None, style_ids=None) -> dict:
+        """
+        :param style_ids: словарь id стиля -> номер в таблице стилей файла; если передан,
+                          фигуры ссылаются на стиль ("style"), а новые стили дописываются в него
+        """
+        if children is None:
+            children = self.children_map()
+
+        kind, row = ref
+        table = self.table(kind)
+        pos = [table.pos_x[row], table.pos_y[row]]
+
+        if kind == TYPE_GROUP:
+            return {
+                "type": TYPE_GROUP,
+                "pos": pos,
+                "children": [self.ref_to_dict(child, children, style_ids) for child in children.get(row, [])]
+            }
+
+        if table.has_points:
+            # Вершины плоским списком [x0, y0, x1, y1, ...]: вдвое меньше скобок, чем список пар
+            props = {"points": table.vertices(row).tolist()}
+        else:
+            props = dict(zip(table.fields, table.values(row)))
+        style = table.style[row]
+
+        if style_ids is not None:
+            index = style_ids.setdefault(style, len(style_ids))
+            return {"type": kind, "pos": pos, "props": props, "style": index}
+
+        props["color"] = STYLE_TABLE.color(style)
+        props["stroke_width"] = STYLE_TABLE.width(style)
+
+        return {"type": kind, "pos": pos, "props": props}
+
+    def to_dicts(self, style_ids=None) -> list:
+        """Дерево фигур в формате to_dict, в порядке отрисовки (style_ids - см. ref_to_dict)"""
+        children = self.children_map()
+        return [self.ref_to_dict(ref, children, style_ids) for ref in self.roots(children)]
@@ -1,8 +1,17 @@
-from src.constants import TYPE_LINE, TYPE_RECT, TYPE_ELLIPSE, TYPE_GROUP, DEFAULT_COLOR
+from src.constants import TYPE_LINE, TYPE_RECT, TYPE_ELLIPSE, TYPE_POLYLINE, TYPE_GROUP
 from src.logic.Ellipse import Ellipse
 from src.logic.Group import Group
 from src.logic.Line import Line
+from src.logic.Polyline import Polyline
 from src.logic.Rectangle import Rectangle
+from src.logic.document import ShapeDocument, STYLE_TABLE
+
+SHAPE_CLASSES = {
+    TYPE_LINE: Line,
+    TYPE_RECT: Rectangle,
+    TYPE_ELLIPSE: Ellipse,
+    TYPE_POLYLINE: Polyline,
+}
 
 
 class ShapeFactory:
@@ -13,6 +22,8 @@ class ShapeFactory:
 
         if shape_type == TYPE_LINE:
             return Line(x1, y1, x2, y2, color)
+        if shape_type == TYPE_POLYLINE:
+            return Polyline((x1, y1, x2, y2), color)
 
         x = min(x1, x2)
         y = min(y1, y2)
@@ -27,56 +38,66 @@ class ShapeFactory:
             raise ValueError(f"Неизвестный тип фигуры: {shape_type}")
 
     @staticmethod
-    def from_dict(data: dict):
+    def from_dict(data: dict, document=None):
         """
         Восстанавливает объект (или дерево объектов) из словаря.
+        Данные сначала попадают в документ, затем по ним строится Qt-объект.
         """
-        shape_type = data.get("type")
+        if document is None:
+            document = ShapeDocument()
 
-        if shape_type == TYPE_GROUP:
-            return ShapeFactory._create_group(data)
-        elif shape_type in [TYPE_RECT, TYPE_LINE, TYPE_ELLIPSE]:
-            return ShapeFactory._create_primitive(data)
-        else:
-            raise ValueError(f"Unknown type: {shape_type}")
+        ref = document.add_dict(data)
+
+        return ShapeFactory.from_document(document, ref)
 
     @staticmethod
-    def _create_primitive(data: dict):
-        props = data.get("props", {})
-        shape_type = data.get("type")
+    def from_document(document, ref, children=None):
+        """
+        Создает Qt-объект (представление) для строки документа.
+        :param children: готовая карта детей (document.children_map()), чтобы не строить ее заново
+        """
+        kind, row = ref
 
-        if shape_type == TYPE_RECT:
-            color = props.get("color", DEFAULT_COLOR)
-            obj = Rectangle(props['x'], props['y'], props['w'], props['h'], color)
+        if kind == TYPE_GROUP:
+            return ShapeFactory._create_group(document, row, children)
+        elif kind in SHAPE_CLASSES:
+            return ShapeFactory._create_primitive(document, kind, row)
+        else:
+            raise ValueError(f"Unknown type: {kind}")
 
-        elif shape_type == TYPE_LINE:
-            color = props.get("color", DEFAULT_COLOR)
-            obj = Line(props['x1'], props['y1'], props['x2'], props['y2'], color)
+    @staticmethod
+    def _create_primitive(document, kind, row):
+        table = document.tables[kind]
+        style = table.style[row]
 
-        elif shape_type == TYPE_ELLIPSE:
-            color = props.get("color", DEFAULT_COLOR)
-            obj = Ellipse(props['x'], props['y'], props['w'], props['h'], color)
+        # Вершины ломаной фигура читает из пула таблицы сама
+        values = () if table.has_points else table.values(row)
+        obj = SHAPE_CLASSES[kind](
+            *values,
+            color=STYLE_TABLE.color(style), stroke_width=STYLE_TABLE.width(style),
+            table=table, row=row
+        )
 
-        if "pos" in data:
-            obj.setPos(data["pos"][0], data["pos"][1])
+        obj.setPos(table.pos_x[row], table.pos_y[row])
 
         return obj
 
     @staticmethod
-    def _create_group(data: dict):
-        group = Group()
-
-        x, y = data.get("pos", [0, 0])
-        group.setPos(x, y)
+    def _create_group(document, row, children=None):
+        if children is None:
+            children = document.children_map()
 
-        children_data = data.get("children", [])
-        for child_dict in children_data:
-            child_item = ShapeFactory.from_dict(child_dict)
+        groups = document.groups
+        group = Group(groups, row)
 
-            group.addToGroup(child_item)
+        child_items = [
+            ShapeFactory.from_document(document, child_ref, children)
+            for child_ref in children.get(row, [])
+        ]
 
-            if "pos" in child_dict:
-                cx, cy = child_dict["pos"]
-                child_item.setPos(cx, cy)
+        # Пока группа в начале координат, локальные позиции детей совпадают с положением
+        # в сцене, и add_items не нужно их пересчитывать; сдвиг группы переносит детей целиком
+        group.add_items(child_items)
+        group.setPos(groups.pos_x[row], groups.pos_y[row])
 
-        return group
\ No newline at end of file
+        return group
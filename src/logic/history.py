@@ -0,0 +1,113 @@
+from PySide6.QtGui import QUndoStack
+from shiboken6 import Shiboken
+
+from src.constants import UNDO_MEMORY_BUDGET, UNDO_STACK_LIMIT, COMMAND_BASE_BYTES
+
+
+def command_bytes(command) -> int:
+    """Оценка памяти команды вместе с вложенными (макрос - сумма своих команд)"""
+    estimate = getattr(command, "retained_bytes", None)
+    size = estimate() if estimate is not None else COMMAND_BASE_BYTES
+
+    for i in range(command.childCount()):
+        size += command_bytes(command.child(i))
+    return size
+
+
+def release_command(command):
+    """Отпускает данные команды и вложенных; сама команда становится obsolete"""
+    release = getattr(command, "release", None)
+    if release is not None:
+        release()
+
+    for i in range(command.childCount()):
+        release_command(command.child(i))
+
+    command.setObsolete(True)
+
+
+class UndoBudgetStack(QUndoStack):
+    """
+    QUndoStack, ограниченный не числом команд, а памятью, которую они держат.
+
+    После каждого изменения стека считается сумма оценок (command_bytes); пока она
+    больше бюджета, самые старые команды вытесняются: их данные отпускаются, а сами
+    они помечаются obsolete. Такую команду QUndoStack при отмене удаляет, не вызывая undo,
+    поэтому история просто заканчивается раньше - состояние документа не расходится с ней.
+    Верхняя команда не вытесняется никогда, даже если одна больше бюджета.
+
+    Число команд дополнительно ограничено UNDO_STACK_LIMIT: оценка пересчитывается
+    на каждое изменение стека и не должна расти без предела.
+    """
+
+    def __init__(self, parent=None, budget=UNDO_MEMORY_BUDGET, limit=UNDO_STACK_LIMIT):
+        super().__init__(parent)
+        self.budget = budget
+        self.setUndoLimit(limit)
+
+        # Оценки по адресу C++-команды, чтобы макросы с тысячами команд не пересчитывались.
+        # Адрес удаленной команды может достаться новой, поэтому вместе с ним сверяются текст и число детей
+        self._sizes = {}
+        self._evicted = 0
+        self._sweeping = False
+
+        self.indexChanged.connect(self._on_index_changed)
+
+    def retained_bytes(self) -> int:
+        return sum(self._command_sizes())
+
+    def _command_sizes(self) -> list:
+        sizes = {}
+        result = []
+
+        for i in range(self.count()):
+            command = self.command(i)
+            key = Shiboken.getCppPointer(command)[0]
+            signature = (command.text(), command.childCount())
+
+            cached = self._sizes.get(key)
+            if cached is not None and cached[0] == signature:
+                size = cached[1]
+            else:
+                size = command_bytes(command)
+
+            sizes[key] = (signature, size)
+            result.append(0 if command.isObsolete() else size)
+
+        self._sizes = sizes
+        return result
+
+    def _on_index_changed(self, index):
+        if self._sweeping:
+            return
+
+        self._enforce_budget()
+        self._sweep()
+
+    def _enforce_budget(self):
+        sizes = self._command_sizes()
+        total = sum(sizes)
+
+        # Не трогаем текущую команду и все, что выше (их можно повторить)
+        last = self.index() - 1
+        for i in range(last):
+            if total <= self.budget:
+                break
+            if sizes[i]:
+                release_command(self.command(i))
+                total -= sizes[i]
+                self._evicted += 1
+
+    def _sweep(self):
+        """Снимает вытесненные команды с вершины истории отмены, чтобы Undo не делал пустых шагов"""
+        self._sweeping = True
+        try:
+            while self.index() > 0 and self.command(self.index() - 1).isObsolete():
+                self.undo()
+        finally:
+            self._sweeping = False
+
+    @property
+    def evicted_count(self) -> int:
+        """Сколько команд вытеснено за время жизни стека (для статистики и тестов)"""
+        return self._evicted
@@ -1,5 +1,52 @@
 import json
 import os
+import struct
+import tempfile
+from contextlib import contextmanager
+
+from src.constants import DEFAULT_SCENE_WIDTH, DEFAULT_SCENE_HEIGHT
+from src.logic.document import ShapeDocument, STYLE_TABLE
+from src.logic.profiling import profiled
+from src.logic.vec_format import read_vec
+
+
+# Права нового файла проекта (временный файл создается с 0600)
+NEW_FILE_MODE = 0o644
+
+
+@contextmanager
+def atomic_write(filename: str):
+    """
+    Запись через временный файл в той же папке: fsync, затем атомарный os.replace.
+    При сбое на месте filename остается прежний файл, а не обрезанный.
+    Выдает путь временного файла, который нужно записать внутри блока with.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(prefix=".~", suffix=".tmp", dir=directory)
+    os.close(fd)
+
+    try:
+        yield tmp_path
+
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+
+        mode = os.stat(filename).st_mode if os.path.exists(filename) else NEW_FILE_MODE
+        os.chmod(tmp_path, mode & 0o777)
+        os.replace(tmp_path, filename)
+
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Фиксируем и саму запись каталога о переименовании (где это поддерживается)
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
 
 
 class FileManager:
@@ -15,8 +62,9 @@ class FileManager:
         :param data: Готовый словарь с данными проекта
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            with atomic_write(filename) as tmp_path:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=4, ensure_ascii=False)
 
         except OSError as e:
             raise IOError(f"Не удалось записать файл: {e}")
@@ -32,4 +80,46 @@ class FileManager:
         except json.JSONDecodeError:
             raise ValueError("Файл поврежден или имеет неверный формат")
         except OSError as e:
-            raise IOError(f"Ошибка чтения файла: {e}")
\ No newline at end of file
+            raise IOError(f"Ошибка чтения файла: {e}")
+
+    @staticmethod
+    @profiled("load.document")
+    def load_document(filename: str):
+        """
+        Загружает проект любого поддерживаемого формата в документ.
+        :return: (документ, {"width": ..., "height": ...}, число пропущенных фигур)
+        """
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"Файл не найден: {filename}")
+
+        if filename.lower().endswith(".vec"):
+            try:
+                document, scene_info = read_vec(filename)
+            except (struct.error, KeyError):
+                raise ValueError("Файл поврежден или имеет неверный формат")
+            except OSError as e:
+                raise IOError(f"Ошибка чтения файла: {e}")
+            return document, scene_info, 0
+
+        data = FileManager.load_project(filename)
+
+        if "version" not in data or "shapes" not in data:
+            raise ValueError("Некорректный формат файла")
+
+        scene_info = data.get("scene", {})
+        scene_info = {
+            "width": scene_info.get("width", DEFAULT_SCENE_WIDTH),
+            "height": scene_info.get("height", DEFAULT_SCENE_HEIGHT),
+        }
+
+        document = ShapeDocument()
+        errors_count = 0
+        styles = STYLE_TABLE.intern_all(data.get("styles", []))
+
+        for shape_dict in data["shapes"]:
+            try:
+                document.add_dict(shape_dict, styles=styles)
+            except Exception:
+                errors_count += 1
+
+        return document, scene_info, errors_count
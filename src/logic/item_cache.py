@@ -0,0 +1,179 @@
+"""
+Адаптивный кэш растра отдельных Qt-объектов фигур.
+
+Без кэша каждая перерисовка заново растеризует путь каждой видимой фигуры
+(сглаженные эллипсы - дороже всего). ItemCache включает кэш у фигур, которые
+не менялись CACHE_IDLE_MS:
+    DeviceCoordinateCache - у отдельных фигур: растр в пикселях экрана, точный и
+        переживающий прокрутку и перемещение, пересоздается при смене масштаба;
+    ItemCoordinateCache - у детей больших групп (от CACHE_GROUP_MIN_CHILDREN):
+        растр в координатах фигуры переживает и масштаб, группа двигается целиком.
+Кэш сбрасывается, как только фигуру начинают править (set_geometry, set_active_color,
+set_stroke_width), и возвращается после нового простоя.
+
+Память пиксмапов ограничена CACHE_MEMORY_LIMIT: при превышении кэш выключается у фигур,
+закэшированных давнее всех (LRU). Сами пиксмапы хранит QPixmapCache, его лимит
+поднимается до того же значения. Кэш растра у QGraphicsItemGroup бесполезен
+(группа рисует только рамку выделения), поэтому у групп кэшируются дети.
+"""
+import time
+import weakref
+from collections import OrderedDict
+
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QPixmapCache
+from PySide6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+
+from src.constants import CACHE_IDLE_MS, CACHE_MEMORY_LIMIT, CACHE_MAX_ITEM_PIXELS, CACHE_GROUP_MIN_CHILDREN
+
+NO_CACHE = QGraphicsItem.CacheMode.NoCache
+DEVICE_CACHE = QGraphicsItem.CacheMode.DeviceCoordinateCache
+ITEM_CACHE = QGraphicsItem.CacheMode.ItemCoordinateCache
+
+BYTES_PER_PIXEL = 4
+
+
+def _leaves(items):
+    """Фигуры объектов: сами фигуры или все фигуры внутри групп"""
+    for item in items:
+        children = item.childItems()
+        if children:
+            yield from _leaves(children)
+        elif hasattr(item, "set_style"):
+            yield item
+
+
+class ItemCache:
+    """
+    Политика кэша для фигур одной сцены. Объекты хранятся по слабым ссылкам:
+    удаленная фигура просто выпадает из учета при следующем проходе.
+    """
+
+    def __init__(self, scene, limit=CACHE_MEMORY_LIMIT):
+        self.scene = scene
+        self.enabled = True
+        self.limit = limit
+        self.bytes = 0
+
+        self._cached = OrderedDict()  # id(объекта) -> (weakref, байт), давние в начале
+        self._idle = {}  # id(объекта) -> (weakref, время последней правки)
+
+        self._timer = QTimer(scene)
+        self._timer.setInterval(CACHE_IDLE_MS // 2)
+        self._timer.timeout.connect(self.cache_idle)
+
+        # QPixmapCache по умолчанию держит 10 МБ на весь процесс и вытесняет сам, без учета фигур
+        if QPixmapCache.cacheLimit() * 1024 < limit:
+            QPixmapCache.setCacheLimit(limit // 1024)
+
+    def __len__(self):
+        return len(self._cached)
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        if not enabled:
+            self.reset()
+
+    def reset(self):
+        """Выключает кэш у всех фигур и забывает их (новый документ, отключение политики)"""
+        self._timer.stop()
+        for ref, _ in self._cached.values():
+            item = ref()
+            if item is not None:
+                item.setCacheMode(NO_CACHE)
+
+        self._cached.clear()
+        self._idle.clear()
+        self.bytes = 0
+
+    def track(self, items):
+        """Новые на сцене объекты: фигуры получат кэш после простоя; уже закэшированные - самые свежие"""
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        for item in _leaves(items):
+            key = id(item)
+            entry = self._cached.get(key)
+            # id удаленного объекта мог достаться новому, поэтому сверяется и сам объект
+            if entry is not None and entry[0]() is item:
+                self._cached.move_to_end(key)
+            else:
+                self._idle[key] = weakref.ref(item), now
+
+        if self._idle and not self._timer.isActive():
+            self._timer.start()
+
+    def discard(self, items):
+        """Объекты уходят со сцены: растр им больше не нужен"""
+        for item in _leaves(items):
+            self._uncache(item)
+            self._idle.pop(id(item), None)
+
+    def edited(self, item):
+        """Фигуру правят: кэш выключается (иначе растр пересоздается на каждом шаге правки)"""
+        if not self.enabled:
+            return
+
+        self._uncache(item)
+        self._idle[id(item)] = weakref.ref(item), time.monotonic()
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def cache_idle(self):
+        """Включает кэш у фигур, простоявших CACHE_IDLE_MS, и укладывается в лимит памяти"""
+        deadline = time.monotonic() - CACHE_IDLE_MS / 1000
+        lod = self._lod()
+
+        for key, (ref, edited_at) in list(self._idle.items()):
+            if edited_at > deadline:
+                continue
+
+            del self._idle[key]
+            item = ref()
+            if item is not None and item.scene() is self.scene:
+                self._cache(item, lod)
+
+        if not self._idle:
+            self._timer.stop()
+
+        self._evict()
+
+    def _cache(self, item, lod):
+        top = item.topLevelItem()
+        in_big_group = top is not item and len(top.childItems()) >= CACHE_GROUP_MIN_CHILDREN
+        mode = ITEM_CACHE if in_big_group else DEVICE_CACHE
+
+        rect = item.boundingRect()
+        # Растр ItemCoordinateCache - пиксель на единицу фигуры, DeviceCoordinateCache - пиксели экрана
+        scale = 1.0 if mode == ITEM_CACHE else lod
+        pixels = rect.width() * scale * rect.height() * scale
+        if pixels > CACHE_MAX_ITEM_PIXELS:
+            return
+
+        size = int(pixels * BYTES_PER_PIXEL)
+        self._uncache(item)
+        item.setCacheMode(mode)
+        self._cached[id(item)] = weakref.ref(item), size
+        self.bytes += size
+
+    def _uncache(self, item):
+        entry = self._cached.pop(id(item), None)
+        if entry is not None:
+            self.bytes -= entry[1]
+            if entry[0]() is item:
+                item.setCacheMode(NO_CACHE)
+
+    def _evict(self):
+        while self.bytes > self.limit and self._cached:
+            _, (ref, size) = self._cached.popitem(last=False)
+            self.bytes -= size
+            item = ref()
+            if item is not None:
+                item.setCacheMode(NO_CACHE)
+
+    def _lod(self) -> float:
+        views = self.scene.views()
+        if not views:
+            return 1.0
+        return QStyleOptionGraphicsItem.levelOfDetailFromTransform(views[0].transform())
@@ -0,0 +1,599 @@
+"""
+Журнал правок (write-ahead log) для восстановления после сбоя.
+
+Каталог журнала содержит одно поколение:
+    snapshot-NNNNNN.bin - полный снимок документа на момент начала поколения
+    journal-NNNNNN.log  - записи о строках таблиц, измененных после снимка
+
+Снимок: длина заголовка (u32), заголовок JSON (сцена, таблица стилей, список колонок
+с typecode и длиной), затем байты колонок подряд. В снимке все строки, включая удаленные:
+номера строк в записях журнала должны совпадать с номерами в документе.
+
+Записи журнала (little-endian):
+    STYLE - id стиля процесса (u32), толщина (u16), длина (u8), цвет utf-8
+    SHAPE - тип (u8), строка (u32), координаты (f64 x4), pos_x, pos_y (f64),
+            стиль (u32), z (u64), parent (i32), alive (u8)
+    GROUP - строка (u32), pos_x, pos_y (f64), z (u64), parent (i32), alive (u8)
+    POINTS - тип (u8), строка (u32), число вершин (u32), вершины (f64 x, y подряд);
+             идет сразу за SHAPE ломаной (координаты SHAPE у нее - габариты вершин)
+
+Запись хранит состояние строки целиком, поэтому повтор журнала идемпотентен:
+строка с номером, равным длине таблицы, добавляется, меньшим - перезаписывается.
+Оборванный при сбое хвост журнала отбрасывается.
+
+Каталог поколений принадлежит одному окну (JournalSession): в общем каталоге восстановления
+у каждого окна свой подкаталог session-<pid>-<время>, который держит блокировка его процесса.
+"""
+import json
+import os
+import shutil
+import struct
+import sys
+import threading
+import time
+from array import array
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from PySide6.QtCore import QObject
+
+from src.constants import (
+    TYPE_GROUP, JOURNAL_FLUSH_MS, JOURNAL_COMPACT_BYTES, JOURNAL_SNAPSHOT_ROWS
+)
+from src.logic.commands import command_items
+from src.logic.document import ShapeDocument, STYLE_TABLE, SHAPE_FIELDS, POINT_COLUMNS
+from src.logic.io_manager import atomic_write
+
+OP_STYLE = 1
+OP_SHAPE = 2
+OP_GROUP = 3
+OP_POINTS = 4
+
+STYLE_RECORD = struct.Struct("<BIHB")
+SHAPE_RECORD = struct.Struct("<BBI4d2dIQiB")
+GROUP_RECORD = struct.Struct("<BI2dQiB")
+POINTS_RECORD = struct.Struct("<BBII")
+SNAPSHOT_HEADER = struct.Struct("<I")
+
+SHAPE_KINDS = list(SHAPE_FIELDS)
+SHAPE_CODES = {kind: code for code, kind in enumerate(SHAPE_KINDS)}
+
+SNAPSHOT_PREFIX = "snapshot-"
+JOURNAL_PREFIX = "journal-"
+SESSION_PREFIX = "session-"
+LOCK_NAME = "owner.lock"  # блокировку держит процесс-владелец сеанса; внутри - его PID
+
+# Общие колонки таблиц, в порядке записи в снимок
+SHAPE_COLUMNS = ("pos_x", "pos_y", "style", "z", "parent", "alive")
+GROUP_COLUMNS = ("pos_x", "pos_y", "z", "parent", "alive")
+
+
+def _snapshot_path(directory, generation):
+    return os.path.join(directory, f"{SNAPSHOT_PREFIX}{generation:06d}.bin")
+
+
+def _journal_path(directory, generation):
+    return os.path.join(directory, f"{JOURNAL_PREFIX}{generation:06d}.log")
+
+
+def _generations(directory) -> list:
+    """Номера поколений, у которых есть снимок, по возрастанию"""
+    if not os.path.isdir(directory):
+        return []
+
+    result = []
+    for name in os.listdir(directory):
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(".bin"):
+            try:
+                result.append(int(name[len(SNAPSHOT_PREFIX):-4]))
+            except ValueError:
+                pass
+    return sorted(result)
+
+
+def _table_columns(document):
+    """(тип, имя колонки, array) для всех колонок документа в фиксированном порядке"""
+    for kind, table in document.tables.items():
+        for name in table.fields:
+            yield kind, name, table.columns[name]
+        for name in SHAPE_COLUMNS:
+            yield kind, name, getattr(table, name)
+        if table.has_points:
+            for name in POINT_COLUMNS:
+                yield kind, name, getattr(table, name)
+
+    for name in GROUP_COLUMNS:
+        yield TYPE_GROUP, name, getattr(document.groups, name)
+
+
+def _column_bytes(column) -> bytes:
+    if sys.byteorder == "big":
+        column = column[:]
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_snapshot(filename: str, document, scene_info: dict, styles: list):
+    """Пишет снимок документа (см. формат в начале модуля); styles - STYLE_TABLE.export всех id"""
+    columns = list(_table_columns(document))
+    header = json.dumps({
+        "scene": scene_info,
+        "styles": styles,
+        "columns": [[kind, name, column.typecode, len(column)] for kind, name, column in columns],
+    }).encode("utf-8")
+
+    with atomic_write(filename) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(len(header)))
+            f.write(header)
+            for _, _, column in columns:
+                f.write(_column_bytes(column))
+
+
+def read_snapshot(filename: str) -> tuple:
+    """Обратное к write_snapshot: (документ, сцена, id стилей процесса для id из снимка)"""
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    (size,) = SNAPSHOT_HEADER.unpack_from(data)
+    offset = SNAPSHOT_HEADER.size
+    header = json.loads(data[offset:offset + size].decode("utf-8"))
+    offset += size
+
+    document = ShapeDocument()
+    for kind, name, typecode, length in header["columns"]:
+        column = array(typecode)
+        end = offset + length * column.itemsize
+        column.frombytes(data[offset:end])
+        if len(column) != length:
+            raise ValueError(f"Снимок обрезан: колонка {kind}.{name}")
+        if sys.byteorder == "big":
+            column.byteswap()
+        offset = end
+
+        table = document.table(kind)
+        if name in SHAPE_COLUMNS or name in GROUP_COLUMNS or name in POINT_COLUMNS:
+            setattr(table, name, column)
+        else:
+            table.columns[name] = column
+
+    style_map = STYLE_TABLE.intern_all(header["styles"])
+    for table in document.tables.values():
+        table.style = array('I', (style_map[style_id] for style_id in table.style))
+
+    return document, header["scene"], dict(enumerate(style_map))
+
+
+def replay(document, data: bytes, style_map: dict) -> int:
+    """
+    Применяет записи журнала к документу из снимка.
+    Возвращает число примененных записей; оборванная или испорченная запись и все
+    после нее отбрасываются (сбой посреди записи).
+    """
+    offset = 0
+    applied = 0
+    size = len(data)
+
+    while offset < size:
+        op = data[offset]
+
+        if op == OP_STYLE and offset + STYLE_RECORD.size <= size:
+            _, style_id, width, length = STYLE_RECORD.unpack_from(data, offset)
+            end = offset + STYLE_RECORD.size + length
+            if end > size:
+                break
+            color = data[offset + STYLE_RECORD.size:end].decode("utf-8")
+            style_map[style_id] = STYLE_TABLE.intern(color, width)
+
+        elif op == OP_SHAPE and offset + SHAPE_RECORD.size <= size:
+            _, code, row, a, b, c, d, px, py, style_id, z, parent, alive = SHAPE_RECORD.unpack_from(data, offset)
+            if code >= len(SHAPE_KINDS) or style_id not in style_map:
+                break
+            table = document.tables[SHAPE_KINDS[code]]
+            if row > len(table):
+                break
+            if row == len(table):
+                table.append((a, b, c, d))
+            table.set_values(row, (a, b, c, d))
+            table.pos_x[row], table.pos_y[row] = px, py
+            table.style[row] = style_map[style_id]
+            table.z[row], table.parent[row], table.alive[row] = z, parent, alive
+            end = offset + SHAPE_RECORD.size
+
+        elif op == OP_GROUP and offset + GROUP_RECORD.size <= size:
+            _, row, px, py, z, parent, alive = GROUP_RECORD.unpack_from(data, offset)
+            table = document.groups
+            if row > len(table):
+                break
+            if row == len(table):
+                table.append()
+            table.pos_x[row], table.pos_y[row] = px, py
+            table.z[row], table.parent[row], table.alive[row] = z, parent, alive
+            end = offset + GROUP_RECORD.size
+
+        elif op == OP_POINTS and offset + POINTS_RECORD.size <= size:
+            _, code, row, count = POINTS_RECORD.unpack_from(data, offset)
+            end = offset + POINTS_RECORD.size + 16 * count
+            if code >= len(SHAPE_KINDS) or end > size:
+                break
+            table = document.tables[SHAPE_KINDS[code]]
+            if not table.has_points or row >= len(table):
+                break
+            points = array('d')
+            points.frombytes(data[offset + POINTS_RECORD.size:end])
+            if sys.byteorder == "big":
+                points.byteswap()
+            table.set_vertices(row, points)
+
+        else:
+            break
+
+        offset = end
+        applied += 1
+
+    return applied
+
+
+def has_recovery(directory: str) -> bool:
+    """Остался ли журнал незавершенного сеанса (окно закрылось не штатно)"""
+    return bool(_generations(directory))
+
+
+def recover(directory: str) -> tuple:
+    """Восстанавливает документ по последнему поколению журнала: (документ, сцена)"""
+    generation = _generations(directory)[-1]
+    document, scene_info, style_map = read_snapshot(_snapshot_path(directory, generation))
+
+    log_path = _journal_path(directory, generation)
+    if os.path.exists(log_path):
+        with open(log_path, "rb") as f:
+            replay(document, f.read(), style_map)
+
+    document.sync_next_z()
+    return document, scene_info
+
+
+def discard(directory: str):
+    """Удаляет все файлы журнала в каталоге"""
+    if not os.path.isdir(directory):
+        return
+
+    for name in os.listdir(directory):
+        if name.startswith((SNAPSHOT_PREFIX, JOURNAL_PREFIX)):
+            os.remove(os.path.join(directory, name))
+
+
+class JournalSession:
+    """
+    Каталог журнала одного окна в общем каталоге восстановления.
+
+    Пока окно открыто, его процесс держит блокировку файла LOCK_NAME. ОС снимает ее при любом
+    завершении процесса, поэтому каталог, чью блокировку удалось взять, - сеанс, владелец которого
+    завершился аварийно. Живые сеансы других окон не трогаются: ни при восстановлении, ни при закрытии.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock_file = None
+
+    @classmethod
+    def create(cls, root: str):
+        """Новый сеанс текущего процесса (каталог создается и блокируется)"""
+        name = f"{SESSION_PREFIX}{os.getpid()}-{time.time_ns()}"
+        session = cls(os.path.join(root, name))
+        os.makedirs(session.directory)
+        if not session.acquire():
+            raise OSError(f"Каталог журнала занят: {session.directory}")
+        return session
+
+    def acquire(self) -> bool:
+        """Берет блокировку сеанса без ожидания; False - владелец сеанса еще работает"""
+        f = open(os.path.join(self.directory, LOCK_NAME), "a+")
+        try:
+            f.seek(0)
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._lock_file = f
+        return True
+
+    def release(self):
+        """Отпускает блокировку; файлы журнала остаются (их восстановит следующий запуск)"""
+        if self._lock_file is None:
+            return
+        if fcntl is None:
+            self._lock_file.seek(0)
+            msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._lock_file.close()
+        self._lock_file = None
+
+    def remove(self):
+        """Удаляет каталог сеанса вместе с журналом (штатное закрытие или журнал уже не нужен)"""
+        discard(self.directory)
+        self.release()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def orphaned_sessions(root: str) -> list:
+    """
+    Сеансы, чьи владельцы завершились (их блокировки теперь держит текущий процесс),
+    от последнего измененного к первому.
+    """
+    if not os.path.isdir(root):
+        return []
+
+    sessions = []
+    for name in os.listdir(root):
+        directory = os.path.join(root, name)
+        if not name.startswith(SESSION_PREFIX) or not os.path.isdir(directory):
+            continue
+
+        session = JournalSession(directory)
+        if session.acquire():
+            sessions.append(session)
+
+    sessions.sort(key=lambda session: os.path.getmtime(session.directory), reverse=True)
+    return sessions
+
+
+class DocumentJournal(QObject):
+    """
+    Журнал правок документа холста.
+
+    Слушает indexChanged истории отмены: после каждой команды (и ее отмены или повтора)
+    в буфер дописываются итоговые состояния строк, которые она затронула, и строки,
+    добавленные в таблицы с прошлого раза. Это несколько struct.pack на команду,
+    без обращения к диску: буфер раз в JOURNAL_FLUSH_MS сбрасывает фоновый поток (write + fsync).
+
+    Журнал периодически заменяется снимком документа (compact): когда он вырос больше
+    JOURNAL_COMPACT_BYTES, когда одна правка задела больше JOURNAL_SNAPSHOT_ROWS строк
+    и при смене документа. Все правки документа идут через историю отмены; то, что меняется
+    в обход нее (открытие файла, размер сцены), вызывающий фиксирует снимком сам (compact()).
+    """
+
+    def __init__(self, directory: str, canvas, parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.canvas = canvas
+        self.stack = canvas.undo_stack
+        self.error = None
+
+        self._generation = 0
+        self._document = None
+        self._lengths = {}
+        self._known_styles = 0
+        self._index = 0
+        self._count = 0
+        self._last_items = []
+        self._journal_bytes = 0
+
+        # Буфер записей и очередь операций для фонового потока; все под _lock
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._ops = []
+
+        # Диск трогают только под _io_lock (фоновый поток и sync())
+        self._io_lock = threading.Lock()
+        self._log = None
+        self._closed = threading.Event()
+        self._thread = None
+
+
+    def start(self):
+        """Начинает новый журнал со снимка текущего документа"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._generation = max(_generations(self.directory), default=0)
+        self.compact()
+
+        self.stack.indexChanged.connect(self._on_index_changed)
+        # Стек при удалении очищается и испускает indexChanged, когда Python-обертка уже недействительна
+        self.canvas.destroyed.connect(self._detach)
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def compact(self):
+        """Фиксирует документ снимком; журнал начинается заново (в фоне)"""
+        document = self.canvas.document
+        rect = self.canvas.scene.sceneRect()
+
+        self._generation += 1
+        self._document = document
+        self._lengths = {kind: len(table) for kind, table in document.tables.items()}
+        self._lengths[TYPE_GROUP] = len(document.groups)
+        self._known_styles = len(STYLE_TABLE)
+        self._index = self.stack.index()
+        self._count = self.stack.count()
+        self._journal_bytes = 0
+
+        op = ("snapshot", self._generation, document.snapshot(),
+              {"width": rect.width(), "height": rect.height()},
+              STYLE_TABLE.export(range(self._known_styles)))
+
+        with self._lock:
+            self._push_buffer()
+            self._ops.append(op)
+
+    def sync(self):
+        """Синхронно сбрасывает все накопленное на диск (тесты, закрытие окна)"""
+        self._drain()
+
+    def close(self, discard_files=True):
+        """Останавливает журнал; при штатном закрытии файлы удаляются - восстанавливать нечего"""
+        if self._thread is not None:
+            self._detach()
+            self._closed.set()
+            self._thread.join()
+            self._thread = None
+
+        self._drain()
+        with self._io_lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+        if discard_files:
+            discard(self.directory)
+
+    def _detach(self, *args):
+        if self.stack is not None:
+            self.stack.indexChanged.disconnect(self._on_index_changed)
+            self.stack = None
+
+    # --- GUI-поток: запись правок ---
+
+    def _on_index_changed(self, _index):
+        if self.canvas.document is not self._document:
+            self.compact()
+            return
+
+        # Индекс читаем у стека: внутри слота стек мог успеть снять вытесненные команды
+        index, count = self.stack.index(), self.stack.count()
+        stack = self.stack
+
+        if count < self._count and index < self._index:
+            # Склейка превратила команду в пустую, и стек ее удалил: строки те же, что в прошлый раз
+            items = self._last_items
+        elif index == self._index:
+            # Склейка с верхней командой: она изменила те же строки еще раз
+            items = list(command_items(stack.command(index - 1))) if index > 0 else []
+        else:
+            items = []
+            for i in range(min(index, self._index), max(index, self._index)):
+                items.extend(command_items(stack.command(i)))
+
+        self._index, self._count = index, count
+        self._last_items = items
+
+        refs = self._appended_refs()
+        refs.extend(_item_refs(items, self._document))
+
+        if len(refs) > JOURNAL_SNAPSHOT_ROWS:
+            self.compact()
+            return
+
+        records = self._pack(refs)
+        with self._lock:
+            self._buffer += records
+        self._journal_bytes += len(records)
+
+        if self._journal_bytes > JOURNAL_COMPACT_BYTES:
+            self.compact()
+
+    def _appended_refs(self) -> list:
+        """Строки, добавленные в таблицы документа с прошлой записи"""
+        refs = []
+        for kind, known in self._lengths.items():
+            length = len(self._document.table(kind))
+            refs.extend((kind, row) for row in range(known, length))
+            self._lengths[kind] = length
+        return refs
+
+    def _pack(self, refs) -> bytearray:
+        document = self._document
+        records = bytearray()
+
+        if len(STYLE_TABLE) > self._known_styles:
+            for style_id in range(self._known_styles, len(STYLE_TABLE)):
+                color = STYLE_TABLE.color(style_id).encode("utf-8")
+                records += STYLE_RECORD.pack(OP_STYLE, style_id, STYLE_TABLE.width(style_id), len(color))
+                records += color
+            self._known_styles = len(STYLE_TABLE)
+
+        for kind, row in refs:
+            if kind == TYPE_GROUP:
+                table = document.groups
+                records += GROUP_RECORD.pack(
+                    OP_GROUP, row, table.pos_x[row], table.pos_y[row],
+                    table.z[row], table.parent[row], table.alive[row]
+                )
+            else:
+                table = document.tables[kind]
+                records += SHAPE_RECORD.pack(
+                    OP_SHAPE, SHAPE_CODES[kind], row, *table.values(row),
+                    table.pos_x[row], table.pos_y[row], table.style[row],
+                    table.z[row], table.parent[row], table.alive[row]
+                )
+                if table.has_points:
+                    records += POINTS_RECORD.pack(OP_POINTS, SHAPE_CODES[kind], row, table.count[row])
+                    records += _column_bytes(table.vertices(row))
+
+        return records
+
+    def _push_buffer(self):
+        # Вызывается под _lock: записи до снимка уходят в очередь перед ним
+        if self._buffer:
+            self._ops.append(("records", self._buffer))
+            self._buffer = bytearray()
+
+    # --- фоновый поток: диск ---
+
+    def _run(self):
+        while not self._closed.wait(JOURNAL_FLUSH_MS / 1000):
+            self._drain()
+
+    def _drain(self):
+        with self._lock:
+            self._push_buffer()
+            ops, self._ops = self._ops, []
+
+        if not ops:
+            return
+
+        with self._io_lock:
+            try:
+                for op in ops:
+                    if op[0] == "records":
+                        if self._log is not None:
+                            self._log.write(op[1])
+                    else:
+                        self._write_snapshot(*op[1:])
+
+                if self._log is not None:
+                    self._log.flush()
+                    os.fsync(self._log.fileno())
+
+            except Exception as e:
+                # Журнал - страховка: его сбой (диск, запись плохой строки) не должен мешать работе
+                # с документом и не должен тихо остановить фоновый поток - причина остается в error
+                self.error = str(e)
+
+    def _write_snapshot(self, generation, document, scene_info, styles):
+        write_snapshot(_snapshot_path(self.directory, generation), document, scene_info, styles)
+
+        if self._log is not None:
+            self._log.close()
+        self._log = open(_journal_path(self.directory, generation), "wb")
+
+        # Новое поколение записано - старые больше не нужны
+        for old in _generations(self.directory):
+            if old < generation:
+                os.remove(_snapshot_path(self.directory, old))
+                old_log = _journal_path(self.directory, old)
+                if os.path.exists(old_log):
+                    os.remove(old_log)
+
+
+def _item_refs(items, document):
+    """Строки документа под объектами; у групп - вместе со строками всех потомков"""
+    for item in items:
+        table = getattr(item, "table", None)
+        if table is None or table.document is not document:
+            continue
+
+        yield item.ref
+        if table.shape_type == TYPE_GROUP:
+            yield from _item_refs(item.childItems(), document)
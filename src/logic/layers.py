@@ -0,0 +1,166 @@
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QPainterPath
+from PySide6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+
+from src.constants import TYPE_LINE, TYPE_ELLIPSE, HIT_TOLERANCE
+from src.logic.document import SHAPE_FIELDS, STYLE_TABLE
+from src.logic.lod import LOD, lod_bucket
+from src.logic.rendering import build_batches, draw_batches, build_density_image
+from src.logic.simplify import segment_distance_sq
+
+
+def hit_test(table, row, x, y, tolerance) -> bool:
+    """Попадает ли точка (в координатах родителя) в фигуру строки row"""
+    a, b, c, d = table.values(row)
+    x -= table.pos_x[row]
+    y -= table.pos_y[row]
+    tolerance += STYLE_TABLE.width(table.style[row]) / 2
+
+    if table.shape_type == TYPE_LINE:
+        length_sq = (c - a) ** 2 + (d - b) ** 2
+        if length_sq == 0:
+            return (x - a) ** 2 + (y - b) ** 2 <= tolerance ** 2
+
+        t = max(0.0, min(1.0, ((x - a) * (c - a) + (y - b) * (d - b)) / length_sq))
+        nx, ny = a + t * (c - a), b + t * (d - b)
+        return (x - nx) ** 2 + (y - ny) ** 2 <= tolerance ** 2
+
+    if table.has_points:
+        if not (a - tolerance <= x <= a + c + tolerance and b - tolerance <= y <= b + d + tolerance):
+            return False
+        points = table.vertices(row)
+        tolerance_sq = tolerance ** 2
+        if len(points) == 2:
+            return (x - points[0]) ** 2 + (y - points[1]) ** 2 <= tolerance_sq
+        return any(segment_distance_sq(x, y, points[i], points[i + 1], points[i + 2], points[i + 3]) <= tolerance_sq
+                   for i in range(0, len(points) - 2, 2))
+
+    if table.shape_type == TYPE_ELLIPSE:
+        rx, ry = c / 2 + tolerance, d / 2 + tolerance
+        cx, cy = a + c / 2, b + d / 2
+        return ((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 <= 1
+
+    return a - tolerance <= x <= a + c + tolerance and b - tolerance <= y <= b + d + tolerance
+
+
+class BulkLayer(QGraphicsItem):
+    """
+    Один QGraphicsItem на много примитивов документа.
+    Фигуры рисуются пакетами по общему стилю, поэтому Qt платит за
+    отрисовку, bounding rect и индекс один раз на слой, а не на фигуру.
+
+    Порядок наложения внутри слоя определяется стилем, а не z фигуры.
+    Слой не перехватывает мышь: выбор фигур делает EditorCanvas через hit().
+
+    При отдалении слой рисует упрощенные пакеты (см. LodSettings), а если он мал на экране
+    или фигур в нем больше, чем пикселей, - растр плотности. Оба кэшируются по уровню масштаба.
+    """
+
+    def __init__(self, document):
+        super().__init__()
+        self.document = document
+        self.rows = {shape_type: set() for shape_type in SHAPE_FIELDS}
+
+        self._batches = None
+        self._bounds = None
+        self._lod_batches = {}  # уровень масштаба -> пакеты
+        self._density = {}  # уровень масштаба -> QImage
+
+    def __len__(self):
+        return sum(len(rows) for rows in self.rows.values())
+
+    def add(self, ref):
+        self.add_many([ref])
+
+    def add_many(self, refs):
+        self.prepareGeometryChange()
+        for kind, row in refs:
+            self.rows[kind].add(row)
+        self._invalidate()
+
+    def remove(self, ref):
+        self.remove_many([ref])
+
+    def remove_many(self, refs):
+        self.prepareGeometryChange()
+        for kind, row in refs:
+            self.rows[kind].discard(row)
+        self._invalidate()
+
+    def _invalidate(self):
+        self._batches = None
+        self._bounds = None
+        self.invalidate_lod()
+
+    def invalidate_lod(self):
+        """Сбрасывает кэши упрощенной отрисовки (например, после смены порогов LOD)"""
+        self._lod_batches = {}
+        self._density = {}
+        self.update()
+
+    def hit(self, x, y, tolerance=HIT_TOLERANCE):
+        """Верхняя (по z) фигура слоя под точкой или None"""
+        best = None
+        best_z = -1
+
+        for kind, rows in self.rows.items():
+            table = self.document.tables[kind]
+            for row in rows:
+                if table.alive[row] and table.z[row] > best_z and hit_test(table, row, x, y, tolerance):
+                    best = (kind, row)
+                    best_z = table.z[row]
+
+        return best
+
+    def boundingRect(self):
+        if self._bounds is None:
+            self._bounds = self._compute_bounds()
+        return self._bounds
+
+    def _compute_bounds(self) -> QRectF:
+        x0 = y0 = float("inf")
+        x1 = y1 = float("-inf")
+        margin = 0
+
+        for kind, rows in self.rows.items():
+            table = self.document.tables[kind]
+            for row in rows:
+                bx0, by0, bx1, by1 = table.bounds(row)
+                x0, y0 = min(x0, bx0), min(y0, by0)
+                x1, y1 = max(x1, bx1), max(y1, by1)
+                margin = max(margin, STYLE_TABLE.width(table.style[row]))
+
+        if x0 > x1:
+            return QRectF()
+
+        return QRectF(x0, y0, x1 - x0, y1 - y0).adjusted(-margin, -margin, margin, margin)
+
+    def shape(self):
+        # Пустая форма: слой не должен попадать в itemAt() и перехватывать клики
+        return QPainterPath()
+
+    def paint(self, painter, option, widget=None):
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+
+        if not LOD.enabled or lod >= 1:
+            if self._batches is None:
+                self._batches = build_batches(self.document, self.rows)
+            draw_batches(painter, self._batches)
+            return
+
+        # Кэш строится с запасом: масштаб уровня не меньше текущего
+        bucket = lod_bucket(lod)
+        scale = 2.0 ** (bucket + 1)
+        bounds = self.boundingRect()
+
+        if LOD.use_density(len(self), bounds.width() * scale, bounds.height() * scale):
+            image = self._density.get(bucket)
+            if image is None:
+                image = self._density[bucket] = build_density_image(self.document, self.rows, bounds, scale)
+            painter.drawImage(bounds, image)
+            return
+
+        batches = self._lod_batches.get(bucket)
+        if batches is None:
+            batches = self._lod_batches[bucket] = build_batches(self.document, self.rows, scale)
+        draw_batches(painter, batches)
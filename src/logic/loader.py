@@ -0,0 +1,303 @@
+import codecs
+import json
+import os
+import queue
+import threading
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from src.constants import (
+    DEFAULT_SCENE_WIDTH, DEFAULT_SCENE_HEIGHT, LOAD_CHUNK_BYTES, LOAD_BATCH_SIZE,
+    LOAD_QUEUE_SIZE, LOAD_FRAME_BUDGET_MS, LOAD_TICK_MS
+)
+from src.logic.document import ShapeDocument, STYLE_TABLE, ROOT
+from src.logic.profiling import profiled
+from src.logic.spatial import document_entries
+
+# Элемент, который не удалось дочитать за столько символов, считается ошибкой формата
+MAX_ELEMENT_CHARS = 64 * 1024 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+class _StreamReader:
+    """Буфер поверх бинарного файла, из которого по одному разбираются JSON-значения"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def _fill(self):
+        raw = self.f.read(self.chunk_size)
+        self.bytes_read += len(raw)
+
+        if not raw:
+            self.eof = True
+
+        self.buf = self.buf[self.pos:] + self.text_decoder.decode(raw, final=not raw)
+        self.pos = 0
+
+        if len(self.buf) > MAX_ELEMENT_CHARS:
+            raise ValueError("Файл поврежден или имеет неверный формат")
+
+    def peek(self) -> str:
+        """Следующий значащий символ (пробелы пропускаются) или '' в конце файла"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+
+            self._fill()
+
+    def take(self, expected: str):
+        if self.peek() != expected:
+            raise ValueError("Файл поврежден или имеет неверный формат")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+
+                # Число в самом конце буфера может быть обрезано - дочитываем
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise ValueError("Файл поврежден или имеет неверный формат")
+
+            self._fill()
+
+
+class ProjectStream:
+    """
+    Потоковый разбор файла проекта (открытого в бинарном режиме).
+    Итерация отдает элементы массива "shapes" по одному,
+    остальные ключи верхнего уровня складываются в header по мере чтения.
+    """
+
+    def __init__(self, f, chunk_size=LOAD_CHUNK_BYTES):
+        self.header = {}
+        self.has_shapes = False
+        self._reader = _StreamReader(f, chunk_size)
+
+    @property
+    def bytes_read(self) -> int:
+        return self._reader.bytes_read
+
+    def __iter__(self):
+        reader = self._reader
+
+        reader.take("{")
+        if reader.peek() == "}":
+            return
+
+        while True:
+            key = reader.value()
+            reader.take(":")
+
+            if key == "shapes":
+                self.has_shapes = True
+                reader.take("[")
+
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield reader.value()
+
+                        if reader.peek() == "]":
+                            reader.pos += 1
+                            break
+                        reader.take(",")
+            else:
+                self.header[key] = reader.value()
+
+            if reader.peek() == "}":
+                return
+            reader.take(",")
+
+
+class ProjectLoader(QObject):
+    """
+    Загрузка проекта без зависания окна.
+
+    Фоновый поток читает и разбирает файл, складывая порции фигур в очередь.
+    В GUI-потоке таймер забирает порции и добавляет фигуры в отдельный документ,
+    пока не исчерпан бюджет кадра (LOAD_FRAME_BUDGET_MS), после чего отдает управление циклу событий.
+
+    Холст получает документ только после успешного чтения всего файла: при ошибке формата
+    или отмене открытый документ и история отмены остаются как были.
+    """
+
+    progress = Signal(int, int)  # прочитано байт, всего байт
+    finished = Signal(int)  # количество пропущенных фигур
+    failed = Signal(str)
+
+    def __init__(self, canvas, path, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.path = path
+        self.total_bytes = os.path.getsize(path)
+
+        self.document = ShapeDocument()
+        # Индекс той же реализации, что у холста, заполняется по порциям вместе с документом
+        self.index = type(canvas.scene.index)()
+        self.errors_count = 0
+
+        # Замеры для бенчмарков: полное время и самая долгая блокировка цикла событий
+        self.total_time = None
+        self.longest_tick = 0.0
+
+        self._queue = queue.Queue(maxsize=LOAD_QUEUE_SIZE)
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._read, daemon=True)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(LOAD_TICK_MS)
+        self._timer.timeout.connect(self._on_tick)
+
+        self._started_at = None
+        self._header_applied = False
+        self._styles = []
+        self._scene_size = (DEFAULT_SCENE_WIDTH, DEFAULT_SCENE_HEIGHT)
+
+    @property
+    def is_running(self) -> bool:
+        return self._timer.isActive()
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread.start()
+        self._timer.start()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._finish()
+
+    def _put(self, message) -> bool:
+        """Кладет сообщение в очередь, пока загрузку не отменили"""
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _read(self):
+        """Фоновый поток: только чтение и разбор JSON, без Qt"""
+        try:
+            with open(self.path, 'rb') as f:
+                stream = ProjectStream(f)
+                batch = []
+                header_sent = False
+
+                for shape_dict in stream:
+                    if not header_sent:
+                        # Заголовок (version, scene, styles) пишется перед фигурами
+                        header_sent = self._put(("header", dict(stream.header), 0))
+                        if not header_sent:
+                            return
+
+                    batch.append(shape_dict)
+
+                    if len(batch) >= LOAD_BATCH_SIZE:
+                        if not self._put(("shapes", batch, stream.bytes_read)):
+                            return
+                        batch = []
+
+                if "version" not in stream.header or not stream.has_shapes:
+                    raise ValueError("Некорректный формат файла")
+
+                if not header_sent:
+                    self._put(("header", dict(stream.header), 0))
+                if batch:
+                    self._put(("shapes", batch, self.total_bytes))
+
+            self._put(("done", None, self.total_bytes))
+
+        except Exception as e:
+            self._put(("error", e, 0))
+
+    @profiled("load.tick")
+    def _on_tick(self):
+        started = time.perf_counter()
+        try:
+            self._process_queue(started + LOAD_FRAME_BUDGET_MS / 1000)
+        finally:
+            self.longest_tick = max(self.longest_tick, time.perf_counter() - started)
+
+    def _process_queue(self, deadline):
+
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload, bytes_read = self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+            if kind == "header":
+                self._apply_header(payload)
+            elif kind == "shapes":
+                self._add_shapes(payload)
+                self.progress.emit(bytes_read, self.total_bytes)
+            elif kind == "done":
+                self._show_document()
+                self._finish()
+                self.finished.emit(self.errors_count)
+                return
+            else:
+                self._finish()
+                self.failed.emit(str(payload))
+                return
+
+    def _apply_header(self, header):
+        if self._header_applied:
+            return
+        self._header_applied = True
+
+        # Таблица стилей файла интернируется здесь, в GUI-потоке: STYLE_TABLE общая
+        self._styles = STYLE_TABLE.intern_all(header.get("styles", []))
+
+        scene_info = header.get("scene", {})
+        self._scene_size = (
+            scene_info.get("width", DEFAULT_SCENE_WIDTH), scene_info.get("height", DEFAULT_SCENE_HEIGHT)
+        )
+
+    def _add_shapes(self, shapes):
+        children = {}
+
+        for shape_dict in shapes:
+            try:
+                self.document.add_dict(shape_dict, children=children, styles=self._styles)
+            except Exception:
+                self.errors_count += 1
+
+        # Иначе индекс по всему документу строился бы при подмене, одним долгим шагом
+        self.index.insert_many(document_entries(self.document, children.get(ROOT, []), children))
+
+    def _show_document(self):
+        """Файл прочитан целиком: документ заменяет открытый на холсте"""
+        self.canvas.set_document(self.document, self.index)
+        self.canvas.scene.setSceneRect(0, 0, *self._scene_size)
+
+    def _finish(self):
+        if not self._timer.isActive():
+            return
+
+        self._timer.stop()
+        self._cancelled.set()
+        self.total_time = time.perf_counter() - self._started_at
@@ -0,0 +1,69 @@
+import math
+
+from src.constants import (
+    TYPE_ELLIPSE, LOD_SKIP_SIZE, LOD_POINT_SIZE, LOD_ELLIPSE_RECT_SIZE, LOD_DENSITY_SHAPES_PER_PIXEL,
+    LOD_DENSITY_LAYER_SIZE
+)
+
+# Уровни детализации фигуры
+DETAIL_SKIP = 0  # не рисуется
+DETAIL_POINT = 1  # точка в центре
+DETAIL_RECT = 2  # эллипс как прямоугольник
+DETAIL_FULL = 3
+
+
+class LodSettings:
+    """
+    Пороги level-of-detail. Размеры - в пикселях экрана:
+    размер фигуры в сцене, умноженный на levelOfDetailFromTransform.
+
+    Применяются при пакетной отрисовке (BulkLayer). Отдельные Shape рисуются как есть:
+    проверка в Python-переопределении paint дороже, чем отрисовка крошечного пути в C++.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.skip_size = LOD_SKIP_SIZE
+        self.point_size = LOD_POINT_SIZE
+        self.ellipse_rect_size = LOD_ELLIPSE_RECT_SIZE
+        self.density_shapes_per_pixel = LOD_DENSITY_SHAPES_PER_PIXEL
+        self.density_layer_size = LOD_DENSITY_LAYER_SIZE
+
+    def configure(self, **thresholds):
+        for name, value in thresholds.items():
+            if not hasattr(self, name):
+                raise AttributeError(f"Неизвестный порог LOD: {name}")
+            setattr(self, name, value)
+
+    def detail(self, shape_type: str, screen_size: float) -> int:
+        """Уровень детализации фигуры, занимающей screen_size пикселей"""
+        if not self.enabled:
+            return DETAIL_FULL
+        if screen_size < self.skip_size:
+            return DETAIL_SKIP
+        if screen_size < self.point_size:
+            return DETAIL_POINT
+        if shape_type == TYPE_ELLIPSE and screen_size < self.ellipse_rect_size:
+            return DETAIL_RECT
+        return DETAIL_FULL
+
+    def use_density(self, shape_count: int, width_px: float, height_px: float) -> bool:
+        """Рисовать ли группу фигур, занимающую width_px x height_px, растром плотности"""
+        if not self.enabled:
+            return False
+        if max(width_px, height_px) < self.density_layer_size:
+            return True
+        return shape_count >= self.density_shapes_per_pixel * width_px * height_px
+
+
+LOD = LodSettings()
+
+
+def lod_bucket(lod: float) -> int:
+    """
+    Масштаб, округленный вниз до степени двойки (показатель степени).
+    Кэши слоев строятся на уровень, а не на каждый кадр зума.
+    """
+    if lod <= 0:
+        return -1024
+    return math.floor(math.log2(lod))
@@ -0,0 +1,161 @@
+"""
+Встроенный профилировщик горячих путей редактора.
+
+Замеры пишутся в гистограммы по имени участка: paint, tool.press/move/release,
+properties.selection, command.<Класс>.redo/undo, save.snapshot/save.write, load.*.
+Корзины гистограммы - степени двойки в микросекундах, поэтому память постоянна
+при любом числе замеров.
+
+Выключенный профилировщик стоит одну проверку флага на вызов: обертки profiled()
+сразу зовут исходную функцию, section() возвращает общий пустой контекст.
+"""
+import json
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from src.constants import PROFILE_BUCKETS, PROFILE_FPS_WINDOW_S
+
+_NULL_SECTION = nullcontext()
+
+
+class Histogram:
+    """Распределение длительностей: корзина i - от 2**(i-1) до 2**i мкс"""
+
+    def __init__(self):
+        self.buckets = [0] * PROFILE_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        bucket = min(int(seconds * 1_000_000).bit_length(), PROFILE_BUCKETS - 1)
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Верхняя граница корзины, в которую попадает доля fraction замеров (секунды)"""
+        if not self.count:
+            return 0.0
+
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min((1 << bucket) / 1_000_000, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        ms = 1000
+        return {
+            "count": self.count,
+            "total_ms": self.total * ms,
+            "mean_ms": self.total / self.count * ms if self.count else 0.0,
+            "min_ms": self.min * ms if self.count else 0.0,
+            "max_ms": self.max * ms,
+            "p50_ms": self.percentile(0.5) * ms,
+            "p95_ms": self.percentile(0.95) * ms,
+            "p99_ms": self.percentile(0.99) * ms,
+            # [верхняя граница корзины в мкс, число замеров], пустые корзины опущены
+            "buckets_us": [[1 << bucket, count] for bucket, count in enumerate(self.buckets) if count],
+        }
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.histograms = {}
+
+        # Моменты последних кадров для FPS (только при включенном профилировщике)
+        self._frames = []
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        self._frames = []
+
+    def reset(self):
+        self.histograms = {}
+        self._frames = []
+
+    def record(self, name: str, seconds: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.add(seconds)
+
+    def section(self, name: str):
+        """with PROFILER.section("save.write"): ... - замер участка кода"""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def frame(self):
+        """Отметка отрисованного кадра (для FPS)"""
+        now = time.perf_counter()
+        frames = self._frames
+        frames.append(now)
+
+        # Окно FPS: кадры старше PROFILE_FPS_WINDOW_S выбрасываются
+        cutoff = now - PROFILE_FPS_WINDOW_S
+        start = 0
+        while frames[start] < cutoff:
+            start += 1
+        if start:
+            del frames[:start]
+
+    def fps(self) -> float:
+        if len(self._frames) < 2:
+            return 0.0
+        span = self._frames[-1] - self._frames[0]
+        return (len(self._frames) - 1) / span if span > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())}
+
+    def export(self, filename: str):
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+# Общий профилировщик процесса
+PROFILER = Profiler()
+
+
+def profiled(name: str):
+    """Декоратор: время каждого вызова уходит в гистограмму name, если профилировщик включен"""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.record(name, time.perf_counter() - start)
+
+        return wrapper
+    return decorate
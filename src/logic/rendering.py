@@ -0,0 +1,268 @@
+import math
+from array import array
+
+from PySide6.QtCore import Qt, QRectF, QLineF, QPointF
+from PySide6.QtGui import QPen, QColor, QPainterPath, QImage
+
+from src.constants import TYPE_LINE, TYPE_ELLIPSE, TYPE_POLYLINE, TYPE_GROUP
+from src.logic.Polyline import make_polygon
+from src.logic.document import STYLE_TABLE, ROOT
+from src.logic.lod import LOD, DETAIL_SKIP, DETAIL_POINT, DETAIL_RECT
+from src.logic.simplify import simplify
+
+# Номер списка в пакете: 0 - линии, 1 - прямоугольники, 2 - эллипсы, 3 - точки (LOD), 4 - ломаные
+_SLOTS = {TYPE_LINE: 0, TYPE_ELLIPSE: 2, TYPE_POLYLINE: 4}
+_POINTS = 3
+_POLYLINES = 4
+
+
+def _new_batch():
+    return [], [], [], [], []
+
+
+def _append_geometry(batch, slot, table, row, dx=0.0, dy=0.0, tolerance=0.0):
+    """:param tolerance: для ломаных - допуск упрощения в единицах сцены (при отдалении)"""
+    px, py = table.pos_x[row] + dx, table.pos_y[row] + dy
+
+    if slot == _POLYLINES:
+        points = table.vertices(row)
+        if tolerance:
+            points = simplify(points, tolerance)
+        batch[_POLYLINES].append(make_polygon(points, px, py))
+        return
+
+    a, b, c, d = table.values(row)
+    if slot == 0:
+        batch[0].append(QLineF(a + px, b + py, c + px, d + py))
+    else:
+        batch[slot].append(QRectF(a + px, b + py, c, d))
+
+
+def screen_size(table, row, lod: float) -> float:
+    """Размер фигуры на экране в пикселях (с учетом толщины линии)"""
+    a, b, c, d = table.values(row)
+    if table.shape_type == TYPE_LINE:
+        size = max(abs(c - a), abs(d - b))
+    else:
+        size = max(abs(c), abs(d))
+    return (size + STYLE_TABLE.width(table.style[row])) * lod
+
+
+def _center(table, row) -> QPointF:
+    x0, y0, x1, y1 = table.bounds(row)
+    return QPointF((x0 + x1) / 2, (y0 + y1) / 2)
+
+
+def build_batches(document, rows_by_type, lod=None) -> dict:
+    """
+    Раскладывает строки документа по стилям.
+    :param rows_by_type: {тип фигуры: итерируемое номеров строк}
+    :param lod: масштаб отображения; с ним мелкие фигуры упрощаются по порогам LOD
+    :return: {style_id: (линии, прямоугольники, эллипсы, точки)} - списки QLineF / QRectF / QPointF
+    """
+    batches = {}
+
+    for shape_type, rows in rows_by_type.items():
+        table = document.tables[shape_type]
+        style, alive = table.style, table.alive
+        slot = _SLOTS.get(shape_type, 1)
+
+        for row in rows:
+            if not alive[row]:
+                continue
+
+            batch = batches.get(style[row])
+            if batch is None:
+                batch = batches[style[row]] = _new_batch()
+
+            if lod is None:
+                _append_geometry(batch, slot, table, row)
+                continue
+
+            detail = LOD.detail(shape_type, screen_size(table, row, lod))
+            if detail == DETAIL_SKIP:
+                continue
+            if detail == DETAIL_POINT:
+                batch[_POINTS].append(_center(table, row))
+            elif detail == DETAIL_RECT:
+                _append_geometry(batch, 1, table, row)
+            else:
+                # Ломаная при отдалении теряет вершины, отклонение которых меньше полупикселя
+                _append_geometry(batch, slot, table, row, tolerance=0.5 / lod)
+
+    return batches
+
+
+def draw_batch(painter, batch):
+    lines, rects, ellipses, points, polylines = batch
+
+    if lines:
+        painter.drawLines(lines)
+    if rects:
+        painter.drawRects(rects)
+    if ellipses:
+        painter.drawPath(_ellipse_path(ellipses))
+    for polygon in polylines:
+        painter.drawPolyline(polygon)
+    if points:
+        # Точки - косметическим пером в 1 пиксель, независимо от масштаба
+        pen = painter.pen()
+        point_pen = QPen(pen)
+        point_pen.setWidth(0)
+        painter.setPen(point_pen)
+        painter.drawPoints(points)
+        painter.setPen(pen)
+
+
+def draw_batches(painter, batches: dict):
+    """Рисует пакеты: один drawLines/drawRects/drawPath на каждый стиль (и drawPolyline на ломаную)"""
+    painter.setBrush(Qt.NoBrush)
+    for style_id, batch in batches.items():
+        painter.setPen(STYLE_TABLE.pen(style_id))
+        draw_batch(painter, batch)
+
+
+def _ellipse_path(rects) -> QPainterPath:
+    # У QPainter нет пакетного drawEllipses, поэтому эллипсы стиля
+    # собираются в один путь и рисуются одним вызовом
+    path = QPainterPath()
+    for rect in rects:
+        path.addEllipse(rect)
+    return path
+
+
+def iter_draw_order(document, children=None, refs=None):
+    """
+    Примитивы документа в порядке отрисовки (обход дерева по z).
+    :param refs: с каких корневых строк начинать обход (по умолчанию - все корни документа)
+    :return: итератор (тип, строка, dx, dy), где dx, dy - суммарная позиция групп-предков
+    """
+    if children is None:
+        children = document.children_map()
+    if refs is None:
+        refs = children.get(ROOT, [])
+
+    groups = document.groups
+    stack = [(iter(refs), 0.0, 0.0)]
+
+    while stack:
+        refs, dx, dy = stack[-1]
+        ref = next(refs, None)
+
+        if ref is None:
+            stack.pop()
+            continue
+
+        kind, row = ref
+        if kind == TYPE_GROUP:
+            stack.append((iter(children.get(row, [])), dx + groups.pos_x[row], dy + groups.pos_y[row]))
+        else:
+            yield kind, row, dx, dy
+
+
+def render_document(painter, document):
+    """
+    Рисует весь документ без QGraphicsScene (годится для фонового потока).
+    Порядок наложения сохраняется: в пакет объединяются только подряд идущие фигуры одного стиля.
+    """
+    render_in_order(painter, document, iter_draw_order(document))
+
+
+def render_in_order(painter, document, items):
+    """
+    Рисует примитивы в заданном порядке.
+    :param items: итерируемое (тип, строка, dx, dy), как у iter_draw_order
+    """
+    painter.setBrush(Qt.NoBrush)
+
+    current_style = None
+    batch = _new_batch()
+
+    for kind, row, dx, dy in items:
+        table = document.tables[kind]
+        style = table.style[row]
+
+        if style != current_style:
+            draw_batch(painter, batch)
+            batch = _new_batch()
+            current_style = style
+            painter.setPen(STYLE_TABLE.pen(style))
+
+        _append_geometry(batch, _SLOTS.get(kind, 1), table, row, dx, dy)
+
+    draw_batch(painter, batch)
+
+
+def _ink_area(table, row) -> float:
+    """Примерная площадь штриха фигуры в единицах сцены (длина контура x толщина)"""
+    a, b, c, d = table.values(row)
+    width = STYLE_TABLE.width(table.style[row])
+
+    if table.shape_type == TYPE_LINE:
+        length = math.hypot(c - a, d - b)
+    elif table.has_points:
+        points = table.vertices(row)
+        xs, ys = points[0::2], points[1::2]
+        length = sum(map(math.hypot, [x1 - x0 for x0, x1 in zip(xs, xs[1:])],
+                         [y1 - y0 for y0, y1 in zip(ys, ys[1:])]))
+    elif table.shape_type == TYPE_ELLIPSE:
+        length = math.pi * (abs(c) + abs(d)) / 2
+    else:
+        length = 2 * (abs(c) + abs(d))
+
+    return max(length, 1.0) * width
+
+
+def build_density_image(document, rows_by_type, rect: QRectF, scale: float) -> QImage:
+    """
+    Растр плотности: пиксель = scale единиц сцены, в него сводятся все фигуры с центром в нем.
+    Прозрачность - доля пикселя, покрытая штрихами; цвет - средний цвет штрихов.
+    """
+    width = max(1, math.ceil(rect.width() * scale))
+    height = max(1, math.ceil(rect.height() * scale))
+    size = width * height
+
+    coverage = array("d", bytes(8 * size))
+    red, green, blue = (array("d", bytes(8 * size)) for _ in range(3))
+    colors = {}
+    touched = set()
+    area_scale = scale * scale
+    left, top = rect.x(), rect.y()
+
+    for shape_type, rows in rows_by_type.items():
+        table = document.tables[shape_type]
+        alive, style = table.alive, table.style
+
+        for row in rows:
+            if not alive[row]:
+                continue
+
+            x0, y0, x1, y1 = table.bounds(row)
+            px = min(width - 1, max(0, int(((x0 + x1) / 2 - left) * scale)))
+            py = min(height - 1, max(0, int(((y0 + y1) / 2 - top) * scale)))
+            i = py * width + px
+
+            rgb = colors.get(style[row])
+            if rgb is None:
+                rgb = colors[style[row]] = QColor(STYLE_TABLE.color(style[row])).getRgb()[:3]
+
+            ink = _ink_area(table, row) * area_scale
+            touched.add(i)
+            coverage[i] += ink
+            red[i] += rgb[0] * ink
+            green[i] += rgb[1] * ink
+            blue[i] += rgb[2] * ink
+
+    # Format_ARGB32_Premultiplied в памяти little-endian: B, G, R, A
+    pixels = bytearray(4 * size)
+    for i in touched:
+        ink = coverage[i]
+        alpha = min(1.0, ink)
+        k = alpha / ink
+        pixels[4 * i] = int(blue[i] * k)
+        pixels[4 * i + 1] = int(green[i] * k)
+        pixels[4 * i + 2] = int(red[i] * k)
+        pixels[4 * i + 3] = int(alpha * 255)
+
+    # copy(): QImage не владеет буфером bytearray
+    return QImage(bytes(pixels), width, height, 4 * width, QImage.Format_ARGB32_Premultiplied).copy()
@@ -0,0 +1,86 @@
+import threading
+
+from PySide6.QtCore import QObject, Signal
+
+from src.logic.profiling import PROFILER
+
+
+class BackgroundSaver(QObject):
+    """
+    Фоновое сохранение проекта.
+
+    Снимок сцены делается в GUI-потоке (strategy.snapshot), сериализация и запись -
+    в рабочем потоке (strategy.write). Пока идет запись, новые запросы на сохранение
+    не ставятся в очередь друг за другом: для каждого файла хранится только последний снимок.
+    """
+    finished = Signal(str)  # имя файла
+    failed = Signal(str, str)  # имя файла, текст ошибки
+
+    # Результат из рабочего потока; соединение с GUI-потоком ставится в очередь автоматически
+    _done = Signal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self._thread = None
+        self._pending = {}  # имя файла -> (стратегия, снимок)
+
+        self._done.connect(self._on_done)
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def save(self, strategy, filename: str, scene):
+        with PROFILER.section("save.snapshot"):
+            snapshot = strategy.snapshot(scene)
+
+        if self.is_running:
+            # Более поздний снимок того же файла вытесняет ожидающий
+            self._pending.pop(filename, None)
+            self._pending[filename] = (strategy, snapshot)
+            return
+
+        self._start(strategy, filename, snapshot)
+
+    def wait(self):
+        """Блокирует до завершения текущей и отложенных записей (например, при закрытии окна)"""
+        while self._thread is not None:
+            thread = self._thread
+            thread.join()
+            self._on_done(*thread.result)
+
+    def _start(self, strategy, filename, snapshot):
+        thread = threading.Thread(target=self._write, args=(strategy, filename, snapshot), daemon=True)
+        thread.result = None
+        self._thread = thread
+        thread.start()
+
+    def _write(self, strategy, filename, snapshot):
+        """Рабочий поток: только сериализация и диск, без обращения к сцене"""
+        try:
+            with PROFILER.section("save.write"):
+                strategy.write(filename, snapshot)
+            error = None
+        except Exception as e:
+            error = e
+
+        threading.current_thread().result = (filename, error)
+        self._done.emit(filename, error)
+
+    def _on_done(self, filename, error):
+        # При wait() результат уже обработан, а сигнал из очереди приходит позже
+        if self._thread is None or self._thread.result != (filename, error):
+            return
+
+        self._thread = None
+
+        if error is None:
+            self.finished.emit(filename)
+        else:
+            self.failed.emit(filename, str(error))
+
+        if self._pending:
+            filename = next(iter(self._pending))
+            strategy, snapshot = self._pending.pop(filename)
+            self._start(strategy, filename, snapshot)
@@ -0,0 +1,114 @@
+"""
+Сводка по выделению сцены для панели свойств.
+
+Qt сообщает о смене выделения сигналом selectionChanged без подробностей, и при выделении
+рамкой он приходит на каждое движение мыши. Пересчет по scene.selectedItems() на каждый
+такой сигнал стоит O(размера выделения). Здесь сводка (сколько объектов каких типов,
+толщины, цвета, позиции) обновляется по изменениям: фигура, у которой поменялось
+выделение (Shape.itemChange) или свойства (команды истории), помечается, а update()
+пересэмплирует только помеченные.
+"""
+from collections import Counter
+
+from src.constants import MIN_STROKE_WIDTH, DEFAULT_COLOR_HEX
+from src.logic.document import STYLE_TABLE
+
+
+def _style_source(item):
+    """Фигура, чей стиль показывает панель: сама фигура или первая фигура внутри группы"""
+    while not hasattr(item, "style_id"):
+        children = item.childItems()
+        if not children:
+            return None
+        item = children[0]
+    return item
+
+
+def sample(item) -> tuple:
+    """
+    (тип, толщина, цвет, позиция) объекта - то, что сводка считает по выделению.
+    Читается из строки документа и STYLE_TABLE, без копий QPen и QColor.
+    """
+    table = getattr(item, "table", None)
+    if table is None:
+        pos = item.pos()
+        return type(item).__name__, MIN_STROKE_WIDTH, DEFAULT_COLOR_HEX, (pos.x(), pos.y())
+
+    width, color = MIN_STROKE_WIDTH, DEFAULT_COLOR_HEX
+    source = _style_source(item)
+    if source is not None:
+        style_id = source.style_id
+        width, color = STYLE_TABLE.width(style_id), STYLE_TABLE.color(style_id)
+
+    row = item.row
+    return table.shape_type.capitalize(), width, color, (table.pos_x[row], table.pos_y[row])
+
+
+class SelectionSummary:
+    def __init__(self, scene):
+        self.scene = scene
+        self.reset()
+
+    def reset(self):
+        """Сцена очищена: выделения больше нет"""
+        self.samples = {}  # id(объекта) -> (объект, sample), в порядке выделения
+        self.types = Counter()
+        self.widths = Counter()
+        self.colors = Counter()
+        self.positions = Counter()
+        self._dirty = {}  # id(объекта) -> объект, чье выделение или свойства могли поменяться
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._dirty)
+
+    def mark(self, items):
+        """Выделение или свойства items поменялись: пересчитать их при следующем update()"""
+        for item in items:
+            if item is not None:
+                self._dirty[id(item)] = item
+
+    def update(self) -> bool:
+        """Сводит накопленные изменения в сводку; True, если она поменялась"""
+        dirty, self._dirty = self._dirty, {}
+        changed = False
+        scene = self.scene
+
+        for key, item in dirty.items():
+            old = self.samples.get(key)
+
+            # Удаленный со сцены объект Qt может оставить выделенным
+            if item.isSelected() and item.scene() is scene:
+                new = sample(item)
+                if old is not None:
+                    if old[1] == new:
+                        continue
+                    self._count(old[1], -1)
+
+                # Уже выделенный объект остается на своем месте в порядке выделения
+                self.samples[key] = (item, new)
+                self._count(new, 1)
+                changed = True
+            elif old is not None:
+                del self.samples[key]
+                self._count(old[1], -1)
+                changed = True
+
+        return changed
+
+    def first(self):
+        """sample() объекта, выделенного раньше остальных (его значения показывает панель), или None"""
+        for _, values in self.samples.values():
+            return values
+        return None
+
+    def _count(self, values, delta):
+        type_text, width, color, pos = values
+        for counter, key in ((self.types, type_text), (self.widths, width),
+                             (self.colors, color), (self.positions, pos)):
+            counter[key] += delta
+            if not counter[key]:
+                del counter[key]
@@ -0,0 +1,114 @@
+"""
+Упрощение ломаных: вершины ближе tolerance к упрощенной линии отбрасываются.
+
+Вершины везде - плоский array('d') (x0, y0, x1, y1, ...), как в пуле ShapeTable.points.
+
+simplify() - Рамер-Дуглас-Пекер для готовой ломаной (стеком, без рекурсии).
+StreamSimplifier - тот же критерий по мере поступления точек (рисование от руки):
+точка становится вершиной, только когда отрезок от последней вершины до новой точки
+перестает проходить в пределах tolerance от всех точек между ними.
+"""
+from array import array
+
+from src.constants import FREEHAND_WINDOW
+
+
+def segment_distance_sq(px, py, ax, ay, bx, by) -> float:
+    """Квадрат расстояния от точки (px, py) до отрезка (ax, ay)-(bx, by)"""
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return (px - ax) ** 2 + (py - ay) ** 2
+
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+    nx, ny = ax + t * dx - px, ay + t * dy - py
+    return nx * nx + ny * ny
+
+
+def simplify(points, tolerance: float) -> array:
+    """Ломаная points, упрощенная алгоритмом Рамера-Дугласа-Пекера; концы сохраняются"""
+    count = len(points) // 2
+    if count < 3:
+        return array('d', points)
+
+    tolerance_sq = tolerance * tolerance
+    keep = bytearray(count)
+    keep[0] = keep[-1] = 1
+    stack = [(0, count - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        ax, ay, bx, by = points[2 * first], points[2 * first + 1], points[2 * last], points[2 * last + 1]
+
+        farthest, index = tolerance_sq, -1
+        for i in range(first + 1, last):
+            distance = segment_distance_sq(points[2 * i], points[2 * i + 1], ax, ay, bx, by)
+            if distance > farthest:
+                farthest, index = distance, i
+
+        if index >= 0:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+
+    result = array('d')
+    for i in range(count):
+        if keep[i]:
+            result.append(points[2 * i])
+            result.append(points[2 * i + 1])
+    return result
+
+
+class StreamSimplifier:
+    """
+    Упрощение по мере рисования: на точку - проверка не больше window точек
+    после последней вершины, поэтому работа на движение мыши ограничена,
+    а в памяти остаются только вершины.
+    """
+
+    def __init__(self, tolerance: float, window: int = FREEHAND_WINDOW):
+        self.tolerance = tolerance
+        self.window = window
+        self.points = array('d')  # зафиксированные вершины
+        self._pending = array('d')  # точки после последней вершины; последняя - текущий конец
+
+    def __len__(self):
+        return len(self.points) // 2 + (1 if self._pending else 0)
+
+    def add(self, x: float, y: float):
+        points, pending = self.points, self._pending
+
+        if not points:
+            points.extend((x, y))
+            return
+        if pending and pending[-2] == x and pending[-1] == y:
+            return
+
+        if pending and not self._covers(x, y):
+            # Отрезок до новой точки уже не проходит рядом со всеми прежними:
+            # прежний конец становится вершиной, проверка начинается от него
+            points.extend(pending[-2:])
+            self._pending = pending = array('d')
+
+        pending.extend((x, y))
+
+    def _covers(self, x, y) -> bool:
+        """Проходит ли отрезок от последней вершины до (x, y) в пределах tolerance от точек окна"""
+        pending = self._pending
+        if len(pending) // 2 >= self.window:
+            return False
+
+        ax, ay = self.points[-2], self.points[-1]
+        tolerance_sq = self.tolerance * self.tolerance
+        for i in range(0, len(pending), 2):
+            if segment_distance_sq(pending[i], pending[i + 1], ax, ay, x, y) > tolerance_sq:
+                return False
+        return True
+
+    def vertices(self) -> array:
+        """Текущая ломаная: вершины и текущий конец"""
+        return self.points + self._pending[-2:]
+
+    def finish(self) -> array:
+        """Итоговая ломаная; жадный проход оставляет лишние вершины, их добирает simplify()"""
+        return simplify(self.vertices(), self.tolerance)
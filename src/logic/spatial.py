@@ -0,0 +1,257 @@
+import math
+from abc import ABC, abstractmethod
+
+from src.constants import SPATIAL_GRID_CELL_SIZE, SPATIAL_GRID_MAX_CELLS
+from src.logic.document import STYLE_TABLE, SHAPE_FIELDS
+from src.logic.rendering import iter_draw_order
+
+
+class SpatialIndex(ABC):
+    """
+    Индекс примитивов документа по габаритам в координатах сцены.
+    Ключи - ссылки документа (тип, строка); габариты - (x0, y0, x1, y1).
+    Запросы возвращают кандидатов по габаритам, точную проверку делает вызывающий.
+    """
+
+    @abstractmethod
+    def __len__(self): pass
+
+    @abstractmethod
+    def __contains__(self, ref): pass
+
+    @abstractmethod
+    def clear(self): pass
+
+    @abstractmethod
+    def insert(self, ref, bounds): pass
+
+    @abstractmethod
+    def remove(self, ref): pass
+
+    @abstractmethod
+    def bounds(self, ref): pass
+
+    @abstractmethod
+    def query_rect(self, x0, y0, x1, y1) -> list: pass
+
+    def insert_many(self, entries):
+        """Массовая загрузка: entries - итерируемое (ref, bounds)"""
+        for ref, bounds in entries:
+            self.insert(ref, bounds)
+
+    def update(self, ref, bounds):
+        self.remove(ref)
+        self.insert(ref, bounds)
+
+    def update_many(self, entries):
+        """Пакетное обновление: entries - итерируемое (ref, bounds)"""
+        for ref, bounds in entries:
+            self.update(ref, bounds)
+
+    def query_point(self, x, y, tolerance=0.0) -> list:
+        return self.query_rect(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
+
+
+class GridIndex(SpatialIndex):
+    """
+    Равномерная сетка: фигура записывается во все ячейки, которые задевают ее габариты.
+    Вставка, удаление и перемещение - O(число ячеек фигуры), без перестройки дерева.
+    Фигуры крупнее SPATIAL_GRID_MAX_CELLS ячеек хранятся отдельно и проверяются в каждом запросе.
+    """
+
+    def __init__(self, cell_size=SPATIAL_GRID_CELL_SIZE, max_cells=SPATIAL_GRID_MAX_CELLS):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self.clear()
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def __contains__(self, ref):
+        return ref in self._bounds
+
+    def clear(self):
+        self._bounds = {}  # ref -> (x0, y0, x1, y1)
+        self._cells = {}  # (cx, cy) -> set(ref)
+        self._large = set()
+
+    def _cell_range(self, x0, y0, x1, y1):
+        size = self.cell_size
+        return (math.floor(x0 / size), math.floor(y0 / size),
+                math.floor(x1 / size), math.floor(y1 / size))
+
+    def insert(self, ref, bounds):
+        if ref in self._bounds:
+            self.remove(ref)
+
+        self._bounds[ref] = bounds
+        cx0, cy0, cx1, cy1 = self._cell_range(*bounds)
+
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > self.max_cells:
+            self._large.add(ref)
+            return
+
+        cells = self._cells
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cell = cells[(cx, cy)] = set()
+                cell.add(ref)
+
+    def bounds(self, ref):
+        return self._bounds.get(ref)
+
+    def update(self, ref, bounds):
+        old = self._bounds.get(ref)
+
+        # Габариты сдвинулись в пределах тех же ячеек (толщина, мелкий сдвиг) - ячейки не трогаем
+        if old is not None and ref not in self._large and self._cell_range(*old) == self._cell_range(*bounds):
+            self._bounds[ref] = bounds
+            return
+
+        self.insert(ref, bounds)
+
+    def update_many(self, entries):
+        # То же, что update, но проверка ячеек без вызовов на каждую фигуру
+        # (// для float - тот же floor, но без вызова функции)
+        size = self.cell_size
+        known, large = self._bounds, self._large
+
+        for ref, bounds in entries:
+            old = known.get(ref)
+            if old is not None and ref not in large:
+                x0, y0, x1, y1 = bounds
+                o0, p0, o1, p1 = old
+                if (x0 // size == o0 // size and y0 // size == p0 // size
+                        and x1 // size == o1 // size and y1 // size == p1 // size):
+                    known[ref] = bounds
+                    continue
+
+            self.insert(ref, bounds)
+
+    def remove(self, ref):
+        bounds = self._bounds.pop(ref, None)
+        if bounds is None:
+            return
+
+        if ref in self._large:
+            self._large.discard(ref)
+            return
+
+        cx0, cy0, cx1, cy1 = self._cell_range(*bounds)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self._cells[(cx, cy)]
+                cell.discard(ref)
+                if not cell:
+                    del self._cells[(cx, cy)]
+
+    def query_rect(self, x0, y0, x1, y1) -> list:
+        cx0, cy0, cx1, cy1 = self._cell_range(x0, y0, x1, y1)
+
+        # Запрос шире заполненной части сетки (например, вся сцена) - дешевле взять все фигуры
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            candidates = set(self._bounds) - self._large
+        else:
+            candidates = set()
+            cells = self._cells
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    cell = cells.get((cx, cy))
+                    if cell:
+                        candidates.update(cell)
+
+        candidates.update(self._large)
+
+        bounds = self._bounds
+        result = []
+        for ref in candidates:
+            bx0, by0, bx1, by1 = bounds[ref]
+            if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                result.append(ref)
+        return result
+
+
+def _with_stroke(table, row, x0, y0, x1, y1):
+    margin = STYLE_TABLE.width(table.style[row]) / 2
+    return x0 - margin, y0 - margin, x1 + margin, y1 + margin
+
+
+def document_entries(document, refs=None, children=None):
+    """
+    (ref, габариты в сцене с учетом толщины) для живых примитивов документа.
+    :param refs: корневые строки, с которых начинать (по умолчанию - весь документ)
+    """
+    for kind, row, dx, dy in iter_draw_order(document, children, refs):
+        table = document.tables[kind]
+        x0, y0, x1, y1 = table.bounds(row)
+        yield (kind, row), _with_stroke(table, row, x0 + dx, y0 + dy, x1 + dx, y1 + dy)
+
+
+def item_entries(document, item):
+    """(ref, габариты) примитивов Qt-объекта: самой фигуры или всех фигур группы"""
+    if item.table.shape_type in document.tables:
+        table = item.table
+        yield item.ref, _with_stroke(table, item.row, *document.scene_bounds(item.ref))
+        return
+
+    for child in item.childItems():
+        if hasattr(child, "ref"):
+            yield from item_entries(document, child)
+
+
+def item_refs(item):
+    """Ссылки примитивов Qt-объекта (как item_entries, но без подсчета габаритов)"""
+    if item.table.shape_type in SHAPE_FIELDS:
+        yield item.ref
+        return
+
+    for child in item.childItems():
+        if hasattr(child, "ref"):
+            yield from item_refs(child)
+
+
+def _scene_index(scene, item):
+    """Индекс сцены, если он есть и объект принадлежит ее документу"""
+    index = getattr(scene, "index", None)
+    if index is None or not hasattr(item, "ref") or item.table.document is not scene.document:
+        return None
+    return index
+
+
+def index_item(scene, item):
+    """Добавляет (или обновляет) примитивы объекта в индексе сцены, если он есть"""
+    index = _scene_index(scene, item)
+    if index is None:
+        return
+
+    for ref, bounds in item_entries(scene.document, item):
+        index.update(ref, bounds)
+
+
+def inflate_item(scene, item, margin):
+    """
+    Расширяет габариты примитива в индексе на margin с каждой стороны (margin < 0 - сужает).
+    Смена толщины меняет только поля обводки, пересчитывать геометрию не нужно.
+    """
+    index = _scene_index(scene, item)
+    if index is None:
+        return
+
+    bounds = index.bounds(item.ref)
+    if bounds is None:
+        index_item(scene, item)
+        return
+
+    x0, y0, x1, y1 = bounds
+    index.update(item.ref, (x0 - margin, y0 - margin, x1 + margin, y1 + margin))
+
+
+def unindex_item(scene, item):
+    index = _scene_index(scene, item)
+    if index is None:
+        return
+
+    for ref in item_refs(item):
+        index.remove(ref)
@@ -1,52 +1,105 @@
 import json
 from abc import ABC, abstractmethod
 
-from PySide6.QtCore import QRectF
 from PySide6.QtGui import QImage, QColor, QPainter
 
 from src.constants import PROJECT_VERSION, BG_COLOR_WHITE
+from src.logic.document import ShapeDocument, STYLE_TABLE
+from src.logic.io_manager import atomic_write
+from src.logic.rendering import render_document
+from src.logic.svg_export import write_svg
+from src.logic.vec_format import write_vec
+
+
+def scene_document(scene):
+    """Документ сцены; для обычной QGraphicsScene собирается из верхнеуровневых объектов"""
+    document = getattr(scene, "document", None)
+    if document is not None:
+        return document
+
+    # topLevelItem(), а не parentItem() is None: в PySide6 6.9 parentItem(), вернувший None,
+    # отдает объект во владение Python, и он удаляется вместе с последней ссылкой
+    items = [item for item in scene.items()[::-1] if hasattr(item, "to_dict") and item.topLevelItem() is item]
+    return ShapeDocument.from_dicts([item.to_dict() for item in items])
 
 
 class SaveStrategy(ABC):
-    @abstractmethod
+    """
+    Сохранение в два шага:
+    snapshot() - дешевая неизменяемая копия данных сцены (только в GUI-потоке),
+    write() - сериализация и запись на диск (можно в фоновом потоке).
+    """
+
     def save(self, filename: str, scene):
         """
         :param filename: Путь сохранения
         :param scene: Ссылка на QGraphicsScene (источник данных)
         """
+        self.write(filename, self.snapshot(scene))
+
+    def snapshot(self, scene):
+        return scene_document(scene).snapshot(), scene.sceneRect()
+
+    @abstractmethod
+    def write(self, filename: str, snapshot):
         pass
 
 
 class JsonSaveStrategy(SaveStrategy):
-    def save(self, filename, scene):
+    def write(self, filename, snapshot):
+        document, rect = snapshot
+
+        # Стили пишутся один раз, фигуры ссылаются на них по номеру
+        style_ids = {}
+        shapes = document.to_dicts(style_ids)
+
+        # styles идут раньше shapes: потоковый загрузчик читает их до первой фигуры
         data = {
             "version": PROJECT_VERSION,
             "scene": {
-                "width": scene.width(),
-                "height": scene.height()
+                "width": rect.width(),
+                "height": rect.height()
             },
-            "shapes": []
+            "styles": STYLE_TABLE.export(style_ids),
+            "shapes": shapes
         }
 
-        items = scene.items()[::-1]
+        with atomic_write(filename) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4)
+
+
+class VecSaveStrategy(SaveStrategy):
+    """Бинарный формат .vec (см. vec_format): колонки документа пишутся как есть"""
+
+    def write(self, filename, snapshot):
+        document, rect = snapshot
+
+        with atomic_write(filename) as tmp_path:
+            write_vec(tmp_path, document, rect.width(), rect.height())
+
+
+class SvgSaveStrategy(SaveStrategy):
+    """SVG для веб-конвейеров (см. svg_export): текст пишется кусками, целиком в памяти не собирается"""
 
-        for item in items:
-            if hasattr(item, "to_dict"):
-                data["shapes"].append(item.to_dict())
+    def write(self, filename, snapshot):
+        document, rect = snapshot
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
+        with atomic_write(filename) as tmp_path:
+            write_svg(tmp_path, document, rect)
 
 
 class ImageSaveStrategy(SaveStrategy):
-    def __init__(self, format_name="PNG", background_color=BG_COLOR_WHITE):
+    def __init__(self, format_name="PNG", background_color=BG_COLOR_WHITE, scale=1.0):
         self.format_name = format_name  # PNG, JPG
         self.bg_color = background_color
+        self.scale = scale  # пикселей на единицу сцены
 
-    def save(self, filename, scene):
-        rect = scene.sceneRect()
-        width = int(rect.width())
-        height = int(rect.height())
+    def write(self, filename, snapshot):
+        # Рисуем по документу, а не через scene.render: сцену нельзя трогать из фонового потока
+        document, rect = snapshot
+        width = int(rect.width() * self.scale)
+        height = int(rect.height() * self.scale)
 
         image = QImage(width, height, QImage.Format_ARGB32)
 
@@ -57,9 +110,13 @@ class ImageSaveStrategy(SaveStrategy):
 
         painter = QPainter(image)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.scale(self.scale, self.scale)
+        painter.translate(-rect.x(), -rect.y())
 
-        scene.render(painter, QRectF(image.rect()), rect)
+        render_document(painter, document)
 
         painter.end()  # Важно завершить рисование перед сохранением
 
-        image.save(filename, self.format_name)
\ No newline at end of file
+        with atomic_write(filename) as tmp_path:
+            if not image.save(tmp_path, self.format_name):
+                raise IOError(f"Не удалось записать изображение: {filename}")
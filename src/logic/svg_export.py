@@ -0,0 +1,226 @@
+"""
+Экспорт документа в SVG потоком.
+
+    <svg viewBox="..."> <style> .s0 {...} ... </style> [элементы в порядке отрисовки] </svg>
+
+Группы становятся <g transform="translate(...)">, позиция фигуры прибавляется к ее координатам.
+Стили общие для многих фигур, поэтому пишутся один раз CSS-классами .sN (N - id в STYLE_TABLE),
+а элемент ссылается на класс.
+
+Текст SVG целиком в памяти не собирается: iter_svg() отдает его кусками по SVG_CHUNK_ELEMENTS элементов.
+Порядок обхода тоже не требует объекта на фигуру (как children_map): у каждой таблицы номера живых строк,
+разложенные по родителям и отсортированные по z, лежат в array('I') - 4 байта на строку.
+"""
+import heapq
+import operator
+from array import array
+from itertools import compress, islice
+
+from src.constants import TYPE_LINE, TYPE_RECT, TYPE_ELLIPSE, TYPE_POLYLINE, TYPE_GROUP, SVG_CHUNK_ELEMENTS
+from src.logic.document import STYLE_TABLE, ROOT
+
+# Общее для всех фигур: без заливки, концы и стыки как у QPen по умолчанию
+BASE_STYLE = "line,rect,ellipse,polyline{fill:none;stroke-linecap:square;stroke-linejoin:bevel}"
+
+# Числа - 9 значащих цифр: столько нужно, чтобы без потерь пройти через float32 просмотрщиков SVG;
+# %-форматирование с %.9g втрое быстрее f-строк с repr и дает текст короче
+LINE = '<line class="s%d" x1="%.9g" y1="%.9g" x2="%.9g" y2="%.9g"/>\n'
+RECT = '<rect class="s%d" x="%.9g" y="%.9g" width="%.9g" height="%.9g"/>\n'
+ELLIPSE = '<ellipse class="s%d" cx="%.9g" cy="%.9g" rx="%.9g" ry="%.9g"/>\n'
+POLYLINE = '<polyline class="s%d" points="%s"/>\n'
+POINT = "%.9g,%.9g"
+GROUP = '<g transform="translate(%.9g,%.9g)">\n'
+
+
+def _line_writer(table):
+    x1s, y1s, x2s, y2s = (table.columns[name] for name in table.fields)
+    pos_x, pos_y, style = table.pos_x, table.pos_y, table.style
+
+    def write(row):
+        px, py = pos_x[row], pos_y[row]
+        return LINE % (style[row], x1s[row] + px, y1s[row] + py, x2s[row] + px, y2s[row] + py)
+
+    return write
+
+
+def _rect_writer(table):
+    xs, ys, ws, hs = (table.columns[name] for name in table.fields)
+    pos_x, pos_y, style = table.pos_x, table.pos_y, table.style
+
+    def write(row):
+        x, y, w, h = xs[row] + pos_x[row], ys[row] + pos_y[row], ws[row], hs[row]
+        # Qt рисует прямоугольник и с отрицательными сторонами, SVG - нет
+        if w < 0:
+            x, w = x + w, -w
+        if h < 0:
+            y, h = y + h, -h
+        return RECT % (style[row], x, y, w, h)
+
+    return write
+
+
+def _ellipse_writer(table):
+    xs, ys, ws, hs = (table.columns[name] for name in table.fields)
+    pos_x, pos_y, style = table.pos_x, table.pos_y, table.style
+
+    def write(row):
+        w, h = ws[row], hs[row]
+        return ELLIPSE % (style[row], xs[row] + w / 2 + pos_x[row], ys[row] + h / 2 + pos_y[row],
+                          abs(w) / 2, abs(h) / 2)
+
+    return write
+
+
+def _polyline_writer(table):
+    pos_x, pos_y, style = table.pos_x, table.pos_y, table.style
+
+    def write(row):
+        px, py = pos_x[row], pos_y[row]
+        points = table.vertices(row)
+        coords = " ".join(POINT % (x + px, y + py) for x, y in zip(points[0::2], points[1::2]))
+        return POLYLINE % (style[row], coords)
+
+    return write
+
+
+# Тип фигуры -> фабрика функции row -> строка элемента (колонки таблицы привязываются один раз)
+ELEMENT_WRITERS = {
+    TYPE_LINE: _line_writer,
+    TYPE_RECT: _rect_writer,
+    TYPE_ELLIPSE: _ellipse_writer,
+    TYPE_POLYLINE: _polyline_writer,
+}
+
+
+def _style_rule(style_id: int) -> str:
+    width = STYLE_TABLE.width(style_id)
+    if width == 0:
+        # Косметическое перо Qt: один пиксель при любом масштабе
+        return f".s{style_id}{{stroke:{STYLE_TABLE.color(style_id)};stroke-width:1;vector-effect:non-scaling-stroke}}"
+    return f".s{style_id}{{stroke:{STYLE_TABLE.color(style_id)};stroke-width:{width}}}"
+
+
+def used_styles(document) -> list:
+    """id стилей живых фигур по возрастанию (проход по колонкам, без обхода дерева)"""
+    styles = set()
+    for table in document.tables.values():
+        styles.update(compress(table.style, table.alive))
+    return sorted(styles)
+
+
+def child_index(table, group_count: int) -> tuple:
+    """
+    Живые строки таблицы, разложенные по родителям и отсортированные по z.
+    :return: (rows, offsets) - строки родителя p лежат в rows[offsets[p + 1]:offsets[p + 2]]
+    """
+    alive, parent, z = table.alive, table.parent, table.z
+
+    # z выдаются по возрастанию при добавлении, поэтому обычно строки уже в порядке z;
+    # сортировка (и ее временный список) нужна только после смены порядка наложения
+    order = range(len(alive))
+    if not all(map(operator.lt, z, islice(z, 1, None))):
+        order = array("I", sorted(order, key=z.__getitem__))
+
+    if group_count == 0:
+        rows = array("I", compress(order, alive))
+        return rows, array("I", [0, len(rows)])
+
+    # Устойчивая сортировка подсчетом по родителю: порядок z внутри родителя сохраняется
+    offsets = array("I", bytes(4 * (group_count + 2)))
+    for row in order:
+        if alive[row]:
+            offsets[parent[row] + 2] += 1
+    for slot in range(2, len(offsets)):
+        offsets[slot] += offsets[slot - 1]
+
+    rows = array("I", bytes(4 * offsets[-1]))
+    cursor = array("I", offsets)
+    for row in order:
+        if alive[row]:
+            slot = parent[row] + 1
+            rows[cursor[slot]] = row
+            cursor[slot] += 1
+
+    return rows, offsets
+
+
+def _stream(kind, z, rows, start, stop):
+    for i in range(start, stop):
+        row = rows[i]
+        yield z[row], kind, row
+
+
+class DrawOrder:
+    """Дети группы в порядке отрисовки: слияние по z уже отсортированных строк каждой таблицы"""
+
+    def __init__(self, document):
+        group_count = len(document.groups)
+        self._indexes = [
+            (table.shape_type, table.z, *child_index(table, group_count))
+            for table in document.all_tables()
+        ]
+
+    def children(self, parent_row: int):
+        """:return: итератор (z, тип, строка) детей parent_row"""
+        slot = parent_row + 1
+        streams = [
+            _stream(kind, z, rows, offsets[slot], offsets[slot + 1])
+            for kind, z, rows, offsets in self._indexes
+            if offsets[slot] < offsets[slot + 1]
+        ]
+        if len(streams) == 1:
+            return streams[0]
+        return heapq.merge(*streams)
+
+
+def iter_elements(document, order=None):
+    """Строки SVG для групп и фигур документа в порядке отрисовки (по строке на элемент или тег </g>)"""
+    if order is None:
+        order = DrawOrder(document)
+
+    groups = document.groups
+    writers = {kind: ELEMENT_WRITERS[kind](table) for kind, table in document.tables.items()}
+    stack = [order.children(ROOT)]
+
+    while stack:
+        child = next(stack[-1], None)
+
+        if child is None:
+            stack.pop()
+            if stack:
+                yield "</g>\n"
+            continue
+
+        _, kind, row = child
+        if kind == TYPE_GROUP:
+            yield GROUP % (groups.pos_x[row], groups.pos_y[row])
+            stack.append(order.children(row))
+        else:
+            yield writers[kind](row)
+
+
+def iter_svg(document, x: float, y: float, width: float, height: float, chunk=SVG_CHUNK_ELEMENTS):
+    """Текст SVG кусками: в памяти не больше chunk элементов сразу"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield ('<svg xmlns="http://www.w3.org/2000/svg" width="%.9g" height="%.9g" viewBox="%.9g %.9g %.9g %.9g">\n'
+           % (width, height, x, y, width, height))
+
+    # Цвета - имена QColor (#rrggbb), классы - числа: экранировать нечего
+    rules = [BASE_STYLE] + [_style_rule(style_id) for style_id in used_styles(document)]
+    yield "<style>\n" + "\n".join(rules) + "\n</style>\n"
+
+    elements = iter_elements(document)
+    while True:
+        part = "".join(islice(elements, chunk))
+        if not part:
+            break
+        yield part
+
+    yield "</svg>\n"
+
+
+def write_svg(filename: str, document, rect):
+    """:param rect: область сцены (QRectF) - становится viewBox"""
+    with open(filename, "w", encoding="utf-8", newline="\n") as f:
+        for part in iter_svg(document, rect.x(), rect.y(), rect.width(), rect.height()):
+            f.write(part)
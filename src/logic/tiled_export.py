@@ -0,0 +1,235 @@
+"""
+Экспорт больших изображений по тайлам.
+
+Целевое изображение режется на квадратные тайлы, тайлы рендерятся в пуле процессов
+(платформа Qt offscreen, без окон), а готовые полосы тайлов сразу пишутся в PNG построчно.
+В памяти одновременно держится не больше двух полос: ширина x EXPORT_TILE_SIZE x 2 x 4 байта,
+независимо от высоты картинки.
+"""
+import math
+import multiprocessing
+import os
+import struct
+import tempfile
+import zlib
+from collections import deque
+
+from PySide6.QtGui import QImage, QColor, QPainter
+
+from src.constants import EXPORT_TILE_SIZE, EXPORT_SCREEN_DPI, BG_COLOR_TRANSPARENT, BG_COLOR_WHITE
+from src.logic.document import STYLE_TABLE
+from src.logic.io_manager import atomic_write
+from src.logic.rendering import iter_draw_order, render_in_order
+from src.logic.strategies import SaveStrategy
+from src.logic.vec_format import write_vec, read_vec
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_IDAT_SIZE = 256 * 1024  # байт сжатых данных в одном чанке IDAT
+
+# Состояние процесса-рендерера: документ и раскладка примитивов по тайлам
+_tiles = {}
+_worker_app = None
+
+
+class PngRowWriter:
+    """Потоковая запись RGBA PNG: строки сжимаются и уходят в файл по мере поступления"""
+
+    def __init__(self, f, width: int, height: int, dpi: float = None):
+        self._f = f
+        self._compressor = zlib.compressobj(6)
+        self._buffer = []
+        self._buffered = 0
+
+        f.write(PNG_SIGNATURE)
+        # 8 бит на канал, цветовой тип 6 (RGBA), без чересстрочности
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        if dpi:
+            pixels_per_meter = round(dpi / 0.0254)
+            self._chunk(b"pHYs", struct.pack(">IIB", pixels_per_meter, pixels_per_meter, 1))
+
+    def _chunk(self, tag: bytes, data: bytes):
+        self._f.write(struct.pack(">I", len(data)))
+        self._f.write(tag)
+        self._f.write(data)
+        self._f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag))))
+
+    def _push(self, data: bytes):
+        if not data:
+            return
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= PNG_IDAT_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._chunk(b"IDAT", b"".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def write_row(self, row: bytes):
+        # Байт фильтра 0 (None) перед каждой строкой
+        self._push(self._compressor.compress(b"\0"))
+        self._push(self._compressor.compress(row))
+
+    def close(self):
+        self._push(self._compressor.flush())
+        self._flush()
+        self._chunk(b"IEND", b"")
+
+
+def _init_tiles(document, origin, scale, tile_size, background, width, height):
+    """Раскладывает примитивы документа по тайлам, которые они задевают (с учетом толщины)"""
+    ox, oy = origin
+    columns = math.ceil(width / tile_size)
+    rows = math.ceil(height / tile_size)
+    buckets = {}
+
+    for kind, row, dx, dy in iter_draw_order(document):
+        table = document.tables[kind]
+        x0, y0, x1, y1 = table.bounds(row)
+        margin = STYLE_TABLE.width(table.style[row]) / 2 + 1
+
+        left = math.floor(((min(x0, x1) + dx - margin - ox) * scale) / tile_size)
+        right = math.floor(((max(x0, x1) + dx + margin - ox) * scale) / tile_size)
+        top = math.floor(((min(y0, y1) + dy - margin - oy) * scale) / tile_size)
+        bottom = math.floor(((max(y0, y1) + dy + margin - oy) * scale) / tile_size)
+
+        for ty in range(max(top, 0), min(bottom, rows - 1) + 1):
+            for tx in range(max(left, 0), min(right, columns - 1) + 1):
+                bucket = buckets.get((tx, ty))
+                if bucket is None:
+                    bucket = buckets[(tx, ty)] = []
+                bucket.append((kind, row, dx, dy))
+
+    _tiles.clear()
+    _tiles.update(document=document, buckets=buckets, origin=origin, scale=scale,
+                  tile_size=tile_size, background=background, width=width, height=height)
+
+
+def _init_worker_process(vec_path, *args):
+    """Инициализация процесса пула: headless Qt и документ из временного .vec"""
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
+    global _worker_app
+    from PySide6.QtGui import QGuiApplication
+    if QGuiApplication.instance() is None:
+        _worker_app = QGuiApplication([])
+
+    document, _ = read_vec(vec_path)
+    _init_tiles(document, *args)
+
+
+def _render_tile(tx: int, ty: int) -> bytes:
+    """:return: пиксели тайла в RGBA8888, строка за строкой без выравнивания"""
+    tile_size = _tiles["tile_size"]
+    scale = _tiles["scale"]
+    ox, oy = _tiles["origin"]
+
+    left, top = tx * tile_size, ty * tile_size
+    w = min(tile_size, _tiles["width"] - left)
+    h = min(tile_size, _tiles["height"] - top)
+
+    image = QImage(w, h, QImage.Format_ARGB32_Premultiplied)
+    if _tiles["background"] == BG_COLOR_TRANSPARENT:
+        image.fill(QColor(0, 0, 0, 0))
+    else:
+        image.fill(QColor(_tiles["background"]))
+
+    bucket = _tiles["buckets"].get((tx, ty))
+    if bucket:
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.translate(-left, -top)
+        painter.scale(scale, scale)
+        painter.translate(-ox, -oy)
+        render_in_order(painter, _tiles["document"], bucket)
+        painter.end()
+
+    # Строки QImage выровнены по 4 байта, у RGBA это и есть w * 4
+    image = image.convertToFormat(QImage.Format_RGBA8888)
+    return bytes(image.constBits())[:w * h * 4]
+
+
+class TiledImageSaveStrategy(SaveStrategy):
+    """
+    PNG любого размера: тайлы рендерятся в пуле процессов и построчно сшиваются в файл.
+    :param scale: Множитель размера в пикселях (1.0 - один пиксель на единицу сцены)
+    :param dpi: Альтернатива scale: масштаб = dpi / EXPORT_SCREEN_DPI, значение пишется в pHYs
+    :param workers: Число процессов; 0 - рендер в текущем процессе
+    """
+
+    def __init__(self, background_color=BG_COLOR_WHITE, scale=None, dpi=None,
+                 tile_size=EXPORT_TILE_SIZE, workers=None):
+        if dpi is not None:
+            scale = dpi / EXPORT_SCREEN_DPI
+        elif scale is None:
+            scale = 1.0
+
+        self.bg_color = background_color
+        self.scale = scale
+        self.dpi = dpi if dpi is not None else EXPORT_SCREEN_DPI * scale
+        self.tile_size = tile_size
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+
+    def write(self, filename, snapshot):
+        document, rect = snapshot
+        width = max(1, math.ceil(rect.width() * self.scale))
+        height = max(1, math.ceil(rect.height() * self.scale))
+
+        params = ((rect.x(), rect.y()), self.scale, self.tile_size, self.bg_color, width, height)
+
+        with atomic_write(filename) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                png = PngRowWriter(f, width, height, self.dpi)
+
+                for band in self._bands(document, params):
+                    for row in band:
+                        png.write_row(row)
+
+                png.close()
+
+    def _bands(self, document, params):
+        """Итератор полос тайлов; полоса - итератор строк изображения в RGBA"""
+        *_, tile_size, _, width, height = params
+        columns = math.ceil(width / tile_size)
+        rows = math.ceil(height / tile_size)
+
+        if self.workers == 0:
+            _init_tiles(document, *params)
+            try:
+                for ty in range(rows):
+                    yield _stitch([_render_tile(tx, ty) for tx in range(columns)], tile_size, width)
+            finally:
+                _tiles.clear()
+            return
+
+        # Процессы получают документ через временный .vec (mmap), а не через pickle
+        with tempfile.TemporaryDirectory() as tmp:
+            vec_path = os.path.join(tmp, "scene.vec")
+            write_vec(vec_path, document, width, height)
+
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(self.workers, initializer=_init_worker_process, initargs=(vec_path, *params)) as pool:
+                tiles = ((tx, ty) for ty in range(rows) for tx in range(columns))
+                pending = deque()
+
+                for ty in range(rows):
+                    # Очередь заданий не длиннее двух полос, чтобы память не росла
+                    while len(pending) < 2 * columns:
+                        tile = next(tiles, None)
+                        if tile is None:
+                            break
+                        pending.append(pool.apply_async(_render_tile, tile))
+
+                    band = [pending.popleft().get() for _ in range(columns)]
+                    yield _stitch(band, tile_size, width)
+
+
+def _stitch(band: list, tile_size: int, width: int):
+    """Склеивает тайлы одной полосы в строки изображения (по одной строке за раз)"""
+    widths = [min(tile_size, width - tx * tile_size) * 4 for tx in range(len(band))]
+    height = len(band[0]) // widths[0]
+
+    for y in range(height):
+        yield b"".join(tile[y * w:(y + 1) * w] for tile, w in zip(band, widths))
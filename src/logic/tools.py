@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QGraphicsView
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import QGraphicsView, QGraphicsItem
 
-from src.constants import DEFAULT_COLOR
-from src.logic.commands import AddShapeCommand, MoveCommand
+from src.constants import DEFAULT_COLOR, FREEHAND_TOLERANCE_PX
+from src.logic.Polyline import Polyline
+from src.logic.commands import AddShapeCommand, BulkMoveCommand, new_session
 from src.logic.factory import ShapeFactory
+from src.logic.simplify import StreamSimplifier
 
 
 class Tool(ABC):
@@ -24,14 +26,30 @@ class Tool(ABC):
 
 
 class CreationTool(Tool):
+    """
+    Рисование новой фигуры.
+    Пока кнопка зажата, фигура - предпросмотр в оверлее холста (EditorCanvas.show_preview):
+    ее нет на сцене, в индексе и кэше растра, а перерисовывается только ее область.
+    Движения мыши не перестраивают путь сами: они запоминают положение, а путь строится
+    один раз, когда цикл событий разберет накопившийся ввод, - по последнему положению.
+    Отрисовку Qt сама сводит к одному кадру на все update() между кадрами.
+    На отпускании тот же объект становится фигурой документа (AddShapeCommand).
+    """
+
     def __init__(self, view, shape_type, undo_stack, color=DEFAULT_COLOR):
         super().__init__(view)
         self.shape_type = shape_type
         self.color = color
         self.start_pos = None
-        self.temp_shape = None
+        self.preview = None
         self.undo_stack = undo_stack
 
+        self._pending = None  # последнее положение мыши, еще не примененное к предпросмотру
+        self._apply_timer = QTimer(view)
+        self._apply_timer.setSingleShot(True)
+        self._apply_timer.setInterval(0)
+        self._apply_timer.timeout.connect(self._apply_pending)
+
     def mouse_press(self, event):
         if event.button() != Qt.LeftButton:
             QGraphicsView.mousePressEvent(self.view, event)
@@ -39,77 +57,180 @@ class CreationTool(Tool):
 
         self.start_pos = self.view.mapToScene(event.pos())
 
-        self.temp_shape = ShapeFactory.create_shape(
+        self.preview = ShapeFactory.create_shape(
             self.shape_type,
             self.start_pos,
             self.start_pos,
             self.color
         )
-        self.scene.addItem(self.temp_shape)
+        self.view.show_preview(self.preview)
 
     def mouse_move(self, event):
-        if self.temp_shape and (event.buttons() and Qt.LeftButton):
-            current_pos = self.view.mapToScene(event.pos())
-            self.temp_shape.set_geometry(self.start_pos, current_pos)
+        if self.preview is not None and event.buttons() & Qt.LeftButton:
+            self._pending = self.view.mapToScene(event.pos())
+            if not self._apply_timer.isActive():
+                self._apply_timer.start()
         else:
             QGraphicsView.mouseMoveEvent(self.view, event)
 
-    def mouse_release(self, event):
-        if self.temp_shape and event.button() == Qt.LeftButton:
-            self.scene.removeItem(self.temp_shape)
-            self.temp_shape = None
+    def _apply_pending(self):
+        if self._pending is None or self.preview is None:
+            return
+        self.preview.set_geometry(self.start_pos, self._pending)
+        self._pending = None
+        self.view.update_preview()
 
-            end_pos = self.view.mapToScene(event.pos())
-            try:
-                final_shape = ShapeFactory.create_shape(
-                    self.shape_type, self.start_pos, end_pos, DEFAULT_COLOR
-                )
+    def mouse_release(self, event):
+        if self.preview is not None and event.button() == Qt.LeftButton:
+            self._apply_timer.stop()
+            shape = self.preview
+            self.preview = None
+            self._pending = None
 
-                command = AddShapeCommand(self.scene, final_shape)
-                self.undo_stack.push(command)
+            shape.set_geometry(self.start_pos, self.view.mapToScene(event.pos()))
+            self.view.clear_preview()
 
-            except ValueError:
-                pass
+            self.undo_stack.push(AddShapeCommand(self.scene, shape))
 
             self.start_pos = None
         else:
             QGraphicsView.mouseReleaseEvent(self.view, event)
 
 
+class FreehandTool(Tool):
+    """
+    Рисование ломаной от руки.
+    Точки мыши упрощаются по мере поступления (StreamSimplifier): вершиной становится только
+    точка, без которой ломаная отошла бы от пути мыши дальше FREEHAND_TOLERANCE_PX экрана,
+    поэтому долгий штрих не копит тысячи почти совпадающих точек. Предпросмотр в оверлее
+    и применение движений раз за цикл событий - как у CreationTool.
+    На отпускании ломаная упрощается целиком и добавляется в документ (AddShapeCommand).
+    """
+
+    def __init__(self, view, undo_stack, color=DEFAULT_COLOR):
+        super().__init__(view)
+        self.color = color
+        self.undo_stack = undo_stack
+        self.preview = None
+        self.simplifier = None
+
+        self._apply_timer = QTimer(view)
+        self._apply_timer.setSingleShot(True)
+        self._apply_timer.setInterval(0)
+        self._apply_timer.timeout.connect(self._apply_pending)
+
+    def _add_point(self, event):
+        pos = self.view.mapToScene(event.pos())
+        self.simplifier.add(pos.x(), pos.y())
+
+    def mouse_press(self, event):
+        if event.button() != Qt.LeftButton:
+            QGraphicsView.mousePressEvent(self.view, event)
+            return
+
+        # Допуск задан в пикселях экрана: при увеличении штрих сохраняет больше деталей
+        scale = abs(self.view.transform().m11()) or 1.0
+        self.simplifier = StreamSimplifier(FREEHAND_TOLERANCE_PX / scale)
+        self._add_point(event)
+
+        self.preview = Polyline(self.simplifier.vertices(), self.color)
+        self.view.show_preview(self.preview)
+
+    def mouse_move(self, event):
+        if self.preview is not None and event.buttons() & Qt.LeftButton:
+            self._add_point(event)
+            if not self._apply_timer.isActive():
+                self._apply_timer.start()
+        else:
+            QGraphicsView.mouseMoveEvent(self.view, event)
+
+    def _apply_pending(self):
+        if self.preview is None:
+            return
+        self.preview.set_points(self.simplifier.vertices())
+        self.view.update_preview()
+
+    def mouse_release(self, event):
+        if self.preview is not None and event.button() == Qt.LeftButton:
+            self._apply_timer.stop()
+            self._add_point(event)
+
+            shape = self.preview
+            self.preview = None
+            shape.set_points(self.simplifier.finish())
+            self.simplifier = None
+            self.view.clear_preview()
+
+            self.undo_stack.push(AddShapeCommand(self.scene, shape))
+        else:
+            QGraphicsView.mouseReleaseEvent(self.view, event)
+
+
 class SelectionTool(Tool):
+    """
+    Выделение и перетаскивание.
+    Qt двигал бы каждый выделенный объект на каждое движение мыши. Вместо этого выделение
+    на время перетаскивания - снимок в оверлее холста (EditorCanvas.begin_drag), и движение
+    мыши только сдвигает снимок. Объекты, документ и индекс меняются один раз на отпускании
+    одной командой BulkMoveCommand с общим сдвигом.
+    """
+
     def __init__(self, view, undo_stack):
         super().__init__(view)
         self.undo_stack = undo_stack
 
-        self.item_positions = {}
+        self.drag_start = None  # точка сцены, где нажали на выделенный объект
+        self.drag_items = None  # что тащим (None - перетаскивание еще не началось)
+        self.drag_session = None  # номер перетаскивания: команды разных перетаскиваний не склеиваются
 
     def mouse_press(self, event):
+        # Фигура из слоя пакетной отрисовки становится отдельным объектом,
+        # после чего Qt выделяет ее как обычно
+        if event.button() == Qt.LeftButton and self.view.itemAt(event.pos()) is None:
+            if hasattr(self.view, "promote_at"):
+                self.view.promote_at(self.view.mapToScene(event.pos()))
+
         super(type(self.view), self.view).mousePressEvent(event)
 
-        self.item_positions.clear()
-        for item in self.scene.selectedItems():
-            self.item_positions[item] = item.pos()
+        self.drag_start = None
+        self.drag_items = None
+        grabber = self.scene.mouseGrabberItem()
+        if (event.button() == Qt.LeftButton and grabber is not None and grabber.isSelected()
+                and grabber.flags() & QGraphicsItem.GraphicsItemFlag.ItemIsMovable):
+            self.drag_start = self.view.mapToScene(event.pos())
 
     def mouse_move(self, event):
-        super(type(self.view), self.view).mouseMoveEvent(event)
+        if self.drag_start is None or not event.buttons() & Qt.LeftButton:
+            super(type(self.view), self.view).mouseMoveEvent(event)
+            return
+
+        if self.drag_items is None:
+            self.drag_items = self._movable_selection()
+            self.drag_session = new_session()
+            self.view.begin_drag(self.drag_items)
+
+        self.view.move_drag(self.view.mapToScene(event.pos()) - self.drag_start)
 
     def mouse_release(self, event):
-        super(type(self.view), self.view).mouseReleaseEvent(event)
+        # Рамку выделения Qt проверяет только по Qt-объектам; фигуры слоев добирает индекс
+        band = self.view.rubberBandRect()
+        if not band.isEmpty() and hasattr(self.view, "select_rect"):
+            self.view.select_rect(self.view.mapToScene(band).boundingRect())
 
-        moved_items = []
-        for item, old_pos in self.item_positions.items():
-            new_pos = item.pos()
-            if new_pos != old_pos:
-                moved_items.append((item, old_pos, new_pos))
+        super(type(self.view), self.view).mouseReleaseEvent(event)
 
-        if moved_items:
-            self.undo_stack.beginMacro("Move Items")
+        if self.drag_items is not None:
+            delta = self.view.mapToScene(event.pos()) - self.drag_start
+            self.view.end_drag()
 
-            for item, old_pos, new_pos in moved_items:
-                cmd = MoveCommand(item, old_pos, new_pos)
-                self.undo_stack.push(cmd)
+            if self.drag_items and not delta.isNull():
+                self.undo_stack.push(BulkMoveCommand(self.scene, self.drag_items, delta, self.drag_session))
 
-            self.undo_stack.endMacro()
+        self.drag_start = None
+        self.drag_items = None
 
-        # Очищаем память
-        self.item_positions.clear()
\ No newline at end of file
+    def _movable_selection(self) -> list:
+        """Выделенные перемещаемые объекты верхнего уровня (детей Qt выделяет вместе с группой)"""
+        movable = QGraphicsItem.GraphicsItemFlag.ItemIsMovable
+        return [item for item in self.scene.selectedItems()
+                if item.topLevelItem() is item and item.flags() & movable]
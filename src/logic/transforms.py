@@ -0,0 +1,321 @@
+"""
+Пакетные преобразования выделения: сдвиг, масштаб, поворот, выравнивание, распределение.
+
+Координаты выбранных примитивов собираются в колонки сцены (ShapeCoords: по две точки
+на фигуру - концы линии или противоположные углы прямоугольника/эллипса). Операция
+считает новые колонки одним проходом по старым, не трогая ни документ, ни Qt-объекты;
+записывает их BulkTransformCommand - разом, одной командой отмены.
+
+Прямоугольники и эллипсы в документе выровнены по осям (x, y, w, h без угла), поэтому
+при повороте вокруг опорной точки поворачивается их центр, а размеры сохраняются;
+на нечетное число четвертей оборота ширина и высота меняются местами.
+
+Ломаная входит в колонки углами своих габаритов. Сдвиг, масштаб, выравнивание и
+распределение переносят ее вершины из старых габаритов в новые; поворот считает
+вершины сам (ShapeCoords.set_vertices), габариты - по повернутым вершинам.
+"""
+import math
+from array import array
+
+from src.constants import TYPE_LINE
+from src.logic.document import ROOT, STYLE_TABLE
+
+ALIGN_EDGES = ("left", "right", "top", "bottom", "hcenter", "vcenter")
+DISTRIBUTE_AXES = ("horizontal", "vertical")
+
+
+class ShapeCoords:
+    """
+    Точки (x1, y1) и (x2, y2) примитивов items в координатах сцены, колонками array('d').
+    Фигуры разложены по таблицам документа: колонки читаются и пишутся потаблично,
+    без кортежа значений на каждую строку. Порядок items - порядок точек.
+    """
+
+    def __init__(self, scene, items):
+        self.document = getattr(scene, "document", None)
+
+        by_table = {}
+        for item in items:
+            by_table.setdefault(id(item.table), (item.table, []))[1].append(item)
+
+        self.items = []
+        self.tables = []  # (таблица, строки, первая позиция в колонках)
+        self.polylines = []  # (позиция, таблица, строка) ломаных
+        self._vertices = (None, {})  # (точки операции, {позиция: вершины ломаной}) - см. set_vertices
+        self.is_line = bytearray()
+        self.ox, self.oy = array('d'), array('d')  # смещение строки в сцену: позиция фигуры и групп-предков
+        self.x1, self.y1, self.x2, self.y2 = array('d'), array('d'), array('d'), array('d')
+
+        for table, table_items in by_table.values():
+            rows = [item.row for item in table_items]
+            start = len(self.items)
+            self.tables.append((table, rows, start))
+            self.items.extend(table_items)
+            self._gather(table, rows)
+
+            if table.has_points:
+                self.polylines.extend((start + i, table, row) for i, row in enumerate(rows))
+
+    def _gather(self, table, rows):
+        ox = [table.pos_x[row] for row in rows]
+        oy = [table.pos_y[row] for row in rows]
+
+        parents = table.parent
+        if self.document is not None and any(parents[row] != ROOT for row in rows):
+            offsets = {}
+            for i, row in enumerate(rows):
+                parent = parents[row]
+                if parent != ROOT:
+                    if parent not in offsets:
+                        offsets[parent] = self.document.offset(parent)
+                    dx, dy = offsets[parent]
+                    ox[i] += dx
+                    oy[i] += dy
+
+        a, b, c, d = ([column[row] for row in rows] for column in map(table.columns.get, table.fields))
+        is_line = table.shape_type == TYPE_LINE
+        if not is_line:
+            c = list(map(float.__add__, a, c))
+            d = list(map(float.__add__, b, d))
+
+        self.is_line.extend([is_line] * len(rows))
+        self.ox.extend(ox)
+        self.oy.extend(oy)
+        self.x1.extend(map(float.__add__, a, ox))
+        self.y1.extend(map(float.__add__, b, oy))
+        self.x2.extend(map(float.__add__, c, ox))
+        self.y2.extend(map(float.__add__, d, oy))
+
+    def __len__(self):
+        return len(self.items)
+
+    def points(self) -> tuple:
+        return self.x1, self.y1, self.x2, self.y2
+
+    def set_vertices(self, points, vertices: dict):
+        """Операция, вернувшая points, сама посчитала вершины ломаных: {позиция: вершины в координатах строки}"""
+        self._vertices = (points, vertices)
+
+    def runs(self) -> dict:
+        """Текущие отрезки пула вершин ломаных: {позиция: (start, count)} - для отмены"""
+        return {i: table.run(row) for i, table, row in self.polylines}
+
+    def write(self, points, runs=None):
+        """
+        Записывает точки сцены в строки документа (позиции фигур не меняются).
+        :param runs: отрезки пула ломаных от runs(); без них вершины ломаных пересчитываются
+        """
+        self._write_polylines(points, runs)
+
+        for table, rows, start in self.tables:
+            if table.has_points:
+                continue
+
+            end = start + len(rows)
+            ox, oy = self.ox[start:end], self.oy[start:end]
+            a, b, c, d = (column[start:end] for column in points)
+
+            if table.shape_type == TYPE_LINE:
+                values = (map(float.__sub__, a, ox), map(float.__sub__, b, oy),
+                          map(float.__sub__, c, ox), map(float.__sub__, d, oy))
+            else:
+                left, top = list(map(min, a, c)), list(map(min, b, d))
+                values = (map(float.__sub__, left, ox), map(float.__sub__, top, oy),
+                          [max(x0, x1) - x for x0, x1, x in zip(a, c, left)],
+                          [max(y0, y1) - y for y0, y1, y in zip(b, d, top)])
+
+            for column, column_values in zip(map(table.columns.get, table.fields), values):
+                for row, value in zip(rows, column_values):
+                    column[row] = value
+
+    def _write_polylines(self, points, runs):
+        if runs is not None:
+            for i, table, row in self.polylines:
+                table.set_run(row, runs[i])
+            return
+
+        computed = self._vertices[1] if self._vertices[0] is points else {}
+        x1, y1, x2, y2 = points
+
+        for i, table, row in self.polylines:
+            vertices = computed.get(i)
+            if vertices is None:
+                # Старые габариты -> новые: по каждой оси свой масштаб; пустая ось только сдвигается
+                ox, oy = self.ox[i], self.oy[i]
+                old_x, old_y = self.x1[i], self.y1[i]
+                old_w, old_h = self.x2[i] - old_x, self.y2[i] - old_y
+                kx = (x2[i] - x1[i]) / old_w if old_w else 1.0
+                ky = (y2[i] - y1[i]) / old_h if old_h else 1.0
+                left, top = x1[i] - ox, y1[i] - oy
+                old_x, old_y = old_x - ox, old_y - oy
+
+                vertices = table.vertices(row)
+                xs = [left + (x - old_x) * kx for x in vertices[0::2]]
+                ys = [top + (y - old_y) * ky for y in vertices[1::2]]
+                vertices[0::2] = array('d', xs)
+                vertices[1::2] = array('d', ys)
+
+            table.set_vertices(row, vertices)
+
+    def index_entries(self, points) -> list:
+        """(ref, габариты в сцене с учетом толщины) для индекса - прямо из точек, без обхода групп"""
+        refs, margins = [], []
+        half_widths = {}
+        for table, rows, _ in self.tables:
+            shape_type, style = table.shape_type, table.style
+            refs.extend((shape_type, row) for row in rows)
+            for row in rows:
+                style_id = style[row]
+                margin = half_widths.get(style_id)
+                if margin is None:
+                    margin = half_widths[style_id] = STYLE_TABLE.width(style_id) / 2
+                margins.append(margin)
+
+        x1, y1, x2, y2 = points
+        return list(zip(refs, zip(
+            [x - m for x, m in zip(map(min, x1, x2), margins)],
+            [y - m for y, m in zip(map(min, y1, y2), margins)],
+            [x + m for x, m in zip(map(max, x1, x2), margins)],
+            [y + m for y, m in zip(map(max, y1, y2), margins)],
+        )))
+
+
+def bounds(points) -> tuple:
+    """Общие габариты точек: (x0, y0, x1, y1)"""
+    x1, y1, x2, y2 = points
+    return min(min(x1), min(x2)), min(min(y1), min(y2)), max(max(x1), max(x2)), max(max(y1), max(y2))
+
+
+def _center(points) -> tuple:
+    x0, y0, x1, y1 = bounds(points)
+    return (x0 + x1) / 2, (y0 + y1) / 2
+
+
+def translate(coords, dx, dy) -> tuple:
+    x1, y1, x2, y2 = coords.points()
+    return (array('d', [x + dx for x in x1]), array('d', [y + dy for y in y1]),
+            array('d', [x + dx for x in x2]), array('d', [y + dy for y in y2]))
+
+
+def scale(coords, sx, sy, anchor=None) -> tuple:
+    """Масштаб относительно anchor (по умолчанию - центр габаритов выделения)"""
+    ax, ay = anchor if anchor is not None else _center(coords.points())
+    x1, y1, x2, y2 = coords.points()
+    return (array('d', [ax + (x - ax) * sx for x in x1]), array('d', [ay + (y - ay) * sy for y in y1]),
+            array('d', [ax + (x - ax) * sx for x in x2]), array('d', [ay + (y - ay) * sy for y in y2]))
+
+
+def rotate(coords, degrees, anchor=None) -> tuple:
+    """Поворот на degrees по часовой стрелке (ось y сцены смотрит вниз) вокруг anchor"""
+    ax, ay = anchor if anchor is not None else _center(coords.points())
+    radians = math.radians(degrees)
+    cos, sin = math.cos(radians), math.sin(radians)
+    # Четверти оборота считаем точно: иначе cos(90°) дает 6e-17 и координаты "плывут"
+    if degrees % 90 == 0:
+        cos, sin = round(cos), round(sin)
+    swap = degrees % 180 == 90
+
+    out = [array('d'), array('d'), array('d'), array('d')]
+    nx1, ny1, nx2, ny2 = out
+    for is_line, a, b, c, d in zip(coords.is_line, *coords.points()):
+        if is_line:
+            nx1.append(ax + (a - ax) * cos - (b - ay) * sin)
+            ny1.append(ay + (a - ax) * sin + (b - ay) * cos)
+            nx2.append(ax + (c - ax) * cos - (d - ay) * sin)
+            ny2.append(ay + (c - ax) * sin + (d - ay) * cos)
+            continue
+
+        cx, cy = (a + c) / 2, (b + d) / 2
+        hw, hh = abs(c - a) / 2, abs(d - b) / 2
+        if swap:
+            hw, hh = hh, hw
+        rx = ax + (cx - ax) * cos - (cy - ay) * sin
+        ry = ay + (cx - ax) * sin + (cy - ay) * cos
+        nx1.append(rx - hw)
+        ny1.append(ry - hh)
+        nx2.append(rx + hw)
+        ny2.append(ry + hh)
+
+    # Ломаная поворачивается по вершинам: ее габариты после поворота - габариты повернутых вершин
+    vertices = {}
+    for i, table, row in coords.polylines:
+        ox, oy = coords.ox[i], coords.oy[i]
+        points = table.vertices(row)
+        xs, ys = points[0::2], points[1::2]
+        # Локальная вершина v: в сцене v + o, поворот вокруг anchor, обратно в координаты строки
+        bx, by = ax - ox, ay - oy
+        rxs = array('d', [bx + (x - bx) * cos - (y - by) * sin for x, y in zip(xs, ys)])
+        rys = array('d', [by + (x - bx) * sin + (y - by) * cos for x, y in zip(xs, ys)])
+        points[0::2], points[1::2] = rxs, rys
+        vertices[i] = points
+
+        if points:
+            nx1[i], ny1[i] = min(rxs) + ox, min(rys) + oy
+            nx2[i], ny2[i] = max(rxs) + ox, max(rys) + oy
+
+    out = tuple(out)
+    coords.set_vertices(out, vertices)
+    return out
+
+
+def _shape_bounds(points) -> tuple:
+    """Колонки габаритов каждой фигуры: (левые, верхние, правые, нижние)"""
+    x1, y1, x2, y2 = points
+    return list(map(min, x1, x2)), list(map(min, y1, y2)), list(map(max, x1, x2)), list(map(max, y1, y2))
+
+
+def _shift(coords, dxs, dys) -> tuple:
+    """Сдвиг каждой фигуры на свой (dx, dy)"""
+    x1, y1, x2, y2 = coords.points()
+    return (array('d', map(float.__add__, x1, dxs)), array('d', map(float.__add__, y1, dys)),
+            array('d', map(float.__add__, x2, dxs)), array('d', map(float.__add__, y2, dys)))
+
+
+def align(coords, edge) -> tuple:
+    """Выравнивает фигуры по краю или центру общих габаритов (edge из ALIGN_EDGES)"""
+    if edge not in ALIGN_EDGES:
+        raise ValueError(f"Unknown align edge: {edge}")
+
+    points = coords.points()
+    left, top, right, bottom = bounds(points)
+    x0, y0, x1, y1 = _shape_bounds(points)
+    zeros = [0.0] * len(coords)
+
+    if edge == "left":
+        return _shift(coords, [left - x for x in x0], zeros)
+    if edge == "right":
+        return _shift(coords, [right - x for x in x1], zeros)
+    if edge == "top":
+        return _shift(coords, zeros, [top - y for y in y0])
+    if edge == "bottom":
+        return _shift(coords, zeros, [bottom - y for y in y1])
+    if edge == "hcenter":
+        middle = left + right
+        return _shift(coords, [(middle - a - b) / 2 for a, b in zip(x0, x1)], zeros)
+
+    middle = top + bottom
+    return _shift(coords, zeros, [(middle - a - b) / 2 for a, b in zip(y0, y1)])
+
+
+def distribute(coords, axis) -> tuple:
+    """
+    Расставляет центры фигур вдоль оси (axis из DISTRIBUTE_AXES) с равным шагом
+    между крайними центрами; порядок фигур вдоль оси сохраняется.
+    """
+    if axis not in DISTRIBUTE_AXES:
+        raise ValueError(f"Unknown distribute axis: {axis}")
+
+    x0, y0, x1, y1 = _shape_bounds(coords.points())
+    low, high = (x0, x1) if axis == "horizontal" else (y0, y1)
+    centers = [(a + b) / 2 for a, b in zip(low, high)]
+
+    count = len(centers)
+    shifts = [0.0] * count
+    if count > 2:
+        order = sorted(range(count), key=centers.__getitem__)
+        first, step = centers[order[0]], (centers[order[-1]] - centers[order[0]]) / (count - 1)
+        for place, index in enumerate(order):
+            shifts[index] = first + step * place - centers[index]
+
+    zeros = [0.0] * count
+    return _shift(coords, shifts, zeros) if axis == "horizontal" else _shift(coords, zeros, shifts)
@@ -0,0 +1,270 @@
+"""
+Бинарный формат проекта .vec
+
+    [заголовок] [каталог блоков] [блоки]
+
+Заголовок:  magic "VEC1", версия формата, ширина и высота сцены, число блоков.
+Каталог:    для каждого блока - тег, смещение, размер в байтах, число строк.
+Блоки:
+    STYL - таблица стилей: (толщина u16, длина u8, цвет utf-8) на строку
+    LINE / RECT / ELLI - колонки фигур одного типа подряд:
+        координаты (f64 x4), pos_x, pos_y (f64), z (u64), parent (i32), style (u32)
+    POLY - ломаные: габариты (f64 x4), первая вершина (u64), число вершин (u32), далее как у LINE
+    PNTS - вершины всех ломаных подряд (f64 x, y); число строк блока - число вершин
+    GRUP - дерево групп: pos_x, pos_y (f64), z (u64), parent (i32)
+
+Блоков POLY и PNTS может не быть (файлы до появления ломаных).
+
+Все числа little-endian, каждая колонка выровнена на 8 байт,
+поэтому колонки читаются из mmap через memoryview.cast() без копирования.
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from src.constants import TYPE_LINE, TYPE_RECT, TYPE_ELLIPSE, TYPE_POLYLINE, TYPE_GROUP
+from src.logic.document import ShapeDocument, STYLE_TABLE, SHAPE_FIELDS, POINT_TYPES, ROOT
+
+MAGIC = b"VEC1"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<4sHHddI")
+DIRECTORY_ENTRY = struct.Struct("<4sQQI")
+STYLE_ENTRY = struct.Struct("<HB")
+
+BLOCK_TAGS = {
+    TYPE_LINE: b"LINE",
+    TYPE_RECT: b"RECT",
+    TYPE_ELLIPSE: b"ELLI",
+    TYPE_POLYLINE: b"POLY",
+    TYPE_GROUP: b"GRUP",
+}
+STYLE_TAG = b"STYL"
+POINTS_TAG = b"PNTS"
+
+# (имя колонки, typecode array) - общие колонки после координат
+SHAPE_COLUMNS = [("pos_x", "d"), ("pos_y", "d"), ("z", "Q"), ("parent", "i"), ("style", "I")]
+GROUP_COLUMNS = [("pos_x", "d"), ("pos_y", "d"), ("z", "Q"), ("parent", "i")]
+# Ссылки ломаной на вершины в блоке PNTS - между координатами и общими колонками
+POINT_REF_COLUMNS = [("start", "Q"), ("count", "I")]
+
+
+def _column_layout(kind: str) -> list:
+    """Порядок колонок таблицы в блоке: [(имя, typecode)]"""
+    if kind == TYPE_GROUP:
+        return GROUP_COLUMNS
+    points = POINT_REF_COLUMNS if kind in POINT_TYPES else []
+    return [(name, "d") for name in SHAPE_FIELDS[kind]] + points + SHAPE_COLUMNS
+
+
+def _get_column(table, name):
+    if name in getattr(table, "columns", {}):
+        return table.columns[name]
+    return getattr(table, name)
+
+
+def _pad(size: int) -> int:
+    return (8 - size % 8) % 8
+
+
+def _to_le(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_vec(filename: str, document, width: float, height: float):
+    rows_by_type = document.reachable_rows()
+
+    # Группы при сжатии получают новые номера, ссылки parent переписываются
+    group_rows = rows_by_type[TYPE_GROUP]
+    group_remap = None
+    if not isinstance(group_rows, range):
+        group_remap = {old: new for new, old in enumerate(group_rows)}
+        group_remap[ROOT] = ROOT
+
+    blocks = [(STYLE_TAG, len(STYLE_TABLE), [_styles_block()])]
+
+    for table in document.all_tables():
+        rows = rows_by_type[table.shape_type]
+        parts = []
+
+        # В файл идут только вершины сохраняемых строк, без старых отрезков пула
+        starts = None
+        if getattr(table, "has_points", False):
+            starts, points = table.pack_points(rows)
+            blocks.append((POINTS_TAG, len(points) // 2, [_to_le(points)]))
+
+        for name, typecode in _column_layout(table.shape_type):
+            column = _get_column(table, name)
+
+            if name == "start":
+                column = starts
+            elif not isinstance(rows, range):
+                column = array(typecode, [column[row] for row in rows])
+            if name == "parent" and group_remap is not None:
+                column = array(typecode, [group_remap[parent] for parent in column])
+
+            data = _to_le(column)
+            parts.append(data)
+            parts.append(b"\0" * _pad(len(data)))
+
+        blocks.append((BLOCK_TAGS[table.shape_type], len(rows), parts))
+
+    offset = HEADER.size + DIRECTORY_ENTRY.size * len(blocks)
+    offset += _pad(offset)
+
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, width, height, len(blocks)))
+
+        for tag, count, parts in blocks:
+            size = sum(len(part) for part in parts)
+            f.write(DIRECTORY_ENTRY.pack(tag, offset, size, count))
+            offset += size + _pad(size)
+
+        f.write(b"\0" * _pad(f.tell()))
+
+        for tag, count, parts in blocks:
+            for part in parts:
+                f.write(part)
+            f.write(b"\0" * _pad(f.tell()))
+
+
+def _styles_block() -> bytes:
+    parts = []
+    for style_id in range(len(STYLE_TABLE)):
+        color = STYLE_TABLE.color(style_id).encode("utf-8")
+        parts.append(STYLE_ENTRY.pack(STYLE_TABLE.width(style_id), len(color)) + color)
+    return b"".join(parts)
+
+
+class VecReader:
+    """
+    Чтение .vec через mmap. Колонки отдаются как memoryview поверх файла (без копирования);
+    to_document() копирует их в изменяемые array документа.
+    """
+
+    def __init__(self, filename: str):
+        self._file = open(filename, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Файл поврежден или имеет неверный формат")
+
+        self._view = memoryview(self._mmap)
+        self._columns = []
+
+        if len(self._view) < HEADER.size:
+            self.close()
+            raise ValueError("Файл поврежден или имеет неверный формат")
+
+        magic, version, _, self.width, self.height, block_count = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError("Файл поврежден или имеет неверный формат")
+
+        self.blocks = {}
+        for i in range(block_count):
+            tag, offset, size, count = DIRECTORY_ENTRY.unpack_from(self._view, HEADER.size + i * DIRECTORY_ENTRY.size)
+            if offset + size > len(self._view):
+                self.close()
+                raise ValueError("Файл поврежден или имеет неверный формат")
+            self.blocks[tag] = (offset, size, count)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for column in reversed(self._columns):
+            column.release()
+        self._columns = []
+
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def styles(self) -> list:
+        """[(цвет, толщина)] в порядке id файла"""
+        offset, size, count = self.blocks[STYLE_TAG]
+        styles = []
+
+        for _ in range(count):
+            width, length = STYLE_ENTRY.unpack_from(self._view, offset)
+            offset += STYLE_ENTRY.size
+            color = bytes(self._view[offset:offset + length]).decode("utf-8")
+            offset += length
+            styles.append((color, width))
+
+        return styles
+
+    def _raw_columns(self, kind: str) -> list:
+        """[(имя, typecode, байтовый memoryview)] для блока типа kind"""
+        offset, size, count = self.blocks[BLOCK_TAGS[kind]]
+        result = []
+
+        for name, typecode in _column_layout(kind):
+            length = count * array(typecode).itemsize
+            column = self._view[offset:offset + length]
+            self._columns.append(column)
+            result.append((name, typecode, column))
+            offset += length + _pad(length)
+
+        return result
+
+    def columns(self, kind: str) -> dict:
+        """{имя колонки: типизированный memoryview} для блока типа kind, без копирования данных"""
+        result = {}
+
+        for name, typecode, raw in self._raw_columns(kind):
+            column = raw.cast(typecode)
+            self._columns.append(column)
+            result[name] = column
+
+        return result
+
+    def to_document(self) -> ShapeDocument:
+        document = ShapeDocument()
+
+        # id стилей файла -> id общей таблицы стилей процесса
+        style_map = [STYLE_TABLE.intern(color, width) for color, width in self.styles()]
+        identity = style_map == list(range(len(style_map)))
+
+        for table in document.all_tables():
+            tag = BLOCK_TAGS[table.shape_type]
+            if tag not in self.blocks:
+                continue
+            count = self.blocks[tag][2]
+
+            for name, _, raw in self._raw_columns(table.shape_type):
+                target = _get_column(table, name)
+                target.frombytes(raw)
+                if sys.byteorder == "big":
+                    target.byteswap()
+
+            if table.shape_type in POINT_TYPES:
+                offset, size, _ = self.blocks[POINTS_TAG]
+                raw = self._view[offset:offset + size]
+                self._columns.append(raw)
+                table.points.frombytes(raw)
+                if sys.byteorder == "big":
+                    table.points.byteswap()
+
+            if table.shape_type != TYPE_GROUP and not identity:
+                table.style = array("I", map(style_map.__getitem__, table.style))
+
+            table.alive.frombytes(b"\1" * count)
+
+        document.sync_next_z()
+        return document
+
+
+def read_vec(filename: str):
+    """:return: (документ, {"width": ..., "height": ...})"""
+    with VecReader(filename) as reader:
+        return reader.to_document(), {"width": reader.width, "height": reader.height}
@@ -0,0 +1,168 @@
+"""
+Виртуализация холста для больших документов.
+
+Фигуры документа рисуют слои BulkLayer, а отдельные Qt-объекты (Line, Rectangle, Ellipse)
+есть только у корневых фигур в видимой области плюс VIEWPORT_MARGIN_PX. При прокрутке
+и масштабировании объекты ушедших из вида фигур возвращаются в пул и перепривязываются
+к новым (Shape.reload), а их фигуры снова рисует слой. Число Qt-объектов поэтому зависит
+от размера окна, а не документа. Сохранение и экспорт читают документ, объекты им не нужны.
+
+Объект остается на сцене, пока он выделен или на него ссылается команда истории отмены:
+перепривязанный к другой строке, он подменил бы фигуру в undo/redo.
+"""
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QStyleOptionGraphicsItem
+
+from src.constants import VIEWPORT_MARGIN_PX, VIEWPORT_MAX_ITEMS, VIEWPORT_MIN_LOD, VIEWPORT_POOL_SIZE
+from src.logic.commands import command_items
+from src.logic.document import ROOT
+from src.logic.factory import ShapeFactory
+
+
+class ViewportItems:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.enabled = False
+
+        self.items = {}  # ref -> Qt-объект на сцене (созданный здесь или через canvas.promote)
+        self.pool = {}  # тип фигуры -> свободные объекты вне сцены
+
+        self._visible = None  # видимая область, по которой было последнее обновление
+        self._pinned = None  # id объектов, на которые ссылается история (None - пересчитать)
+
+        # Сцену нельзя менять во время отрисовки: обновление идет сразу после кадра
+        self._timer = QTimer(canvas)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.refresh)
+
+        canvas.undo_stack.indexChanged.connect(self._unpin)
+
+    def __len__(self):
+        return len(self.items)
+
+    def reset(self):
+        """Новый документ: объекты старого удалены вместе со сценой, пул держит его таблицы"""
+        self._timer.stop()
+        self.enabled = False
+        self.items = {}
+        self.pool = {}
+        self._visible = None
+        self._pinned = None
+
+    def check(self):
+        """Вызывается на каждый кадр: видимая область сдвинулась - обновить объекты после кадра"""
+        if self.enabled and not self._timer.isActive() and self._visible_rect() != self._visible:
+            self._timer.start()
+
+    def schedule(self):
+        """Обновить объекты после кадра, даже если область не менялась (пришли новые фигуры)"""
+        if self.enabled:
+            self._visible = None
+            self._timer.start()
+
+    def refresh(self):
+        if not self.enabled:
+            return
+
+        self._visible = self._visible_rect()
+        wanted = self._wanted()
+
+        scene = self.canvas.scene
+        pinned = self._pinned_ids()
+        released = []
+
+        for ref, item in list(self.items.items()):
+            if ref in wanted:
+                continue
+
+            # Объект удалили или сгруппировали командой - он больше не наш
+            if item.scene() is not scene or item.topLevelItem() is not item:
+                del self.items[ref]
+            elif not item.isSelected() and id(item) not in pinned:
+                released.append(ref)
+
+        self.release(released)
+        self.materialize([ref for ref in wanted if ref not in self.items and self.canvas.in_layer(ref)])
+
+    def materialize(self, refs) -> list:
+        """Переносит фигуры из слоев в отдельные Qt-объекты (из пула, если есть); возвращает объекты"""
+        canvas = self.canvas
+        document = canvas.document
+
+        # Снизу вверх: новые объекты ложатся поверх прежних в порядке z документа
+        refs = sorted(refs, key=lambda ref: document.tables[ref[0]].z[ref[1]])
+
+        by_layer = {}
+        for ref in refs:
+            by_layer.setdefault(canvas.layer_key(ref), []).append(ref)
+        for key, layer_refs in by_layer.items():
+            canvas.layer(key).remove_many(layer_refs)
+
+        items = []
+        for ref in refs:
+            kind, row = ref
+            free = self.pool.get(kind)
+            if free:
+                item = free.pop()
+                item.reload(document.tables[kind], row)
+            else:
+                item = ShapeFactory.from_document(document, ref)
+
+            canvas.scene.addItem(item)
+            self.items[ref] = item
+            items.append(item)
+
+        canvas.scene.item_cache.track(items)
+        return items
+
+    def release(self, refs):
+        """Возвращает фигуры в слои, а их объекты - в пул (сверх VIEWPORT_POOL_SIZE объекты удаляются)"""
+        canvas = self.canvas
+        by_layer = {}
+        items = [self.items.pop(ref) for ref in refs]
+        canvas.scene.item_cache.discard(items)
+
+        for ref, item in zip(refs, items):
+            canvas.scene.removeItem(item)
+
+            free = self.pool.setdefault(ref[0], [])
+            if len(free) < VIEWPORT_POOL_SIZE:
+                free.append(item)
+
+            by_layer.setdefault(canvas.layer_key(ref), []).append(ref)
+
+        for key, layer_refs in by_layer.items():
+            canvas.layer(key).add_many(layer_refs)
+
+    def _visible_rect(self):
+        canvas = self.canvas
+        return canvas.mapToScene(canvas.viewport().rect()).boundingRect()
+
+    def _wanted(self) -> set:
+        """Корневые фигуры, которым положен объект; пусто, если их слишком много для объектов"""
+        canvas = self.canvas
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(canvas.transform())
+        if lod < VIEWPORT_MIN_LOD:
+            return set()
+
+        refs = canvas.visible_refs(VIEWPORT_MARGIN_PX / lod)
+        if len(refs) > VIEWPORT_MAX_ITEMS:
+            return set()
+
+        tables = canvas.document.tables
+        return {ref for ref in refs if tables[ref[0]].parent[ref[1]] == ROOT}
+
+    def _pinned_ids(self) -> set:
+        if self._pinned is None:
+            stack = self.canvas.undo_stack
+            self._pinned = {
+                id(item)
+                for index in range(stack.count())
+                for item in command_items(stack.command(index))
+                if item is not None
+            }
+        return self._pinned
+
+    def _unpin(self, *args):
+        self._pinned = None
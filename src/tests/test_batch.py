@@ -0,0 +1,74 @@
+import io
+import json
+
+import pytest
+from PySide6.QtGui import QImage
+
+from src.logic import batch
+from src.logic.io_manager import FileManager
+
+PROJECT = {
+    "version": "1.1",
+    "scene": {"width": 120, "height": 80},
+    "shapes": [
+        {"type": "rect", "props": {"x": 10, "y": 10, "w": 50, "h": 30, "color": "#ff0000", "stroke_width": 3}},
+        {"type": "group", "pos": [60, 0], "children": [
+            {"type": "line", "props": {"x1": 0, "y1": 0, "x2": 40, "y2": 40}},
+        ]},
+    ],
+}
+
+
+def _inputs(tmp_path, count=2, broken=True):
+    folder = tmp_path / "in"
+    folder.mkdir()
+    for i in range(count):
+        (folder / f"p{i}.json").write_text(json.dumps(PROJECT))
+    if broken:
+        (folder / "broken.json").write_text("{not json")
+    return folder
+
+
+def _run(files, out_dir, **kwargs):
+    stream = io.StringIO()
+    code = batch.run(files, str(out_dir), stream=stream, **kwargs)
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    return code, lines[:-1], lines[-1]["summary"]
+
+
+@pytest.mark.parametrize("jobs", [0, 2])
+def test_convert_reports_each_file(tmp_path, jobs):
+    folder = _inputs(tmp_path)
+    files = batch.expand_inputs([str(folder / "*.json")])
+
+    code, results, summary = _run(files, tmp_path / "out", fmt="png", jobs=jobs)
+
+    assert code == batch.EXIT_FAILED
+    assert summary["files"] == 3 and summary["ok"] == 2 and summary["failed"] == 1
+
+    by_name = {result["input"].rsplit("/", 1)[-1]: result for result in results}
+    assert by_name["broken.json"]["status"] == "error" and by_name["broken.json"]["error"]
+    assert by_name["p0.json"]["status"] == "ok" and by_name["p0.json"]["shapes"] == 2
+
+    image = QImage(str(tmp_path / "out" / "p1.png"))
+    assert (image.width(), image.height()) == (120, 80)
+
+
+def test_convert_between_formats(tmp_path):
+    folder = _inputs(tmp_path, count=1, broken=False)
+
+    code, _, _ = _run([str(folder / "p0.json")], tmp_path / "vec", fmt="vec", jobs=0)
+    assert code == batch.EXIT_OK
+
+    # .vec -> .json возвращает те же фигуры
+    code, _, _ = _run([str(tmp_path / "vec" / "p0.vec")], tmp_path / "json", fmt="json", jobs=0)
+    assert code == batch.EXIT_OK
+
+    expected = FileManager.load_document(str(folder / "p0.json"))[0].to_dicts()
+    assert FileManager.load_document(str(tmp_path / "json" / "p0.json"))[0].to_dicts() == expected
+
+
+def test_usage_errors(tmp_path, capsys):
+    assert batch.main([]) == batch.EXIT_USAGE
+    assert batch.main([str(tmp_path / "*.json"), str(tmp_path / "out")]) == batch.EXIT_USAGE
+    assert batch.main(["a.json", "out", "--format", "bmp"]) == batch.EXIT_USAGE
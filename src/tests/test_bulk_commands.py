@@ -0,0 +1,261 @@
+import time
+
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtWidgets import QApplication
+
+import src.widgets.canvas as canvas_module
+from src.logic.commands import (
+    BulkDeleteCommand, BulkChangeColorCommand, BulkChangeWidthCommand, BulkMoveCommand, UngroupCommand
+)
+from src.logic.document import ShapeDocument, STYLE_TABLE
+from src.logic.spatial import document_entries
+from src.widgets.canvas import EditorCanvas
+
+SHAPES = [
+    {"type": "rect", "props": {"x": 0, "y": 0, "w": 100, "h": 100, "color": "#ff0000", "stroke_width": 2}},
+    {"type": "line", "props": {"x1": 0, "y1": 0, "x2": 100, "y2": 100, "color": "#00ff00", "stroke_width": 3}},
+    {"type": "group", "pos": [500, 0], "children": [
+        {"type": "ellipse", "props": {"x": 0, "y": 0, "w": 50, "h": 50, "color": "#0000ff", "stroke_width": 1}},
+    ]},
+]
+
+
+def _canvas(shapes):
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(shapes))
+    return canvas
+
+
+def _select_all(canvas):
+    canvas.scene.blockSignals(True)
+    for item in canvas.scene.items():
+        # Не parentItem(): в PySide6 6.9 вызов, вернувший None, отдает объект сборщику Python
+        if item.topLevelItem() is item:
+            item.setSelected(True)
+    canvas.scene.blockSignals(False)
+
+
+def test_bulk_delete_and_undo():
+    canvas = _canvas(SHAPES)
+    _select_all(canvas)
+    order = _stacking(canvas)
+
+    changes = []
+    canvas.scene.selectionChanged.connect(lambda: changes.append(1))
+
+    canvas.delete_selected()
+
+    assert changes == [1]
+    assert canvas.scene.items() == []
+    assert canvas.document.to_dicts() == []
+    # Вместе с группой удалены и строки ее фигур
+    assert len(canvas.document) == 0 and canvas.document.tables["ellipse"].alive[0] == 0
+    assert len(canvas.scene.index) == 0
+    assert canvas.pick(QPointF(525, 1)) is None
+    assert canvas.undo_stack.count() == 1
+
+    canvas.undo_stack.undo()
+
+    # Порядок наложения тот же, что до удаления
+    assert _stacking(canvas) == order
+    assert canvas.document.to_dicts() == ShapeDocument.from_dicts(SHAPES).to_dicts()
+    assert len(canvas.document) == 3 and len(canvas.scene.index) == 3
+    assert canvas.pick(QPointF(525, 1)) == ("ellipse", 0)
+
+
+def _index_matches_document(canvas):
+    index = canvas.scene.index
+    entries = dict(document_entries(canvas.document))
+    return len(index) == len(entries) and all(index.bounds(ref) == bounds for ref, bounds in entries.items())
+
+
+def test_delete_right_after_grouping_keeps_group_whole():
+    canvas = _canvas(SHAPES)
+    _select_all(canvas)
+    canvas.group_selection()
+    # Как после Ctrl+G в окне: выделены группа и все ее дети
+    group = canvas.scene.items()[-1]
+    assert len(canvas.scene.selectedItems()) == 4
+
+    canvas.delete_selected()
+    assert canvas.document.to_dicts() == []
+
+    canvas.undo_stack.undo()
+    assert len(group.childItems()) == 3
+    assert all(child.table.parent[child.row] == group.row for child in group.childItems())
+
+    canvas.undo_stack.push(BulkMoveCommand(canvas.scene, [group], QPointF(100, 0)))
+    (data,) = canvas.document.to_dicts()
+    assert data["pos"] == [100, 0]
+    assert [child["pos"] for child in data["children"]] == [[0, 0], [0, 0], [500, 0]]
+    assert canvas.pick(QPointF(625, 1)) == ("ellipse", 0)
+    assert _index_matches_document(canvas)
+
+
+def test_bulk_restyle_and_undo():
+    canvas = _canvas(SHAPES)
+    items = [item for item in canvas.scene.items() if item.topLevelItem() is item]
+
+    canvas.undo_stack.push(BulkChangeColorCommand(items, "#123456"))
+    canvas.undo_stack.push(BulkChangeWidthCommand(items, 9))
+
+    for data in canvas.document.to_dicts():
+        props = data["children"][0]["props"] if data["type"] == "group" else data["props"]
+        assert (props["color"], props["stroke_width"]) == ("#123456", 9)
+
+    ellipse = next(item for item in canvas.scene.items() if getattr(item, "ref", None) == ("ellipse", 0))
+    assert ellipse.pen().width() == 9
+    # Толщина учтена в индексе: край обводки эллипса попадает в поиск
+    assert canvas.pick(QPointF(496, 25), tolerance=0) == ("ellipse", 0)
+
+    canvas.undo_stack.undo()
+    canvas.undo_stack.undo()
+
+    assert canvas.document.to_dicts() == ShapeDocument.from_dicts(SHAPES).to_dicts()
+    assert ellipse.pen().width() == 1
+
+
+def test_bulk_commands_on_100k_shapes(monkeypatch):
+    monkeypatch.setattr(canvas_module, "BULK_LAYER_THRESHOLD", float("inf"))
+
+    shapes = [
+        {"type": "rect", "props": {"x": i % 1000, "y": i // 1000, "w": 1, "h": 1, "stroke_width": 1 + i % 3}}
+        for i in range(100_000)
+    ]
+    canvas = _canvas(shapes)
+    QApplication.processEvents()
+    items = canvas.scene.items()
+    timings = []
+
+    def timed(action):
+        start = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - start)
+
+    timed(lambda: canvas.undo_stack.push(BulkChangeWidthCommand(items, 5)))
+    assert {STYLE_TABLE.width(style) for style in canvas.document.tables["rect"].style} == {5}
+
+    timed(lambda: canvas.undo_stack.push(BulkDeleteCommand(canvas.scene, items)))
+    assert len(canvas.document) == 0
+
+    timed(canvas.undo_stack.undo)
+    assert len(canvas.scene.items()) == 100_000
+
+    # Раньше - по команде на фигуру, десятки секунд и больше на удаление
+    assert max(timings) < 15
+
+
+def _stacking(canvas):
+    """Объекты сцены сверху вниз, как их рисует Qt (items() без области при NoIndex - порядок добавления)"""
+    scene = canvas.scene
+    items = scene.items(scene.itemsBoundingRect(), Qt.IntersectsItemBoundingRect, Qt.DescendingOrder)
+    return [item.ref for item in items]
+
+
+def _z_order(canvas):
+    """Объекты сцены сверху вниз по z строк документа (без учета порядка добавления в Qt)"""
+    items = canvas.scene.items()
+    return [item.ref for item in sorted(items, key=lambda item: item.table.z[item.row], reverse=True)]
+
+
+def test_group_and_ungroup_are_single_undo_steps():
+    canvas = _canvas(SHAPES)
+    expected = canvas.document.to_dicts()
+    order = _stacking(canvas)
+    _select_all(canvas)
+
+    canvas.group_selection()
+
+    assert canvas.undo_stack.count() == 1
+    assert [data["type"] for data in canvas.document.to_dicts()] == ["group"]
+    group = canvas.scene.items()[-1]
+    # Внутри группы порядок наложения прежний
+    assert [ref for ref in _stacking(canvas) if ref != group.ref] == order
+
+    group.setPos(10, 20)
+    canvas.ungroup_selection()
+
+    assert canvas.undo_stack.count() == 2
+    assert group.scene() is None
+    assert {item.ref for item in canvas.scene.items() if item.topLevelItem() is item} == \
+        {("rect", 0), ("line", 0), ("group", 0)}
+    assert canvas.pick(QPointF(535, 21)) == ("ellipse", 0)
+    assert canvas.document.to_dicts()[2]["pos"] == [510, 20]
+
+    canvas.undo_stack.undo()
+    assert group.scene() is canvas.scene
+    assert len(group.childItems()) == 3
+    assert canvas.document.to_dicts()[0]["pos"] == [10, 20]
+
+    group.setPos(0, 0)
+    canvas.undo_stack.undo()
+    assert canvas.document.to_dicts() == expected
+    assert _stacking(canvas) == order
+
+    canvas.undo_stack.redo()
+    assert [data["type"] for data in canvas.document.to_dicts()] == ["group"]
+    assert canvas.pick(QPointF(525, 1)) == ("ellipse", 0)
+
+
+def test_grouping_twice_nests_the_first_group():
+    canvas = _canvas(SHAPES)
+    _select_all(canvas)
+    canvas.group_selection()
+    first = canvas.scene.items()[-1]
+
+    # Выделены новая группа и ее дети: повторный Ctrl+G не должен вынимать детей из нее
+    canvas.group_selection()
+
+    (outer,) = [item for item in canvas.scene.items() if item.topLevelItem() is item]
+    assert outer.childItems() == [first]
+    assert len(first.childItems()) == 3
+    (data,) = canvas.document.to_dicts()
+    assert [child["type"] for child in data["children"]] == ["group"]
+    assert len(data["children"][0]["children"]) == 3
+
+    canvas.undo_stack.undo()
+    canvas.undo_stack.undo()
+    assert canvas.document.to_dicts() == ShapeDocument.from_dicts(SHAPES).to_dicts()
+
+
+def test_stacking_follows_document_z_not_insertion_order():
+    canvas = _canvas(SHAPES)
+    order = _stacking(canvas)
+    assert order == _z_order(canvas)
+
+    # Объекты возвращаются на сцену в обратном порядке: Qt-порядок добавления больше не совпадает с z
+    top = [item for item in canvas.scene.items() if item.topLevelItem() is item]
+    for item in top:
+        canvas.scene.removeItem(item)
+    for item in reversed(top):
+        canvas.scene.addItem(item)
+    assert _stacking(canvas) == order
+
+    _select_all(canvas)
+    canvas.group_selection()
+    canvas.ungroup_selection()
+    assert _stacking(canvas) == _z_order(canvas)
+
+    canvas.undo_stack.undo()
+    canvas.undo_stack.undo()
+    assert _stacking(canvas) == order
+
+
+def test_ungroup_nested_group_keeps_scene_positions():
+    canvas = _canvas([{"type": "group", "pos": [100, 0], "children": SHAPES}])
+    outer = [item for item in canvas.scene.items() if item.topLevelItem() is item][0]
+    inner = [child for child in outer.childItems() if child.ref[0] == "group"][0]
+    ellipse = inner.childItems()[0]
+    scene_pos = ellipse.scenePos()
+
+    canvas.undo_stack.push(UngroupCommand(canvas.scene, [inner]))
+
+    assert ellipse.topLevelItem() is outer
+    assert ellipse.scenePos() == scene_pos
+    assert ellipse.table.parent[ellipse.row] == outer.row
+
+    canvas.undo_stack.undo()
+    assert ellipse.topLevelItem() is outer
+    assert ellipse.scenePos() == scene_pos
+    assert canvas.document.to_dicts() == ShapeDocument.from_dicts(
+        [{"type": "group", "pos": [100, 0], "children": SHAPES}]).to_dicts()
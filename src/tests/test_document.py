@@ -0,0 +1,91 @@
+from PySide6.QtCore import QPointF
+
+from src.logic.Line import Line
+from src.logic.commands import AddShapeCommand, DeleteCommand
+from src.logic.document import ShapeDocument, STYLE_TABLE
+from src.logic.factory import ShapeFactory
+from src.widgets.canvas import EditorCanvas
+
+
+def test_document_dict_round_trip():
+    shapes = [
+        {"type": "line", "pos": [5, 5],
+         "props": {"x1": 0, "y1": 0, "x2": 10, "y2": 20, "color": "#ff0000", "stroke_width": 3}},
+        {"type": "group", "pos": [1, 2], "children": [
+            {"type": "rect", "pos": [0, 0],
+             "props": {"x": 1, "y": 2, "w": 3, "h": 4, "color": "#00ff00", "stroke_width": 1}},
+            {"type": "ellipse", "pos": [0, 0],
+             "props": {"x": 5, "y": 6, "w": 7, "h": 8, "color": "#0000ff", "stroke_width": 2}},
+        ]},
+    ]
+
+    document = ShapeDocument.from_dicts(shapes)
+
+    assert len(document) == 3
+    assert document.to_dicts() == shapes
+
+
+def test_style_table_is_stored_once():
+    shapes = [
+        {"type": "line", "pos": [0, 0],
+         "props": {"x1": 0, "y1": 0, "x2": i, "y2": 1, "color": "#ff0000", "stroke_width": 2 + i % 2}}
+        for i in range(10)
+    ]
+    document = ShapeDocument.from_dicts(shapes)
+
+    style_ids = {}
+    compact = document.to_dicts(style_ids)
+    styles = STYLE_TABLE.export(style_ids)
+
+    assert styles == [["#ff0000", 2], ["#ff0000", 3]]
+    assert [data["style"] for data in compact] == [i % 2 for i in range(10)]
+    assert all("color" not in data["props"] for data in compact)
+    assert ShapeDocument.from_dicts(compact, styles).to_dicts() == shapes
+
+
+def test_items_share_style_pen():
+    document = ShapeDocument.from_dicts([
+        {"type": "rect", "props": {"x": 0, "y": 0, "w": 1, "h": 1, "color": "#00ff00"}},
+        {"type": "rect", "props": {"x": 5, "y": 5, "w": 1, "h": 1, "color": "#00ff00"}},
+    ])
+    first, second = (ShapeFactory.from_document(document, ref) for ref in document.roots())
+    assert first.style_id == second.style_id
+
+    second.set_stroke_width(7)
+    assert second.style_id == STYLE_TABLE.intern("#00ff00", 7)
+    assert second.pen().width() == 7 and first.pen().width() != 7
+
+    second.set_stroke_width(first.stroke_width)
+    assert second.style_id == first.style_id
+    assert second.pen() == first.pen()
+
+
+def test_item_writes_through_to_document():
+    document = ShapeDocument()
+    item = ShapeFactory.from_dict(
+        {"type": "line", "props": {"x1": 0, "y1": 0, "x2": 10, "y2": 10}}, document
+    )
+
+    item.set_geometry(QPointF(1, 2), QPointF(3, 4))
+    item.set_active_color("#123456")
+    item.setPos(7, 8)
+
+    data = document.to_dicts()[0]
+    assert data["pos"] == [7, 8]
+    assert data["props"]["x1"] == 1 and data["props"]["y2"] == 4
+    assert data["props"]["color"] == "#123456"
+
+
+def test_commands_keep_document_in_sync():
+    canvas = EditorCanvas()
+    line = Line(0, 0, 10, 10)
+
+    canvas.undo_stack.push(AddShapeCommand(canvas.scene, line))
+    assert line.table.document is canvas.document
+    assert len(canvas.document) == 1
+
+    canvas.undo_stack.push(DeleteCommand(canvas.scene, line))
+    assert len(canvas.document) == 0
+
+    canvas.undo_stack.undo()
+    assert len(canvas.document) == 1
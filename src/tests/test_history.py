@@ -0,0 +1,132 @@
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QUndoStack
+
+from src.constants import COMMAND_BASE_BYTES, ITEM_RETAINED_BYTES, DEFAULT_STROKE_WIDTH
+from src.logic.Line import Line
+from src.logic.commands import (
+    MoveCommand, ChangeWidthCommand, AddShapeCommand, BulkDeleteCommand, BulkChangeWidthCommand, new_session
+)
+from src.logic.document import ShapeDocument
+from src.logic.history import UndoBudgetStack, command_bytes
+from src.widgets.canvas import EditorCanvas
+
+
+def test_continuous_edits_merge():
+    line = Line(0, 0, 10, 10)
+    stack = QUndoStack()
+
+    for width in (3, 4, 5):
+        stack.push(ChangeWidthCommand(line, width))
+    session = new_session()
+    for x in (1, 2, 3):
+        stack.push(MoveCommand(line, QPointF(x - 1, 0), QPointF(x, 0), session))
+
+    assert stack.count() == 2
+    assert line.stroke_width == 5 and line.pos() == QPointF(3, 0)
+
+    stack.undo()
+    assert line.pos() == QPointF(0, 0)
+    stack.undo()
+    assert line.stroke_width == DEFAULT_STROKE_WIDTH
+
+    # Правка, вернувшаяся к исходному значению, не оставляет пустой записи
+    stack.clear()
+    stack.push(ChangeWidthCommand(line, 7))
+    stack.push(ChangeWidthCommand(line, DEFAULT_STROKE_WIDTH))
+    assert stack.count() == 0
+
+
+def test_moves_merge_only_within_one_interaction():
+    line = Line(0, 0, 10, 10)
+    stack = QUndoStack()
+
+    # Два перетаскивания подряд, без паузы - две записи истории
+    stack.push(MoveCommand(line, QPointF(0, 0), QPointF(5, 0), new_session()))
+    stack.push(MoveCommand(line, QPointF(5, 0), QPointF(9, 0), new_session()))
+    stack.push(MoveCommand(line, QPointF(9, 0), QPointF(12, 0)))
+    assert stack.count() == 3
+
+    # Одно действие склеивается и после долгой паузы
+    session = new_session()
+    stack.push(MoveCommand(line, QPointF(12, 0), QPointF(13, 0), session))
+    late = MoveCommand(line, QPointF(13, 0), QPointF(14, 0), session)
+    late._edited_at += 60
+    stack.push(late)
+    assert stack.count() == 4
+
+    stack.undo()
+    assert line.pos() == QPointF(12, 0)
+
+
+def test_merge_needs_same_target_and_short_pause():
+    first, second = Line(0, 0, 10, 10), Line(0, 0, 20, 20)
+    stack = QUndoStack()
+
+    stack.push(ChangeWidthCommand(first, 3))
+    stack.push(ChangeWidthCommand(second, 3))
+
+    late = ChangeWidthCommand(second, 4)
+    late._edited_at += 60
+    stack.push(late)
+
+    assert stack.count() == 3
+
+    items = [Line(0, 0, i, i) for i in range(1, 4)]
+    stack.clear()
+    for width in (3, 4, 5):
+        stack.push(BulkChangeWidthCommand(items, width))
+    stack.push(BulkChangeWidthCommand(items[:2], 6))
+
+    assert stack.count() == 2
+    stack.undo()
+    stack.undo()
+    assert [item.stroke_width for item in items] == [DEFAULT_STROKE_WIDTH] * 3
+
+
+def test_budget_evicts_oldest_history():
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts([
+        {"type": "line", "props": {"x1": i, "y1": 0, "x2": i, "y2": 10}} for i in range(30)
+    ]))
+    items = canvas.scene.items()[::-1]
+    batches = [items[i:i + 10] for i in range(0, 30, 10)]
+
+    command_size = COMMAND_BASE_BYTES + 10 * (ITEM_RETAINED_BYTES + 8)
+    stack = UndoBudgetStack(budget=2 * command_size)
+
+    commands = [BulkDeleteCommand(canvas.scene, batch) for batch in batches]
+    for command in commands:
+        stack.push(command)
+
+    # Три удаления по 10 фигур не влезают в бюджет на два: первое вытеснено
+    assert stack.evicted_count == 1
+    assert commands[0].isObsolete() and commands[0].items == []
+    assert stack.retained_bytes() == 2 * command_size
+    assert command_bytes(commands[1]) == command_size
+
+    stack.undo()
+    stack.undo()
+
+    # История кончилась на вытесненной команде: ее фигуры так и остались удаленными
+    assert not stack.canUndo()
+    assert stack.count() == 2
+    assert len(canvas.document) == 20
+
+    stack.redo()
+    assert len(canvas.document) == 10
+
+
+def test_single_command_over_budget_stays():
+    canvas = EditorCanvas()
+    stack = UndoBudgetStack(budget=1)
+
+    for x in range(3):
+        stack.push(AddShapeCommand(canvas.scene, Line(x, 0, x, 10)))
+
+    # Вытеснены все, кроме последней; Undo отменяет ее и снимает вытесненные
+    assert stack.evicted_count == 2
+    stack.undo()
+
+    assert len(canvas.document) == 2
+    assert not stack.canUndo()
+    assert stack.count() == 1
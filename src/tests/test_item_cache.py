@@ -0,0 +1,86 @@
+from PySide6.QtWidgets import QGraphicsItem
+
+import src.logic.item_cache as item_cache_module
+from src.logic.document import ShapeDocument
+from src.widgets.canvas import EditorCanvas
+
+NO_CACHE = QGraphicsItem.CacheMode.NoCache
+DEVICE_CACHE = QGraphicsItem.CacheMode.DeviceCoordinateCache
+ITEM_CACHE = QGraphicsItem.CacheMode.ItemCoordinateCache
+
+
+def _canvas(monkeypatch, shapes):
+    monkeypatch.setattr(item_cache_module, "CACHE_IDLE_MS", 0)
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(shapes))
+    return canvas
+
+
+def _shapes(canvas):
+    return [item for item in canvas.scene.items() if hasattr(item, "set_style")]
+
+
+def test_idle_shapes_are_cached_and_edits_drop_the_cache(monkeypatch):
+    canvas = _canvas(monkeypatch, [
+        {"type": "ellipse", "props": {"x": 0, "y": 0, "w": 50, "h": 50}},
+        {"type": "rect", "props": {"x": 0, "y": 0, "w": 5000, "h": 5000}},
+        {"type": "group", "children": [
+            {"type": "line", "props": {"x1": i, "y1": 0, "x2": i, "y2": 10}} for i in range(64)
+        ]},
+    ])
+    cache = canvas.scene.item_cache
+    ellipse, = [item for item in _shapes(canvas) if item.type_name == "ellipse"]
+    big, = [item for item in _shapes(canvas) if item.type_name == "rect"]
+    lines = [item for item in _shapes(canvas) if item.type_name == "line"]
+
+    assert ellipse.cacheMode() == NO_CACHE
+    cache.cache_idle()
+
+    assert ellipse.cacheMode() == DEVICE_CACHE
+    # Дети большой группы - в координатах фигуры, слишком крупная фигура - без кэша
+    assert {line.cacheMode() for line in lines} == {ITEM_CACHE}
+    assert big.cacheMode() == NO_CACHE
+    assert len(cache) == 65
+
+    ellipse.set_active_color("#ff0000")
+    assert ellipse.cacheMode() == NO_CACHE
+    lines[0].set_stroke_width(4)
+    assert lines[0].cacheMode() == NO_CACHE
+
+    cache.cache_idle()
+    assert ellipse.cacheMode() == DEVICE_CACHE
+    assert lines[0].cacheMode() == ITEM_CACHE
+
+
+def test_cache_memory_limit_evicts_least_recent(monkeypatch):
+    canvas = _canvas(monkeypatch, [
+        {"type": "rect", "props": {"x": i * 20, "y": 0, "w": 10, "h": 10}} for i in range(10)
+    ])
+    cache = canvas.scene.item_cache
+    cache.cache_idle()
+    per_item = cache.bytes // len(cache)
+
+    first = [item for item in _shapes(canvas) if item.cacheMode() == DEVICE_CACHE]
+    assert len(first) == 10
+
+    # Свежие - последние тронутые: их кэш остается, давний вытесняется
+    cache.limit = per_item * 4
+    cache.track(first[:4])
+    cache.cache_idle()
+
+    assert cache.bytes <= cache.limit
+    assert [item.cacheMode() for item in first[:4]] == [DEVICE_CACHE] * 4
+    assert all(item.cacheMode() == NO_CACHE for item in first[4:])
+
+
+def test_disabled_cache_leaves_items_alone(monkeypatch):
+    canvas = _canvas(monkeypatch, [{"type": "ellipse", "props": {"x": 0, "y": 0, "w": 50, "h": 50}}])
+    cache = canvas.scene.item_cache
+    cache.cache_idle()
+
+    cache.set_enabled(False)
+    cache.track(_shapes(canvas))
+    cache.cache_idle()
+
+    assert _shapes(canvas)[0].cacheMode() == NO_CACHE
+    assert len(cache) == 0
@@ -0,0 +1,150 @@
+import os
+
+from PySide6.QtCore import QPointF
+
+from src.logic import journal
+from src.logic.Line import Line
+from src.logic.Rectangle import Rectangle
+from src.logic.commands import (
+    AddShapeCommand, MoveCommand, ChangeWidthCommand, BulkDeleteCommand, BulkChangeColorCommand
+)
+from src.logic.document import ShapeDocument
+from src.widgets.canvas import EditorCanvas
+
+SHAPES = [
+    {"type": "rect", "props": {"x": 0, "y": 0, "w": 100, "h": 100, "color": "#ff0000", "stroke_width": 2}},
+    {"type": "group", "pos": [500, 0], "children": [
+        {"type": "ellipse", "props": {"x": 0, "y": 0, "w": 50, "h": 50, "color": "#0000ff", "stroke_width": 1}},
+    ]},
+]
+
+
+def _journaled_canvas(tmp_path):
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+    log = journal.DocumentJournal(str(tmp_path), canvas)
+    log.start()
+    return canvas, log
+
+
+def _top_items(canvas):
+    return [item for item in canvas.scene.items() if item.topLevelItem() is item]
+
+
+def test_recover_replays_commands(tmp_path):
+    canvas, log = _journaled_canvas(tmp_path)
+    stack = canvas.undo_stack
+
+    line = Line(0, 0, 10, 10)
+    stack.push(AddShapeCommand(canvas.scene, line))
+    stack.push(MoveCommand(line, QPointF(0, 0), QPointF(5, 5)))
+    stack.push(ChangeWidthCommand(line, 7))
+    stack.push(BulkChangeColorCommand(_top_items(canvas), "#123456"))
+
+    group = next(item for item in _top_items(canvas) if not hasattr(item, "set_style"))
+    stack.push(BulkDeleteCommand(canvas.scene, [group]))
+    stack.undo()
+    stack.undo()
+
+    log.sync()
+    expected = canvas.document.to_dicts()
+
+    # Процесс "упал": файлы журнала остались, окно не закрывалось
+    assert journal.has_recovery(str(tmp_path))
+    document, scene_info = journal.recover(str(tmp_path))
+
+    assert document.to_dicts() == expected
+    assert scene_info["width"] == canvas.scene.sceneRect().width()
+
+    log.close(discard_files=True)
+    assert not journal.has_recovery(str(tmp_path))
+
+
+def test_compaction_keeps_one_generation(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "JOURNAL_COMPACT_BYTES", 200)
+    canvas, log = _journaled_canvas(tmp_path)
+
+    for x in range(10):
+        canvas.undo_stack.push(AddShapeCommand(canvas.scene, Rectangle(x, 0, 10, 10)))
+    log.sync()
+
+    # Каждые ~200 байт журнал заменялся снимком, на диске только последнее поколение
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 2 and names[0].startswith("journal-") and names[1].startswith("snapshot-")
+    assert journal.recover(str(tmp_path))[0].to_dicts() == canvas.document.to_dicts()
+
+    # Новый документ тоже начинает новое поколение
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES[:1]))
+    canvas.undo_stack.push(AddShapeCommand(canvas.scene, Line(0, 0, 1, 1)))
+    log.sync()
+    assert journal.recover(str(tmp_path))[0].to_dicts() == canvas.document.to_dicts()
+
+    log.close()
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    canvas, log = _journaled_canvas(tmp_path)
+
+    line = Line(0, 0, 10, 10)
+    canvas.undo_stack.push(AddShapeCommand(canvas.scene, line))
+    log.sync()
+    expected = canvas.document.to_dicts()
+
+    canvas.undo_stack.push(ChangeWidthCommand(line, 9))
+    log.sync()
+
+    # Сбой посреди записи последней команды: от нее на диске только часть байт
+    log_path = next(tmp_path.glob("journal-*.log"))
+    data = log_path.read_bytes()
+    log_path.write_bytes(data[:-10])
+
+    assert journal.recover(str(tmp_path))[0].to_dicts() == expected
+
+    log.close()
+
+
+def test_live_session_is_not_offered_for_recovery(tmp_path):
+    root = str(tmp_path)
+    live = journal.JournalSession.create(root)
+    other = journal.JournalSession.create(root)
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+    log = journal.DocumentJournal(live.directory, canvas)
+    log.start()
+    log.sync()
+
+    # Второе окно видит журнал первого, но его блокировка держится - это не сбой
+    assert journal.has_recovery(live.directory)
+    assert journal.orphaned_sessions(root) == []
+
+    # Закрытие другого окна удаляет только его каталог
+    other.remove()
+    assert os.listdir(root) == [os.path.basename(live.directory)]
+    assert journal.has_recovery(live.directory)
+
+    # Процесс "упал": ОС сняла блокировку, файлы журнала остались
+    log.close(discard_files=False)
+    live.release()
+    orphans = journal.orphaned_sessions(root)
+    assert [session.directory for session in orphans] == [live.directory]
+    assert journal.recover(orphans[0].directory)[0].to_dicts() == canvas.document.to_dicts()
+
+    orphans[0].remove()
+    assert os.listdir(root) == []
+
+
+def test_write_failure_is_reported_not_raised(tmp_path, monkeypatch):
+    canvas, log = _journaled_canvas(tmp_path)
+    log.sync()
+
+    def broken(*args):
+        raise ValueError("bad row")
+
+    monkeypatch.setattr(journal, "write_snapshot", broken)
+    log.compact()
+    log.sync()
+    assert log.error == "bad row"
+
+    # Фоновый поток жив и дальше сбрасывает записи
+    assert log._thread.is_alive()
+    log.close()
@@ -0,0 +1,96 @@
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QImage, QPainter, QColor
+
+import src.widgets.canvas as canvas_module
+from src.logic.Line import Line
+from src.logic.document import ShapeDocument
+from src.logic.layers import BulkLayer
+from src.logic.rendering import build_batches
+from src.widgets.canvas import EditorCanvas
+
+
+def _document():
+    return ShapeDocument.from_dicts([
+        {"type": "line", "props": {"x1": 0, "y1": 0, "x2": 100, "y2": 100, "color": "#ff0000"}},
+        {"type": "rect", "props": {"x": 200, "y": 200, "w": 50, "h": 50}},
+        {"type": "ellipse", "props": {"x": 300, "y": 0, "w": 40, "h": 20, "color": "#ff0000"}},
+    ])
+
+
+def test_layer_hit_and_bounds():
+    document = _document()
+    layer = BulkLayer(document)
+    layer.add_many([("line", 0), ("rect", 0), ("ellipse", 0)])
+
+    assert layer.hit(50, 50) == ("line", 0)
+    assert layer.hit(225, 225) == ("rect", 0)
+    assert layer.hit(320, 10) == ("ellipse", 0)
+    assert layer.hit(150, 10) is None
+
+    rect = layer.boundingRect()
+    assert rect.left() < 0 and rect.right() > 340
+
+
+def test_layer_paints_batches():
+    layer = BulkLayer(_document())
+    layer.add_many([("line", 0), ("rect", 0), ("ellipse", 0)])
+
+    image = QImage(400, 300, QImage.Format_ARGB32)
+    image.fill(QColor("white"))
+    painter = QPainter(image)
+    layer.paint(painter, None)
+    painter.end()
+
+    assert image.pixelColor(50, 50).name() == "#ff0000"
+
+
+def test_canvas_promotes_layer_shape(monkeypatch):
+    monkeypatch.setattr(canvas_module, "BULK_LAYER_THRESHOLD", 1)
+
+    canvas = EditorCanvas()
+    canvas.set_document(_document())
+
+    assert not [item for item in canvas.scene.items() if isinstance(item, Line)]
+
+    item = canvas.promote_at(QPointF(50, 50))
+
+    assert isinstance(item, Line)
+    assert item.scene() is canvas.scene
+    assert sum(len(layer) for layer in canvas.layers.values()) == 2
+
+
+def test_lod_simplifies_small_shapes():
+    document = _document()
+    rows = {"line": [0], "rect": [0], "ellipse": [0]}
+
+    def counts(lod):
+        batches = build_batches(document, rows, lod).values()
+        return tuple(sum(len(batch[slot]) for batch in batches) for slot in range(4))
+
+    # (линии, прямоугольники, эллипсы, точки)
+    assert counts(1) == (1, 1, 1, 0)
+    # 1/16: эллипс 40x20 (+2 толщины) ~2.6 px - прямоугольником
+    assert counts(1 / 16) == (1, 2, 0, 0)
+    # 1/128: все фигуры меньше 1.5 px - точками, 1/1024 - не рисуются
+    assert counts(1 / 128) == (0, 0, 0, 3)
+    assert counts(1 / 1024) == (0, 0, 0, 0)
+
+
+def test_layer_paints_density_raster_when_zoomed_out():
+    document = ShapeDocument.from_dicts([
+        {"type": "rect", "props": {"x": i % 100 * 10, "y": i // 100 * 10, "w": 8, "h": 8, "color": "#0000ff"}}
+        for i in range(2000)
+    ])
+    layer = BulkLayer(document)
+    layer.add_many([("rect", row) for row in range(2000)])
+
+    image = QImage(100, 100, QImage.Format_ARGB32)
+    image.fill(QColor("white"))
+    painter = QPainter(image)
+    painter.scale(0.05, 0.05)
+    layer.paint(painter, None)
+    painter.end()
+
+    assert len(layer._density) == 1
+    assert image.pixelColor(20, 5).blue() > image.pixelColor(20, 5).red()
+    assert image.pixelColor(80, 80).name() == "#ffffff"
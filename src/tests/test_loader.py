@@ -0,0 +1,123 @@
+import io
+import json
+import time
+
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from src.logic.Line import Line
+from src.logic.commands import AddShapeCommand
+from src.logic.document import ShapeDocument
+from src.logic.loader import ProjectStream, ProjectLoader
+from src.widgets.canvas import EditorCanvas
+
+
+def _project(count):
+    return {
+        "version": "1.0",
+        "scene": {"width": 321, "height": 123},
+        "shapes": [
+            {"type": "line", "props": {"x1": i, "y1": 0, "x2": i, "y2": 10.5, "color": "#ff0000", "stroke_width": 2}}
+            for i in range(count)
+        ] + [{"type": "group", "pos": [1, 1], "children": [
+            {"type": "rect", "props": {"x": 0, "y": 0, "w": 5, "h": 5}}
+        ]}]
+    }
+
+
+def _wait(loader, timeout=10):
+    deadline = time.monotonic() + timeout
+    while loader.is_running and time.monotonic() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.001)
+
+
+def test_stream_matches_json_load():
+    data = _project(50)
+    raw = json.dumps(data, indent=4).encode("utf-8")
+
+    # Маленькие куски, чтобы значения резались на границах чтения
+    stream = ProjectStream(io.BytesIO(raw), chunk_size=7)
+    shapes = list(stream)
+
+    assert shapes == data["shapes"]
+    assert stream.header == {"version": "1.0", "scene": {"width": 321, "height": 123}}
+    assert stream.bytes_read == len(raw)
+
+
+def test_stream_rejects_broken_file():
+    with pytest.raises(ValueError):
+        list(ProjectStream(io.BytesIO(b'{"version": "1.0", "shapes": [{"type": "line"'), chunk_size=4))
+
+
+def test_loader_fills_canvas(tmp_path):
+    path = tmp_path / "project.json"
+    path.write_text(json.dumps(_project(1200)), encoding="utf-8")
+
+    canvas = EditorCanvas()
+    loader = ProjectLoader(canvas, str(path))
+    results = []
+    progress = []
+    loader.finished.connect(results.append)
+    loader.progress.connect(lambda done, total: progress.append(done))
+
+    loader.start()
+    _wait(loader)
+
+    assert results == [0]
+    assert progress[-1] == path.stat().st_size
+    assert len(canvas.document) == 1201
+    assert len(canvas.scene.index) == 1201
+    assert canvas.scene.sceneRect().width() == 321
+    assert 0 < loader.longest_tick <= loader.total_time
+
+
+def _edited_canvas():
+    """Холст с открытым документом и правкой в истории отмены"""
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(_project(3)["shapes"]))
+    canvas.undo_stack.push(AddShapeCommand(canvas.scene, Line(0, 0, 5, 5)))
+    return canvas
+
+
+def test_loader_cancel_keeps_open_document(tmp_path):
+    path = tmp_path / "project.json"
+    path.write_text(json.dumps(_project(20000)), encoding="utf-8")
+
+    canvas = _edited_canvas()
+    document = canvas.document
+    count = len(document)
+    loader = ProjectLoader(canvas, str(path))
+    loader.start()
+    loader.cancel()
+    _wait(loader)
+
+    assert not loader.is_running
+    assert canvas.document is document and len(document) == count
+    assert canvas.undo_stack.count() == 1
+
+
+@pytest.mark.parametrize("tail", [
+    b"]}",  # нет версии
+    b', {"type": "line", "props": ',  # файл обрывается посреди фигуры
+])
+def test_loader_failure_keeps_open_document(tmp_path, tail):
+    shapes = json.dumps(_project(3000)["shapes"])[1:-1].encode("utf-8")
+    path = tmp_path / "project.json"
+    path.write_bytes(b'{"scene": {"width": 10, "height": 10}, "shapes": [' + shapes + tail)
+
+    canvas = _edited_canvas()
+    document = canvas.document
+    count = len(document)
+    items = len(canvas.scene.items())
+    loader = ProjectLoader(canvas, str(path))
+    errors = []
+    loader.failed.connect(errors.append)
+    loader.start()
+    _wait(loader)
+
+    assert len(errors) == 1
+    assert canvas.document is document and len(document) == count
+    assert len(canvas.scene.items()) == items
+    assert canvas.undo_stack.count() == 1
+    assert canvas.scene.sceneRect().width() != 10
@@ -76,4 +76,26 @@ def test_undo_stack_logic():
     assert rect not in scene.items()
 
     stack.redo()
-    assert rect in scene.items()
\ No newline at end of file
+    assert rect in scene.items()
+
+def test_group_and_ungroup_selection():
+    from src.logic.document import ShapeDocument
+    from src.widgets.canvas import EditorCanvas
+
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts([
+        {"type": "line", "props": {"x1": 0, "y1": 0, "x2": 10, "y2": 10}},
+        {"type": "rect", "pos": [5, 5], "props": {"x": 0, "y": 0, "w": 10, "h": 10}},
+    ]))
+    expected = canvas.document.to_dicts()
+
+    for item in canvas.scene.items():
+        item.setSelected(True)
+    canvas.group_selection()
+
+    assert [data["type"] for data in canvas.document.to_dicts()] == ["group"]
+
+    canvas.ungroup_selection()
+
+    assert canvas.document.to_dicts() == expected
+    assert all(item.topLevelItem() is item for item in canvas.scene.items())
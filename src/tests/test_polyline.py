@@ -0,0 +1,125 @@
+import math
+
+from src.logic import journal, transforms
+from src.logic.Polyline import Polyline
+from src.logic.commands import AddShapeCommand
+from src.logic.document import ShapeDocument
+from src.logic.io_manager import FileManager
+from src.logic.simplify import simplify, segment_distance_sq, StreamSimplifier
+from src.logic.strategies import JsonSaveStrategy, VecSaveStrategy
+from src.logic.vec_format import write_vec, VecReader
+from src.widgets.canvas import EditorCanvas
+
+SHAPES = [
+    {"type": "polyline", "pos": [5, 5],
+     "props": {"points": [0, 0, 10, 5, 20, 0, 30, 10], "color": "#ff0000", "stroke_width": 3}},
+    {"type": "group", "pos": [1, 2], "children": [
+        {"type": "polyline", "pos": [0, 0],
+         "props": {"points": [-1.5, 2.25, 4, 4], "color": "#000000", "stroke_width": 2}},
+    ]},
+]
+
+
+def _trace(count):
+    """Зашумленная синусоида - как трек GPS"""
+    points = []
+    for i in range(count):
+        points += [i * 0.5, 20 * math.sin(i / 40) + (i * 7919 % 13) / 100]
+    return points
+
+
+def _max_deviation(source, result) -> float:
+    """Насколько дальше всего точки source отходят от ломаной result"""
+    return max(
+        min(segment_distance_sq(source[i], source[i + 1], result[j], result[j + 1], result[j + 2], result[j + 3])
+            for j in range(0, len(result) - 2, 2))
+        for i in range(0, len(source), 2)
+    ) ** 0.5
+
+
+def test_simplification_stays_within_tolerance():
+    trace = _trace(2000)
+
+    reduced = simplify(trace, 0.5)
+    assert len(reduced) < len(trace) // 10
+    assert reduced[:2].tolist() == trace[:2] and reduced[-2:].tolist() == trace[-2:]
+    assert _max_deviation(trace, reduced) <= 0.5
+
+    stream = StreamSimplifier(0.5, window=64)
+    for i in range(0, len(trace), 2):
+        stream.add(trace[i], trace[i + 1])
+    # Поток хранит только вершины, а окно ограничивает работу на точку
+    assert len(stream.points) < len(trace) // 5
+    assert len(stream._pending) // 2 <= 64
+
+    final = stream.finish()
+    assert _max_deviation(trace, final) <= 1.0 + 1e-9
+
+
+def test_polyline_round_trips_through_project_formats(tmp_path):
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+
+    JsonSaveStrategy().save(str(tmp_path / "p.json"), canvas.scene)
+    VecSaveStrategy().save(str(tmp_path / "p.vec"), canvas.scene)
+
+    json_document, _, _ = FileManager.load_document(str(tmp_path / "p.json"))
+    vec_document, _, _ = FileManager.load_document(str(tmp_path / "p.vec"))
+    assert vec_document.to_dicts() == json_document.to_dicts() == SHAPES
+
+    # Габариты - колонки x, y, w, h: по ним работают индекс, слои и LOD
+    table = json_document.tables["polyline"]
+    assert table.values(0) == (0, 0, 30, 10)
+    assert json_document.scene_bounds(("polyline", 1)) == (-0.5, 4.25, 5, 6)
+
+
+def test_vec_keeps_only_live_vertices(tmp_path):
+    document = ShapeDocument.from_dicts(SHAPES)
+    table = document.tables["polyline"]
+    table.set_vertices(1, [0, 0, 1, 1, 2, 0])
+    document.set_alive(("polyline", 0), False)
+
+    write_vec(str(tmp_path / "p.vec"), document, 100, 100)
+
+    with VecReader(str(tmp_path / "p.vec")) as reader:
+        loaded = reader.to_document()
+
+    assert loaded.to_dicts() == document.to_dicts()
+    assert list(loaded.tables["polyline"].points) == [0, 0, 1, 1, 2, 0]
+
+
+def test_rotation_turns_vertices_and_undo_restores_them():
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES[:1]))
+    item = canvas.scene.items()[0]
+    item.setSelected(True)
+    before = list(item.points)
+
+    canvas.transform_selection("Rotate", transforms.rotate, 90, (5, 5))
+    # Вокруг позиции фигуры: (x, y) -> (-y, x)
+    assert list(item.points) == [0, 0, -5, 10, 0, 20, -10, 30]
+    assert canvas.document.tables["polyline"].values(0) == (-10, 0, 10, 30)
+
+    canvas.undo_stack.undo()
+    assert list(item.points) == before
+    canvas.undo_stack.redo()
+    canvas.undo_stack.undo()
+
+    canvas.transform_selection("Scale", transforms.scale, 2, 1, (5, 0))
+    assert list(item.points) == [0, 0, 20, 5, 40, 0, 60, 10]
+    canvas.undo_stack.undo()
+    assert list(item.points) == before
+
+
+def test_journal_recovers_polylines(tmp_path):
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+    log = journal.DocumentJournal(str(tmp_path), canvas)
+    log.start()
+
+    canvas.undo_stack.push(AddShapeCommand(canvas.scene, Polyline(_trace(50), "#00ff00")))
+    log.sync()
+
+    document, _ = journal.recover(str(tmp_path))
+    assert document.to_dicts() == canvas.document.to_dicts()
+    log.close(discard_files=True)
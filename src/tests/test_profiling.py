@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from PySide6.QtCore import QPointF
+
+from src.logic.Line import Line
+from src.logic.commands import AddShapeCommand, MoveCommand
+from src.logic.document import ShapeDocument
+from src.logic.profiling import PROFILER, Histogram
+from src.widgets.canvas import EditorCanvas
+
+
+@pytest.fixture
+def canvas():
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts([
+        {"type": "rect", "props": {"x": 10, "y": 10, "w": 50, "h": 50}},
+    ]))
+    canvas.resize(300, 200)
+    PROFILER.reset()
+    yield canvas
+    canvas.set_profiling(False)
+    PROFILER.reset()
+
+
+def _edit(canvas):
+    line = Line(0, 0, 10, 10)
+    canvas.undo_stack.push(AddShapeCommand(canvas.scene, line))
+    canvas.undo_stack.push(MoveCommand(line, QPointF(0, 0), QPointF(5, 5)))
+    canvas.undo_stack.undo()
+    canvas.grab()
+
+
+def test_disabled_profiler_records_nothing(canvas):
+    _edit(canvas)
+    assert PROFILER.histograms == {}
+
+
+def test_hot_paths_are_recorded_and_exported(canvas, tmp_path):
+    canvas.set_profiling(True)
+    _edit(canvas)
+
+    names = set(PROFILER.histograms)
+    assert {"paint", "command.AddShapeCommand.redo", "command.MoveCommand.redo",
+            "command.MoveCommand.undo"} <= names
+
+    PROFILER.export(str(tmp_path / "profile.json"))
+    data = json.loads((tmp_path / "profile.json").read_text())
+
+    paint = data["paint"]
+    assert paint["count"] >= 1
+    assert sum(count for _, count in paint["buckets_us"]) == paint["count"]
+    assert paint["min_ms"] <= paint["p50_ms"] <= paint["max_ms"]
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.add(0.000_010)  # 10 мкс
+    for _ in range(10):
+        histogram.add(0.010)  # 10 мс
+
+    # Оценка - верхняя граница корзины-степени двойки
+    assert histogram.percentile(0.5) == pytest.approx(16e-6)
+    assert histogram.percentile(0.99) == pytest.approx(0.010)
+    assert histogram.count == 100
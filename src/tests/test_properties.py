@@ -0,0 +1,122 @@
+from PySide6.QtCore import QPointF
+
+from src.logic.commands import BulkChangeWidthCommand, BulkMoveCommand
+from src.logic.document import ShapeDocument
+from src.widgets.canvas import EditorCanvas
+from src.widgets.properties import PropertiesPanel
+
+SHAPES = [
+    {"type": "rect", "props": {"x": 0, "y": 0, "w": 10, "h": 10, "color": "#ff0000", "stroke_width": 2}},
+    {"type": "rect", "pos": [20, 0], "props": {"x": 0, "y": 0, "w": 10, "h": 10, "color": "#ff0000", "stroke_width": 2}},
+    {"type": "line", "props": {"x1": 0, "y1": 0, "x2": 9, "y2": 9, "color": "#00ff00", "stroke_width": 3}},
+]
+
+
+def _panel():
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+    panel = PropertiesPanel(canvas.scene, canvas.undo_stack)
+    items = sorted(canvas.scene.items(), key=lambda item: item.row + (10 if item.type_name == "line" else 0))
+    return canvas, panel, items
+
+
+def _flush(panel):
+    # Таймер кадра не ждем: срабатывание - это вызов refresh
+    assert panel._refresh_timer.isActive()
+    panel._refresh_timer.stop()
+    panel.refresh()
+
+
+def test_selection_signals_are_coalesced_into_one_refresh():
+    canvas, panel, (first, second, line) = _panel()
+    calls = []
+    original = panel.refresh
+    panel.refresh = lambda: (calls.append(1), original())
+
+    for item in (first, second, line):
+        item.setSelected(True)
+    assert calls == []
+    _flush(panel)
+
+    summary = canvas.scene.selection
+    assert len(summary) == 3
+    assert summary.types == {"Rect": 2, "Line": 1}
+    assert summary.widths == {2: 2, 3: 1}
+    assert panel.lbl_type.text() == "Rect (+2)"
+    assert panel.spin_width.value() == 2 and panel.spin_width.toolTip()
+
+    line.setSelected(False)
+    _flush(panel)
+    assert summary.widths == {2: 2}
+    assert panel.lbl_type.text() == "Rect (+1)"
+    assert panel.spin_width.toolTip() == ""
+    assert panel.spin_x.toolTip()  # прямоугольники в разных позициях
+
+
+def test_history_changes_update_the_summary():
+    canvas, panel, (first, second, line) = _panel()
+    first.setSelected(True)
+    second.setSelected(True)
+    _flush(panel)
+
+    canvas.undo_stack.push(BulkChangeWidthCommand([first, second], 7))
+    _flush(panel)
+    assert canvas.scene.selection.widths == {7: 2}
+    assert panel.spin_width.value() == 7
+
+    canvas.undo_stack.push(BulkMoveCommand(canvas.scene, [first], QPointF(5, 5)))
+    _flush(panel)
+    assert panel.spin_x.value() == 5
+
+    canvas.undo_stack.undo()
+    canvas.undo_stack.undo()
+    _flush(panel)
+    assert canvas.scene.selection.widths == {2: 2}
+    assert panel.spin_x.value() == 0
+
+    # Удаленный объект Qt оставляет выделенным, но в сводке его нет
+    canvas.delete_selected()
+    _flush(panel)
+    assert len(canvas.scene.selection) == 0
+    assert not panel.isEnabled()
+
+
+def test_position_fields_move_the_whole_selection_by_one_command():
+    canvas, panel, (first, second, line) = _panel()
+    first.setSelected(True)
+    second.setSelected(True)
+    _flush(panel)
+
+    panel.spin_x.setValue(10)
+    panel.spin_y.setValue(5)
+
+    # Два поля - две правки, склеенные в одну команду; взаимное расположение сохраняется
+    assert canvas.undo_stack.count() == 1
+    assert (first.pos().x(), first.pos().y()) == (10, 5)
+    assert (second.pos().x(), second.pos().y()) == (30, 5)
+
+    canvas.undo_stack.undo()
+    assert (second.pos().x(), second.pos().y()) == (20, 0)
+
+    # Законченный ввод - конец действия: следующая правка поля - новая запись истории
+    canvas.undo_stack.redo()
+    panel.spin_x.editingFinished.emit()
+    panel.spin_x.setValue(12)
+    assert canvas.undo_stack.count() == 2
+    assert first.pos().x() == 12
+
+
+def test_width_after_grouping_inflates_each_shape_once():
+    canvas, panel, items = _panel()
+    for item in items:
+        item.setSelected(True)
+    canvas.group_selection()
+    # Выделены группа и ее дети: каждая фигура должна попасть в команду один раз
+    assert len(canvas.scene.selectedItems()) == 4
+
+    panel.on_width_changed(20)
+    assert len(canvas.undo_stack.command(1).items) == 3
+
+    rect = items[0]
+    assert canvas.scene.index.bounds(rect.ref) == (-10, -10, 20, 20)
+    assert canvas.pick(QPointF(-15, 5)) is None
@@ -0,0 +1,102 @@
+import json
+import os
+import time
+
+import pytest
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+
+from src.logic.document import ShapeDocument
+from src.logic.io_manager import atomic_write
+from src.logic.saver import BackgroundSaver
+from src.logic.strategies import JsonSaveStrategy, ImageSaveStrategy
+from src.widgets.canvas import EditorCanvas
+
+SHAPES = [
+    {"type": "rect", "pos": [0, 0],
+     "props": {"x": 10, "y": 10, "w": 20, "h": 20, "color": "#ff0000", "stroke_width": 2}},
+    {"type": "group", "pos": [40, 0], "children": [
+        {"type": "line", "pos": [0, 0],
+         "props": {"x1": 0, "y1": 5, "x2": 30, "y2": 5, "color": "#0000ff", "stroke_width": 2}},
+    ]},
+]
+
+
+def _wait(saver, timeout=10):
+    deadline = time.monotonic() + timeout
+    while saver.is_running and time.monotonic() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.001)
+
+
+def test_atomic_write_keeps_old_file_on_error(tmp_path):
+    path = tmp_path / "p.json"
+    path.write_text("old", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as tmp_path_name:
+            with open(tmp_path_name, "w") as f:
+                f.write("partial")
+            raise RuntimeError("disk full")
+
+    assert path.read_text(encoding="utf-8") == "old"
+    assert os.listdir(tmp_path) == ["p.json"]
+
+
+def test_background_save_uses_snapshot(tmp_path):
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+    canvas.scene.setSceneRect(0, 0, 100, 50)
+
+    saver = BackgroundSaver()
+    finished = []
+    saver.finished.connect(finished.append)
+
+    path = str(tmp_path / "p.json")
+    saver.save(JsonSaveStrategy(), path, canvas.scene)
+    # Правки после запроса сохранения в файл уже не попадают
+    canvas.document.set_alive(("rect", 0), False)
+    _wait(saver)
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    assert finished == [path]
+    assert ShapeDocument.from_dicts(data["shapes"], data["styles"]).to_dicts() == SHAPES
+    assert data["scene"] == {"width": 100, "height": 50}
+
+
+def test_background_save_coalesces_requests(tmp_path):
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+
+    saver = BackgroundSaver()
+    finished = []
+    failed = []
+    saver.finished.connect(finished.append)
+    saver.failed.connect(lambda filename, message: failed.append(filename))
+
+    path = str(tmp_path / "p.json")
+    for _ in range(5):
+        saver.save(JsonSaveStrategy(), path, canvas.scene)
+    saver.save(JsonSaveStrategy(), str(tmp_path / "missing" / "p.json"), canvas.scene)
+    saver.wait()
+
+    # Первый запрос пишется сразу, из остальных четырех остается последний
+    assert finished == [path, path]
+    assert failed == [str(tmp_path / "missing" / "p.json")]
+
+
+def test_image_strategy_renders_document(tmp_path):
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+    canvas.scene.setSceneRect(0, 0, 100, 50)
+
+    path = str(tmp_path / "p.png")
+    ImageSaveStrategy("PNG", background_color="transparent").save(path, canvas.scene)
+
+    image = QImage(path)
+    assert image.width() == 100 and image.height() == 50
+    assert image.pixelColor(10, 20).red() == 255
+    assert image.pixelColor(55, 5).blue() == 255
+    assert image.pixelColor(80, 40).alpha() == 0
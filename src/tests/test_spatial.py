@@ -0,0 +1,94 @@
+import random
+
+from PySide6.QtCore import QPointF, QRectF
+from PySide6.QtGui import QUndoStack
+
+import src.widgets.canvas as canvas_module
+from src.logic.commands import MoveCommand, DeleteCommand
+from src.logic.document import ShapeDocument
+from src.logic.spatial import GridIndex
+from src.widgets.canvas import EditorCanvas
+
+
+def _brute_force(entries, x0, y0, x1, y1):
+    return sorted(ref for ref, (bx0, by0, bx1, by1) in entries.items()
+                  if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1)
+
+
+def test_grid_matches_brute_force():
+    rng = random.Random(1)
+    index = GridIndex(cell_size=50, max_cells=16)
+    entries = {}
+
+    for row in range(500):
+        x, y = rng.uniform(-500, 500), rng.uniform(-500, 500)
+        # Часть фигур крупнее max_cells ячеек
+        size = rng.choice([5, 40, 400])
+        entries[("rect", row)] = (x, y, x + size, y + size)
+    index.insert_many(entries.items())
+
+    for row in range(0, 500, 3):
+        x, y = rng.uniform(-500, 500), rng.uniform(-500, 500)
+        entries[("rect", row)] = (x, y, x + 10, y + 10)
+        index.update(("rect", row), entries[("rect", row)])
+    for row in range(1, 500, 7):
+        index.remove(("rect", row))
+        del entries[("rect", row)]
+
+    assert len(index) == len(entries)
+    for _ in range(50):
+        x0, y0 = rng.uniform(-600, 600), rng.uniform(-600, 600)
+        rect = (x0, y0, x0 + rng.uniform(0, 300), y0 + rng.uniform(0, 300))
+        assert sorted(index.query_rect(*rect)) == _brute_force(entries, *rect)
+
+    everything = (-10 ** 6, -10 ** 6, 10 ** 6, 10 ** 6)
+    assert sorted(index.query_rect(*everything)) == sorted(entries)
+
+
+SHAPES = [
+    {"type": "rect", "props": {"x": 0, "y": 0, "w": 100, "h": 100}},
+    {"type": "line", "props": {"x1": 0, "y1": 0, "x2": 100, "y2": 100}},
+    {"type": "group", "pos": [500, 0], "children": [
+        {"type": "ellipse", "props": {"x": 0, "y": 0, "w": 50, "h": 50}},
+    ]},
+]
+
+
+def test_canvas_pick_and_select(monkeypatch):
+    monkeypatch.setattr(canvas_module, "BULK_LAYER_THRESHOLD", 1)
+
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+
+    # Линия выше прямоугольника по z; эллипс смещен позицией группы
+    assert canvas.pick(QPointF(50, 50)) == ("line", 0)
+    assert canvas.pick(QPointF(0, 60)) == ("rect", 0)
+    assert canvas.pick(QPointF(525, 1)) == ("ellipse", 0)
+    assert canvas.pick(QPointF(300, 300)) is None
+
+    canvas.select_rect(QRectF(-10, -10, 50, 50))
+
+    assert sorted(item.ref for item in canvas.scene.selectedItems()) == [("line", 0), ("rect", 0)]
+    assert sum(len(layer) for layer in canvas.layers.values()) == 0
+
+
+def test_index_follows_commands():
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+    stack = QUndoStack()
+
+    rect = next(item for item in canvas.scene.items() if getattr(item, "ref", None) == ("rect", 0))
+    stack.push(MoveCommand(rect, QPointF(0, 0), QPointF(1000, 1000)))
+
+    assert canvas.pick(QPointF(1050, 1000)) == ("rect", 0)
+    assert canvas.pick(QPointF(50, 0)) is None
+
+    stack.undo()
+    assert canvas.pick(QPointF(50, 0)) == ("rect", 0)
+
+    group = next(item for item in canvas.scene.items() if getattr(item, "ref", None) == ("group", 0))
+    stack.push(DeleteCommand(canvas.scene, group))
+    assert canvas.pick(QPointF(525, 1)) is None
+
+    stack.undo()
+    assert canvas.pick(QPointF(525, 1)) == ("ellipse", 0)
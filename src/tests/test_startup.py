@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+# Модули, которые первому кадру не нужны и грузятся при первом использовании
+LAZY_MODULES = [
+    "src.logic.batch", "src.logic.tiled_export", "src.logic.strategies", "src.logic.vec_format",
+    "src.logic.svg_export", "src.logic.io_manager", "src.logic.loader", "src.logic.journal", "multiprocessing",
+]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_window_module_does_not_load_optional_subsystems():
+    # Отдельный интерпретатор: в процессе тестов эти модули уже импортированы другими тестами
+    code = "import sys, src.app; print('\\n'.join(sys.modules))"
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+
+    loaded = set(output.split())
+    assert [name for name in LAZY_MODULES if name in loaded] == []
@@ -0,0 +1,78 @@
+import xml.etree.ElementTree as ET
+
+from src.logic.batch import save_strategy
+from src.logic.document import ShapeDocument, STYLE_TABLE
+from src.logic.strategies import SvgSaveStrategy
+from src.logic.svg_export import iter_svg
+from src.widgets.canvas import EditorCanvas
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+SHAPES = [
+    {"type": "line", "pos": [5, 5],
+     "props": {"x1": 0, "y1": 0, "x2": 10, "y2": 20, "color": "#ff0000", "stroke_width": 3}},
+    {"type": "group", "pos": [1, 2], "children": [
+        {"type": "rect", "pos": [0, 0],
+         "props": {"x": 1, "y": 2, "w": -3, "h": 4, "color": "#ff0000", "stroke_width": 3}},
+        {"type": "group", "pos": [3, 3], "children": [
+            {"type": "ellipse", "pos": [0, 0],
+             "props": {"x": 5, "y": 6, "w": 8, "h": 4, "color": "#0000ff", "stroke_width": 2}},
+        ]},
+    ]},
+    {"type": "polyline", "pos": [1, 1],
+     "props": {"points": [0, 0, 10, 5, 20, 0], "color": "#0000ff", "stroke_width": 2}},
+]
+
+
+def _tag(element) -> str:
+    return element.tag.replace(SVG, "")
+
+
+def test_svg_keeps_groups_styles_and_draw_order(tmp_path):
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+    canvas.scene.setSceneRect(0, 0, 200, 100)
+
+    path = str(tmp_path / "scene.svg")
+    strategy = save_strategy(path, canvas.scene.sceneRect())
+    assert isinstance(strategy, SvgSaveStrategy)
+    strategy.save(path, canvas.scene)
+
+    root = ET.parse(path).getroot()
+    assert root.get("viewBox") == "0 0 200 100"
+    assert [_tag(child) for child in root] == ["style", "line", "g", "polyline"]
+
+    red = STYLE_TABLE.intern("#ff0000", 3)
+    blue = STYLE_TABLE.intern("#0000ff", 2)
+    style = root.find(f"{SVG}style").text
+    assert f".s{red}{{stroke:#ff0000;stroke-width:3}}" in style
+    assert f".s{blue}{{stroke:#0000ff;stroke-width:2}}" in style
+
+    # Позиция фигуры - в координатах, позиция группы - в transform
+    line = root.find(f"{SVG}line")
+    assert line.get("class") == f"s{red}"
+    assert [float(line.get(name)) for name in ("x1", "y1", "x2", "y2")] == [5, 5, 15, 25]
+
+    group = root.find(f"{SVG}g")
+    assert group.get("transform") == "translate(1,2)"
+    rect, inner = list(group)
+    assert [float(rect.get(name)) for name in ("x", "y", "width", "height")] == [-2, 2, 3, 4]
+    assert inner.get("transform") == "translate(3,3)"
+
+    ellipse = inner.find(f"{SVG}ellipse")
+    assert ellipse.get("class") == f"s{blue}"
+    assert [float(ellipse.get(name)) for name in ("cx", "cy", "rx", "ry")] == [9, 8, 4, 2]
+
+    assert root.find(f"{SVG}polyline").get("points") == "1,1 11,6 21,1"
+
+
+def test_svg_follows_z_order_and_skips_deleted_rows():
+    document = ShapeDocument.from_dicts(SHAPES)
+    document.set_alive(("polyline", 0), False)
+    # Линия поднята наверх: z больше всех, строка таблицы та же
+    document.tables["line"].z[0] = document._take_z()
+
+    text = "".join(iter_svg(document, 0, 0, 100, 100, chunk=2))
+    root = ET.fromstring(text)
+    assert [_tag(child) for child in root] == ["style", "g", "line"]
+    assert "<polyline" not in text
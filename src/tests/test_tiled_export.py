@@ -0,0 +1,58 @@
+import pytest
+from PySide6.QtGui import QImage
+
+from src.logic.document import ShapeDocument
+from src.logic.strategies import ImageSaveStrategy
+from src.logic.tiled_export import TiledImageSaveStrategy
+from src.widgets.canvas import EditorCanvas
+
+SHAPES = [
+    {"type": "rect", "pos": [0, 0],
+     "props": {"x": 10, "y": 10, "w": 150, "h": 70, "color": "#ff0000", "stroke_width": 3}},
+    {"type": "ellipse", "pos": [0, 0],
+     "props": {"x": 60, "y": 30, "w": 90, "h": 90, "color": "#00aa00", "stroke_width": 5}},
+    {"type": "group", "pos": [20, 40], "children": [
+        {"type": "line", "pos": [0, 0],
+         "props": {"x1": 0, "y1": 0, "x2": 170, "y2": 80, "color": "#0000ff", "stroke_width": 2}},
+    ]},
+]
+
+
+@pytest.fixture
+def canvas():
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+    canvas.scene.setSceneRect(0, 0, 200, 130)
+    return canvas
+
+
+def _pixels(path):
+    image = QImage(str(path)).convertToFormat(QImage.Format_RGBA8888)
+    pixels = bytes(image.constBits())
+    return image.width(), image.height(), pixels
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_tiles_match_single_image(tmp_path, canvas, workers):
+    ImageSaveStrategy("PNG", background_color="white", scale=1.5).save(str(tmp_path / "whole.png"), canvas.scene)
+
+    # Тайлы некратного размера, чтобы фигуры пересекали границы
+    tiled = TiledImageSaveStrategy(background_color="white", scale=1.5, tile_size=37, workers=workers)
+    tiled.save(str(tmp_path / "tiled.png"), canvas.scene)
+
+    width, height, tiled_pixels = _pixels(tmp_path / "tiled.png")
+    assert (width, height) == (300, 195)
+
+    # Сглаживание на стыках тайлов может отличаться на пару единиц канала
+    _, _, whole_pixels = _pixels(tmp_path / "whole.png")
+    assert max(abs(a - b) for a, b in zip(tiled_pixels, whole_pixels)) <= 8
+
+
+def test_tiled_export_dpi(tmp_path, canvas):
+    path = str(tmp_path / "p.png")
+    TiledImageSaveStrategy(background_color="transparent", dpi=192, workers=0).save(path, canvas.scene)
+
+    image = QImage(path)
+    assert (image.width(), image.height()) == (400, 260)
+    assert round(image.dotsPerMeterX() * 0.0254) == 192
+    assert image.pixelColor(399, 259).alpha() == 0
@@ -0,0 +1,119 @@
+from PySide6.QtCore import Qt, QPointF, QEvent
+from PySide6.QtGui import QMouseEvent
+from PySide6.QtWidgets import QApplication
+
+from src.constants import TYPE_RECT, TYPE_POLYLINE
+from src.logic.Polyline import Polyline
+from src.logic.Rectangle import Rectangle
+from src.logic.document import ShapeDocument
+from src.widgets.canvas import EditorCanvas
+
+
+def _mouse(kind, x, y, button=Qt.LeftButton):
+    buttons = Qt.NoButton if kind == QEvent.Type.MouseButtonRelease else Qt.LeftButton
+    return QMouseEvent(kind, QPointF(x, y), QPointF(x, y), button, buttons, Qt.NoModifier)
+
+
+def test_creation_preview_stays_out_of_the_scene_and_is_committed():
+    canvas = EditorCanvas()
+    canvas.resize(400, 300)
+    canvas.set_tool(TYPE_RECT)
+    tool = canvas.active_tool
+    start = canvas.mapToScene(10, 10)
+
+    tool.mouse_press(_mouse(QEvent.Type.MouseButtonPress, 10, 10))
+    preview = canvas.preview
+    assert isinstance(preview, Rectangle)
+    assert canvas.scene.items() == []
+
+    # Накопившиеся движения применяются одним перестроением пути - по последнему
+    first = preview.path().boundingRect()
+    tool.mouse_move(_mouse(QEvent.Type.MouseMove, 50, 40))
+    tool.mouse_move(_mouse(QEvent.Type.MouseMove, 60, 50))
+    tool.mouse_move(_mouse(QEvent.Type.MouseMove, 70, 60))
+    assert preview.path().boundingRect() == first
+    assert canvas.scene.items() == []
+
+    QApplication.processEvents()
+    end = canvas.mapToScene(70, 60)
+    assert preview.w == end.x() - start.x()
+    canvas.grab()
+
+    tool.mouse_release(_mouse(QEvent.Type.MouseButtonRelease, 90, 80))
+    assert canvas.preview is None
+    assert canvas.scene.items() == [preview]
+    assert canvas.undo_stack.count() == 1
+
+    end = canvas.mapToScene(90, 80)
+    assert (preview.w, preview.h) == (end.x() - start.x(), end.y() - start.y())
+    assert canvas.document.to_dicts()[0]["props"]["w"] == preview.w
+    assert canvas.pick(QPointF(start.x(), start.y() + 5)) == preview.ref
+
+    canvas.undo_stack.undo()
+    assert canvas.scene.items() == []
+    QApplication.processEvents()
+
+
+def test_drag_moves_selection_once_on_release():
+    canvas = EditorCanvas()
+    canvas.resize(400, 300)
+    canvas.set_document(ShapeDocument.from_dicts([
+        {"type": "rect", "pos": [0, 0], "props": {"x": 10 + 40 * i, "y": 10, "w": 30, "h": 30}}
+        for i in range(5)
+    ]))
+    for item in canvas.scene.items():
+        item.setSelected(True)
+    items = canvas.scene.selectedItems()
+    tool = canvas.active_tool
+
+    press = canvas.mapFromScene(QPointF(25, 25))
+    tool.mouse_press(_mouse(QEvent.Type.MouseButtonPress, press.x(), press.y()))
+    for step in range(1, 6):
+        tool.mouse_move(_mouse(QEvent.Type.MouseMove, press.x() + 10 * step, press.y() + 5 * step, Qt.NoButton))
+
+    # Пока тащим, двигается только снимок
+    assert all(item.pos() == QPointF(0, 0) and item.opacity() == 0.0 for item in items)
+    assert canvas.undo_stack.count() == 0
+    canvas.grab()
+
+    tool.mouse_release(_mouse(QEvent.Type.MouseButtonRelease, press.x() + 50, press.y() + 25))
+    delta = canvas.mapToScene(press.x() + 50, press.y() + 25) - canvas.mapToScene(press)
+
+    assert canvas.undo_stack.count() == 1
+    assert all(item.pos() == delta and item.opacity() == 1.0 and item.isSelected() for item in items)
+    assert canvas.document.to_dicts()[0]["pos"] == [delta.x(), delta.y()]
+    assert canvas.pick(QPointF(25, 10) + delta) is not None
+    assert canvas.pick(QPointF(10, 25)) is None
+
+    canvas.undo_stack.undo()
+    assert all(item.pos() == QPointF(0, 0) for item in items)
+    assert canvas.pick(QPointF(10, 25)) is not None
+
+
+def test_freehand_stroke_is_simplified_while_drawing():
+    canvas = EditorCanvas()
+    canvas.resize(400, 300)
+    canvas.set_tool(TYPE_POLYLINE)
+    tool = canvas.active_tool
+
+    # Прямой штрих из сотни точек и поворот под прямым углом
+    tool.mouse_press(_mouse(QEvent.Type.MouseButtonPress, 10, 10))
+    for x in range(11, 110):
+        tool.mouse_move(_mouse(QEvent.Type.MouseMove, x, 10))
+    for y in range(11, 60):
+        tool.mouse_move(_mouse(QEvent.Type.MouseMove, 109, y))
+    assert len(tool.simplifier.points) // 2 <= 3
+    assert canvas.scene.items() == []
+
+    QApplication.processEvents()
+    tool.mouse_release(_mouse(QEvent.Type.MouseButtonRelease, 109, 60))
+
+    shape = canvas.scene.items()[0]
+    assert isinstance(shape, Polyline)
+    corner = canvas.mapToScene(109, 10)
+    assert len(shape.points) == 6
+    # Угол - вершина с точностью до допуска упрощения (1 px)
+    assert abs(shape.points[2] - corner.x()) <= 1 and abs(shape.points[3] - corner.y()) <= 1
+    assert canvas.document.to_dicts()[0]["props"]["points"] == shape.points.tolist()
+    assert canvas.pick(canvas.mapToScene(60, 10)) == shape.ref
+    assert canvas.pick(canvas.mapToScene(60, 40)) is None
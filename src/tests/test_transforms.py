@@ -0,0 +1,89 @@
+import pytest
+
+from src.logic import transforms
+from src.logic.document import ShapeDocument
+from src.widgets.canvas import EditorCanvas
+
+SHAPES = [
+    {"type": "rect", "props": {"x": 0, "y": 0, "w": 10, "h": 20}},
+    {"type": "line", "pos": [100, 0], "props": {"x1": 0, "y1": 0, "x2": 10, "y2": 0}},
+    {"type": "group", "pos": [0, 100], "children": [
+        {"type": "ellipse", "props": {"x": 40, "y": 0, "w": 20, "h": 10}},
+    ]},
+]
+
+
+def _canvas():
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+    for item in canvas.scene.items():
+        if item.topLevelItem() is item:
+            item.setSelected(True)
+    return canvas
+
+
+def _props(canvas):
+    return [shape["props"] if "props" in shape else shape["children"][0]["props"]
+            for shape in canvas.document.to_dicts()]
+
+
+def _geometry(props):
+    return {key: value for key, value in props.items() if key not in ("color", "stroke_width")}
+
+
+def test_transforms_are_single_undoable_commands():
+    canvas = _canvas()
+    before = _props(canvas)
+
+    canvas.transform_selection("Move", transforms.translate, 5, -5)
+    rect, line, ellipse = _props(canvas)
+    assert _geometry(rect) == {"x": 5, "y": -5, "w": 10, "h": 20}
+    assert _geometry(line) == {"x1": 5, "y1": -5, "x2": 15, "y2": -5}  # позиция линии не меняется
+    assert _geometry(ellipse) == {"x": 45, "y": -5, "w": 20, "h": 10}
+    assert canvas.undo_stack.count() == 1
+
+    canvas.undo_stack.undo()
+    assert _props(canvas) == before
+
+
+def test_scale_and_quarter_rotation_about_anchor():
+    canvas = _canvas()
+
+    canvas.transform_selection("Scale", transforms.scale, 2, 2, (0, 0))
+    rect, line, ellipse = _props(canvas)
+    assert _geometry(rect) == {"x": 0, "y": 0, "w": 20, "h": 40}
+    # Линия в позиции (100, 0): ее точки в сцене (100, 0)-(110, 0) уходят в (200, 0)-(220, 0)
+    assert _geometry(line) == {"x1": 100, "y1": 0, "x2": 120, "y2": 0}
+    assert _geometry(ellipse) == {"x": 80, "y": 100, "w": 40, "h": 20}
+
+    canvas.undo_stack.undo()
+    canvas.transform_selection("Rotate", transforms.rotate, 90, (0, 0))
+    rect, line, ellipse = _props(canvas)
+    # Центр (5, 10) -> (-10, 5), ширина и высота меняются местами
+    assert _geometry(rect) == {"x": -20, "y": 0, "w": 20, "h": 10}
+    assert _geometry(line) == {"x1": -100, "y1": 100, "x2": -100, "y2": 110}
+
+    item = next(item for item in canvas.scene.items() if item.ref == ("rect", 0))
+    assert item.path().boundingRect().width() == 20
+    assert canvas.pick(item.sceneBoundingRect().center()) is not None
+
+
+def test_align_and_distribute():
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts([
+        {"type": "rect", "props": {"x": x, "y": y, "w": 10, "h": 10}}
+        for x, y in ((0, 0), (15, 30), (100, 60))
+    ]))
+    for item in canvas.scene.items():
+        item.setSelected(True)
+
+    canvas.transform_selection("Align", transforms.align, "right")
+    assert [props["x"] for props in _props(canvas)] == [100, 100, 100]
+
+    canvas.undo_stack.undo()
+    canvas.transform_selection("Distribute", transforms.distribute, "horizontal")
+    assert [props["x"] for props in _props(canvas)] == [0, 50, 100]
+    assert [props["y"] for props in _props(canvas)] == [0, 30, 60]
+
+    with pytest.raises(ValueError):
+        transforms.align(transforms.ShapeCoords(canvas.scene, []), "diagonal")
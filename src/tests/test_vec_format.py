@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from src.logic.document import ShapeDocument
+from src.logic.io_manager import FileManager
+from src.logic.strategies import JsonSaveStrategy, VecSaveStrategy
+from src.logic.vec_format import VecReader, write_vec
+from src.widgets.canvas import EditorCanvas
+
+SHAPES = [
+    {"type": "line", "pos": [5, 5],
+     "props": {"x1": 0, "y1": 0, "x2": 10, "y2": 20, "color": "#ff0000", "stroke_width": 3}},
+    {"type": "group", "pos": [1, 2], "children": [
+        {"type": "rect", "pos": [0, 0],
+         "props": {"x": 1, "y": 2, "w": 3, "h": 4, "color": "#00ff00", "stroke_width": 1}},
+        {"type": "group", "pos": [3, 3], "children": [
+            {"type": "ellipse", "pos": [0, 0],
+             "props": {"x": 5, "y": 6, "w": 7, "h": 8, "color": "#0000ff", "stroke_width": 2}},
+        ]},
+    ]},
+    {"type": "rect", "pos": [0, 0],
+     "props": {"x": -1.5, "y": 2.25, "w": 30, "h": 40, "color": "#000000", "stroke_width": 2}},
+]
+
+
+def test_vec_round_trip_matches_json(tmp_path):
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts(SHAPES))
+
+    JsonSaveStrategy().save(str(tmp_path / "p.json"), canvas.scene)
+    VecSaveStrategy().save(str(tmp_path / "p.vec"), canvas.scene)
+
+    json_document, json_scene, _ = FileManager.load_document(str(tmp_path / "p.json"))
+    vec_document, vec_scene, _ = FileManager.load_document(str(tmp_path / "p.vec"))
+
+    assert vec_document.to_dicts() == json_document.to_dicts() == SHAPES
+    assert vec_scene == json_scene
+
+
+def test_vec_skips_deleted_rows(tmp_path):
+    document = ShapeDocument.from_dicts(SHAPES)
+    document.set_alive(("line", 0), False)
+    document.set_alive(("group", 1), False)
+
+    write_vec(str(tmp_path / "p.vec"), document, 100, 100)
+
+    with VecReader(str(tmp_path / "p.vec")) as reader:
+        # Колонки доступны прямо из mmap
+        assert list(reader.columns("rect")["w"]) == [3, 30]
+        loaded = reader.to_document()
+
+    assert loaded.to_dicts() == document.to_dicts()
+    assert len(loaded) == 2
+
+
+def test_vec_rejects_garbage(tmp_path):
+    path = tmp_path / "bad.vec"
+    path.write_bytes(json.dumps({"version": "1.0"}).encode())
+
+    with pytest.raises(ValueError):
+        FileManager.load_document(str(path))
@@ -0,0 +1,98 @@
+from PySide6.QtCore import QPointF
+
+import src.widgets.canvas as canvas_module
+from src.logic.commands import MoveCommand
+from src.logic.document import ShapeDocument
+from src.logic.io_manager import FileManager
+from src.logic.strategies import JsonSaveStrategy
+from src.widgets.canvas import EditorCanvas
+
+GRID = 40
+STEP = 500
+
+
+def _canvas(monkeypatch):
+    monkeypatch.setattr(canvas_module, "BULK_LAYER_THRESHOLD", 1)
+
+    canvas = EditorCanvas()
+    canvas.set_document(ShapeDocument.from_dicts([
+        {"type": ("rect", "ellipse")[(i + j) % 2], "props": {"x": i * STEP, "y": j * STEP, "w": 100, "h": 100}}
+        for i in range(GRID) for j in range(GRID)
+    ]))
+    canvas.scene.setSceneRect(0, 0, GRID * STEP, GRID * STEP)
+    canvas.resize(400, 300)
+    canvas.centerOn(0, 0)
+    canvas.viewport_items.refresh()
+    return canvas
+
+
+def _layered(canvas):
+    return sum(len(layer) for layer in canvas.layers.values())
+
+
+def _scroll(canvas, x, y):
+    canvas.centerOn(x, y)
+    canvas.viewport_items.refresh()
+
+
+def test_only_visible_shapes_get_items(monkeypatch):
+    canvas = _canvas(monkeypatch)
+    items = canvas.viewport_items
+
+    assert 0 < len(items) < 20
+    assert len(canvas.scene.items()) == len(items) + len(canvas.layers)
+    assert _layered(canvas) == GRID * GRID - len(items)
+
+    first = {id(item) for item in items.items.values()}
+    _scroll(canvas, GRID * STEP / 2, GRID * STEP / 2)
+
+    # Объекты ушедших фигур переиспользованы для новых или ждут в пуле, а не удалены
+    current = {id(item) for item in items.items.values()}
+    pooled = {id(item) for free in items.pool.values() for item in free}
+    assert first & current
+    assert first <= current | pooled
+    rect = canvas.mapToScene(canvas.viewport().rect()).boundingRect()
+    for (kind, row), item in items.items.items():
+        assert item.ref == (kind, row)
+        assert item.sceneBoundingRect().intersects(rect.adjusted(-300, -300, 300, 300))
+    assert _layered(canvas) == GRID * GRID - len(items)
+
+    # При сильном отдалении объектов нет, все рисуют слои
+    canvas.scale(0.1, 0.1)
+    canvas.viewport_items.refresh()
+    assert len(items) == 0
+    assert _layered(canvas) == GRID * GRID
+
+
+def test_selected_and_edited_items_are_kept(monkeypatch):
+    canvas = _canvas(monkeypatch)
+    items = list(canvas.viewport_items.items.values())
+    selected, moved = items[0], items[1]
+
+    selected.setSelected(True)
+    canvas.undo_stack.push(MoveCommand(moved, moved.pos(), moved.pos() + QPointF(5, 5)))
+
+    _scroll(canvas, GRID * STEP / 2, GRID * STEP / 2)
+    assert selected.scene() is canvas.scene and moved.scene() is canvas.scene
+    assert canvas.viewport_items.items[moved.ref] is moved
+
+    canvas.undo_stack.undo()
+    assert canvas.document.tables["rect"].pos_x[moved.row] == 0
+
+    selected.setSelected(False)
+    canvas.undo_stack.clear()
+    canvas.viewport_items.refresh()
+    assert selected.scene() is None and moved.scene() is None
+
+
+def test_save_reads_the_document(monkeypatch, tmp_path):
+    canvas = _canvas(monkeypatch)
+    _scroll(canvas, GRID * STEP / 3, GRID * STEP / 4)
+
+    filename = str(tmp_path / "scene.json")
+    JsonSaveStrategy().save(filename, canvas.scene)
+
+    document, _, errors = FileManager.load_document(filename)
+    assert errors == 0
+    assert len(document) == GRID * GRID
+    assert document.to_dicts() == canvas.document.to_dicts()
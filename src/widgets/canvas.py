@@ -1,43 +1,121 @@
-from PySide6.QtWidgets import QGraphicsView, QGraphicsScene
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QPainter, QUndoStack
+import time
+
+from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QStyle, QStyleOptionGraphicsItem
+from PySide6.QtCore import Qt, QTimer, QRect, QRectF, QPointF
+from PySide6.QtGui import QPainter, QPainterPath, QColor, QPixmap, QTransform
 
 from src.constants import (
-    DEFAULT_SCENE_WIDTH, DEFAULT_SCENE_HEIGHT, UNDO_STACK_LIMIT,
-    TYPE_SELECT, TYPE_RECT, TYPE_LINE, TYPE_ELLIPSE, DEFAULT_COLOR
+    DEFAULT_SCENE_WIDTH, DEFAULT_SCENE_HEIGHT,
+    TYPE_SELECT, TYPE_RECT, TYPE_LINE, TYPE_ELLIPSE, TYPE_POLYLINE, TYPE_GROUP, DEFAULT_COLOR,
+    BULK_LAYER_THRESHOLD, LAYER_CHUNK_SIZE, HIT_TOLERANCE, PROFILE_OVERLAY_REFRESH_S
 )
 from src.logic.Group import Group
-from src.logic.commands import DeleteCommand
+from src.logic.commands import (
+    BulkDeleteCommand, BulkTransformCommand, GroupCommand, UngroupCommand, shape_leaves
+)
+from src.logic.document import ShapeDocument
 from src.logic.factory import ShapeFactory
-from src.logic.tools import SelectionTool, CreationTool
+from src.logic.history import UndoBudgetStack
+from src.logic.item_cache import ItemCache
+from src.logic.layers import BulkLayer, hit_test
+from src.logic.lod import LOD
+from src.logic.profiling import PROFILER, profiled
+from src.logic.selection import SelectionSummary
+from src.logic.spatial import GridIndex, document_entries
+from src.logic.tools import SelectionTool, CreationTool, FreehandTool
+from src.logic.transforms import ShapeCoords
+from src.logic.viewport import ViewportItems
+
+
+def _paint_tree(painter, item, base, state):
+    """Рисует объект и его детей, как их нарисовала бы сцена; base - переход от сцены к устройству"""
+    option = QStyleOptionGraphicsItem()
+    option.state = state
+    option.exposedRect = item.boundingRect()
+
+    painter.setTransform(item.sceneTransform() * base)
+    item.paint(painter, option, None)
+
+    for child in item.childItems():
+        _paint_tree(painter, child, base, QStyle.StateFlag.State_None)
+
+
+class EditorScene(QGraphicsScene):
+    """
+    Сцена, которая знает свой документ (источник данных о фигурах),
+    пространственный индекс его примитивов, политику кэша растра своих фигур
+    и сводку по выделению.
+    """
+
+    def __init__(self, document, parent=None, index=None):
+        super().__init__(parent)
+        self.document = document
+        self.index = index
+        self.item_cache = ItemCache(self)
+        self.selection = SelectionSummary(self)
 
 
 class EditorCanvas(QGraphicsView):
     def __init__(self):
         super().__init__()
-        self.scene = QGraphicsScene(self)
+        self.document = ShapeDocument()
+        self.scene = EditorScene(self.document, self, GridIndex())
         self.setMouseTracking(True)
 
-        self.undo_stack = QUndoStack(self)
-        self.undo_stack.setUndoLimit(UNDO_STACK_LIMIT)
+        # Поиск фигур идет по собственному индексу документа, BSP-дерево Qt не нужно:
+        # его пришлось бы перестраивать после каждой загрузки и при каждом перетаскивании
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+
+        # История ограничена памятью команд (UNDO_MEMORY_BUDGET), а не их числом
+        self.undo_stack = UndoBudgetStack(self)
 
         self.setScene(self.scene)
         self.scene.setSceneRect(0, 0, DEFAULT_SCENE_WIDTH, DEFAULT_SCENE_HEIGHT)
 
         self.setRenderHint(self.renderHints() | QPainter.RenderHint.Antialiasing)
         self.setAlignment(Qt.AlignCenter)
+        self.setDragMode(QGraphicsView.DragMode.RubberBandDrag)
 
         self.tools = {
             TYPE_SELECT: SelectionTool(self, self.undo_stack),
             TYPE_RECT: CreationTool(self, TYPE_RECT, self.undo_stack),
             TYPE_LINE: CreationTool(self, TYPE_LINE, self.undo_stack),
-            TYPE_ELLIPSE: CreationTool(self, TYPE_ELLIPSE, self.undo_stack)
+            TYPE_ELLIPSE: CreationTool(self, TYPE_ELLIPSE, self.undo_stack),
+            TYPE_POLYLINE: FreehandTool(self, self.undo_stack)
         }
         self.active_tool = self.tools[TYPE_SELECT]
         self.active_color = DEFAULT_COLOR
 
+        # Слои пакетной отрисовки по ячейкам сцены: (cx, cy) -> BulkLayer
+        self.layers = {}
+        # Отдельные Qt-объекты у видимых фигур больших документов (включается вместе со слоями)
+        self.viewport_items = ViewportItems(self)
+
         self.start_point = None
 
+        # Фигура, которую сейчас рисуют: оверлей поверх сцены (см. CreationTool)
+        self.preview = None
+        self._preview_rect = QRect()
+
+        # Растр перетаскиваемого выделения, его место в сцене и сдвиг (см. SelectionTool)
+        self._drag_items = []
+        self._drag_pixmap = None
+        self._drag_bounds = QRectF()
+        self._drag_offset = QPointF()
+        self._drag_rect = QRect()
+
+        # Оверлей профилировщика: FPS, время отрисовки, число объектов
+        self.show_profile_overlay = False
+        self._last_paint = 0.0
+        self._overlay_counts = ""
+        self._overlay_counted_at = 0.0
+        self._overlay_rect = QRect()
+
+        # Сцена может долго не перерисовываться: оверлей обновляется сам
+        self._overlay_timer = QTimer(self)
+        self._overlay_timer.setInterval(int(PROFILE_OVERLAY_REFRESH_S * 1000))
+        self._overlay_timer.timeout.connect(lambda: self.viewport().update(self._overlay_rect))
+
     def set_tool(self, tool_name):
         if tool_name in self.tools:
             self.active_tool = self.tools[tool_name]
@@ -47,50 +125,349 @@ class EditorCanvas(QGraphicsView):
             else:
                 self.setCursor(Qt.CrossCursor)
 
+    def set_document(self, document, index=None):
+        """
+        Заменяет документ и строит по нему Qt-объекты.
+        :param index: SpatialIndex, уже заполненный по document (загрузчик строит его по порциям)
+        """
+        self.begin_document(document)
+        if index is not None:
+            self.scene.index = index
+
+        # Большие документы рисуются слоями, отдельные объекты - только у групп
+        children = document.children_map()
+        self.show_refs(document.roots(children), children, len(document) >= BULK_LAYER_THRESHOLD,
+                       indexed=index is not None)
+
+    def begin_document(self, document):
+        """Очищает сцену и подключает новый документ"""
+        self.scene.clear()
+        self.undo_stack.clear()
+
+        self.document = document
+        self.scene.document = document
+        self.scene.index.clear()
+        self.scene.item_cache.reset()
+        self.scene.selection.reset()
+        self.layers = {}
+        self.viewport_items.reset()
+
+    def set_spatial_index(self, index):
+        """Подключает другую реализацию SpatialIndex и заполняет ее по документу"""
+        index.clear()
+        index.insert_many(document_entries(self.document))
+        self.scene.index = index
+
+    def show_refs(self, refs, children=None, use_layers=False, indexed=False):
+        """
+        Создает представление для корневых строк документа.
+        :param children: карта детей групп (document.children_map() или ее часть)
+        :param use_layers: примитивы уходят в слои пакетной отрисовки, а не в отдельные объекты
+        :param indexed: строки уже есть в индексе сцены
+        """
+        pending = {}
+        items = []
+
+        for ref in refs:
+            if use_layers and ref[0] != TYPE_GROUP:
+                pending.setdefault(self.layer_key(ref), []).append(ref)
+            else:
+                item = ShapeFactory.from_document(self.document, ref, children)
+                self.scene.addItem(item)
+                items.append(item)
+
+        self.scene.item_cache.track(items)
+
+        for key, layer_refs in pending.items():
+            self.layer(key).add_many(layer_refs)
+
+        if not indexed:
+            self.scene.index.insert_many(document_entries(self.document, refs, children))
+
+        if use_layers:
+            self.viewport_items.enabled = True
+            self.viewport_items.schedule()
+
+    def layer_key(self, ref):
+        kind, row = ref
+        x0, y0, _, _ = self.document.tables[kind].bounds(row)
+        return int(x0 // LAYER_CHUNK_SIZE), int(y0 // LAYER_CHUNK_SIZE)
+
+    def layer(self, key):
+        layer = self.layers.get(key)
+        if layer is None:
+            layer = self.layers[key] = BulkLayer(self.document)
+            self.scene.addItem(layer)
+        return layer
+
+    def in_layer(self, ref) -> bool:
+        layer = self.layers.get(self.layer_key(ref))
+        return layer is not None and ref[1] in layer.rows[ref[0]]
+
+    def promote(self, ref):
+        """Достает фигуру из слоя и делает ее отдельным Qt-объектом (для редактирования)"""
+        return self.viewport_items.materialize([ref])[0]
+
+    def pick(self, scene_pos, tolerance=HIT_TOLERANCE):
+        """Верхний (по z) примитив документа под точкой или None"""
+        x, y = scene_pos.x(), scene_pos.y()
+        best = None
+        best_z = -1
+
+        for ref in self.scene.index.query_point(x, y, tolerance):
+            kind, row = ref
+            table = self.document.tables[kind]
+            if table.z[row] <= best_z:
+                continue
+
+            dx, dy = self.document.offset(table.parent[row])
+            if hit_test(table, row, x - dx, y - dy, tolerance):
+                best, best_z = ref, table.z[row]
+
+        return best
+
+    def promote_at(self, scene_pos):
+        """Продвигает верхнюю фигуру под точкой, если она в слое; возвращает объект или None"""
+        ref = self.pick(scene_pos)
+        if ref is None or not self.in_layer(ref):
+            return None
+        return self.promote(ref)
+
+    def visible_refs(self, margin=0.0) -> list:
+        """Примитивы, чьи габариты попадают в видимую область (плюс margin единиц сцены)"""
+        rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        return self.scene.index.query_rect(
+            rect.left() - margin, rect.top() - margin, rect.right() + margin, rect.bottom() + margin
+        )
+
+    def select_rect(self, rect):
+        """
+        Выделение рамкой: фигуры из слоев, задевающие rect, сначала продвигаются
+        в отдельные объекты, затем выделение делает Qt по точной форме.
+        """
+        for ref in self.scene.index.query_rect(rect.left(), rect.top(), rect.right(), rect.bottom()):
+            if self.in_layer(ref):
+                self.promote(ref)
+
+        path = QPainterPath()
+        path.addRect(rect)
+        self.scene.setSelectionArea(path, Qt.ItemSelectionOperation.ReplaceSelection,
+                                    Qt.ItemSelectionMode.IntersectsItemShape, self.viewportTransform())
+
+    def set_lod_thresholds(self, **thresholds):
+        """
+        Меняет пороги level-of-detail (поля LodSettings: enabled, skip_size, point_size,
+        ellipse_rect_size, density_shapes_per_pixel, density_layer_size) и перерисовывает холст.
+        """
+        LOD.configure(**thresholds)
+
+        for layer in self.layers.values():
+            layer.invalidate_lod()
+        self.viewport().update()
+
+    def show_preview(self, item):
+        """Рисует item поверх сцены, не добавляя его в нее (ни в индекс, ни в кэш растра)"""
+        self.preview = item
+        self._preview_rect = QRect()
+        self.update_preview()
+
+    def update_preview(self):
+        """Перерисовывает область предпросмотра: прежнее положение и новое"""
+        rect = QRect()
+        if self.preview is not None:
+            # Запас на сглаживание края пера
+            rect = self.mapFromScene(self.preview.sceneBoundingRect()).boundingRect().adjusted(-2, -2, 2, 2)
+
+        self.viewport().update(self._preview_rect.united(rect))
+        self._preview_rect = rect
+
+    def clear_preview(self):
+        self.preview = None
+        self.update_preview()
+
+    def begin_drag(self, items):
+        """
+        Перетаскивание: items один раз рисуются в растр и скрываются (прозрачность 0,
+        выделение остается), дальше move_drag только сдвигает растр - кадр стоит одного
+        drawPixmap при любом размере выделения. Сами объекты, документ и индекс
+        до end_drag не меняются. Растр покрывает вид и по его размеру с каждой стороны:
+        то, что было дальше, до отпускания не показывается.
+        """
+        self._drag_items = sorted(items, key=lambda item: item.table.z[item.row])
+
+        bounds = QRectF()
+        for item in self._drag_items:
+            bounds = bounds.united(item.sceneBoundingRect())
+
+        view = self.viewport().rect()
+        reach = view.adjusted(-view.width(), -view.height(), view.width(), view.height())
+        # Запас на сглаживание края пера и рамку выделения
+        rect = self.mapFromScene(bounds).boundingRect().adjusted(-2, -2, 2, 2).intersected(reach)
+
+        ratio = self.viewport().devicePixelRatioF()
+        pixmap = QPixmap(rect.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHints(self.renderHints())
+        base = self.viewportTransform() * QTransform.fromTranslate(-rect.x(), -rect.y())
+        for item in self._drag_items:
+            _paint_tree(painter, item, base, QStyle.StateFlag.State_Selected)
+        painter.end()
+
+        for item in self._drag_items:
+            item.setOpacity(0.0)
+
+        self._drag_pixmap = pixmap
+        self._drag_bounds = self.mapToScene(rect).boundingRect()
+        self._drag_rect = QRect()
+        self.move_drag(QPointF())
+
+    def move_drag(self, offset):
+        self._drag_offset = offset
+        rect = self.mapFromScene(self._drag_bounds.translated(offset)).boundingRect().adjusted(-1, -1, 1, 1)
+        self.viewport().update(self._drag_rect.united(rect))
+        self._drag_rect = rect
+
+    def end_drag(self):
+        """Возвращает объекты на место растра (их позиции меняет уже команда перемещения)"""
+        for item in self._drag_items:
+            item.setOpacity(1.0)
+
+        self._drag_items = []
+        self._drag_pixmap = None
+        self.viewport().update(self._drag_rect)
+        self._drag_rect = QRect()
+
+    def drawForeground(self, painter, rect):
+        if self._drag_pixmap is not None:
+            pixmap = self._drag_pixmap
+            painter.drawPixmap(self._drag_bounds.translated(self._drag_offset), pixmap,
+                               QRectF(pixmap.rect()))
+
+        preview = self.preview
+        if preview is None:
+            return
+
+        painter.save()
+        painter.translate(preview.pos())
+        painter.setPen(preview.pen())
+        painter.setBrush(preview.brush())
+        preview.draw_outline(painter)
+        painter.restore()
+
+    def set_profiling(self, enabled: bool):
+        """Включает замеры горячих путей (PROFILER) и оверлей с их сводкой"""
+        PROFILER.set_enabled(enabled)
+        self.show_profile_overlay = enabled
+
+        if enabled:
+            self._overlay_timer.start()
+        else:
+            self._overlay_timer.stop()
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        self.viewport_items.check()
+
+        if not PROFILER.enabled:
+            super().paintEvent(event)
+            return
+
+        start = time.perf_counter()
+        super().paintEvent(event)
+        self._last_paint = time.perf_counter() - start
+
+        PROFILER.record("paint", self._last_paint)
+        PROFILER.frame()
+
+        if self.show_profile_overlay:
+            self._draw_profile_overlay()
+
+    def _draw_profile_overlay(self):
+        now = time.perf_counter()
+        # Подсчет объектов сцены - O(n), поэтому не на каждый кадр
+        if now - self._overlay_counted_at > PROFILE_OVERLAY_REFRESH_S:
+            self._overlay_counted_at = now
+            self._overlay_counts = (
+                f"items {len(self.scene.items())}  shapes {len(self.document)}  "
+                f"layers {len(self.layers)}  selected {len(self.scene.selectedItems())}"
+            )
+
+        paint = PROFILER.histograms["paint"]
+        lines = [
+            f"FPS {PROFILER.fps():.0f}  paint {self._last_paint * 1000:.1f} ms  "
+            f"p95 {paint.percentile(0.95) * 1000:.1f} ms",
+            self._overlay_counts,
+        ]
+
+        painter = QPainter(self.viewport())
+        metrics = painter.fontMetrics()
+        width = max(metrics.horizontalAdvance(line) for line in lines) + 12
+        height = metrics.height() * len(lines) + 8
+
+        self._overlay_rect = QRect(4, 4, width, height)
+        painter.fillRect(self._overlay_rect, QColor(0, 0, 0, 160))
+        painter.setPen(QColor(255, 255, 255))
+        for i, line in enumerate(lines):
+            painter.drawText(10, 8 + metrics.ascent() + i * metrics.height(), line)
+        painter.end()
+
+    @profiled("tool.press")
     def mousePressEvent(self, event):
         self.active_tool.mouse_press(event)
 
+    @profiled("tool.move")
     def mouseMoveEvent(self, event):
         self.active_tool.mouse_move(event)
 
+    @profiled("tool.release")
     def mouseReleaseEvent(self, event):
         self.active_tool.mouse_release(event)
 
     def group_selection(self):
-        """Создает группу из выделенных элементов"""
-        selected_items = self.scene.selectedItems()
+        """Создает группу из выделенных элементов (одной командой отмены)"""
+        # Выделение группы в Qt выделяет и ее детей: группируем только верхние объекты,
+        # иначе дети ушли бы из своей группы в новую, а старая осталась бы пустой
+        roots = [item for item in self.scene.selectedItems() if item.topLevelItem() is item]
 
-        if not selected_items:
+        if not roots:
             return
 
-        group = Group()
-
-        self.scene.addItem(group)
-
-        for item in selected_items:
-            item.setSelected(False)
-
-            group.addToGroup(item)
-
-        group.setSelected(True)
+        self.undo_stack.push(GroupCommand(self.scene, roots))
 
     def ungroup_selection(self):
         """Разбивает выделенные группы на отдельные элементы"""
-        selected_items = self.scene.selectedItems()
+        # Выделение группы в Qt выделяет и ее детей; вложенные группы разбивать не нужно
+        groups = [
+            item for item in self.scene.selectedItems()
+            if isinstance(item, Group) and item.topLevelItem() is item
+        ]
 
-        for item in selected_items:
-            if isinstance(item, Group):
-                self.scene.destroyGroup(item)
+        if not groups:
+            return
 
-    def delete_selected(self):
-        selected = self.scene.selectedItems()
-        if not selected:
+        self.undo_stack.push(UngroupCommand(self.scene, groups))
+
+    def transform_selection(self, text, operation, *args):
+        """
+        Преобразует выделение одной командой отмены.
+        :param operation: функция из src.logic.transforms (translate, scale, rotate, align, distribute)
+        :param args: ее параметры после координат
+        """
+        # Выделение группы в Qt выделяет и ее детей: берем верхние объекты и их примитивы
+        roots = [item for item in self.scene.selectedItems() if item.topLevelItem() is item]
+        coords = ShapeCoords(self.scene, shape_leaves(roots))
+        if not len(coords):
             return
 
-        self.undo_stack.beginMacro("Delete Selection")
+        self.undo_stack.push(BulkTransformCommand(self.scene, coords, operation(coords, *args), text))
 
-        for item in selected:
-            cmd = DeleteCommand(self.scene, item)
-            self.undo_stack.push(cmd)
+    def delete_selected(self):
+        # Дети удаляются вместе с группой; removeItem ребенка отдельно вынул бы его из группы
+        roots = [item for item in self.scene.selectedItems() if item.topLevelItem() is item]
+        if not roots:
+            return
 
-        self.undo_stack.endMacro()
\ No newline at end of file
+        self.undo_stack.push(BulkDeleteCommand(self.scene, roots))
\ No newline at end of file
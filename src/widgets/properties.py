@@ -1,12 +1,15 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel,
-                               QSpinBox, QPushButton, QFrame, QColorDialog, QHBoxLayout, QDoubleSpinBox)
-from PySide6.QtCore import Qt
+                               QSpinBox, QPushButton, QFrame, QHBoxLayout, QDoubleSpinBox)
+from PySide6.QtCore import Qt, QTimer, QPointF
 
 from src.constants import (
     PROPERTIES_PANEL_WIDTH, PANEL_BG_COLOR, MIN_STROKE_WIDTH, MAX_STROKE_WIDTH,
-    DEFAULT_COLOR_HEX, MIN_COORDINATE, MAX_COORDINATE
+    MIN_COORDINATE, MAX_COORDINATE, PROPERTIES_REFRESH_MS
 )
-from src.logic.commands import ChangeColorCommand, ChangeWidthCommand
+from src.logic.commands import (
+    BulkChangeColorCommand, BulkChangeWidthCommand, BulkMoveCommand, command_items, new_session
+)
+from src.logic.profiling import profiled
 
 
 class PropertiesPanel(QWidget):
@@ -17,7 +20,20 @@ class PropertiesPanel(QWidget):
 
         self._init_ui()
 
+        # Панель обновляется не чаще раза за кадр, сколько бы сигналов ни пришло за это время
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(PROPERTIES_REFRESH_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+
+        # Правка X/Y - одно действие, пока не закончен ввод и не сменилось выделение:
+        # ее шаги склеиваются в одну команду перемещения
+        self._move_session = None
+
+        self._history_index = undo_stack.index()
         self.scene.selectionChanged.connect(self.on_selection_changed)
+        self.scene.selectionChanged.connect(self._end_move_session)
+        self.undo_stack.indexChanged.connect(self._on_history_changed)
 
     def _init_ui(self):
         self.setFixedWidth(PROPERTIES_PANEL_WIDTH)
@@ -50,11 +66,13 @@ class PropertiesPanel(QWidget):
         self.spin_x.setRange(MIN_COORDINATE, MAX_COORDINATE)
         self.spin_x.setPrefix("X: ")
         self.spin_x.valueChanged.connect(self.on_geo_changed)
+        self.spin_x.editingFinished.connect(self._end_move_session)
 
         self.spin_y = QDoubleSpinBox()
         self.spin_y.setRange(MIN_COORDINATE, MAX_COORDINATE)
         self.spin_y.setPrefix("Y: ")
         self.spin_y.valueChanged.connect(self.on_geo_changed)
+        self.spin_y.editingFinished.connect(self._end_move_session)
 
         layout.addLayout(geo_layout)
 
@@ -69,129 +87,125 @@ class PropertiesPanel(QWidget):
         self.setEnabled(False)
 
     def on_selection_changed(self):
-        """Вызывается автоматически при клике по фигурам"""
-        selected_items = self.scene.selectedItems()
-
-        if not selected_items:
+        """Выделение поменялось (при выделении рамкой - на каждое движение мыши): обновим панель к кадру"""
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def _on_history_changed(self, index):
+        """Команды истории меняют свойства объектов: выделенные среди них пересчитываются в сводке"""
+        stack = self.undo_stack
+        # Последняя команда - только что выполненная или склеенная; диапазон - отмены и повторы
+        indices = set(range(min(index, self._history_index), max(index, self._history_index)))
+        indices.add(index - 1)
+        self._history_index = index
+
+        selection = self.scene.selection
+        for i in indices:
+            command = stack.command(i) if 0 <= i < stack.count() else None
+            if command is not None:
+                selection.mark(command_items(command))
+
+        if selection.pending:
+            self.on_selection_changed()
+
+    @profiled("properties.selection")
+    def refresh(self):
+        """Показывает сводку выделения (SelectionSummary), досчитав ее по накопленным изменениям"""
+        summary = self.scene.selection
+        summary.update()
+
+        first = summary.first()
+        if first is None:
             self.setEnabled(False)
             self.spin_width.setValue(MIN_STROKE_WIDTH)
             self.btn_color.setStyleSheet("background-color: transparent")
             return
 
         self.setEnabled(True)
+        type_text, width, color, (x, y) = first
 
-        item = selected_items[0]
-
-        current_width = MIN_STROKE_WIDTH
-        current_color = DEFAULT_COLOR_HEX
+        self._show_width(width, len(summary.widths) > 1)
 
-        if hasattr(item, "pen") and item.pen() is not None:
-            current_width = item.pen().width()
-            current_color = item.pen().color().name()
-
-        self.spin_width.blockSignals(True)
-        self.spin_width.setValue(current_width)
-        self.spin_width.blockSignals(False)
-
-        self.btn_color.setStyleSheet(f"background-color: {current_color}; border: 1px solid gray;")
+        self.btn_color.setStyleSheet(f"background-color: {color}; border: 1px solid gray;")
+        self.btn_color.setToolTip("Выбраны объекты разного цвета" if len(summary.colors) > 1 else "")
 
         self.spin_x.blockSignals(True)
         self.spin_y.blockSignals(True)
 
-        self.spin_x.setValue(item.pos().x())
-        self.spin_y.setValue(item.pos().y())
+        self.spin_x.setValue(x)
+        self.spin_y.setValue(y)
+        self._mark_mixed(self.spin_x, len(summary.positions) > 1, "Выбраны объекты в разных позициях")
+        self._mark_mixed(self.spin_y, len(summary.positions) > 1, "Выбраны объекты в разных позициях")
 
         self.spin_x.blockSignals(False)
         self.spin_y.blockSignals(False)
 
-        if hasattr(item, "type_name"):
-            type_text = item.type_name.capitalize()
-        else:
-            type_text = type(item).__name__
-
-        if len(selected_items) > 1:
-            type_text += f" (+{len(selected_items) - 1})"
-
+        if len(summary) > 1:
+            type_text += f" (+{len(summary) - 1})"
         self.lbl_type.setText(type_text)
-        self.update_width_ui(selected_items)
+        self.lbl_type.setToolTip(
+            ", ".join(f"{name}: {count}" for name, count in summary.types.most_common())
+            if len(summary.types) > 1 else ""
+        )
+
+    def _selected_roots(self) -> list:
+        """Выделенные объекты верхнего уровня (дети выделенной группы входят в нее)"""
+        return [item for item in self.scene.selectedItems() if item.topLevelItem() is item]
 
     def on_width_changed(self, value):
-        selected_items = self.scene.selectedItems()
-        if not selected_items:
+        # Выделение группы в Qt выделяет и ее детей: без фильтра каждая фигура группы попала бы в команду дважды
+        roots = self._selected_roots()
+        if not roots:
             return
 
-        self.undo_stack.beginMacro("Change Width All")
+        self.undo_stack.push(BulkChangeWidthCommand(roots, value))
 
-        for item in selected_items:
-            cmd = ChangeWidthCommand(item, value)
-            self.undo_stack.push(cmd)
+    def on_geo_changed(self, value):
+        """Сдвигает выделение целиком так, чтобы первый выделенный объект встал в X/Y"""
+        # Прошлая правка поля могла еще не дойти до сводки
+        summary = self.scene.selection
+        summary.update()
+        first = summary.first()
+        if first is None:
+            return
 
-        self.undo_stack.endMacro()
-        self.scene.update()
+        _, _, _, (x, y) = first
+        delta = QPointF(self.spin_x.value() - x, self.spin_y.value() - y)
+        if delta.isNull():
+            return
 
-    def on_geo_changed(self, value):
-        selected_items = self.scene.selectedItems()
-        for item in selected_items:
-            new_x = self.spin_x.value()
-            new_y = self.spin_y.value()
-            item.setPos(new_x, new_y)
+        # Выделение группы в Qt выделяет и ее детей: двигаем только верхние объекты
+        roots = self._selected_roots()
+        if self._move_session is None:
+            self._move_session = new_session()
+        self.undo_stack.push(BulkMoveCommand(self.scene, roots, delta, self._move_session))
 
-        self.scene.update()
+    def _end_move_session(self):
+        self._move_session = None
 
     def on_color_clicked(self):
+        # Диалог нужен редко - не грузим его при старте
+        from PySide6.QtWidgets import QColorDialog
         color = QColorDialog.getColor()
 
         if color.isValid():
             hex_color = color.name()
             self.btn_color.setStyleSheet(f"background-color: {hex_color};")
 
-            selected_items = self.scene.selectedItems()
-            if not selected_items:
+            roots = self._selected_roots()
+            if not roots:
                 return
 
-            self.undo_stack.beginMacro("Change Color All")
-
-            for item in selected_items:
-                cmd = ChangeColorCommand(item, hex_color)
-                self.undo_stack.push(cmd)
+            self.undo_stack.push(BulkChangeColorCommand(roots, hex_color))
 
-            self.undo_stack.endMacro()
-
-    def update_width_ui(self, selected_items):
+    def _show_width(self, width, is_mixed):
         self.spin_width.blockSignals(True)
+        self.spin_width.setValue(width)
+        self._mark_mixed(self.spin_width, is_mixed, "Выбраны объекты с разной толщиной")
+        self.spin_width.blockSignals(False)
 
-        first_width = -1
-        is_mixed = False
-
-        def get_width(item):
-            """Получить толщину объекта, учитывая Group"""
-            if hasattr(item, "pen") and item.pen() is not None:
-                return item.pen().width()
-            # Для Group пытаемся получить толщину от первого ребенка
-            if hasattr(item, "childItems"):
-                children = item.childItems()
-            if children:
-                return get_width(children[0])
-            return MIN_STROKE_WIDTH
-
-        for i, item in enumerate(selected_items):
-            w = get_width(item)
-
-            if i == 0:
-                first_width = w
-            else:
-                if w != first_width:
-                    is_mixed = True
-                    break
-
-        if first_width > 0:
-            if is_mixed:
-                self.spin_width.setValue(first_width)
-                self.spin_width.setStyleSheet("background-color: #fffacd;")
-                self.spin_width.setToolTip("Выбраны объекты с разной толщиной")
-            else:
-                self.spin_width.setValue(first_width)
-                self.spin_width.setStyleSheet("")
-                self.spin_width.setToolTip("")
-
-        self.spin_width.blockSignals(False)
\ No newline at end of file
+    @staticmethod
+    def _mark_mixed(widget, is_mixed, tooltip):
+        """У выделенных объектов разные значения: поле показывает значение первого и подсвечено"""
+        widget.setStyleSheet("background-color: #fffacd;" if is_mixed else "")
+        widget.setToolTip(tooltip if is_mixed else "")